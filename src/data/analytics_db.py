@@ -0,0 +1,346 @@
+"""
+Eingebettete Analyse-Datenbank (SQLite) über F1, F2 und F3.
+
+ingest() lädt einmal:
+- die Kaggle-F1-Tabellen (f1_races, f1_results, ...) mit Primärschlüsseln
+- die F2-Sessiondateien (Feature, Sprint, Sprint 2, Training, Qualifying)
+  als f2_sessions
+- die F3-Rennfeatures als f3_results
+und baut daraus results_all (eine Zeile pro Fahrer und Rennen, alle Serien)
+plus materialisierte Aggregate (mv_driver_season, mv_team_season_type).
+Indizes liegen auf IDs, Saison, Fahrer und Team.
+
+query() gibt DataFrames zurück; benchmark() vergleicht typische Fragen mit
+den entsprechenden pandas-Scans (CSV neu laden bzw. schon im Speicher).
+
+Aufruf vom Projektroot:
+    python -m src.data.analytics_db --ingest
+    python -m src.data.analytics_db --sql "SELECT * FROM mv_team_season_type LIMIT 5"
+    python -m src.data.analytics_db --benchmark
+"""
+
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.load_f1_kaggle import DATA_DIR as F1_RAW_DIR
+from src.data.standings import award_points
+from src.f3.parse_times import to_seconds
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+DB_PATH = BASE_DIR / "data" / "store" / "analytics.sqlite"
+F2_DIR = BASE_DIR / "data" / "f2"
+F3_INPUT = BASE_DIR / "data" / "f3" / "f3_2019_2025_races_features.csv"
+
+# Kaggle-Tabelle -> Primärschlüssel
+F1_TABLES = {
+    "circuits": ["circuitId"],
+    "constructors": ["constructorId"],
+    "drivers": ["driverId"],
+    "seasons": ["year"],
+    "status": ["statusId"],
+    "races": ["raceId"],
+    "results": ["resultId"],
+    "sprint_results": ["resultId"],
+    "qualifying": ["qualifyId"],
+    "driver_standings": ["driverStandingsId"],
+    "constructor_standings": ["constructorStandingsId"],
+    "constructor_results": ["constructorResultsId"],
+    "pit_stops": ["raceId", "driverId", "stop"],
+}
+
+# F2-Datei -> Session
+F2_SESSIONS = {
+    "Feature-Race.csv": "feature",
+    "Sprint-Race.csv": "sprint",
+    "Sprint-Race-2.csv": "sprint2",
+    "Free-Practice.csv": "practice",
+    "Qualifying-Session.csv": "qualifying",
+}
+
+INDEXES = [
+    ("f1_races", ["year", "round"]),
+    ("f1_results", ["raceId"]),
+    ("f1_results", ["driverId"]),
+    ("f1_results", ["constructorId"]),
+    ("f1_sprint_results", ["raceId"]),
+    ("f1_qualifying", ["raceId", "driverId"]),
+    ("f1_driver_standings", ["raceId", "driverId"]),
+    ("f1_constructor_standings", ["raceId", "constructorId"]),
+    ("f2_sessions", ["season", "round"]),
+    ("f2_sessions", ["driver"]),
+    ("f2_sessions", ["team"]),
+    ("f3_results", ["season", "session_round"]),
+    ("f3_results", ["driver_name"]),
+    ("f3_results", ["team_name"]),
+    ("results_all", ["series", "season", "round"]),
+    ("results_all", ["driver"]),
+    ("results_all", ["team"]),
+    ("results_all", ["race_type", "season"]),
+    ("mv_driver_season", ["series", "season"]),
+    ("mv_driver_season", ["driver"]),
+    ("mv_team_season_type", ["team", "race_type", "season"]),
+]
+
+RESULT_COLS = ["series", "season", "round", "race_type", "event", "driver", "team",
+               "position", "finished", "points"]
+
+MATERIALIZED = {
+    "mv_driver_season": """
+        SELECT series, season, driver, MAX(team) AS team,
+               COUNT(*) AS starts, SUM(finished) AS finishes,
+               AVG(position) AS avg_position, MIN(position) AS best_position,
+               SUM(position = 1) AS wins, SUM(position <= 3) AS podiums,
+               SUM(points) AS points
+        FROM results_all GROUP BY series, season, driver
+    """,
+    "mv_team_season_type": """
+        SELECT series, season, team, race_type,
+               COUNT(*) AS starts, COUNT(position) AS classified, COUNT(DISTINCT driver) AS drivers,
+               AVG(position) AS avg_position, SUM(position = 1) AS wins,
+               SUM(position <= 3) AS podiums, SUM(points) AS points,
+               1.0 - AVG(finished) AS dnf_rate
+        FROM results_all GROUP BY series, season, team, race_type
+    """,
+}
+
+
+# =========================================================
+# 1. Laden
+# =========================================================
+
+def load_f1_tables() -> dict:
+    tables = {}
+    for name in F1_TABLES:
+        path = F1_RAW_DIR / f"{name}.csv"
+        if path.exists():
+            tables[name] = pd.read_csv(path, na_values=["\\N"], low_memory=False)
+    return tables
+
+
+def load_f2_sessions() -> pd.DataFrame:
+    frames = []
+    for filename, session in F2_SESSIONS.items():
+        raw = pd.read_csv(F2_DIR / filename)
+        frames.append(pd.DataFrame({
+            "season": raw["DATE"].str[:4].astype(int),
+            "round": raw["ROUND"].str.extract(r"(\d+)", expand=False).astype(int),
+            "session": session,
+            "circuit": raw["CIRCUIT"],
+            "date": raw["DATE"],
+            "driver": raw["PILOT NAME"],
+            "team": raw["TEAM"],
+            "car": raw["CAR"],
+            "position": pd.to_numeric(raw["POS"], errors="coerce"),
+            "laps": pd.to_numeric(raw["LAPS"], errors="coerce"),
+            "kph": pd.to_numeric(raw["KPH"], errors="coerce"),
+            "time_s": to_seconds(raw["TIME"]),
+            "best_lap_s": to_seconds(raw["BEST"]) if "BEST" in raw else np.nan,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def results_all(f1: dict, f2: pd.DataFrame, f3: pd.DataFrame) -> pd.DataFrame:
+    """Eine Zeile pro Fahrer und Rennen über alle Serien (ohne Training/Qualifying)."""
+    races = f1["races"][["raceId", "year", "round", "name"]]
+    drivers = f1["drivers"].assign(driver=lambda d: d["forename"] + " " + d["surname"])[["driverId", "driver"]]
+    teams = f1["constructors"][["constructorId", "name"]].rename(columns={"name": "team"})
+    f1_frames = []
+    for table, race_type in (("results", "feature"), ("sprint_results", "sprint")):
+        res = (
+            f1[table].merge(races, on="raceId").merge(drivers, on="driverId").merge(teams, on="constructorId")
+        )
+        f1_frames.append(pd.DataFrame({
+            "series": "f1", "season": res["year"], "round": res["round"], "race_type": race_type,
+            "event": res["name"], "driver": res["driver"], "team": res["team"],
+            "position": res["position"], "finished": res["position"].notna().astype(int),
+            "points": res["points"],
+        }))
+
+    f2_races = f2[f2["session"].isin(["feature", "sprint", "sprint2"])]
+    f2_out = pd.DataFrame({
+        "series": "f2", "season": f2_races["season"], "round": f2_races["round"],
+        "race_type": f2_races["session"], "event": f2_races["circuit"],
+        "driver": f2_races["driver"], "team": f2_races["team"],
+        "position": f2_races["position"], "finished": f2_races["position"].notna().astype(int),
+    })
+    f2_out["points"] = award_points(
+        f2_out.assign(race_type=f2_out["race_type"].replace("sprint2", "sprint")), "f2")
+
+    pos = pd.to_numeric(f3["position"], errors="coerce").where(f3["finished"] == 1)
+    f3_out = pd.DataFrame({
+        "series": "f3", "season": f3["season"], "round": f3["session_round"], "race_type": "feature",
+        "event": f3["race_id"].astype(str), "driver": f3["driver_name"], "team": f3["team_name"],
+        "position": pos, "finished": f3["finished"].astype(int),
+    })
+    f3_out["points"] = award_points(f3_out, "f3")
+
+    return pd.concat(f1_frames + [f2_out, f3_out], ignore_index=True)[RESULT_COLS]
+
+
+# =========================================================
+# 2. Ingest
+# =========================================================
+
+def _write_table(con, name, df, keys=None):
+    con.execute(f'DROP TABLE IF EXISTS "{name}"')
+    con.execute(pd.io.sql.get_schema(df, name, keys=keys, con=con))
+    df.to_sql(name, con, if_exists="append", index=False, chunksize=10_000)
+
+
+def ingest(db_path=DB_PATH) -> pd.DataFrame:
+    """Baut die komplette Datenbank neu auf und gibt Zeilen/Dauer pro Tabelle zurück."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    report = []
+
+    f1 = load_f1_tables()
+    f2 = load_f2_sessions()
+    f3 = pd.read_csv(F3_INPUT)
+
+    with sqlite3.connect(db_path) as con:
+        con.execute("PRAGMA journal_mode=WAL")
+        tables = {f"f1_{name}": (df, F1_TABLES[name]) for name, df in f1.items()}
+        tables["f2_sessions"] = (f2, None)
+        tables["f3_results"] = (f3, None)
+        tables["results_all"] = (results_all(f1, f2, f3), None)
+
+        for name, (df, keys) in tables.items():
+            start = time.perf_counter()
+            _write_table(con, name, df, keys)
+            report.append({"table": name, "rows": len(df), "seconds": time.perf_counter() - start})
+
+        for name, select in MATERIALIZED.items():
+            start = time.perf_counter()
+            con.execute(f"DROP TABLE IF EXISTS {name}")
+            con.execute(f"CREATE TABLE {name} AS {select}")
+            rows = con.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+            report.append({"table": name, "rows": rows, "seconds": time.perf_counter() - start})
+
+        for table, cols in INDEXES:
+            con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{'_'.join(cols)} ON {table} ({', '.join(cols)})")
+        con.execute("ANALYZE")
+    return pd.DataFrame(report)
+
+
+def query(sql: str, params=None, db_path=DB_PATH) -> pd.DataFrame:
+    """SQL-Abfrage gegen die Analyse-Datenbank als DataFrame."""
+    if not Path(db_path).exists():
+        raise FileNotFoundError(f"Datenbank fehlt: {db_path} (zuerst: python -m src.data.analytics_db --ingest)")
+    with sqlite3.connect(db_path) as con:
+        return pd.read_sql(sql, con, params=params)
+
+
+def team_avg_position(team_pattern: str, race_type: str, season_from: int, season_to: int,
+                      db_path=DB_PATH) -> pd.DataFrame:
+    """Beispiel: mittlere Zielposition eines Teams in einem Renntyp über Saisons."""
+    return query(
+        "SELECT series, SUM(avg_position * classified) / SUM(classified) AS avg_position, SUM(starts) AS starts "
+        "FROM mv_team_season_type WHERE team LIKE ? AND race_type = ? AND season BETWEEN ? AND ? "
+        "GROUP BY series",
+        (team_pattern, race_type, season_from, season_to), db_path,
+    )
+
+
+# =========================================================
+# 3. Benchmark gegen pandas
+# =========================================================
+
+def _pandas_inputs():
+    f1 = load_f1_tables()
+    f2 = load_f2_sessions()
+    f3 = pd.read_csv(F3_INPUT)
+    return {"f1": f1, "all": results_all(f1, f2, f3)}
+
+
+BENCHMARK_QUERIES = {
+    "PREMA Sprint 2021-2023 (mv)": (
+        "SELECT SUM(avg_position * classified) / SUM(classified) AS avg_position FROM mv_team_season_type "
+        "WHERE team LIKE 'prema%' AND race_type = 'sprint' AND season BETWEEN 2021 AND 2023",
+        lambda d: d["all"].loc[
+            d["all"]["team"].str.lower().str.startswith("prema")
+            & (d["all"]["race_type"] == "sprint") & d["all"]["season"].between(2021, 2023), "position"
+        ].mean(),
+    ),
+    "PREMA Sprint 2021-2023 (roh)": (
+        "SELECT AVG(position) FROM results_all "
+        "WHERE team LIKE 'prema%' AND race_type = 'sprint' AND season BETWEEN 2021 AND 2023",
+        lambda d: d["all"].loc[
+            d["all"]["team"].str.lower().str.startswith("prema")
+            & (d["all"]["race_type"] == "sprint") & d["all"]["season"].between(2021, 2023), "position"
+        ].mean(),
+    ),
+    "F1 Siege pro Fahrer (Top 10)": (
+        "SELECT driver, SUM(wins) AS wins FROM mv_driver_season WHERE series = 'f1' "
+        "GROUP BY driver ORDER BY wins DESC LIMIT 10",
+        lambda d: d["all"][(d["all"]["series"] == "f1") & (d["all"]["position"] == 1)]
+        .groupby("driver").size().nlargest(10),
+    ),
+    "F1 Konstrukteurspunkte 2021 (Join)": (
+        "SELECT c.name, SUM(r.points) AS points FROM f1_results r "
+        "JOIN f1_races ra ON ra.raceId = r.raceId JOIN f1_constructors c ON c.constructorId = r.constructorId "
+        "WHERE ra.year = 2021 GROUP BY c.name ORDER BY points DESC",
+        lambda d: d["f1"]["results"].merge(d["f1"]["races"].loc[d["f1"]["races"]["year"] == 2021, ["raceId"]], on="raceId")
+        .merge(d["f1"]["constructors"], on="constructorId").groupby("name")["points"].sum()
+        .sort_values(ascending=False),
+    ),
+    "Alle Rennen eines Fahrers": (
+        "SELECT * FROM results_all WHERE driver = 'Oscar Piastri' OR driver = 'O. Piastri'",
+        lambda d: d["all"][d["all"]["driver"].isin(["Oscar Piastri", "O. Piastri"])],
+    ),
+}
+
+
+def benchmark(db_path=DB_PATH, repeat: int = 5):
+    ingest_start = time.perf_counter()
+    ingest(db_path)
+    print(f"Ingest: {time.perf_counter() - ingest_start:.2f} s")
+
+    start = time.perf_counter()
+    data = _pandas_inputs()
+    load_s = time.perf_counter() - start
+
+    rows = []
+    for name, (sql, pandas_fn) in BENCHMARK_QUERIES.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            query(sql, db_path=db_path)
+        sql_ms = (time.perf_counter() - start) / repeat * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            pandas_fn(data)
+        mem_ms = (time.perf_counter() - start) / repeat * 1000
+
+        rows.append({"query": name, "sqlite_ms": sql_ms, "pandas_memory_ms": mem_ms,
+                     "pandas_with_csv_ms": mem_ms + load_s * 1000})
+
+    report = pd.DataFrame(rows)
+    print(f"CSV laden + results_all bauen (pandas): {load_s * 1000:.0f} ms")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse-Datenbank über alle Serien.")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--ingest", action="store_true")
+    parser.add_argument("--sql", help="SQL-Abfrage ausführen und ausgeben")
+    parser.add_argument("--benchmark", action="store_true")
+    args = parser.parse_args()
+
+    if args.ingest:
+        print(ingest(args.db).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    if args.sql:
+        print(query(args.sql, db_path=args.db).to_string(index=False))
+    if args.benchmark:
+        benchmark(args.db)
+
+
+if __name__ == "__main__":
+    main()
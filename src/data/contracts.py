@@ -0,0 +1,370 @@
+"""
+Datenverträge (Contracts) für die Übergänge zwischen den Pipeline-Stufen.
+
+Jeder Datensatz hat einen deklarativen Vertrag in CONTRACTS:
+- columns:   Pflichtspalten mit erwartetem Typ ("int", "float", "str")
+- not_null:  Spalten ohne fehlende Werte
+- ranges:    erlaubter Wertebereich (inklusive Grenzen)
+- patterns:  Regex, den jeder Wert vollständig erfüllen muss
+- unique:    Schlüssel, der pro Zeile eindeutig sein muss
+- monotonic: Spalte darf innerhalb einer Gruppe (in Zeilenreihenfolge) nicht fallen
+
+Fehlende Pflichtspalten sind ein Strukturfehler (ContractError). Alle
+Zeilenregeln werden als vektorisierte Masken ausgewertet (Regex nur auf den
+eindeutigen Werten, jede Spalte wird pro Block einmal faktorisiert bzw. in
+Zahlen umgewandelt und von allen Regeln geteilt); verletzte Zeilen landen mit allen verletzten Regeln in
+data/<serie>/quarantine/<vertrag>.csv.
+Zeilen mit Schwere "error" werden aus der Ausgabe entfernt, "warn" bleibt
+drin und wird nur protokolliert.
+
+Aufruf vom Projektroot (prüft die vorhandenen F3-Dateien):
+    python -m src.data.contracts
+    python -m src.data.contracts --benchmark 100
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+F3_DIR = BASE_DIR / "data" / "f3"
+QUARANTINE_DIR = F3_DIR / "quarantine"
+
+# Anteil der Stufenlaufzeit, den die Prüfungen höchstens kosten sollen
+# (Standard; report_overhead/benchmark nehmen auch ein eigenes Budget)
+OVERHEAD_BUDGET = 0.03
+
+_F3_STATUS = r"DNF|DNS|DSQ|DQ|NC|EX|WD|RET"
+
+CONTRACTS = {
+    "f3_raw_results": {
+        "file": "f3_2019_2025_raw_results.csv",
+        "columns": {"driver_info": "str", "race_id": "int", "season": "int", "session_type": "str"},
+        "not_null": [("race_id", "error"), ("season", "error"), ("session_type", "error")],
+        "ranges": {"season": (2019, 2030, "error")},
+    },
+    "f3_with_drivers_and_status": {
+        "file": "f3_2019_2025_with_drivers_and_status.csv",
+        "columns": {"race_id": "int", "season": "int", "session_type": "str", "status": "str",
+                    "car_number": "int", "driver_name": "str", "driver_code": "str", "team_name": "str"},
+        # Standings- und Info-Tabellen haben oft keinen Fahrercode -> nur protokollieren
+        "not_null": [("driver_code", "warn"), ("car_number", "warn")],
+        # driver_info beginnt mit Position + Startnummer ohne Trenner ("127J. Daruvala")
+        "ranges": {"car_number": (1, 99, "warn")},
+        "patterns": {"driver_code": (r"[A-Z]{3}", "warn"), "status": (_F3_STATUS, "warn")},
+    },
+    "f3_races_only": {
+        "file": "f3_2019_2025_races_only.csv",
+        "columns": {"race_id": "int", "season": "int", "session_type": "str", "laps": "str"},
+        "not_null": [("laps", "error")],
+        "patterns": {"session_type": (r"(?!Standings).*", "error")},
+    },
+    "f3_with_times": {
+        "file": "f3_2019_2025_with_times.csv",
+        "columns": {"race_id": "int", "season": "int", "session_type": "str", "driver_name": "str",
+                    "time_s": "float", "best_lap_s": "float", "gap_s": "float"},
+        "ranges": {"best_lap_s": (30.0, 300.0, "warn"), "gap_s": (0.0, 7200.0, "warn")},
+    },
+    "f3_races_only_final": {
+        "file": "f3_2019_2025_races_only_final.csv",
+        "columns": {"race_id": "int", "season": "int", "session_type": "str", "driver_name": "str",
+                    "laps": "str", "status": "str", "time_s": "float", "best_lap_s": "float"},
+        "not_null": [("driver_name", "error")],
+        "patterns": {"session_type": (r"ROUND\d+Summary", "error"), "status": (_F3_STATUS, "warn")},
+        "ranges": {"time_s": (60.0, 7200.0, "warn"), "best_lap_s": (60.0, 240.0, "warn")},
+        "unique": (["race_id", "session_type", "driver_name"], "error"),
+        # Gleiche Rundenzahl im Ziel: Gesamtzeit steigt mit der Reihenfolge der Tabelle
+        "monotonic": {"by": ["race_id", "session_type", "laps"], "column": "time_s",
+                      "where_null": "status", "severity": "warn"},
+    },
+    "f3_races_features": {
+        "file": "f3_2019_2025_races_features.csv",
+        "columns": {
+            "season": "int", "race_id": "int", "session_type": "str", "driver_name": "str",
+            "team_name": "str", "position": "float", "finished": "int", "is_dnf": "int",
+            "time_s": "float", "best_lap_s": "float", "gap_s": "float", "winner_time_s": "float",
+            "best_race_lap_s": "float", "rel_laps": "float", "avg_lap_time_s": "float",
+            "time_from_winner_s": "float", "team_avg_pos_season": "float",
+            "best_lap_from_best_s": "float", "lap_vs_race_avg": "float", "driver_top10_rate": "float",
+            "race_avg_lap_time_s": "float", "team_speed": "float", "driver_speed": "float",
+            "driver_vs_team": "float", "session_round": "int",
+        },
+        "not_null": [("session_round", "error"), ("driver_name", "error")],
+        "ranges": {
+            "position": (1, 40, "error"),
+            "session_round": (1, 20, "error"),
+            "finished": (0, 1, "error"),
+            "rel_laps": (0.0, 1.0, "error"),
+            "avg_lap_time_s": (60.0, 240.0, "warn"),
+            "time_from_winner_s": (0.0, 3600.0, "warn"),
+        },
+        "unique": (["race_id", "session_type", "driver_name"], "error"),
+    },
+}
+
+
+class ContractError(ValueError):
+    """Strukturfehler, der sich nicht pro Zeile in Quarantäne legen lässt."""
+
+
+# =========================================================
+# 1. Vektorisierte Regeln
+# =========================================================
+
+def _type_mask(codes: "_Codes", col: str, kind: str) -> np.ndarray:
+    """Zeilen, deren Wert sich nicht in den erwarteten Typ umwandeln lässt."""
+    values = codes.df[col]
+    if kind == "str" or pd.api.types.is_integer_dtype(values):
+        return np.zeros(len(values), dtype=bool)
+    num = codes.numeric(col)
+    if pd.api.types.is_float_dtype(values) or col in codes.parsed:
+        # Zahlentyp bzw. jeder Text war als Zahl lesbar
+        bad = np.zeros(len(values), dtype=bool)
+    else:
+        bad = np.isnan(num) & values.notna().to_numpy()
+    if kind == "int":
+        bad |= ~np.isnan(num) & (num % 1 != 0)
+    return bad
+
+
+def _numeric(values: pd.Series):
+    """(Zahlen, alle Werte lesbar). Nicht lesbare Werte werden NaN."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float), True
+    # Text (Chunk-Modus liest alles als str): direkter float-Cast ist viel
+    # schneller als to_numeric, nur bei nicht lesbaren Werten der langsame Weg
+    try:
+        return values.to_numpy(dtype=object, na_value=np.nan).astype(float), True
+    except (ValueError, TypeError):
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float), False
+
+
+class _Codes:
+    """
+    Pro Spalte einmal pd.factorize bzw. Zahlenumwandlung (Typ- und
+    Bereichsregeln teilen sie); Schlüssel aus mehreren Spalten als int64-Code.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._cache = {}
+        self._numeric = {}
+        self.parsed = set()
+
+    def numeric(self, col) -> np.ndarray:
+        if col not in self._numeric:
+            self._numeric[col], clean = _numeric(self.df[col])
+            if clean:
+                self.parsed.add(col)
+        return self._numeric[col]
+
+    def column(self, col):
+        if col not in self._cache:
+            # NaN bekommt einen eigenen Code (wie dropna=False)
+            self._cache[col] = pd.factorize(self.df[col], use_na_sentinel=False)
+        return self._cache[col]
+
+    def key(self, cols) -> np.ndarray:
+        combined = np.zeros(len(self.df), dtype=np.int64)
+        for col in cols:
+            codes, uniques = self.column(col)
+            combined = combined * (len(uniques) + 1) + codes
+        return combined
+
+
+def _pattern_mask(codes: _Codes, col: str, pattern: str) -> np.ndarray:
+    """Regex nur auf den eindeutigen Werten auswerten (Sessions, Status, Codes wiederholen sich)."""
+    idx, uniques = codes.column(col)
+    values = pd.Series(uniques)
+    ok = values.isna().to_numpy() | values.astype(str).str.fullmatch(pattern).to_numpy(dtype=bool)
+    return ~ok[idx]
+
+
+def _monotonic_mask(df: pd.DataFrame, codes: _Codes, rule: dict) -> np.ndarray:
+    """Wert fällt gegenüber der vorherigen Zeile derselben Gruppe (Zeilenreihenfolge)."""
+    value = codes.numeric(rule["column"])
+    scope = ~np.isnan(value)
+    if rule.get("where_null"):
+        scope &= df[rule["where_null"]].isna().to_numpy()
+    group = codes.key(rule["by"])
+
+    idx = np.flatnonzero(scope)
+    idx = idx[np.argsort(group[idx], kind="stable")]
+    same = group[idx[1:]] == group[idx[:-1]]
+    falls = same & (value[idx[1:]] < value[idx[:-1]])
+    bad = np.zeros(len(df), dtype=bool)
+    bad[idx[1:][falls]] = True
+    return bad
+
+
+def violations(df: pd.DataFrame, contract: dict) -> list:
+    """
+    Wertet alle Zeilenregeln aus und gibt [(regel, schwere, maske), ...] zurück.
+    Fehlende Pflichtspalten lösen ContractError aus.
+    """
+    missing = [c for c in contract.get("columns", {}) if c not in df.columns]
+    if missing:
+        raise ContractError(f"Pflichtspalten fehlen: {missing}")
+
+    codes = _Codes(df)
+    found = []
+    for col, kind in contract.get("columns", {}).items():
+        found.append((f"type:{col}:{kind}", "error", _type_mask(codes, col, kind)))
+    for col, severity in contract.get("not_null", []):
+        found.append((f"not_null:{col}", severity, df[col].isna().to_numpy()))
+    for col, (lo, hi, severity) in contract.get("ranges", {}).items():
+        num = codes.numeric(col)
+        found.append((f"range:{col}:[{lo},{hi}]", severity, (num < lo) | (num > hi)))
+    for col, (pattern, severity) in contract.get("patterns", {}).items():
+        found.append((f"pattern:{col}", severity, _pattern_mask(codes, col, pattern)))
+    if "unique" in contract:
+        key, severity = contract["unique"]
+        # Schlüsselcode -> dichte Gruppennummer, doppelt = Gruppe mit mehr als einer Zeile
+        group, _ = pd.factorize(codes.key(key))
+        dup = np.bincount(group)[group] > 1
+        found.append((f"unique:{'+'.join(key)}", severity, dup))
+    if "monotonic" in contract:
+        rule = contract["monotonic"]
+        found.append((f"monotonic:{rule['column']}", rule["severity"], _monotonic_mask(df, codes, rule)))
+    return found
+
+
+# =========================================================
+# 2. Durchsetzen + Quarantäne
+# =========================================================
+
+def enforce(df: pd.DataFrame, name: str, quarantine_dir=QUARANTINE_DIR, drop_errors: bool = True,
+            append: bool = False, row_offset: int = 0):
+    """
+    Prüft df gegen CONTRACTS[name]. Verletzende Zeilen werden mit allen
+    verletzten Regeln nach quarantine_dir/<name>.csv geschrieben;
+    "error"-Zeilen werden entfernt. Gibt (bereinigtes df, Bericht) zurück.
+
+    Für Chunks: append=True hängt an die Quarantäne-Datei an (der Aufrufer
+    löscht sie vor dem ersten Chunk), row_offset verschiebt _row.
+    """
+    start = time.perf_counter()
+    found = violations(df, CONTRACTS[name])
+    check_s = time.perf_counter() - start
+
+    error_mask = np.zeros(len(df), dtype=bool)
+    any_mask = np.zeros(len(df), dtype=bool)
+    rules = np.full(len(df), "", dtype=object)
+    counts = {}
+    for rule, severity, mask in found:
+        if not mask.any():
+            continue
+        counts[rule] = int(mask.sum())
+        any_mask |= mask
+        if severity == "error":
+            error_mask |= mask
+        rules[mask] += f"{rule}({severity});"
+
+    # Eine Quarantäne-Zeile pro verletzender Zeile, alle Regeln in _rules
+    path = Path(quarantine_dir) / f"{name}.csv"
+    if any_mask.any():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.loc[any_mask].assign(
+            _row=np.flatnonzero(any_mask) + row_offset,
+            _rules=rules[any_mask],
+            _dropped=error_mask[any_mask],
+        ).to_csv(path, index=False, mode="a" if append else "w", header=not (append and path.exists()))
+    elif path.exists() and not append:
+        path.unlink()
+
+    out = df.loc[~error_mask].reset_index(drop=True) if drop_errors else df
+    report = {
+        "contract": name,
+        "rows": len(df),
+        "dropped": int(error_mask.sum()) if drop_errors else 0,
+        "violations": counts,
+        "quarantine": str(path) if any_mask.any() else None,
+        "check_seconds": check_s,
+        "seconds": time.perf_counter() - start,
+    }
+    return out, report
+
+
+def report_overhead(reports: list, stage_seconds: float, stage: str = "", budget: float = None):
+    """
+    Kurze Zusammenfassung pro Stufe. Das Budget (Standard OVERHEAD_BUDGET) gilt
+    für die Prüfungen selbst; das Schreiben der Quarantäne-Datei wird getrennt
+    ausgewiesen.
+    """
+    budget = OVERHEAD_BUDGET if budget is None else budget
+    check_s = sum(r["check_seconds"] for r in reports)
+    write_s = sum(r["seconds"] - r["check_seconds"] for r in reports)
+    share = check_s / stage_seconds if stage_seconds > 0 else 0.0
+    for r in reports:
+        if r["violations"]:
+            print(f"[{r['contract']}] {sum(r['violations'].values())} Verletzungen, "
+                  f"{r['dropped']} Zeilen entfernt -> {r['quarantine']}")
+    flag = "" if share <= budget else f"  (über Budget {budget:.0%})"
+    print(f"{stage}: Prüfungen {check_s * 1000:.1f} ms von {stage_seconds * 1000:.0f} ms "
+          f"= {share:.1%}{flag}, Quarantäne schreiben {write_s * 1000:.1f} ms")
+    return share
+
+
+def benchmark(scale: int = 100, budget: float = OVERHEAD_BUDGET):
+    """
+    Prüfaufwand gegenüber der Feature-Stufe auf einem scale-fach vervielfachten
+    races_only_final (race_id verschoben, damit die Schlüssel eindeutig bleiben).
+    """
+    from src.f3.feature_engineering import build_features
+
+    base = pd.read_csv(F3_DIR / CONTRACTS["f3_races_only_final"]["file"], low_memory=False)
+    offsets = np.repeat(np.arange(scale) * 100_000, len(base))
+    df = pd.concat([base] * scale, ignore_index=True)
+    df["race_id"] = df["race_id"] + offsets
+
+    start = time.perf_counter()
+    features = build_features(df)
+    stage_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    violations(df, CONTRACTS["f3_races_only_final"])
+    violations(features, CONTRACTS["f3_races_features"])
+    check_s = time.perf_counter() - start
+    share = check_s / stage_s
+    flag = "" if share <= budget else f"  (über Budget {budget:.0%})"
+    print(f"{len(df):,} Zeilen: build_features {stage_s * 1000:.0f} ms, "
+          f"Ein- und Ausgabevertrag {check_s * 1000:.0f} ms = {share:.1%}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prüft die F3-Dateien gegen ihre Verträge.")
+    parser.add_argument("--data-dir", type=Path, default=F3_DIR)
+    parser.add_argument("--quarantine-dir", type=Path, default=QUARANTINE_DIR)
+    parser.add_argument("--benchmark", type=int, metavar="SCALE", help="Overhead auf SCALE-facher Datenmenge messen")
+    parser.add_argument("--budget", type=float, default=OVERHEAD_BUDGET, help="erlaubter Anteil an der Stufenlaufzeit")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.budget)
+        return
+
+    rows = []
+    for name, contract in CONTRACTS.items():
+        path = args.data_dir / contract["file"]
+        if not path.exists():
+            continue
+        df = pd.read_csv(path, low_memory=False)
+        _, report = enforce(df, name, args.quarantine_dir)
+        rows.append({
+            "contract": name,
+            "rows": report["rows"],
+            "error_rows": report["dropped"],
+            "violations": sum(report["violations"].values()),
+            "check_ms": report["seconds"] * 1000,
+        })
+        for rule, n in report["violations"].items():
+            print(f"  {name}: {rule} -> {n}")
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+DNF-Hazard in diskreter Zeit (Runde für Runde) für F3 und F1, ohne die
+Person-Perioden-Tabelle (eine Zeile pro Fahrer und Runde) aufzubauen.
+
+Pro Fahrer und Rennen gibt es nur laps_clean, race_max_laps und is_dnf.
+Daraus folgt die Risikozeit: ein Finisher ist in den Runden 1..laps unter
+Risiko (zensiert), ein DNF in 1..laps+1 mit dem Ausfall in der letzten
+Runde. Die naive Expansion hat sum(Risikozeit) Zeilen, bei F3 ~20x und bei
+F1 ~50x so viele wie die Ergebnistabelle.
+
+Modell: logit h(t | x) = alpha[Abschnitt(t / race_max_laps)] + beta * x
+mit N_BINS Rennabschnitten als Basis-Hazard und Fahrer-/Teamkovariaten.
+
+Drei Wege zur selben Likelihood:
+- naive_expand():     alle Person-Perioden-Zeilen (nur zum Vergleich)
+- iter_person_period(): dieselben Zeilen lazy in Blöcken aus Offsets
+                      (np.repeat über die Risikozeiten eines Fahrerblocks);
+                      fit_chunked() summiert Gradient und Hesse-Matrix pro
+                      Block, nie mehr als chunk_rows Zeilen im Speicher
+- aggregated_design(): alle Runden eines Fahrers im selben Abschnitt haben
+                      dieselbe Designzeile -> eine Zeile pro (Fahrer, Abschnitt)
+                      mit Anzahl Risikorunden und Ausfällen (Binomial, exakt
+                      dieselbe Likelihood), direkt aus den Rundenzahlen gerechnet
+
+Aufruf vom Projektroot:
+    python -m src.data.dnf_hazard --series f3
+    python -m src.data.dnf_hazard --series f1 --benchmark
+"""
+
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+F3_FEATURES = BASE_DIR / "data" / "f3" / "f3_2019_2025_races_features.csv"
+F1_RESULTS = BASE_DIR / "data" / "f1" / "raw" / "results.csv"
+F1_RACES = BASE_DIR / "data" / "f1" / "raw" / "races.csv"
+F1_STATUS = BASE_DIR / "data" / "f1" / "raw" / "status.csv"
+
+# F1: nie gestartet -> nicht unter Risiko (positionText F = nicht qualifiziert,
+# W = zurückgezogen; sonst 0 Runden mit einem dieser Status)
+F1_NON_STARTER_TEXT = ["F", "W"]
+F1_NON_STARTER_STATUS = ["Did not qualify", "Did not prequalify", "Withdrew", "107% Rule", "Driver unwell"]
+
+# Rennabschnitte für den Basis-Hazard (Anteil an race_max_laps)
+N_BINS = 10
+# Ridge-Strafe für die Newton-Schritte (nur gegen Singularität)
+RIDGE = 1e-6
+MAX_ITER = 50
+TOL = 1e-10
+
+
+@dataclass
+class Spells:
+    """Eine Zeile pro Fahrer und Rennen: Risikozeit, Ausfall, Kovariaten."""
+    exposure: np.ndarray     # int64, Runden unter Risiko
+    max_laps: np.ndarray     # int64, Renndistanz
+    event: np.ndarray        # int8, 1 = Ausfall in der letzten Risikorunde
+    X: np.ndarray            # float64 (n, p), standardisiert
+    covariates: list
+    keys: pd.DataFrame
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """Startzeile jedes Fahrers in der (gedachten) Person-Perioden-Tabelle."""
+        return np.r_[0, np.cumsum(self.exposure)[:-1]]
+
+
+def make_spells(df: pd.DataFrame, laps: str, max_laps: str, event: str, covariates: list,
+                keys: list) -> Spells:
+    """Risikozeit aus den Rundenzahlen; Zeilen ohne Runden- oder Distanzangabe entfallen."""
+    laps_v = pd.to_numeric(df[laps], errors="coerce").to_numpy(dtype=float)
+    max_v = pd.to_numeric(df[max_laps], errors="coerce").to_numpy(dtype=float)
+    ev = df[event].fillna(0).to_numpy(dtype=np.int8)
+    ok = np.isfinite(laps_v) & np.isfinite(max_v) & (max_v > 0)
+    # DNF: Ausfall in der Runde nach der letzten gewerteten, höchstens in der letzten
+    exposure = np.minimum(laps_v + ev, max_v)
+    ok &= exposure > 0
+
+    X = df[covariates].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)[ok]
+    mean, std = np.nanmean(X, axis=0), np.nanstd(X, axis=0)
+    X = np.where(np.isnan(X), mean, X)
+    X = (X - mean) / np.where(std > 0, std, 1.0)
+    return Spells(
+        exposure=exposure[ok].astype(np.int64),
+        max_laps=max_v[ok].astype(np.int64),
+        event=ev[ok],
+        X=X,
+        covariates=list(covariates),
+        keys=df.loc[ok, keys].reset_index(drop=True),
+    )
+
+
+def lap_bin(lap: np.ndarray, max_laps: np.ndarray, n_bins: int = N_BINS) -> np.ndarray:
+    """Rennabschnitt 0..n_bins-1 einer Runde (1-basiert)."""
+    return np.minimum((lap - 1) * n_bins // max_laps, n_bins - 1)
+
+
+# =========================================================
+# 1. Naiv und lazy: Person-Perioden-Zeilen
+# =========================================================
+
+def _rows(spells: Spells, lo: int, hi: int, n_bins: int) -> dict:
+    """Person-Perioden-Zeilen der Fahrer lo..hi-1 aus den Offsets."""
+    exp = spells.exposure[lo:hi]
+    subject = np.repeat(np.arange(lo, hi), exp)
+    starts = np.repeat(np.cumsum(exp) - exp, exp)
+    lap = np.arange(len(subject)) - starts + 1
+    last = lap == spells.exposure[subject]
+    return {
+        "subject": subject,
+        "lap": lap,
+        "bin": lap_bin(lap, spells.max_laps[subject], n_bins),
+        "y": (last & (spells.event[subject] == 1)).astype(np.int8),
+    }
+
+
+def naive_expand(spells: Spells, n_bins: int = N_BINS) -> pd.DataFrame:
+    """Komplette Person-Perioden-Tabelle mit Kovariaten (eine Zeile pro Fahrer und Runde)."""
+    rows = _rows(spells, 0, len(spells.exposure), n_bins)
+    out = pd.DataFrame(rows)
+    for j, col in enumerate(spells.covariates):
+        out[col] = spells.X[rows["subject"], j]
+    return out
+
+
+def iter_person_period(spells: Spells, chunk_rows: int = 100_000, n_bins: int = N_BINS):
+    """Dieselben Zeilen in Blöcken von höchstens ~chunk_rows (ganze Fahrer pro Block)."""
+    ends = np.cumsum(spells.exposure)
+    lo = 0
+    while lo < len(ends):
+        base = ends[lo - 1] if lo else 0
+        hi = max(int(np.searchsorted(ends, base + chunk_rows, side="right")), lo + 1)
+        yield _rows(spells, lo, hi, n_bins)
+        lo = hi
+
+
+def aggregated_design(spells: Spells, n_bins: int = N_BINS) -> dict:
+    """
+    Eine Zeile pro (Fahrer, Abschnitt) mit Risikorunden n und Ausfällen e.
+    Abschnitt b umfasst die Runden ceil(b*M/B)+1 .. ceil((b+1)*M/B).
+    """
+    M = spells.max_laps[:, None]
+    b = np.arange(n_bins)[None, :]
+    first = -(-b * M // n_bins) + 1
+    last = -(-(b + 1) * M // n_bins)
+    n = np.clip(np.minimum(last, spells.exposure[:, None]) - first + 1, 0, None)
+    e = np.zeros_like(n)
+    end_bin = lap_bin(spells.exposure, spells.max_laps, n_bins)
+    hit = spells.event == 1
+    e[np.flatnonzero(hit), end_bin[hit]] = 1
+
+    subject, bins = np.nonzero(n)
+    return {"subject": subject, "bin": bins, "n": n[subject, bins], "e": e[subject, bins]}
+
+
+# =========================================================
+# 2. Fit: Newton-Raphson für die logistische Hazard-Regression
+# =========================================================
+
+def _design(spells: Spells, subject: np.ndarray, bins: np.ndarray, n_bins: int) -> np.ndarray:
+    """[One-Hot Abschnitt | Kovariaten] für die angegebenen Zeilen."""
+    D = np.zeros((len(subject), n_bins + spells.X.shape[1]))
+    D[np.arange(len(subject)), bins] = 1.0
+    D[:, n_bins:] = spells.X[subject]
+    return D
+
+
+def _newton(spells: Spells, blocks, n_bins: int) -> tuple:
+    """
+    blocks() liefert pro Iteration (subject, bin, n, e)-Blöcke; Gradient und
+    Hesse-Matrix werden über die Blöcke summiert. Gibt (beta, Iterationen) zurück.
+    """
+    k = n_bins + spells.X.shape[1]
+    beta = np.zeros(k)
+    # Start: Basis-Hazard auf die mittlere Ausfallrate
+    rate = max(spells.event.sum(), 1) / spells.exposure.sum()
+    beta[:n_bins] = np.log(rate / (1 - rate))
+    for it in range(1, MAX_ITER + 1):
+        grad = -RIDGE * beta
+        hess = -RIDGE * np.eye(k)
+        for subject, bins, n, e in blocks():
+            D = _design(spells, subject, bins, n_bins)
+            mu = 1.0 / (1.0 + np.exp(-(D @ beta)))
+            grad += D.T @ (e - n * mu)
+            hess -= (D * (n * mu * (1 - mu))[:, None]).T @ D
+        step = np.linalg.solve(hess, grad)
+        beta -= step
+        if np.abs(step).max() < TOL:
+            break
+    return beta, it
+
+
+def fit_aggregated(spells: Spells, n_bins: int = N_BINS) -> tuple:
+    agg = aggregated_design(spells, n_bins)
+    return _newton(spells, lambda: [(agg["subject"], agg["bin"], agg["n"], agg["e"])], n_bins)
+
+
+def fit_chunked(spells: Spells, chunk_rows: int = 100_000, n_bins: int = N_BINS) -> tuple:
+    def blocks():
+        for rows in iter_person_period(spells, chunk_rows, n_bins):
+            yield rows["subject"], rows["bin"], np.ones(len(rows["y"])), rows["y"]
+    return _newton(spells, blocks, n_bins)
+
+
+def fit_naive(spells: Spells, n_bins: int = N_BINS) -> tuple:
+    pp = naive_expand(spells, n_bins)
+    subject, bins, y = pp["subject"].to_numpy(), pp["bin"].to_numpy(), pp["y"].to_numpy()
+    return _newton(spells, lambda: [(subject, bins, np.ones(len(y)), y)], n_bins)
+
+
+def coefficient_table(spells: Spells, beta: np.ndarray, n_bins: int = N_BINS) -> pd.DataFrame:
+    """Basis-Hazard pro Abschnitt und Odds Ratios pro Standardabweichung der Kovariaten."""
+    names = [f"abschnitt_{b * 100 // n_bins:02d}-{(b + 1) * 100 // n_bins:02d}%" for b in range(n_bins)]
+    hazard = 1.0 / (1.0 + np.exp(-beta[:n_bins]))
+    return pd.DataFrame({
+        "term": names + spells.covariates,
+        "coef": beta,
+        "hazard_per_lap": np.r_[hazard, [np.nan] * len(spells.covariates)],
+        "odds_ratio": np.r_[[np.nan] * n_bins, np.exp(beta[n_bins:])],
+    })
+
+
+# =========================================================
+# 3. Daten: F3-Features und F1-Kaggle-Ergebnisse
+# =========================================================
+
+def load_f3() -> Spells:
+    from src.f1.models.train_model import prepare_f3
+
+    df = prepare_f3(pd.read_csv(F3_FEATURES))
+    # DNS: nie unter Risiko gewesen
+    df = df[df["status"].ne("DNS")]
+    return make_spells(
+        df, "laps_clean", "race_max_laps", "is_dnf",
+        ["driver_prior_is_dnf", "team_prior_is_dnf", "driver_prior_position_clean"],
+        ["season", "race_id", "driver_name"],
+    )
+
+
+def load_f1(min_year: int = 1990) -> Spells:
+    results = pd.read_csv(F1_RESULTS, na_values="\\N")
+    races = pd.read_csv(F1_RACES, na_values="\\N", usecols=["raceId", "year"])
+    df = results.merge(races, on="raceId", how="left")
+    df = df[df["year"] >= min_year]
+    # Nicht-Starter (DNQ, zurückgezogen) wie DNS bei F3 entfernen, sonst zählen sie als Ausfall in Runde 1
+    status = pd.read_csv(F1_STATUS).set_index("statusId")["status"]
+    non_starter = (df["positionText"].isin(F1_NON_STARTER_TEXT)
+                   | (df["laps"].eq(0) & df["statusId"].map(status).isin(F1_NON_STARTER_STATUS)))
+    df = df[~non_starter].copy()
+    df["race_max_laps"] = df.groupby("raceId")["laps"].transform("max")
+    # Ausfall = nicht klassiert (positionText R, D, W, ...); überrundete Finisher sind zensiert
+    df["is_dnf"] = (~df["positionText"].astype(str).str.isnumeric()).astype(int)
+    df["grid"] = pd.to_numeric(df["grid"], errors="coerce").replace(0, np.nan)
+    return make_spells(df, "laps", "race_max_laps", "is_dnf", ["grid", "year"],
+                       ["year", "raceId", "driverId"])
+
+
+LOADERS = {"f3": load_f3, "f1": load_f1}
+
+
+# =========================================================
+# 4. Speicher- und Zeitvergleich
+# =========================================================
+
+def _measure(func, *args) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    out = func(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return out, seconds, peak
+
+
+def benchmark(spells: Spells, chunk_rows: int = 100_000, n_bins: int = N_BINS):
+    n_pp = int(spells.exposure.sum())
+    agg_rows = len(aggregated_design(spells, n_bins)["n"])
+    print(f"{len(spells.exposure):,} Fahrer-Rennen, {n_pp:,} Person-Perioden-Zeilen "
+          f"({n_pp / len(spells.exposure):.0f}x), aggregiert {agg_rows:,} Zeilen")
+
+    pp, _, expand_mb = _measure(naive_expand, spells, n_bins)
+    print(f"  naive Tabelle: {pp.memory_usage(deep=True).sum() / 2**20:.1f} MB "
+          f"(Spitze beim Aufbau {expand_mb:.1f} MB)")
+    del pp
+
+    betas = {}
+    print(f"  {'Weg':<32} {'Zeit':>9} {'Spitze':>10} {'Iter.':>6}")
+    for label, func, args in [
+        ("naiv (voll expandiert)", fit_naive, (spells, n_bins)),
+        (f"lazy, {chunk_rows:,} Zeilen/Block", fit_chunked, (spells, chunk_rows, n_bins)),
+        ("aggregiert (Fahrer, Abschnitt)", fit_aggregated, (spells, n_bins)),
+    ]:
+        (beta, iters), seconds, peak = _measure(func, *args)
+        betas[label] = beta
+        print(f"  {label:<32} {seconds:8.2f}s {peak:8.1f} MB {iters:6d}")
+
+    ref = next(iter(betas.values()))
+    for label, beta in list(betas.items())[1:]:
+        print(f"  max. Abweichung der Koeffizienten {label}: {np.abs(beta - ref).max():.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DNF-Hazard in diskreter Zeit ohne volle Expansion.")
+    parser.add_argument("--series", choices=list(LOADERS), default="f3")
+    parser.add_argument("--bins", type=int, default=N_BINS)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--benchmark", action="store_true", help="Speicher und Zeit gegen die naive Expansion")
+    args = parser.parse_args()
+
+    spells = LOADERS[args.series]()
+    if args.benchmark:
+        benchmark(spells, args.chunk_rows, args.bins)
+        return
+
+    beta, iters = fit_aggregated(spells, args.bins)
+    print(f"{args.series}: {len(spells.exposure):,} Fahrer-Rennen, {int(spells.event.sum())} Ausfälle, "
+          f"{int(spells.exposure.sum()):,} Runden unter Risiko, {iters} Newton-Schritte")
+    print(coefficient_table(spells, beta, args.bins).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
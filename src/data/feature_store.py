@@ -0,0 +1,372 @@
+"""
+Lokaler Feature Store (SQLite) für F1, F2 und F3.
+
+- materialize() legt die aufbereiteten Feature-Tabellen (SERIES[...]["prepare"]
+  aus train_model) einmal als Tabelle features_<serie> ab, mit einheitlichen
+  Schlüsseln (season, race_id, driver) und Index darauf
+- as_of ordnet jede Zeile zeitlich ein (season * 1000 + Runde); F1-Saison-
+  Features gelten erst nach Saisonende, F2 hat keine Saison und gilt erst
+  "ganz am Ende"
+- F3-Saison-Aggregate (driver_top10_rate, team_speed, ...) rechnet die
+  Feature-Datei über die ganze Saison. Im Store stehen stattdessen laufende
+  Werte über alle Rennen der Saison bis einschliesslich der eigenen Runde,
+  damit point_in_time() keine späteren Rennen sieht
+- source_sha256 umfasst die Quelldatei und den Code der Aufbereitung; ändert
+  sich eins davon, wird die Tabelle neu gebaut
+- lookup() holt Feature-Zeilen für viele Schlüssel auf einmal, davor sitzt
+  ein LRU-Cache
+- point_in_time() liefert pro Fahrer die letzte Zeile, die vor einem
+  Rennen bekannt war
+- benchmark() misst Schlüssel-Latenz und Trainingsset-Aufbau gegen CSV
+
+Aufruf vom Projektroot:
+    python -m src.data.feature_store --materialize
+    python -m src.data.feature_store --benchmark
+"""
+
+import argparse
+import hashlib
+import inspect
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.f1.models.train_model import SERIES
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+STORE_PATH = BASE_DIR / "data" / "store" / "features.sqlite"
+
+KEY_COLS = ["season", "race_id", "driver"]
+END_OF_TIME = 9_999_999
+
+# Serie -> Quellspalten für die einheitlichen Schlüssel (None = konstant)
+KEY_SOURCES = {
+    "f3": {"season": "season", "race_id": "race_id", "driver": "driver_name", "round": "session_round"},
+    "f1": {"season": "year", "race_id": None, "driver": "driverId", "round": None},
+    "f2": {"season": None, "race_id": None, "driver": "driver", "round": None},
+}
+
+
+def _quote(columns) -> str:
+    return ", ".join(f'"{c}"' for c in columns)
+
+
+def _source_digest(series: str) -> str:
+    """Quelldatei + Code von prepare und der Schlüssel-/as_of-Aufbereitung."""
+    h = hashlib.sha256(Path(SERIES[series]["path"]).read_bytes())
+    for func in (SERIES[series]["prepare"], keyed_frame, expanding_season_features, _expanding_mean):
+        h.update(inspect.getsource(func).encode())
+    return h.hexdigest()
+
+
+def _expanding_mean(df: pd.DataFrame, keys: list, values: pd.Series, counts: pd.Series = None) -> np.ndarray:
+    """
+    Summe(values) / Summe(counts) pro keys über alle Zeilen mit as_of <= eigenem
+    as_of (Rennen derselben Runde zählen gemeinsam). counts: Standard nicht-NaN.
+    """
+    counts = values.notna().astype(int) if counts is None else counts
+    parts = pd.DataFrame({"s": values.fillna(0.0), "n": counts})
+    per_round = parts.groupby([df[k] for k in keys + ["as_of"]]).sum().sort_index()
+    cum = per_round.groupby(level=list(range(len(keys)))).cumsum()
+    mean = cum["s"] / cum["n"].where(cum["n"] > 0)
+    return mean.reindex(pd.MultiIndex.from_frame(df[keys + ["as_of"]])).to_numpy()
+
+
+def expanding_season_features(df: pd.DataFrame) -> pd.DataFrame:
+    """F3: Saison-Aggregate aus feature_engineering.season_features als laufende Werte."""
+    df = df.copy()
+    pos = pd.to_numeric(df["position_clean"], errors="coerce")
+    lap = pd.to_numeric(df["avg_lap_time_s"], errors="coerce")
+    team, driver = ["season", "team_name"], ["season", "driver_name"]
+    df["team_avg_pos_season"] = _expanding_mean(df, team, pos)
+    df["team_speed"] = _expanding_mean(df, team, lap)
+    df["driver_speed"] = _expanding_mean(df, driver, lap)
+    # wie top10_rate: Anteil aller Zeilen (auch DNF) mit Platz <= 10
+    df["driver_top10_rate"] = _expanding_mean(df, driver, (pos <= 10).astype(float),
+                                              pd.Series(1, index=df.index))
+    df["driver_vs_team"] = lap - df["team_speed"]
+    return df
+
+
+# Serie -> Umrechnung der Saison-Aggregate auf den Stand der eigenen Runde
+EXPANDING = {"f3": expanding_season_features}
+
+
+def keyed_frame(series: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Ergänzt season, race_id, driver und as_of nach KEY_SOURCES."""
+    src = KEY_SOURCES[series]
+    out = df.copy()
+    out["season"] = df[src["season"]].astype("int64") if src["season"] else 0
+    out["race_id"] = df[src["race_id"]].astype("int64") if src["race_id"] else 0
+    out["driver"] = df[src["driver"]].astype(str)
+
+    if src["round"]:
+        out["as_of"] = out["season"] * 1000 + df[src["round"]].astype("int64")
+    elif src["season"]:
+        # Saison-Aggregat: erst nach der letzten Runde bekannt
+        out["as_of"] = out["season"] * 1000 + 999
+    else:
+        out["as_of"] = END_OF_TIME
+    if series in EXPANDING:
+        out = EXPANDING[series](out)
+    return out
+
+
+class FeatureStore:
+    """SQLite-Datei mit einer Feature-Tabelle pro Serie und LRU-Cache davor."""
+
+    def __init__(self, path=STORE_PATH, cache_size: int = 50_000):
+        self.path = Path(path)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._columns = {}
+        self._local = threading.local()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def connect(self) -> sqlite3.Connection:
+        """Eine offene Verbindung pro Thread (Öffnen kostet mehr als die Abfrage)."""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            con = sqlite3.connect(self.path)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("CREATE TEMP TABLE wanted (season INTEGER, race_id INTEGER, driver TEXT)")
+            self._local.con = con
+        return con
+
+    # ---------------------------------------------------------
+    # Materialisierung
+    # ---------------------------------------------------------
+
+    def materialize(self, series_list=("f3", "f1", "f2")) -> pd.DataFrame:
+        """Baut die Feature-Tabellen neu auf, wenn sich die Quelldatei geändert hat."""
+        rows = []
+        with self.connect() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS feature_sets ("
+                "series TEXT PRIMARY KEY, source TEXT, source_sha256 TEXT, "
+                "n_rows INTEGER, n_columns INTEGER, materialized_at TEXT)"
+            )
+            for series in series_list:
+                cfg = SERIES[series]
+                digest = _source_digest(series)
+                known = con.execute("SELECT source_sha256 FROM feature_sets WHERE series = ?",
+                                    (series,)).fetchone()
+                if known and known[0] == digest:
+                    rows.append({"series": series, "status": "aktuell"})
+                    continue
+
+                start = time.perf_counter()
+                df = keyed_frame(series, cfg["prepare"](pd.read_csv(cfg["path"], low_memory=False)))
+                table = f"features_{series}"
+                df.to_sql(table, con, if_exists="replace", index=False, chunksize=5_000)
+                con.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{table}_key ON {table} "
+                            f"(season, race_id, driver)")
+                con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_pit ON {table} (driver, as_of)")
+                con.execute(
+                    "INSERT OR REPLACE INTO feature_sets VALUES (?, ?, ?, ?, ?, ?)",
+                    (series, str(cfg["path"].relative_to(BASE_DIR)), digest, len(df), df.shape[1],
+                     datetime.now().isoformat(timespec="seconds")),
+                )
+                rows.append({"series": series, "status": "neu", "rows": len(df),
+                             "seconds": time.perf_counter() - start})
+        self.clear_cache()
+        return pd.DataFrame(rows)
+
+    def catalog(self) -> pd.DataFrame:
+        with self.connect() as con:
+            return pd.read_sql("SELECT * FROM feature_sets", con)
+
+    def columns(self, series: str) -> list:
+        if series not in self._columns:
+            with self.connect() as con:
+                info = con.execute(f"PRAGMA table_info(features_{series})").fetchall()
+            if not info:
+                raise KeyError(f"Feature-Tabelle für {series} fehlt (zuerst --materialize)")
+            self._columns[series] = [row[1] for row in info]
+        return self._columns[series]
+
+    # ---------------------------------------------------------
+    # Schlüssel-Lookups mit LRU-Cache
+    # ---------------------------------------------------------
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self._columns.clear()
+            self.cache_hits = self.cache_misses = 0
+
+    def _fetch(self, series: str, keys: list, columns: list) -> dict:
+        """Eine SQL-Abfrage für alle fehlenden Schlüssel (über eine temporäre Tabelle)."""
+        cols = ", ".join(f'f."{c}"' for c in columns)
+        with self.connect() as con:
+            con.execute("DELETE FROM wanted")
+            con.executemany("INSERT INTO wanted VALUES (?, ?, ?)", keys)
+            rows = con.execute(
+                f"SELECT f.season, f.race_id, f.driver, {cols} FROM wanted w "
+                f"JOIN features_{series} f USING (season, race_id, driver)"
+            ).fetchall()
+        return {row[:3]: row[3:] for row in rows}
+
+    def lookup(self, series: str, keys, columns=None) -> pd.DataFrame:
+        """
+        Feature-Zeilen für eine Liste von (season, race_id, driver)-Schlüsseln,
+        in Reihenfolge der Schlüssel; unbekannte Schlüssel ergeben NaN-Zeilen.
+        """
+        columns = list(columns or self.columns(series))
+        keys = [(int(s), int(r), str(d)) for s, r, d in keys]
+        tag = (series, tuple(columns))
+
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                hit = self._cache.get((tag, key))
+                if hit is not None:
+                    self._cache.move_to_end((tag, key))
+                    found[key] = hit
+                    self.cache_hits += 1
+                else:
+                    missing.append(key)
+                    self.cache_misses += 1
+
+        if missing:
+            fetched = self._fetch(series, list(dict.fromkeys(missing)), columns)
+            with self._lock:
+                for key, values in fetched.items():
+                    self._cache[(tag, key)] = values
+                    found[key] = values
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        empty = (None,) * len(columns)
+        return pd.DataFrame([found.get(k, empty) for k in keys], columns=columns)
+
+    # ---------------------------------------------------------
+    # Point-in-time
+    # ---------------------------------------------------------
+
+    def point_in_time(self, series: str, before_season: int, before_round: int = 0,
+                      drivers=None, columns=None) -> pd.DataFrame:
+        """
+        Pro Fahrer die letzte Feature-Zeile mit as_of < (before_season, before_round),
+        also der Stand "vor Rennen X". Ohne drivers für alle Fahrer.
+        """
+        cols = columns or [c for c in self.columns(series) if c not in KEY_COLS + ["as_of"]]
+        cutoff = before_season * 1000 + before_round
+        driver_filter, params = "", [cutoff]
+        if drivers is not None:
+            drivers = [str(d) for d in drivers]
+            driver_filter = f"AND driver IN ({', '.join('?' * len(drivers))})"
+            params += drivers
+
+        # Letzte bekannte Zeile pro Fahrer über den Index (driver, as_of)
+        query = (
+            f"SELECT season, race_id, driver, as_of, {_quote(cols)} FROM features_{series} "
+            f"JOIN (SELECT driver, MAX(as_of) AS as_of FROM features_{series} "
+            f"      WHERE as_of < ? {driver_filter} GROUP BY driver) USING (driver, as_of)"
+        )
+        with self.connect() as con:
+            return pd.read_sql(query, con, params=params)
+
+    def training_set(self, series: str, task: str, keys=None):
+        """
+        X, y und Schlüssel für (series, task) direkt aus dem Store. Ohne keys
+        alle Zeilen mit Zielwert, sonst genau die angegebenen Schlüssel.
+        """
+        cfg = SERIES[series]
+        target, kind = cfg["tasks"][task]
+        features = [c for c in cfg["features"] if c in self.columns(series)]
+        if keys is None:
+            with self.connect() as con:
+                df = pd.read_sql(
+                    f"SELECT {_quote(KEY_COLS + features + [target])} FROM features_{series} "
+                    f'WHERE "{target}" IS NOT NULL ORDER BY as_of, driver',
+                    con,
+                )
+        else:
+            df = self.lookup(series, keys, KEY_COLS + features + [target])
+            df = df[df[target].notna()]
+        X = df[features].to_numpy(dtype=np.float32)
+        y = df[target].to_numpy(dtype=np.int64 if kind == "clf" else np.float64)
+        return X, y, df[KEY_COLS].reset_index(drop=True)
+
+
+# =========================================================
+# Benchmark
+# =========================================================
+
+def benchmark(store: FeatureStore, series: str = "f3", task: str = "top10", n_single: int = 2_000):
+    from src.f1.models.train_model import load_dataset
+
+    store.materialize((series,))
+    keys = list(store.training_set(series, task)[2].itertuples(index=False, name=None))
+    rng = np.random.default_rng(0)
+    sample = [keys[i] for i in rng.integers(0, len(keys), n_single)]
+
+    store.clear_cache()
+    for label in ("Cache füllt sich", "Cache warm"):
+        lat = []
+        for key in sample:
+            start = time.perf_counter()
+            store.lookup(series, [key])
+            lat.append(time.perf_counter() - start)
+        lat = np.array(lat) * 1000
+        print(f"Einzel-Lookup ({n_single} Schlüssel, {label}): "
+              f"p50 {np.percentile(lat, 50):.3f} ms, p99 {np.percentile(lat, 99):.3f} ms")
+    print(f"  Trefferquote gesamt {store.cache_hits / (store.cache_hits + store.cache_misses):.1%}")
+
+    timings = {}
+    start = time.perf_counter()
+    load_dataset(series, task)
+    timings["CSV + prepare (load_dataset)"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.training_set(series, task)
+    timings["Store, ganze Tabelle"] = time.perf_counter() - start
+
+    store.clear_cache()
+    start = time.perf_counter()
+    store.training_set(series, task, keys)
+    timings["Store, Schlüssel-Batch (kalt)"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.training_set(series, task, keys)
+    timings["Store, Schlüssel-Batch (Cache)"] = time.perf_counter() - start
+
+    season = int(max(k[0] for k in keys))
+    start = time.perf_counter()
+    snap = store.point_in_time(series, season, 1)
+    timings[f"Point-in-time vor {season}/R1"] = time.perf_counter() - start
+
+    print(f"Trainingsset {series}/{task}: {len(keys):,} Zeilen, Point-in-time: {len(snap)} Fahrer")
+    for name, seconds in timings.items():
+        print(f"  {name:32s} {seconds * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler Feature Store (SQLite).")
+    parser.add_argument("--path", type=Path, default=STORE_PATH)
+    parser.add_argument("--materialize", action="store_true")
+    parser.add_argument("--series", nargs="+", default=["f3", "f1", "f2"])
+    parser.add_argument("--benchmark", action="store_true")
+    args = parser.parse_args()
+
+    store = FeatureStore(args.path)
+    if args.materialize:
+        print(store.materialize(args.series).to_string(index=False))
+        print(store.catalog().to_string(index=False))
+    if args.benchmark:
+        benchmark(store)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Inhalts-Hashes für gescrapte Ergebnistabellen (Dedup und Änderungserkennung).
+
+Die Rohdatei f3_2019_2025_raw_results.csv mischt Rennen, Qualifying,
+Trainings und Standings. Bei einem erneuten Scrape soll erkennbar sein,
+welche Tabellen sich geändert haben (z. B. Strafen nach dem Rennen):
+
+- row_hashes:   64-bit-Hash pro Zeile (pd.util.hash_pandas_object, vektorisiert)
+- drop_exact_duplicates: exakt gleiche Zeilen entfernen (über die Hashes)
+- drop_seen_duplicates:  dasselbe chunkweise, mit den Hashes früherer Chunks
+- table_fingerprints:    ein Fingerprint pro (race_id, session_type); hängt
+  von Inhalt und Reihenfolge der Zeilen ab (Reihenfolge = Platzierung)
+- diff_fingerprints:     neue, geänderte und entfernte Tabellen
+- refresh / record: Dedup + Vergleich mit dem letzten Stand in
+  data/f3/cache/; die geänderten race_ids kommen für jede nachgelagerte
+  Stufe (DOWNSTREAM) in eine eigene Liste changed_races_<stufe>.csv. Die
+  Listen werden angesammelt, bis die Stufe sie mit consume_changed_races
+  abgearbeitet hat (mehrere Scrapes zwischen zwei Läufen gehen nicht verloren)
+- update_races: Stufenausgabe nur für die geänderten Rennen (bzw. ganzen
+  Saisons) neu rechnen, den Rest aus der bisherigen Ausgabe übernehmen
+
+Aufruf vom Projektroot:
+    python -m src.data.fingerprints
+    python -m src.data.fingerprints --benchmark 1000000
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+F3_DIR = BASE_DIR / "data" / "f3"
+RAW = F3_DIR / "f3_2019_2025_raw_results.csv"
+CACHE_DIR = F3_DIR / "cache"
+FINGERPRINTS = CACHE_DIR / "raw_fingerprints.csv"
+
+# Stufen nach driver_cleaning, die geänderte Rennen mit --incremental abarbeiten
+DOWNSTREAM = ["build_clean_datasets", "parse_times", "race_only_bereinigung", "feature_engineering"]
+
+TABLE_KEY = ["race_id", "session_type"]
+
+# Multiplikator aus splitmix64, verteilt die Zeilennummer über alle Bits
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def row_hashes(df: pd.DataFrame, columns=None) -> np.ndarray:
+    """uint64-Hash pro Zeile über alle (oder die angegebenen) Spalten, ohne Index."""
+    frame = df if columns is None else df[list(columns)]
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def drop_exact_duplicates(df: pd.DataFrame, hashes=None):
+    """Entfernt exakte Duplikate (erste Zeile bleibt). Gibt (df, hashes) zurück."""
+    if hashes is None:
+        hashes = row_hashes(df)
+    keep = ~pd.Series(hashes).duplicated().to_numpy()
+    if keep.all():
+        return df, hashes
+    return df.loc[keep].reset_index(drop=True), hashes[keep]
+
+
+def drop_seen_duplicates(df: pd.DataFrame, seen: np.ndarray):
+    """
+    Dedup über mehrere Chunks: entfernt Zeilen, deren Hash schon in seen
+    (sortiertes uint64-Array) oder früher im selben Chunk vorkommt. Gibt
+    (df, seen inkl. der neuen Hashes) zurück; Speicher 8 Byte pro Zeile.
+    """
+    hashes = row_hashes(df)
+    pos = np.searchsorted(seen, hashes).clip(max=max(len(seen) - 1, 0))
+    known = (seen[pos] == hashes) if len(seen) else np.zeros(len(hashes), dtype=bool)
+    keep = ~known & ~pd.Series(hashes).duplicated().to_numpy()
+    seen = np.union1d(seen, hashes[keep])
+    if keep.all():
+        return df, seen
+    return df.loc[keep].reset_index(drop=True), seen
+
+
+def table_fingerprints(df: pd.DataFrame, hashes=None, key=TABLE_KEY) -> pd.DataFrame:
+    """
+    Ein Fingerprint pro Tabelle (key): Summe (mod 2^64) der Zeilen-Hashes,
+    vorher mit der Zeilennummer innerhalb der Tabelle gemischt. Damit zählt
+    auch eine geänderte Reihenfolge (Platzierung) als Änderung.
+    """
+    if hashes is None:
+        hashes = row_hashes(df)
+    groups = df.groupby(key, sort=False, dropna=False)
+    code = groups.ngroup().to_numpy()
+    pos = groups.cumcount().to_numpy().astype(np.uint64)
+
+    mixed = pd.util.hash_array(hashes ^ ((pos + np.uint64(1)) * _GOLDEN))
+
+    order = np.argsort(code, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(code[order]) != 0])
+    # uint64-Summe läuft modulo 2^64 über, das ist hier gewollt
+    with np.errstate(over="ignore"):
+        fingerprint = np.add.reduceat(mixed[order], starts)
+
+    first = order[starts]
+    out = df.iloc[first][key].reset_index(drop=True)
+    out["n_rows"] = np.diff(np.r_[starts, len(order)])
+    out["fingerprint"] = fingerprint
+    return out
+
+
+def diff_fingerprints(old: pd.DataFrame, new: pd.DataFrame, key=TABLE_KEY) -> pd.DataFrame:
+    """Tabellen mit Status new / changed / removed (unveränderte fehlen)."""
+    merged = old.merge(new, on=key, how="outer", suffixes=("_old", "_new"), indicator=True)
+    change = np.select(
+        [merged["_merge"] == "right_only",
+         merged["_merge"] == "left_only",
+         merged["fingerprint_old"] != merged["fingerprint_new"]],
+        ["new", "removed", "changed"],
+        default="",
+    )
+    merged["change"] = change
+    return merged.loc[change != "", key + ["n_rows_old", "n_rows_new", "change"]].reset_index(drop=True)
+
+
+def load_fingerprints(path=FINGERPRINTS) -> pd.DataFrame:
+    if not Path(path).exists():
+        return pd.DataFrame(columns=TABLE_KEY + ["n_rows", "fingerprint"])
+    fp = pd.read_csv(path, dtype={"fingerprint": str})
+    # als Hex-Text gespeichert, CSV kennt kein uint64
+    fp["fingerprint"] = fp["fingerprint"].map(lambda h: int(h, 16)).astype(np.uint64)
+    return fp
+
+
+def save_fingerprints(fp: pd.DataFrame, path=FINGERPRINTS):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    fp.assign(fingerprint=[f"{v:016x}" for v in fp["fingerprint"]]).to_csv(path, index=False)
+
+
+def refresh(df: pd.DataFrame, path=FINGERPRINTS):
+    """
+    Dedup + Vergleich mit dem gespeicherten Stand. Gibt (dedupliziertes df,
+    neue Fingerprints, Änderungen) zurück; beim ersten Lauf gilt alles als neu.
+    Gespeichert wird erst mit record(), wenn die Stufe durchgelaufen ist.
+    """
+    df, hashes = drop_exact_duplicates(df)
+    new = table_fingerprints(df, hashes)
+    changes = diff_fingerprints(load_fingerprints(path), new)
+    return df, new, changes
+
+
+def changed_races(changes: pd.DataFrame) -> np.ndarray:
+    """Rennen mit mindestens einer neuen, geänderten oder entfernten Tabelle."""
+    return np.sort(changes["race_id"].unique())
+
+
+def changed_path(stage: str, cache_dir=CACHE_DIR) -> Path:
+    return Path(cache_dir) / f"changed_races_{stage}.csv"
+
+
+def record(fingerprints: pd.DataFrame, races, path=FINGERPRINTS, stages=DOWNSTREAM, cache_dir=CACHE_DIR):
+    """
+    Fingerprints als neuen Stand speichern und die geänderten race_ids zu den
+    offenen Listen der nachgelagerten Stufen hinzufügen.
+    """
+    save_fingerprints(fingerprints, path)
+    for stage in stages:
+        pending = load_changed_races(stage, cache_dir)
+        merged = np.union1d(pending if pending is not None else [], np.asarray(races)).astype(np.int64)
+        pd.DataFrame({"race_id": merged}).to_csv(changed_path(stage, cache_dir), index=False)
+
+
+def load_changed_races(stage: str, cache_dir=CACHE_DIR):
+    """Offene race_ids einer Stufe; None, wenn es noch keinen Stand gibt (-> alles neu)."""
+    path = changed_path(stage, cache_dir)
+    if not path.exists():
+        return None
+    return pd.read_csv(path)["race_id"].to_numpy()
+
+
+def consume_changed_races(stage: str, cache_dir=CACHE_DIR):
+    """Nach erfolgreichem Schreiben der Stufe: offene Liste leeren (nicht löschen)."""
+    path = changed_path(stage, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({"race_id": np.empty(0, dtype=np.int64)}).to_csv(path, index=False)
+
+
+def read_output(path) -> pd.DataFrame:
+    """
+    Bisherige Ausgabe einer Stufe für update_races einlesen. round_trip liest
+    Floats exakt so zurück, wie sie geschrieben wurden, damit übernommene
+    Zeilen byte-gleich zum vollen Lauf bleiben.
+    """
+    return pd.read_csv(path, float_precision="round_trip")
+
+
+def update_races(df: pd.DataFrame, previous: pd.DataFrame, races, func, by: str = "race_id") -> pd.DataFrame:
+    """
+    func nur auf die Zeilen von df anwenden, die zu geänderten Rennen gehören,
+    alle anderen Zeilen aus previous (bisherige Ausgabe) übernehmen. Rennen,
+    die es in df nicht mehr gibt, fallen weg; Reihenfolge der Rennen (by) wie in df.
+
+    by="season" rechnet ganze Saisons der geänderten Rennen neu (für Stufen mit
+    Saison-Aggregaten); entfernte Rennen zählen über previous mit.
+    """
+    races = np.asarray(races)
+    if by == "race_id":
+        units = races
+    else:
+        units = pd.concat([df.loc[df["race_id"].isin(races), by],
+                           previous.loc[previous["race_id"].isin(races), by]]).unique()
+    redo = df[by].isin(units)
+    keep = previous[~previous[by].isin(units) & previous["race_id"].isin(df["race_id"])]
+    if not redo.any():
+        return keep.reset_index(drop=True)
+    out = pd.concat([keep, func(df[redo])], ignore_index=True)
+
+    # Einheiten (Rennen bzw. Saisons) in der Reihenfolge von df, innerhalb
+    # einer Einheit die Reihenfolge von func bzw. der bisherigen Ausgabe
+    order = pd.Index(df[by].unique())
+    return out.iloc[np.argsort(order.get_indexer(out[by]), kind="stable")].reset_index(drop=True)
+
+
+# =========================================================
+# Benchmark
+# =========================================================
+
+def benchmark(n_rows: int = 1_000_000):
+    """
+    Rohtabelle auf n_rows vervielfachen (race_id verschoben), 1 % Duplikate
+    anhängen und 0.1 % der Tabellen verändern; Zeiten der einzelnen Schritte.
+    """
+    base = pd.read_csv(RAW, low_memory=False)
+    scale = int(np.ceil(n_rows / len(base)))
+    df = pd.concat([base] * scale, ignore_index=True).iloc[:n_rows]
+    df["race_id"] = df["race_id"] + np.repeat(np.arange(scale) * 100_000, len(base))[:n_rows]
+    rng = np.random.default_rng(0)
+    dupes = df.iloc[rng.choice(len(df), len(df) // 100, replace=False)]
+    df = pd.concat([df, dupes], ignore_index=True)
+
+    timings = {}
+    start = time.perf_counter()
+    hashes = row_hashes(df)
+    timings["row_hashes"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    deduped, hashes = drop_exact_duplicates(df, hashes)
+    timings["dedup (Hashes)"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df.drop_duplicates()
+    timings["dedup (df.drop_duplicates)"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    old = table_fingerprints(deduped, hashes)
+    timings["table_fingerprints"] = time.perf_counter() - start
+
+    # Strafe nach dem Rennen simulieren: Zeit in 0.1 % der Tabellen ändern
+    tables = old.sample(frac=0.001, random_state=0)[TABLE_KEY]
+    hit = deduped[TABLE_KEY].merge(tables, how="left", indicator=True)["_merge"].eq("both").to_numpy()
+    rescrape = deduped.copy()
+    rescrape.loc[hit, "time"] = rescrape.loc[hit, "time"].astype(str) + "+5s"
+
+    start = time.perf_counter()
+    rescrape, rescrape_hashes = drop_exact_duplicates(rescrape)
+    new = table_fingerprints(rescrape, rescrape_hashes)
+    changes = diff_fingerprints(old, new)
+    timings["Refresh gesamt"] = time.perf_counter() - start
+
+    print(f"{len(df):,} Zeilen, {len(df) - len(deduped):,} Duplikate, {len(old):,} Tabellen")
+    for step, seconds in timings.items():
+        print(f"  {step:<28} {seconds * 1000:8.0f} ms")
+    print(f"  geänderte Tabellen: {len(changes)} erkannt / {len(tables)} verändert")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dedup und Änderungserkennung für die F3-Rohdaten.")
+    parser.add_argument("--input", type=Path, default=RAW)
+    parser.add_argument("--dry-run", action="store_true", help="Fingerprints nicht speichern")
+    parser.add_argument("--benchmark", type=int, metavar="ROWS", help="Benchmark auf ROWS Zeilen")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+
+    raw = pd.read_csv(args.input, low_memory=False)
+    df, fingerprints, changes = refresh(raw)
+    races = changed_races(changes)
+    if not args.dry_run:
+        record(fingerprints, races)
+    print(f"{len(raw):,} Zeilen, {len(raw) - len(df)} exakte Duplikate entfernt")
+    if changes.empty:
+        print("Keine Änderungen seit dem letzten Lauf.")
+        return
+    print(changes["change"].value_counts().to_string())
+    print(f"{len(races)} Rennen neu zu verarbeiten (offen für {', '.join(DOWNSTREAM)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Klassifikation neutralisierter Runden und Tempo-Ausreisser für F1 und F3.
+
+Bisher filtert create_clean_lap_dataset nur Deleted, IsAccurate und Ein-/
+Ausfahrt; Safety-Car-, VSC- und Verkehrsrunden bleiben drin und verzerren
+Tempofeatures wie avg_lap_time_s. Hier werden sie markiert (nicht gelöscht),
+für alle Sessions einer oder mehrerer Saisons in einem Durchlauf:
+
+F1 (eine Zeile pro Runde, classify_laps):
+- neutralisiert: TrackStatus enthält 4 (SC), 5 (rot), 6/7 (VSC)
+- Ausreisser:    robuster z-Wert |x - Median| / (1.4826 * MAD) > OUTLIER_Z,
+                 Median und MAD pro Session aus den grünen Runden (gruppierte
+                 Mediane über einen Gruppencode, keine Schleife über Sessions)
+- lap_class:     "green", "neutralised" oder "outlier"
+
+F3 (eine Zeile pro Fahrer und Rennen, classify_results): Rundendaten gibt es
+nicht, nur avg_lap_time_s = time_s / laps. Deshalb pro Rennen
+- is_outlier_result:    robuster z-Wert von avg_lap_time_s im Rennen
+Das hängt nur vom Rennen ab und läuft daher auch im Chunk-Modus. Ein Flag
+für neutralisierte F3-Rennen gibt es nicht: ohne TrackStatus bleibt nur
+Median-Rundenschnitt / beste Rennrunde, und dieses Verhältnis streut
+zwischen 1.02 und 1.35 ohne Lücke zwischen Rennen mit und ohne Safety Car
+(bei 1.10 wären 55 % der Rennen markiert), lässt sich also nicht kalibrieren.
+
+pace_features() rechnet den Rundenschnitt mit und ohne markierte Runden.
+
+Aufruf vom Projektroot:
+    python -m src.data.lap_classification --benchmark 5
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# MAD -> Standardabweichung bei Normalverteilung
+MAD_SCALE = 1.4826
+# Robuster z-Wert, ab dem eine Runde als Ausreisser gilt
+OUTLIER_Z = 3.5
+# TrackStatus-Codes für neutralisierte Runden (SC, rote Flagge, VSC, VSC endet)
+NEUTRALISED_STATUS = "[4567]"
+
+F1_SESSION_COLS = ["year", "round", "session_type"]
+F3_RACE_COLS = ["season", "race_id", "session_type"]
+
+
+def group_codes(df: pd.DataFrame, keys: list) -> np.ndarray:
+    """Ganzzahliger Gruppencode pro Zeile (alles eine Gruppe ohne Schlüssel)."""
+    if not keys:
+        return np.zeros(len(df), dtype=np.int64)
+    return df.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+
+
+def robust_zscore(values: np.ndarray, g: np.ndarray, use: np.ndarray = None):
+    """
+    Median, MAD und robuster z-Wert pro Gruppe g. Statistiken nur aus den
+    Zeilen mit use (Standard: alle endlichen Werte), z-Wert für alle Zeilen.
+    MAD = 0 oder zu wenige Werte -> z NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    base = np.where(use if use is not None else np.isfinite(values), values, np.nan)
+    median = pd.Series(base).groupby(g).median().reindex(range(g.max() + 1 if len(g) else 0)).to_numpy()[g]
+    mad = pd.Series(np.abs(base - median)).groupby(g).median().reindex(
+        range(g.max() + 1 if len(g) else 0)).to_numpy()[g]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(mad > 0, (values - median) / (MAD_SCALE * mad), np.nan)
+    return median, mad, z
+
+
+# =========================================================
+# 1. F1: Runden
+# =========================================================
+
+def neutralised_mask(df: pd.DataFrame, status_col: str = "TrackStatus") -> np.ndarray:
+    if status_col not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    # TrackStatus ist eine Ziffernfolge ("1", "4", "2671"), als Zahl gelesen ggf. "4.0"
+    status = df[status_col].astype(str).str.replace(r"\.0$", "", regex=True)
+    return status.str.contains(NEUTRALISED_STATUS, regex=True).fillna(False).to_numpy(dtype=bool)
+
+
+def classify_laps(df: pd.DataFrame, value: str = "LapTime_s", keys: list = None,
+                  z: float = OUTLIER_Z) -> pd.DataFrame:
+    """Markiert neutralisierte Runden und Tempo-Ausreisser pro Session."""
+    df = df.copy()
+    keys = [c for c in F1_SESSION_COLS if c in df.columns] if keys is None else keys
+    g = group_codes(df, keys)
+    x = pd.to_numeric(df[value], errors="coerce").to_numpy(dtype=float)
+
+    neutral = neutralised_mask(df)
+    _, _, score = robust_zscore(x, g, np.isfinite(x) & ~neutral)
+    outlier = ~neutral & (np.abs(score) > z)
+
+    df["is_neutralised_lap"] = neutral
+    df["pace_z"] = score
+    df["is_pace_outlier"] = outlier
+    df["lap_class"] = np.where(neutral, "neutralised", np.where(outlier, "outlier", "green"))
+    return df
+
+
+def pace_features(df: pd.DataFrame, by: list, value: str = "LapTime_s") -> pd.DataFrame:
+    """Rundenschnitt pro Gruppe mit allen Runden und nur mit grünen Runden."""
+    x = pd.to_numeric(df[value], errors="coerce")
+    green = df["lap_class"].eq("green") & x.notna()
+    parts = pd.DataFrame({
+        "lap_sum": x, "n_laps": x.notna().astype(int),
+        "clean_sum": x.where(green), "n_clean_laps": green.astype(int),
+    })
+    sums = parts.groupby([df[c] for c in by], sort=True).sum(min_count=1)
+    out = pd.DataFrame({
+        "n_laps": sums["n_laps"],
+        "n_clean_laps": sums["n_clean_laps"],
+        "avg_lap_time_s": sums["lap_sum"] / sums["n_laps"].where(sums["n_laps"] > 0),
+        "avg_lap_time_clean_s": sums["clean_sum"] / sums["n_clean_laps"].where(sums["n_clean_laps"] > 0),
+    })
+    out["neutralisation_effect_s"] = out["avg_lap_time_s"] - out["avg_lap_time_clean_s"]
+    return out.reset_index()
+
+
+# =========================================================
+# 2. F3: Rennresultate
+# =========================================================
+
+def classify_results(df: pd.DataFrame, value: str = "avg_lap_time_s", z: float = OUTLIER_Z) -> pd.DataFrame:
+    """
+    Erwartet avg_lap_time_s (race_features). Ergänzt is_outlier_result und
+    den Rennschnitt ohne Ausreisser.
+    """
+    df = df.copy()
+    g = group_codes(df, [c for c in F3_RACE_COLS if c in df.columns])
+    x = df[value].to_numpy(dtype=float)
+    _, _, score = robust_zscore(x, g)
+
+    outlier = np.abs(score) > z
+    df["is_outlier_result"] = outlier.astype(int)
+
+    clean = pd.Series(np.where(outlier, np.nan, x), index=df.index)
+    df["race_avg_lap_time_clean_s"] = clean.groupby(g).transform("mean")
+    df["lap_vs_race_avg_clean"] = df[value] - df["race_avg_lap_time_clean_s"]
+    return df
+
+
+# =========================================================
+# 3. Benchmark auf synthetischen Mehrsaison-Runden
+# =========================================================
+
+def benchmark(n_seasons: int = 5, repeat: int = 3):
+    from src.data.synthetic import generate_fastf1_laps
+
+    laps = generate_fastf1_laps(n_seasons)
+    # Verkehr / Fehler: einige Runden deutlich langsamer, ohne TrackStatus
+    rng = np.random.default_rng(1)
+    hit = rng.random(len(laps)) < 0.01
+    laps.loc[hit, "LapTime_s"] += rng.uniform(4.0, 15.0, hit.sum())
+
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = classify_laps(laps)
+        seconds.append(time.perf_counter() - start)
+    best = min(seconds)
+    n_sessions = out.groupby(F1_SESSION_COLS).ngroups
+    print(f"{len(laps):,} Runden, {n_sessions} Sessions, {n_seasons} Saisons: "
+          f"{best * 1000:.0f} ms ({len(laps) / best:,.0f} Runden/s)")
+    print(out["lap_class"].value_counts().to_string())
+    # Wirklich langsam: eingestreut, Ausfahrtsrunden und Startrunde (Generator +19 s / +4 s)
+    slow = hit | ((laps["TyreLife"] == 1) & (laps["Stint"] > 1)).to_numpy() | (laps["LapNumber"] == 1).to_numpy()
+    slow &= ~out["is_neutralised_lap"].to_numpy()
+    found = out["is_pace_outlier"].to_numpy()
+    print(f"langsame Runden erkannt: {(found & slow).sum() / slow.sum():.0%}, "
+          f"Fehlalarme unter den übrigen grünen Runden: {(found & ~slow).sum() / (~slow).sum():.2%}")
+
+    start = time.perf_counter()
+    pace = pace_features(out, F1_SESSION_COLS + ["Driver"])
+    print(f"Tempofeatures pro (Session, Fahrer): {len(pace):,} Gruppen in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+    print("Rundenschnitt mit minus ohne markierte Runden (s):")
+    print(pace["neutralisation_effect_s"].describe().to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Neutralisierte Runden und Tempo-Ausreisser markieren.")
+    parser.add_argument("--benchmark", type=int, default=5, metavar="N_SEASONS")
+    args = parser.parse_args()
+    benchmark(args.benchmark)
+
+
+if __name__ == "__main__":
+    main()
@@ -70,6 +70,11 @@ def load_sprint_results() -> pd.DataFrame:
     return _load_csv("sprint_results.csv")
 
 
+def load_driver_standings() -> pd.DataFrame:
+    """Lädt driver_standings.csv (falls vorhanden)"""
+    return _load_csv("driver_standings.csv")
+
+
 def load_core_tables() -> dict:
     """
     Lädt die wichtigsten Kern-Tabellen und gibt sie als Dict zurück.
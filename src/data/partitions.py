@@ -0,0 +1,358 @@
+"""
+Partitionierte Ablage der verarbeiteten Datensätze (Hive-Layout) mit Katalog.
+
+Statt einer flachen Datei pro Datensatz liegt jede Kombination aus Serie,
+Saison und Session in einem eigenen Ordner:
+
+    data/partitioned/<datensatz>/series=f3/season=2024/session=ROUND3Summary/part-0.csv
+
+Werte in Ordnernamen sind URL-kodiert ("Standings after round1" ->
+"Standings%20after%20round1"), fehlende Werte heissen wie bei Hive
+__HIVE_DEFAULT_PARTITION__. Die Partitionsspalten bleiben zusätzlich in den
+Dateien, damit die Typen beim Lesen erhalten bleiben.
+
+_catalog.csv führt pro Partition Pfad, Zeilen, Bytes und den Bereich der
+race_id (min/max). read_dataset wählt über den Katalog nur die passenden
+Partitionen aus (Saison, Session, Serie; race_id über min/max) und öffnet
+nur diese Dateien; die Zeilen werden danach exakt gefiltert.
+
+Dazu führt _schema.json pro Datensatz die Spaltentypen (dtypes) und einen
+Fingerprint der Quelldatei (source, Größe:mtime). Gelesen wird mit den
+gespeicherten Typen statt mit neuer Typerkennung pro Partition (eine
+Session ohne Text in "gap" wäre sonst float statt str). read() nimmt die
+flache Datei, sobald sich die Quelle seit dem Partitionieren geändert hat.
+
+Aufruf vom Projektroot:
+    python -m src.data.partitions --write
+    python -m src.data.partitions --dataset f3_races_features --season 2024 --session ROUND3Summary
+    python -m src.data.partitions --benchmark 20
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+ROOT = BASE_DIR / "data" / "partitioned"
+CATALOG_NAME = "_catalog.csv"
+SCHEMA_NAME = "_schema.json"
+
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Datensatz -> Quelldatei, Serie und Spalten für Saison / Session / Rennen
+# (None = Datensatz hat keine solche Spalte, Partition heisst dann session=all)
+DATASETS = {
+    "f3_races_features": {
+        "file": BASE_DIR / "data" / "f3" / "f3_2019_2025_races_features.csv",
+        "series": "f3", "season": "season", "session": "session_type", "race": "race_id",
+    },
+    "f3_races_only_final": {
+        "file": BASE_DIR / "data" / "f3" / "f3_2019_2025_races_only_final.csv",
+        "series": "f3", "season": "season", "session": "session_type", "race": "race_id",
+    },
+    "f3_with_times": {
+        "file": BASE_DIR / "data" / "f3" / "f3_2019_2025_with_times.csv",
+        "series": "f3", "season": "season", "session": "session_type", "race": "race_id",
+    },
+    "f1_features": {
+        "file": BASE_DIR / "data" / "f1" / "processed" / "f1_features.csv",
+        "series": "f1", "season": "year", "session": None, "race": None,
+    },
+}
+
+CATALOG_COLUMNS = ["dataset", "series", "season", "session", "path", "rows", "bytes", "race_min", "race_max"]
+
+
+def _encode(value) -> str:
+    if pd.isna(value):
+        return NULL_PARTITION
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        value = int(value)
+    return quote(str(value), safe="")
+
+
+def source_fingerprint(path) -> str:
+    """Größe und mtime der Quelldatei; ändert sich bei jedem Neuschreiben."""
+    stat = Path(path).stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _read_types(types: dict, usecols=None) -> tuple:
+    """Gespeicherte dtypes -> (dtype=, parse_dates=) für read_csv."""
+    if not types:
+        return None, None
+    if usecols is not None:
+        types = {c: t for c, t in types.items() if c in usecols}
+    dates = [c for c, t in types.items() if t.startswith("datetime")]
+    return {c: t for c, t in types.items() if c not in dates}, dates or None
+
+
+def partition_path(dataset: str, series: str, season, session) -> Path:
+    """Relativer Ordner einer Partition (ohne ROOT)."""
+    return (Path(dataset) / f"series={_encode(series)}" / f"season={_encode(season)}"
+            / f"session={_encode(session)}")
+
+
+# =========================================================
+# 1. Schreiben + Katalog
+# =========================================================
+
+def load_catalog(root=ROOT) -> pd.DataFrame:
+    path = Path(root) / CATALOG_NAME
+    if not path.exists():
+        return pd.DataFrame(columns=CATALOG_COLUMNS)
+    return pd.read_csv(path, dtype={"series": str, "session": str, "path": str})
+
+
+def load_schema(root=ROOT) -> dict:
+    """Datensatz -> {"source": Fingerprint oder None, "dtypes": {Spalte: dtype}}."""
+    path = Path(root) / SCHEMA_NAME
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def write_dataset(df: pd.DataFrame, dataset: str, spec: dict = None, root=ROOT, source: str = None) -> pd.DataFrame:
+    """
+    Schreibt df partitioniert nach (Serie, Saison, Session) und ersetzt die
+    Einträge des Datensatzes im Katalog. Gibt die neuen Katalogzeilen zurück.
+    source: Fingerprint der Quelldatei (source_fingerprint), falls df aus einer Datei stammt.
+    """
+    spec = spec or DATASETS[dataset]
+    root = Path(root)
+    shutil.rmtree(root / dataset, ignore_errors=True)
+
+    season_col, session_col, race_col = spec["season"], spec["session"], spec["race"]
+    keys = [season_col] + ([session_col] if session_col else [])
+    entries = []
+    for key, part in df.groupby(keys, sort=True, dropna=False):
+        key = key if isinstance(key, tuple) else (key,)
+        season = key[0]
+        session = key[1] if session_col else "all"
+        rel = partition_path(dataset, spec["series"], season, session) / "part-0.csv"
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        part.to_csv(root / rel, index=False)
+
+        races = pd.to_numeric(part[race_col], errors="coerce") if race_col else pd.Series(dtype=float)
+        entries.append({
+            "dataset": dataset, "series": spec["series"],
+            "season": season, "session": None if pd.isna(session) else str(session),
+            "path": rel.as_posix(), "rows": len(part), "bytes": (root / rel).stat().st_size,
+            "race_min": races.min(), "race_max": races.max(),
+        })
+    entries = pd.DataFrame(entries, columns=CATALOG_COLUMNS)
+
+    catalog = load_catalog(root)
+    catalog = catalog[catalog["dataset"] != dataset]
+    catalog = pd.concat([c for c in [catalog, entries] if len(c)], ignore_index=True)
+    catalog.to_csv(root / CATALOG_NAME, index=False)
+
+    schema = load_schema(root)
+    schema[dataset] = {"source": source, "dtypes": {c: str(t) for c, t in df.dtypes.items()}}
+    (root / SCHEMA_NAME).write_text(json.dumps(schema, indent=1), encoding="utf-8")
+    return entries
+
+
+def write_all(root=ROOT, datasets=None) -> pd.DataFrame:
+    """Alle (oder die angegebenen) Datensätze aus DATASETS partitionieren."""
+    written = []
+    for name in datasets or DATASETS:
+        spec = DATASETS[name]
+        if not spec["file"].exists():
+            print(f"{name}: {spec['file'].name} fehlt, übersprungen")
+            continue
+        source = source_fingerprint(spec["file"])
+        entries = write_dataset(pd.read_csv(spec["file"], low_memory=False), name, spec, root, source)
+        print(f"{name}: {entries['rows'].sum():,} Zeilen in {len(entries)} Partitionen")
+        written.append(entries)
+    return pd.concat(written, ignore_index=True) if written else pd.DataFrame(columns=CATALOG_COLUMNS)
+
+
+# =========================================================
+# 2. Lesen mit Partition Pruning
+# =========================================================
+
+def _as_list(values):
+    if values is None:
+        return None
+    return list(values) if isinstance(values, (list, tuple, set, np.ndarray, pd.Index)) else [values]
+
+
+def prune(catalog: pd.DataFrame, dataset: str, series=None, seasons=None, sessions=None,
+          races=None) -> pd.DataFrame:
+    """Katalogzeilen der Partitionen, die zu den Filtern passen können."""
+    keep = (catalog["dataset"] == dataset).to_numpy(copy=True)
+    if series is not None:
+        keep &= catalog["series"].isin(_as_list(series)).to_numpy()
+    if seasons is not None:
+        keep &= catalog["season"].isin(_as_list(seasons)).to_numpy()
+    if sessions is not None:
+        keep &= catalog["session"].isin([str(s) for s in _as_list(sessions)]).to_numpy()
+    if races is not None:
+        # Zonenkarte: Partition nur öffnen, wenn eine race_id in [min, max] liegt
+        races = np.sort(np.asarray(_as_list(races), dtype=float))
+        lo = np.searchsorted(races, catalog["race_min"].to_numpy(dtype=float), side="left")
+        hi = np.searchsorted(races, catalog["race_max"].to_numpy(dtype=float), side="right")
+        keep &= hi > lo
+    return catalog[keep]
+
+
+def read_dataset(dataset: str, series=None, seasons=None, sessions=None, races=None,
+                 columns=None, root=ROOT, stats: dict = None) -> pd.DataFrame:
+    """
+    Liest nur die Partitionen, die zu series/seasons/sessions/races passen
+    (einzelner Wert oder Liste). Zeilen nach Saison und Session sortiert,
+    innerhalb einer Partition in der ursprünglichen Reihenfolge.
+    stats (optional) erhält Anzahl geöffneter Partitionen und Bytes.
+    """
+    spec = DATASETS.get(dataset, {})
+    root = Path(root)
+    catalog = load_catalog(root)
+    if not (catalog["dataset"] == dataset).any():
+        raise FileNotFoundError(f"{dataset} ist nicht partitioniert, zuerst python -m src.data.partitions --write")
+    selected = prune(catalog, dataset, series, seasons, sessions, races)
+    if stats is not None:
+        stats.update(partitions=len(selected), total_partitions=int((catalog["dataset"] == dataset).sum()),
+                     bytes=int(selected["bytes"].sum()))
+
+    race_col = spec.get("race", "race_id")
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(list(columns) + ([race_col] if races is not None else [])))
+    # Typen der Quelle statt Typerkennung pro Partition
+    dtype, dates = _read_types(load_schema(root).get(dataset, {}).get("dtypes"), usecols)
+    parts = [pd.read_csv(root / path, usecols=usecols, dtype=dtype, parse_dates=dates, low_memory=False)
+             for path in selected["path"]]
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(parts, ignore_index=True)
+
+    if races is not None:
+        df = df[df[race_col].isin(_as_list(races))].reset_index(drop=True)
+    return df if columns is None else df[list(columns)]
+
+
+def read_flat(dataset: str, series=None, seasons=None, sessions=None, races=None, columns=None, path=None):
+    """Vergleichsweg: ganze flache Datei lesen und danach filtern."""
+    spec = DATASETS[dataset]
+    df = pd.read_csv(path or spec["file"], low_memory=False)
+    mask = np.ones(len(df), dtype=bool)
+    if seasons is not None:
+        mask &= df[spec["season"]].isin(_as_list(seasons)).to_numpy()
+    if sessions is not None and spec["session"]:
+        mask &= df[spec["session"]].isin(_as_list(sessions)).to_numpy()
+    if races is not None and spec["race"]:
+        mask &= df[spec["race"]].isin(_as_list(races)).to_numpy()
+    df = df[mask].reset_index(drop=True)
+    return df if columns is None else df[list(columns)]
+
+
+def is_current(dataset: str, root=ROOT) -> bool:
+    """Partitionen passen noch zur Quelldatei (ohne Fingerprint oder ohne Datei: ja)."""
+    schema = load_schema(root)
+    if dataset not in schema:
+        return False
+    recorded = schema[dataset]["source"]
+    path = DATASETS.get(dataset, {}).get("file")
+    if recorded is None or path is None or not path.exists():
+        return True
+    return recorded == source_fingerprint(path)
+
+
+def read(dataset: str, root=ROOT, **filters) -> pd.DataFrame:
+    """Partitioniert lesen, falls vorhanden und aktuell, sonst die flache Datei."""
+    if is_current(dataset, root):
+        return read_dataset(dataset, root=root, **filters)
+    if dataset in load_schema(root):
+        print(f"{dataset}: Quelldatei seit dem Partitionieren geändert, lese die flache Datei "
+              f"(neu partitionieren mit --write)")
+    return read_flat(dataset, **filters)
+
+
+# =========================================================
+# 3. Benchmark: eine Saison partitioniert vs. flache Datei
+# =========================================================
+
+def _scaled_features(scale: int) -> pd.DataFrame:
+    """F3-Features scale-fach: jede Kopie bekommt eigene Saisons und race_ids."""
+    base = pd.read_csv(DATASETS["f3_races_features"]["file"])
+    n_seasons = base["season"].max() - base["season"].min() + 1
+    offset = base["race_id"].max() + 1
+    copies = [base.assign(season=base["season"] + i * n_seasons, race_id=base["race_id"] + i * offset)
+              for i in range(scale)]
+    return pd.concat(copies, ignore_index=True)
+
+
+def _best_of(func, repeat: int = 3) -> tuple:
+    best, out = np.inf, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = func()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def benchmark(scale: int = 20):
+    df = _scaled_features(scale)
+    season = int(df["season"].median())
+    session = "ROUND3Summary"
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        flat = tmp / "flat.csv"
+        df.to_csv(flat, index=False)
+        start = time.perf_counter()
+        entries = write_dataset(df, "f3_races_features", root=tmp)
+        write_s = time.perf_counter() - start
+        print(f"{len(df):,} Zeilen, {df['season'].nunique()} Saisons: flach {flat.stat().st_size / 2**20:.1f} MB, "
+              f"{len(entries)} Partitionen (Schreiben {write_s:.1f} s)")
+
+        queries = {
+            f"Saison {season}": {"seasons": season},
+            f"Saison {season}, {session}": {"seasons": season, "sessions": session},
+            "ein Rennen (race_id)": {"races": int(df.loc[df["season"] == season, "race_id"].iloc[0])},
+        }
+        for label, filters in queries.items():
+            flat_s, expected = _best_of(lambda: read_flat("f3_races_features", path=flat, **filters))
+            stats = {}
+            part_s, got = _best_of(lambda: read_dataset("f3_races_features", root=tmp, stats=stats, **filters))
+            assert len(got) == len(expected), label
+            assert got.dtypes.equals(expected.dtypes), f"{label}: Typen weichen von der flachen Datei ab"
+            print(f"  {label:<28} flach {flat_s * 1000:8.1f} ms | partitioniert {part_s * 1000:7.1f} ms "
+                  f"({stats['partitions']}/{stats['total_partitions']} Partitionen, "
+                  f"{stats['bytes'] / 2**10:.0f} KB) -> {flat_s / part_s:5.1f}x, {len(got):,} Zeilen")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hive-partitionierte Ablage der verarbeiteten Datensätze.")
+    parser.add_argument("--write", action="store_true", help="alle Datensätze nach data/partitioned/ schreiben")
+    parser.add_argument("--dataset", choices=list(DATASETS), default="f3_races_features")
+    parser.add_argument("--season", type=int, nargs="*")
+    parser.add_argument("--session", nargs="*")
+    parser.add_argument("--race", type=int, nargs="*")
+    parser.add_argument("--benchmark", type=int, metavar="SCALE", help="Abfrage einer Saison auf SCALE-facher Datenmenge")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    if args.write:
+        write_all()
+        return
+
+    if args.dataset in load_schema() and not is_current(args.dataset):
+        print(f"Achtung: {args.dataset} ist älter als die Quelldatei, neu partitionieren mit --write")
+    stats = {}
+    df = read_dataset(args.dataset, seasons=args.season, sessions=args.session, races=args.race, stats=stats)
+    print(f"{len(df):,} Zeilen aus {stats['partitions']}/{stats['total_partitions']} Partitionen "
+          f"({stats['bytes'] / 2**10:.0f} KB)")
+    print(df.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
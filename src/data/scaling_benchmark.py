@@ -0,0 +1,260 @@
+"""
+Skalierungs-Benchmark der Pipeline-Stufen auf synthetischen Daten.
+
+Für jede Skala erzeugt src/data/synthetic.py die Rohdaten (F1/F2/F3) in
+einem temporären Ordner; danach laufen die Stufen in Pipeline-Reihenfolge:
+
+- F3: Rohdaten lesen, driver_cleaning, build_clean_datasets, parse_times,
+  race_only_bereinigung,
+  feature_engineering, EDA-Aggregate (Würfel + prepare_inputs ohne Plots)
+- F2: f2_feature_engineering (inkl. CSV lesen)
+- F1: f1_build_dataset (inkl. CSV lesen), build_f1_season_features (alle Saisons)
+
+Pro Stufe werden Laufzeit und Spitzenspeicher (tracemalloc, in einem
+zweiten Lauf, damit das Tracing die Zeit nicht verfälscht) gemessen. Aus den
+Skalen ergibt sich pro Stufe der Exponent der Laufzeit über die Zeilenzahl
+(1 = linear). Ergebnisse können als Baseline gespeichert und spätere Läufe
+damit verglichen werden. Die Kurven (images/benchmarks/scaling.png) gehören
+zur Baseline und werden nur mit --save-baseline neu gezeichnet; sonst nur
+mit --plot in eine eigene Datei.
+
+Aufruf vom Projektroot:
+    python -m src.data.scaling_benchmark --scales 1 10
+    python -m src.data.scaling_benchmark --scales 1 10 --plot /tmp/scaling.png
+    python -m src.data.scaling_benchmark --scales 1 10 100 --save-baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+import matplotlib
+
+# Headless Backend: Plots werden nur gespeichert, nie angezeigt
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from src.data import synthetic
+from src.f1.features.f1_build_dataset import build_f1_base_dataset
+from src.f1.features.f1_feature_engineering import build_f1_season_features
+from src.f2.f2_feature_engineering import build_f2_features, load_sessions
+from src.f3 import aggregate_cube, explorative_analyse
+from src.f3.build_clean_datasets import races_only
+from src.f3.driver_cleaning import clean_drivers
+from src.f3.feature_engineering import build_features
+from src.f3.parse_times import add_times
+from src.f3.race_only_bereinigung import final_races
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+BASELINE = BASE_DIR / "data" / "benchmarks" / "scaling_baseline.json"
+PLOT = BASE_DIR / "images" / "benchmarks" / "scaling.png"
+
+# Ab diesem Faktor gegenüber der Baseline gilt eine Stufe als langsamer
+REGRESSION_FACTOR = 1.5
+
+
+# =========================================================
+# 1. Stufen
+# =========================================================
+
+def _eda(features: pd.DataFrame):
+    cube = aggregate_cube.build_cube(features)
+    return explorative_analyse.prepare_inputs(features, cube)
+
+
+def _f1_base(raw_dir: Path) -> pd.DataFrame:
+    tables = {name: pd.read_csv(raw_dir / f"{name}.csv")
+              for name in ["races", "results", "drivers", "constructors"]}
+    return build_f1_base_dataset(tables)
+
+
+# (Serie, Stufe, Eingabe im Kontext, Ausgabe im Kontext, Funktion)
+STAGES = [
+    ("f3", "read_raw", "f3_dir", "raw", lambda d: pd.read_csv(d / synthetic.F3_RAW)),
+    ("f3", "driver_cleaning", "raw", "drivers", clean_drivers),
+    ("f3", "build_clean_datasets", "drivers", "races_only", races_only),
+    ("f3", "with_times", "drivers", "with_times", add_times),
+    ("f3", "race_only_bereinigung", "with_times", "final", final_races),
+    ("f3", "feature_engineering", "final", "features", build_features),
+    ("f3", "eda_inputs", "features", "eda", _eda),
+    ("f2", "f2_feature_engineering", "f2_dir", "f2_features", lambda d: build_f2_features(load_sessions(d))),
+    ("f1", "f1_build_dataset", "f1_raw", "f1_base", _f1_base),
+    ("f1", "build_f1_season_features", "f1_base", "f1_features",
+     lambda base: build_f1_season_features(min_year=0, base=base)),
+]
+
+
+def _rows(obj) -> int:
+    return len(obj) if isinstance(obj, pd.DataFrame) else 0
+
+
+def _input_rows(ctx: dict, key: str) -> int:
+    """Zeilen der Eingabe; für Ordner die Rohdaten der Serie."""
+    value = ctx[key]
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    return ctx["raw_rows"][key]
+
+
+def run_scale(scale: int, seed: int = 0, memory: bool = True, series=("f1", "f2", "f3")) -> list:
+    """Alle Stufen einer Skala; eine Zeile pro Stufe."""
+    records = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        start = time.perf_counter()
+        counts = synthetic.write(tmp, scale, seed, series, lap_times=False)
+        print(f"\nSkala {scale}: Daten erzeugt in {time.perf_counter() - start:.1f} s")
+
+        ctx = {
+            "f3_dir": tmp / "f3", "f2_dir": tmp / "f2", "f1_raw": tmp / "f1" / "raw",
+            "raw_rows": {
+                "f3_dir": sum(n for k, n in counts.items() if k.startswith("f3/")),
+                "f2_dir": sum(n for k, n in counts.items() if k.startswith("f2/")),
+                "f1_raw": sum(counts.get(f"f1/{t}", 0) for t in ["races", "results", "drivers", "constructors"]),
+            },
+        }
+        for stage_series, stage, source, target, func in STAGES:
+            if stage_series not in series:
+                continue
+            rows = _input_rows(ctx, source)
+
+            # Die Stufen drucken Zwischenstände -> ausblenden
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                out = func(ctx[source])
+                seconds = time.perf_counter() - start
+
+                peak_mb = np.nan
+                if memory:
+                    tracemalloc.start()
+                    base = tracemalloc.get_traced_memory()[0]
+                    func(ctx[source])
+                    peak_mb = (tracemalloc.get_traced_memory()[1] - base) / 2**20
+                    tracemalloc.stop()
+
+            ctx[target] = out
+            records.append({"series": stage_series, "stage": stage, "scale": scale, "rows": rows,
+                            "out_rows": _rows(out), "seconds": seconds, "peak_mb": peak_mb})
+            print(f"  {stage_series}/{stage:<26} {rows:>10,} Zeilen {seconds * 1000:10.0f} ms "
+                  f"{peak_mb:9.1f} MB")
+    return records
+
+
+# =========================================================
+# 2. Auswertung: Skalierung, Baseline, Plot
+# =========================================================
+
+def scaling_exponents(results: pd.DataFrame) -> pd.DataFrame:
+    """Steigung von log(Laufzeit) bzw. log(Speicher) über log(Zeilen) pro Stufe."""
+    rows = []
+    for (series, stage), g in results.groupby(["series", "stage"], sort=False):
+        g = g[(g["rows"] > 0) & (g["seconds"] > 0)]
+        if g["scale"].nunique() < 2:
+            continue
+        x = np.log(g["rows"].to_numpy(dtype=float))
+        mem = g["peak_mb"].to_numpy(dtype=float)
+        rows.append({
+            "series": series,
+            "stage": stage,
+            "time_exponent": np.polyfit(x, np.log(g["seconds"]), 1)[0],
+            "memory_exponent": (np.polyfit(x, np.log(mem), 1)[0]
+                                if np.all(np.isfinite(mem)) and np.all(mem > 0) else np.nan),
+            "seconds_max_scale": g["seconds"].iloc[-1],
+        })
+    return pd.DataFrame(rows)
+
+
+def save_baseline(results: pd.DataFrame, path: Path = BASELINE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "created": date.today().isoformat(),
+        "machine": {"python": platform.python_version(), "pandas": pd.__version__,
+                    "numpy": np.__version__, "processor": platform.machine()},
+        "results": results.to_dict(orient="records"),
+    }
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"Baseline gespeichert: {path}")
+
+
+def compare_baseline(results: pd.DataFrame, path: Path = BASELINE) -> pd.DataFrame:
+    """Laufzeit- und Speicherfaktor gegenüber der Baseline (gleiche Stufe und Skala)."""
+    if not path.exists():
+        return pd.DataFrame()
+    base = pd.DataFrame(json.loads(path.read_text(encoding="utf-8"))["results"])
+    merged = results.merge(base, on=["series", "stage", "scale"], suffixes=("", "_base"))
+    merged["time_factor"] = merged["seconds"] / merged["seconds_base"]
+    merged["memory_factor"] = merged["peak_mb"] / merged["peak_mb_base"]
+    merged["regression"] = merged["time_factor"] > REGRESSION_FACTOR
+    return merged[["series", "stage", "scale", "seconds_base", "seconds", "time_factor",
+                   "memory_factor", "regression"]]
+
+
+def plot_scaling(results: pd.DataFrame, path: Path = PLOT):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fig, (ax_t, ax_m) = plt.subplots(1, 2, figsize=(14, 6))
+    for (series, stage), g in results.groupby(["series", "stage"], sort=False):
+        label = f"{series}/{stage}"
+        ax_t.plot(g["rows"], g["seconds"], marker="o", label=label)
+        ax_m.plot(g["rows"], g["peak_mb"], marker="o", label=label)
+    for ax, ylabel in ((ax_t, "Laufzeit (s)"), (ax_m, "Spitzenspeicher (MB)")):
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel("Eingabezeilen")
+        ax.set_ylabel(ylabel)
+        ax.grid(True, which="both", alpha=0.3)
+    ax_t.set_title("Laufzeit pro Stufe")
+    ax_m.set_title("Spitzenspeicher pro Stufe (tracemalloc)")
+    ax_m.legend(fontsize=8, loc="upper left")
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    print(f"Skalierungskurven gespeichert: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Laufzeit und Speicher der Stufen auf synthetischen Daten.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--series", nargs="*", default=["f1", "f2", "f3"], choices=["f1", "f2", "f3"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="ohne tracemalloc-Lauf (halbe Laufzeit)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Ergebnisse nach {BASELINE.name} schreiben")
+    parser.add_argument("--plot", type=Path, metavar="PNG",
+                        help=f"Kurven in diese Datei zeichnen (mit --save-baseline: {PLOT.name})")
+    args = parser.parse_args()
+
+    records = []
+    for scale in sorted(args.scales):
+        records += run_scale(scale, args.seed, memory=not args.no_memory, series=args.series)
+    results = pd.DataFrame(records)
+
+    exponents = scaling_exponents(results)
+    if not exponents.empty:
+        print("\nSkalierung (Exponent über Eingabezeilen, 1 = linear):")
+        print(exponents.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+    comparison = compare_baseline(results)
+    if not comparison.empty:
+        print(f"\nVergleich mit Baseline ({BASELINE.name}):")
+        print(comparison.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+        slower = comparison[comparison["regression"]]
+        if len(slower):
+            print(f"{len(slower)} Stufen mehr als {REGRESSION_FACTOR}x langsamer als die Baseline")
+
+    if args.save_baseline:
+        save_baseline(results)
+    if args.plot or args.save_baseline:
+        plot_scaling(results, args.plot or PLOT)
+
+
+if __name__ == "__main__":
+    main()
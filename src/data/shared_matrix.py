@@ -0,0 +1,319 @@
+"""
+Trainingsmatrizen einmal ablegen, von allen Worker-Prozessen ohne Kopie einblenden.
+
+Ein Dataset aus train_model (X, y, Saison-Gruppen, Schlüssel season /
+race_id / driver) wird in einen zusammenhängenden Block geschrieben:
+
+    [8 Byte "F3MATRIX"] [uint64 Headerlänge] [JSON-Header] [Arrays, 64-Byte-ausgerichtet]
+
+Der Header enthält Serie, Task, Art, Feature-Namen und pro Array dtype,
+Form und Offset. Text-Schlüssel (driver_name, team_name) liegen als int32-
+Codes im Block, die Kategorien im Header.
+
+Zwei Träger mit demselben Layout:
+- Datei (np.memmap):          export() / attach(path)
+- Shared Memory (POSIX shm):  export_shm() / attach(name, shm=True)
+
+attach() gibt read-only Sichten auf den Block zurück (kein Kopieren, die
+Seiten teilen sich alle Prozesse über den Page Cache bzw. /dev/shm) und
+merkt sich den zuletzt eingeblendeten Block pro Prozess, sodass
+wiederverwendete Worker nur einmal einblenden. Kommt ein anderer Block
+(neuer Lauf mit neuem Temp-Ordner), wird der alte vorher freigegeben; ein
+langlebiger loky-Worker hält so nie mehr als einen Block. evaluate() in train_model, tune_model und explain_model
+übergeben ihren Workern nur noch den Pfad.
+
+Aufruf vom Projektroot:
+    python -m src.data.shared_matrix --series f3 --task top10 --benchmark --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import tempfile
+import time
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"F3MATRIX"
+ALIGN = 64
+
+# Pro Prozess eingeblendeter Block ((Pfad/Name, shm) -> SharedMatrix), höchstens einer
+_ATTACHED = {}
+
+
+class SharedMatrix:
+    """Read-only Sichten auf einen exportierten Block."""
+
+    def __init__(self, buffer, meta: dict, handle=None):
+        self.meta = meta
+        self._handle = handle        # SharedMemory-Objekt bzw. Memmap am Leben halten
+        self.arrays = {}
+        for name, spec in meta["arrays"].items():
+            arr = np.ndarray(tuple(spec["shape"]), dtype=np.dtype(spec["dtype"]),
+                             buffer=buffer, offset=spec["offset"])
+            arr.flags.writeable = False
+            self.arrays[name] = arr
+
+    def __getattr__(self, name):
+        arrays = self.__dict__.get("arrays", {})
+        if name in arrays:
+            return arrays[name]
+        raise AttributeError(name)
+
+    def keys_frame(self) -> pd.DataFrame:
+        """Schlüsselspalten als DataFrame (Text-Codes zurück in Kategorien, kopiert)."""
+        out = {}
+        for col, spec in self.meta.get("keys", {}).items():
+            values = self.arrays[f"key:{col}"]
+            if spec.get("categories") is not None:
+                values = pd.Categorical.from_codes(values, categories=spec["categories"]).astype(object)
+            out[col] = np.asarray(values)
+        return pd.DataFrame(out)
+
+    def to_dataset(self):
+        """Als train_model.Dataset; X, y und groups bleiben Sichten auf den Block."""
+        from src.f1.models.train_model import Dataset
+
+        m = self.meta
+        return Dataset(m["series"], m["task"], m["kind"], self.arrays["X"], self.arrays["y"],
+                       self.arrays["groups"], list(m["feature_names"]), self.keys_frame())
+
+
+# =========================================================
+# 1. Layout
+# =========================================================
+
+def _layout(arrays: dict, meta: dict) -> tuple:
+    """Offsets der Arrays und fertiger Header; Offsets zählen ab Blockanfang."""
+    specs, offset = {}, 0
+    for name, arr in arrays.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        specs[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += arr.nbytes
+    # Header-Länge hängt von den Offsets ab -> Arrays hinter einen festen Vorlauf schieben
+    for _ in range(2):
+        header = json.dumps({**meta, "arrays": specs}).encode()
+        start = -(-(16 + len(header)) // ALIGN) * ALIGN
+        shifted = {n: {**s, "offset": s["offset"] + start} for n, s in specs.items()}
+        header = json.dumps({**meta, "arrays": shifted}).encode()
+        if 16 + len(header) <= start:
+            break
+        specs = {n: {**s, "offset": s["offset"] + ALIGN} for n, s in specs.items()}
+    return header, shifted, start + offset
+
+
+def _fill(buffer, header: bytes, specs: dict, arrays: dict):
+    raw = np.ndarray((16 + len(header),), dtype=np.uint8, buffer=buffer)
+    raw[:] = np.frombuffer(MAGIC + np.uint64(len(header)).tobytes() + header, dtype=np.uint8)
+    for name, arr in arrays.items():
+        spec = specs[name]
+        view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=buffer, offset=spec["offset"])
+        view[...] = arr
+
+
+def _read_meta(buffer) -> dict:
+    if bytes(buffer[:8]) != MAGIC:
+        raise ValueError("Kein exportierter Matrix-Block (falsche Kennung)")
+    length = int(np.frombuffer(bytes(buffer[8:16]), dtype=np.uint64)[0])
+    return json.loads(bytes(buffer[16:16 + length]))
+
+
+def dataset_arrays(data) -> tuple:
+    """Dataset -> (Arrays, Metadaten) im Exportformat."""
+    arrays = {
+        "X": np.ascontiguousarray(data.X, dtype=np.float32),
+        "y": np.ascontiguousarray(data.y),
+        "groups": np.ascontiguousarray(data.groups),
+    }
+    keys = {}
+    for col in data.keys.columns:
+        values = data.keys[col]
+        if pd.api.types.is_numeric_dtype(values):
+            arrays[f"key:{col}"] = values.to_numpy()
+            keys[col] = {"categories": None}
+        else:
+            codes, categories = pd.factorize(values)
+            arrays[f"key:{col}"] = codes.astype(np.int32)
+            keys[col] = {"categories": [str(c) for c in categories]}
+    meta = {"series": data.series, "task": data.task, "kind": data.kind,
+            "feature_names": list(data.feature_names), "keys": keys}
+    return arrays, meta
+
+
+# =========================================================
+# 2. Datei und Shared Memory
+# =========================================================
+
+def write_arrays(path: Path, arrays: dict, meta: dict = None) -> Path:
+    """Beliebige Arrays in eine Blockdatei schreiben (z. B. nur X für SHAP-Worker)."""
+    header, specs, size = _layout(arrays, meta or {})
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    block = np.memmap(tmp, dtype=np.uint8, mode="w+", shape=(size,))
+    _fill(block, header, specs, arrays)
+    block.flush()
+    del block
+    tmp.replace(path)
+    return path
+
+
+def export(data, path: Path) -> Path:
+    arrays, meta = dataset_arrays(data)
+    return write_arrays(path, arrays, meta)
+
+
+def export_shm(data, name: str = None) -> shared_memory.SharedMemory:
+    """Block in POSIX Shared Memory; der Aufrufer ruft am Ende close() und unlink()."""
+    arrays, meta = dataset_arrays(data)
+    header, specs, size = _layout(arrays, meta)
+    shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    _fill(shm.buf, header, specs, arrays)
+    return shm
+
+
+def attach(source, shm: bool = False) -> SharedMatrix:
+    """Block einblenden (pro Prozess nur einmal); ein zuvor eingeblendeter anderer Block wird freigegeben."""
+    key = (str(source), shm)
+    if key not in _ATTACHED:
+        for old in list(_ATTACHED):
+            detach(*old)
+        if shm:
+            handle = shared_memory.SharedMemory(name=str(source))
+            buffer = handle.buf
+        else:
+            handle = np.memmap(source, dtype=np.uint8, mode="r")
+            buffer = handle
+        _ATTACHED[key] = SharedMatrix(buffer, _read_meta(buffer), handle)
+    return _ATTACHED[key]
+
+
+def detach(source, shm: bool = False):
+    """Eingeblendeten Block vergessen (Shared Memory: Handle schliessen)."""
+    matrix = _ATTACHED.pop((str(source), shm), None)
+    if matrix is not None and shm:
+        matrix.arrays.clear()
+        try:
+            matrix._handle.close()
+        except BufferError:
+            # Aufrufer hält noch Sichten; das Handle schliesst sich mit der letzten Referenz
+            pass
+
+
+# =========================================================
+# 3. Benchmark: N Worker, Kopie vs. Memmap vs. Shared Memory
+# =========================================================
+
+def _memory_mb() -> dict:
+    """Pss (anteilig geteilte Seiten) und private Seiten des Prozesses aus /proc (Linux)."""
+    out = {"pss": np.nan, "private": np.nan}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {line.split(":")[0]: int(line.split()[1]) for line in f if line.split()[-1] == "kB"}
+    except OSError:
+        return out
+    out["pss"] = fields.get("Pss", 0) / 1024
+    out["private"] = (fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024
+    return out
+
+
+def _bench_worker(mode, payload, ready, done):
+    start = time.perf_counter()
+    if mode == "ohne Daten":
+        X, y = np.zeros((0, 1), dtype=np.float32), np.zeros(0)
+    elif mode == "kopie":
+        X, y = payload
+    else:
+        d = attach(payload, shm=(mode == "shared memory"))
+        X, y = d.X, d.y
+    # Alle Seiten einmal lesen (wie ein Fit über die ganze Matrix)
+    checksum = float(np.nansum(X, dtype=np.float64)) + float(y.sum())
+    ready.put({"startup_s": time.perf_counter() - start, "checksum": checksum, **_memory_mb()})
+    done.wait()
+
+
+def _run_workers(mode, payload, n_workers) -> dict:
+    ctx = mp.get_context("spawn")   # wie loky: Argumente werden gepickelt, nicht geerbt
+    ready, done = ctx.Queue(), ctx.Event()
+    start = time.perf_counter()
+    procs = [ctx.Process(target=_bench_worker, args=(mode, payload, ready, done)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    reports = [ready.get() for _ in procs]
+    wall = time.perf_counter() - start
+    done.set()
+    for p in procs:
+        p.join()
+    return {
+        "bis alle bereit (s)": wall,
+        "Laden pro Worker (s)": float(np.mean([r["startup_s"] for r in reports])),
+        "Pss gesamt (MB)": float(np.sum([r["pss"] for r in reports])),
+        "privat gesamt (MB)": float(np.sum([r["private"] for r in reports])),
+        "checksum": reports[0]["checksum"],
+    }
+
+
+def benchmark(data, n_workers: int = 4, scale: int = 1):
+    """Startzeit und Gesamtspeicher eines N-Worker-Jobs; scale vervielfacht die Zeilen."""
+    if scale > 1:
+        from src.f1.models.train_model import Dataset
+
+        data = Dataset(data.series, data.task, data.kind, np.tile(data.X, (scale, 1)),
+                       np.tile(data.y, scale), np.tile(data.groups, scale), data.feature_names,
+                       pd.concat([data.keys] * scale, ignore_index=True))
+    nbytes = data.X.nbytes + data.y.nbytes
+    print(f"{data.series}/{data.task}: {data.X.shape[0]:,} Zeilen x {data.X.shape[1]} Features "
+          f"({nbytes / 2**20:.1f} MB X+y), {n_workers} Worker")
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="f_matrix_") as tmp:
+        start = time.perf_counter()
+        path = export(data, Path(tmp) / "data.f3m")
+        print(f"  Export Datei: {(time.perf_counter() - start) * 1000:.0f} ms, "
+              f"{path.stat().st_size / 2**20:.1f} MB")
+        start = time.perf_counter()
+        shm = export_shm(data)
+        print(f"  Export Shared Memory: {(time.perf_counter() - start) * 1000:.0f} ms")
+        try:
+            # Grundlast eines Workers (Interpreter, NumPy, pandas) zum Abziehen
+            results["ohne Daten"] = _run_workers("ohne Daten", None, n_workers)
+            results["kopie"] = _run_workers("kopie", (data.X, data.y), n_workers)
+            results["memmap"] = _run_workers("memmap", str(path), n_workers)
+            results["shared memory"] = _run_workers("shared memory", shm.name, n_workers)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    table = pd.DataFrame(results).T
+    checks = table.pop("checksum").drop("ohne Daten")
+    table["Daten gesamt (MB)"] = table["Pss gesamt (MB)"] - table.at["ohne Daten", "Pss gesamt (MB)"]
+    print(table.to_string(float_format=lambda v: f"{v:.2f}"))
+    print(f"  gleiche Prüfsumme in allen Varianten: {checks.nunique() == 1}")
+
+
+def main():
+    from src.f1.models.train_model import SERIES, load_dataset
+
+    parser = argparse.ArgumentParser(description="Trainingsmatrix als geteilter, typisierter Block.")
+    parser.add_argument("--series", choices=list(SERIES), default="f3")
+    parser.add_argument("--task", default="top10")
+    parser.add_argument("--out", type=Path, help="Block als Datei schreiben")
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--scale", type=int, default=200, help="Zeilen für den Benchmark vervielfachen")
+    args = parser.parse_args()
+
+    data = load_dataset(args.series, args.task)
+    if args.benchmark:
+        benchmark(data, args.workers, args.scale)
+        return
+    out = args.out or Path(tempfile.gettempdir()) / f"{args.series}_{args.task}.f3m"
+    export(data, out)
+    d = attach(out)
+    print(f"{out}: {out.stat().st_size / 2**10:.0f} KB, Arrays {({k: v.shape for k, v in d.arrays.items()})}")
+
+
+if __name__ == "__main__":
+    main()
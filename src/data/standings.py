@@ -0,0 +1,410 @@
+"""
+Meisterschaftsstand nach jeder Runde (F1 / F2 / F3) in einem vektorisierten Durchlauf.
+
+- Punkteschemata pro Serie und ab Saison konfigurierbar (Feature-/Sprint-
+  Tabelle, Bonus für schnellste Runde und Pole)
+- Punkte, Siege und Positionszählungen werden als dichte Arrays
+  (Fahrer-Saison × Runde) aufgebaut und kumuliert
+- Gleichstände werden per Countback (mehr Siege, dann mehr 2. Plätze, ...)
+  mit einem einzigen np.lexsort über alle Saisons und Runden aufgelöst
+
+Eingabe ist eine Tabelle mit einer Zeile pro Fahrer und Rennen:
+season, round, driver, race_type ("feature"/"sprint"), position (NaN = nicht
+klassiert) und optional fastest_lap, pole, multiplier oder fertige Punkte.
+
+Aufruf vom Projektroot:
+    python -m src.data.standings --verify
+    python -m src.data.standings --benchmark 70
+    python -m src.data.standings --series f3 --season 2025 --after-round 1
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data import partitions
+from src.data.load_f1_kaggle import (
+    load_driver_standings,
+    load_races,
+    load_results,
+    load_sprint_results,
+)
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+F3_INPUT = BASE_DIR / "data" / "f3" / "f3_2019_2025_races_features.csv"
+
+RACE_TYPES = ("feature", "sprint")
+
+# Punkteschemata: Liste von (gültig ab Saison, Schema).
+# fastest_lap: Bonus pro Renntyp, nur wenn im Ziel unter den Top fastest_lap_top
+# pole: Bonus für die Zeile, die als Pole markiert ist
+POINTS_SYSTEMS = {
+    "f1": [
+        (2010, {"feature": [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], "sprint": [],
+                "fastest_lap": {}, "fastest_lap_top": 10, "pole": 0}),
+        (2019, {"feature": [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], "sprint": [],
+                "fastest_lap": {"feature": 1}, "fastest_lap_top": 10, "pole": 0}),
+        (2021, {"feature": [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], "sprint": [3, 2, 1],
+                "fastest_lap": {"feature": 1}, "fastest_lap_top": 10, "pole": 0}),
+        (2022, {"feature": [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], "sprint": [8, 7, 6, 5, 4, 3, 2, 1],
+                "fastest_lap": {"feature": 1}, "fastest_lap_top": 10, "pole": 0}),
+        (2025, {"feature": [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], "sprint": [8, 7, 6, 5, 4, 3, 2, 1],
+                "fastest_lap": {}, "fastest_lap_top": 10, "pole": 0}),
+    ],
+    "f2": [
+        (2017, {"feature": [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], "sprint": [15, 12, 10, 8, 6, 4, 2, 1],
+                "fastest_lap": {"feature": 2, "sprint": 2}, "fastest_lap_top": 10, "pole": 4}),
+        (2022, {"feature": [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], "sprint": [10, 8, 6, 5, 4, 3, 2, 1],
+                "fastest_lap": {"feature": 1, "sprint": 1}, "fastest_lap_top": 10, "pole": 2}),
+    ],
+    "f3": [
+        (2019, {"feature": [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], "sprint": [15, 12, 10, 8, 6, 4, 2, 1],
+                "fastest_lap": {"feature": 2, "sprint": 2}, "fastest_lap_top": 10, "pole": 4}),
+        (2022, {"feature": [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], "sprint": [10, 9, 8, 7, 6, 5, 4, 3, 2, 1],
+                "fastest_lap": {"feature": 1, "sprint": 1}, "fastest_lap_top": 10, "pole": 2}),
+    ],
+}
+
+# Rennen mit abweichender Wertung (doppelte / halbe Punkte), (Saison, Runde) -> Faktor
+F1_SPECIAL_RACES = {(2014, 19): 2.0, (2021, 12): 0.5}
+
+
+def schema_for(series: str, season: int) -> dict:
+    """Gültiges Punkteschema einer Serie für eine Saison."""
+    starts = [s for s, _ in POINTS_SYSTEMS[series]]
+    idx = np.searchsorted(starts, season, side="right") - 1
+    if idx < 0:
+        raise ValueError(f"Kein Punkteschema für {series} vor Saison {starts[0]}")
+    return POINTS_SYSTEMS[series][idx][1]
+
+
+def points_table(series: str, season: int, race_type: str, n_positions: int) -> np.ndarray:
+    """Punkte nach Zielposition (Index 0 = P1), mit Nullen aufgefüllt."""
+    table = np.zeros(n_positions, dtype=np.float32)
+    pts = schema_for(series, season)[race_type][:n_positions]
+    table[:len(pts)] = pts
+    return table
+
+
+# =========================================================
+# 1. Punkte vergeben
+# =========================================================
+
+def _schema_arrays(series: str):
+    """Alle Schemata einer Serie als Arrays: Punkte[Schema, Typ, Position], Boni."""
+    systems = POINTS_SYSTEMS[series]
+    width = max(len(s[t]) for _, s in systems for t in RACE_TYPES)
+    table = np.zeros((len(systems), len(RACE_TYPES), width + 1))  # Position 0 = keine Punkte
+    fl_bonus = np.zeros((len(systems), len(RACE_TYPES)))
+    fl_top = np.zeros(len(systems))
+    pole = np.zeros(len(systems))
+    for i, (_, schema) in enumerate(systems):
+        for t, race_type in enumerate(RACE_TYPES):
+            pts = schema[race_type]
+            table[i, t, 1:len(pts) + 1] = pts
+            fl_bonus[i, t] = schema["fastest_lap"].get(race_type, 0)
+        fl_top[i] = schema["fastest_lap_top"]
+        pole[i] = schema["pole"]
+    starts = np.array([s for s, _ in systems])
+    return starts, table, fl_bonus, fl_top, pole
+
+
+def _flag(results: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in results:
+        return np.zeros(len(results), dtype=bool)
+    return results[col].fillna(False).to_numpy(dtype=bool)
+
+
+def award_points(results: pd.DataFrame, series: str) -> np.ndarray:
+    """Punkte pro Zeile nach dem Schema der jeweiligen Saison (ohne Schleife)."""
+    starts, table, fl_bonus, fl_top, pole = _schema_arrays(series)
+    season = results["season"].to_numpy(dtype=np.int64)
+    system = np.searchsorted(starts, season, side="right") - 1
+    if (system < 0).any():
+        raise ValueError(f"Kein Punkteschema für {series} vor Saison {starts[0]}")
+
+    race_type = pd.Categorical(results.get("race_type", pd.Series("feature", index=results.index)),
+                               categories=RACE_TYPES)
+    if (race_type.codes < 0).any():
+        raise ValueError(f"Unbekannter race_type, erlaubt: {RACE_TYPES}")
+    t = race_type.codes
+
+    pos = pd.to_numeric(results["position"], errors="coerce").to_numpy(dtype=float)
+    width = table.shape[2] - 1
+    p_idx = np.where((pos >= 1) & (pos <= width), np.nan_to_num(pos), 0).astype(np.int64)
+
+    points = table[system, t, p_idx]
+    points += _flag(results, "fastest_lap") * (pos <= fl_top[system]) * fl_bonus[system, t]
+    points += _flag(results, "pole") * pole[system]
+    if "multiplier" in results:
+        points *= results["multiplier"].fillna(1.0).to_numpy(dtype=float)
+    return points
+
+
+# =========================================================
+# 2. Stand nach jeder Runde
+# =========================================================
+
+def compute_standings(results: pd.DataFrame, series: str = None, points_col: str = None,
+                      countback_types=("feature",)) -> pd.DataFrame:
+    """
+    Kumulierter Stand nach jeder Runde jeder Saison.
+    Punkte kommen aus points_col (falls angegeben) oder aus dem Schema der Serie.
+    Countback zählt nur Zielpositionen der Renntypen in countback_types.
+    Ein Fahrer erscheint ab seiner ersten Runde bis Saisonende im Stand.
+    """
+    if points_col is not None:
+        points = results[points_col].fillna(0).to_numpy(dtype=float)
+    else:
+        points = award_points(results, series)
+
+    season = results["season"].to_numpy(dtype=np.int64)
+    rnd = results["round"].to_numpy(dtype=np.int64)
+    # Countback nach eigener Spalte (z. B. Reihenfolge inkl. Ausfälle), sonst Zielposition
+    cb_col = "countback_position" if "countback_position" in results else "position"
+    pos = pd.to_numeric(results[cb_col], errors="coerce").to_numpy(dtype=float)
+    race_type = results["race_type"].to_numpy() if "race_type" in results else np.full(len(results), "feature")
+
+    # Runden je Saison dicht durchnummerieren (0 .. n_rounds-1)
+    round_keys, round_inv = np.unique(season * 1000 + rnd, return_inverse=True)
+    round_season = round_keys // 1000
+    seasons, season_start, season_rounds = np.unique(round_season, return_index=True, return_counts=True)
+    r = (np.arange(len(round_keys)) - season_start[np.searchsorted(seasons, round_season)])[round_inv]
+    n_r = int(season_rounds.max())
+
+    # Fahrer-Saisons als Entitäten
+    driver_codes, drivers = pd.factorize(results["driver"], sort=True)
+    n_drv = len(drivers)
+    entity_keys, e = np.unique(season * n_drv + driver_codes, return_inverse=True)
+    n_e = len(entity_keys)
+    e_season = entity_keys // n_drv
+    e_driver = entity_keys % n_drv
+    cell = e * n_r + r
+
+    cum_points = np.bincount(cell, weights=points, minlength=n_e * n_r).reshape(n_e, n_r).cumsum(axis=1)
+
+    # Positionszählungen für Countback: counts[e, r, k] = Anzahl (k+1)-Plätze bis Runde r
+    cb = np.isin(race_type, countback_types) & (pos >= 1)
+    n_k = int(np.nanmax(pos[cb])) if cb.any() else 1
+    k = np.nan_to_num(pos[cb]).astype(np.int64) - 1
+    counts = (
+        np.bincount(cell[cb] * n_k + k, minlength=n_e * n_r * n_k)
+        .reshape(n_e, n_r, n_k)
+        .cumsum(axis=1, dtype=np.int32)
+    )
+
+    # Gültige Zellen: ab erster Teilnahme bis letzte Runde der Saison
+    first_round = np.full(n_e, n_r)
+    np.minimum.at(first_round, e, r)
+    s_idx = np.searchsorted(seasons, e_season)
+    steps = np.arange(n_r)
+    valid = (steps[None, :] >= first_round[:, None]) & (steps[None, :] < season_rounds[s_idx][:, None])
+    ei, ri = np.nonzero(valid)
+
+    # Sortierschlüssel (letzter = primär): Saison, Runde, -Punkte, -P1, -P2, ..., Fahrer
+    cb_counts = counts[ei, ri]
+    keys = [e_driver[ei]]
+    keys += [-cb_counts[:, j] for j in range(n_k - 1, -1, -1)]
+    keys += [-cum_points[ei, ri], ri, e_season[ei]]
+    order = np.lexsort(keys)
+    ei, ri = ei[order], ri[order]
+
+    group = e_season[ei] * n_r + ri
+    new_group = np.r_[True, group[1:] != group[:-1]]
+    group_start = np.flatnonzero(new_group)
+    position = np.arange(len(ei)) - np.repeat(group_start, np.diff(np.r_[group_start, len(ei)])) + 1
+
+    return pd.DataFrame({
+        "season": e_season[ei],
+        "round": round_keys[season_start[s_idx[ei]] + ri] % 1000,
+        "driver": drivers[e_driver[ei]],
+        "points": cum_points[ei, ri],
+        "position": position,
+        "wins": counts[ei, ri, 0],
+    })
+
+
+def standings_after(standings: pd.DataFrame, season: int, after_round: int) -> pd.DataFrame:
+    """Stand einer Saison nach der letzten Runde <= after_round."""
+    season_rows = standings[standings["season"] == season]
+    last = season_rows.loc[season_rows["round"] <= after_round, "round"].max()
+    return season_rows[season_rows["round"] == last].reset_index(drop=True)
+
+
+def naive_standings(results: pd.DataFrame, points: np.ndarray, countback_types=("feature",)) -> pd.DataFrame:
+    """Referenz mit Schleife über Saisons und Runden (nur für Prüfung/Benchmark)."""
+    df = results.assign(pts=points)
+    rows = []
+    for season, season_df in df.groupby("season"):
+        totals, tallies = {}, {}
+        for rnd, round_df in season_df.groupby("round"):
+            for row in round_df.itertuples():
+                totals[row.driver] = totals.get(row.driver, 0.0) + row.pts
+                tally = tallies.setdefault(row.driver, {})
+                if getattr(row, "race_type", "feature") in countback_types and row.position >= 1:
+                    tally[int(row.position)] = tally.get(int(row.position), 0) + 1
+            max_pos = max((p for t in tallies.values() for p in t), default=1)
+            ranking = sorted(
+                totals,
+                key=lambda d: (-totals[d], *[-tallies[d].get(p, 0) for p in range(1, max_pos + 1)], d),
+            )
+            for i, driver in enumerate(ranking, start=1):
+                rows.append((season, rnd, driver, totals[driver], i, tallies[driver].get(1, 0)))
+    return pd.DataFrame(rows, columns=["season", "round", "driver", "points", "position", "wins"])
+
+
+# =========================================================
+# 3. Ergebnisse der Serien
+# =========================================================
+
+def f1_results(include_sprints: bool = True) -> pd.DataFrame:
+    """Kaggle-Ergebnisse (Rennen + Sprints) im Format der Standings-Engine."""
+    races = load_races()[["raceId", "year", "round"]].rename(columns={"year": "season"})
+    cols = ["raceId", "driverId", "position", "positionOrder", "points"]
+    res = load_results()
+    frames = [res[cols].assign(
+        race_type="feature",
+        fastest_lap=pd.to_numeric(res["rank"], errors="coerce") == 1,
+    )]
+    if include_sprints:
+        frames.append(load_sprint_results()[cols].assign(race_type="sprint", fastest_lap=False))
+
+    out = pd.concat(frames, ignore_index=True).merge(races, on="raceId")
+    out["position"] = pd.to_numeric(out["position"], errors="coerce")
+    special = pd.Series(F1_SPECIAL_RACES)
+    out["multiplier"] = [special.get((s, r), 1.0) for s, r in zip(out["season"], out["round"])]
+    return out.rename(columns={"driverId": "driver", "positionOrder": "countback_position"})
+
+
+def f3_results(df: pd.DataFrame) -> pd.DataFrame:
+    """F3-Features (ein Rennen pro Runde) im Format der Standings-Engine."""
+    pos = pd.to_numeric(df["position"], errors="coerce")
+    return pd.DataFrame({
+        "season": df["season"],
+        "round": df["session_round"],
+        "driver": df["driver_name"],
+        "race_type": "feature",
+        "position": pos.where(df["finished"] == 1),
+        "fastest_lap": df["best_lap_s"].notna() & (df["best_lap_s"] == df["best_race_lap_s"]),
+    })
+
+
+def verify_f1(recompute_from: int = 2010) -> pd.DataFrame:
+    """
+    Vergleicht mit driver_standings.csv. Bis recompute_from werden die Punkte
+    aus results.csv übernommen (Streichresultate & Co. sind nicht abgebildet),
+    ab recompute_from aus dem F1-Schema neu berechnet.
+    """
+    results = f1_results()
+    old = results[results["season"] < recompute_from]
+    new = results[results["season"] >= recompute_from]
+    engine = pd.concat([
+        compute_standings(old, points_col="points"),
+        compute_standings(new, series="f1"),
+    ], ignore_index=True)
+
+    races = load_races()[["raceId", "year", "round"]].rename(columns={"year": "season"})
+    official = load_driver_standings().merge(races, on="raceId").rename(columns={"driverId": "driver"})
+    merged = official.merge(engine, on=["season", "round", "driver"], how="left", suffixes=("_kaggle", ""))
+    merged["points_ok"] = np.isclose(merged["points"], merged["points_kaggle"])
+    merged["position_ok"] = merged["position"] == merged["position_kaggle"]
+    merged["wins_ok"] = merged["wins"] == merged["wins_kaggle"]
+    # Abweichungen bei Punktgleichheit: Kaggle ordnet Fahrer ohne Zielankunft nicht per Countback
+    merged["points_tied"] = merged.duplicated(["season", "round", "points_kaggle"], keep=False)
+    merged["era"] = np.where(merged["season"] >= recompute_from, f"ab {recompute_from} (Schema)",
+                             (merged["season"] // 10 * 10).astype(str) + "er")
+    return merged
+
+
+# =========================================================
+# 4. Benchmark
+# =========================================================
+
+def synthetic_results(n_seasons: int = 70, n_drivers: int = 24, n_rounds: int = 24,
+                      sprint_every: int = 4, first_season: int = 2022, seed: int = 0) -> pd.DataFrame:
+    """Zufällige Saisons mit Sprints, DNFs, schnellster Runde und Pole."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for race_type, rounds in (("feature", np.arange(1, n_rounds + 1)),
+                              ("sprint", np.arange(1, n_rounds + 1, sprint_every))):
+        n_races = n_seasons * len(rounds)
+        finish = np.argsort(rng.random((n_races, n_drivers)), axis=1) + 1
+        dnf = rng.random((n_races, n_drivers)) < 0.1
+        fl = np.zeros((n_races, n_drivers), dtype=bool)
+        fl[np.arange(n_races), rng.integers(0, n_drivers, n_races)] = True
+        frames.append(pd.DataFrame({
+            "season": np.repeat(np.repeat(first_season + np.arange(n_seasons), len(rounds)), n_drivers),
+            "round": np.repeat(np.tile(rounds, n_seasons), n_drivers),
+            "driver": np.tile([f"D{i:02d}" for i in range(n_drivers)], n_races),
+            "race_type": race_type,
+            "position": np.where(dnf, np.nan, finish).ravel(),
+            "fastest_lap": fl.ravel(),
+            "pole": (finish == 1).ravel() & (race_type == "feature"),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def benchmark(n_seasons: int = 70):
+    results = synthetic_results(n_seasons)
+
+    start = time.perf_counter()
+    points = award_points(results, "f3")
+    fast = compute_standings(results.assign(points=points), points_col="points")
+    fast_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    slow = naive_standings(results, points)
+    slow_s = time.perf_counter() - start
+
+    cols = ["season", "round", "driver"]
+    a = fast.sort_values(cols).reset_index(drop=True)
+    b = slow.sort_values(cols).reset_index(drop=True)
+    same = (a[["points", "position", "wins"]].to_numpy() == b[["points", "position", "wins"]].to_numpy()).all()
+
+    print(f"{n_seasons} Saisons, {len(results):,} Ergebniszeilen -> {len(fast):,} Standings-Zeilen")
+    print(f"  vektorisiert: {fast_s:7.3f} s")
+    print(f"  Schleife:     {slow_s:7.3f} s  (Faktor {slow_s / fast_s:.1f})")
+    print(f"  identisch:    {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Meisterschaftsstand nach jeder Runde.")
+    parser.add_argument("--series", choices=["f1", "f3"], default="f3")
+    parser.add_argument("--season", type=int)
+    parser.add_argument("--after-round", type=int)
+    parser.add_argument("--verify", action="store_true", help="F1-Stand gegen driver_standings.csv prüfen")
+    parser.add_argument("--benchmark", type=int, metavar="N_SEASONS")
+    args = parser.parse_args()
+
+    if args.verify:
+        report = verify_f1()
+        summary = report.groupby("era")[["points_ok", "position_ok", "wins_ok"]].mean()
+        print(summary.to_string(float_format=lambda v: f"{v:.4f}"))
+        untied = report[~report["points_tied"]]
+        print(f"\nGesamt: {len(report):,} Zeilen, Punkte {report['points_ok'].mean():.4f}, "
+              f"Position {report['position_ok'].mean():.4f}, "
+              f"Position ohne Punktgleichheit {untied['position_ok'].mean():.4f}")
+    if args.benchmark:
+        benchmark(args.benchmark)
+    if args.verify or args.benchmark:
+        return
+
+    if args.series == "f3":
+        # Stand einer Saison braucht nur deren Partitionen (src/data/partitions.py)
+        f3 = partitions.read("f3_races_features", seasons=args.season) if args.season else pd.read_csv(F3_INPUT)
+        standings = compute_standings(f3_results(f3), series="f3")
+    else:
+        standings = compute_standings(f1_results(), points_col="points")
+    season = args.season or int(standings["season"].max())
+    after = args.after_round or int(standings.loc[standings["season"] == season, "round"].max())
+    table = standings_after(standings, season, after)
+    print(f"Stand {args.series.upper()} {season} nach Runde {after}:")
+    print(table.head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
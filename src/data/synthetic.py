@@ -0,0 +1,942 @@
+"""
+Synthetische F1/F2/F3-Rohdaten im Format, das die Pipeline einliest.
+
+Die echten Datensätze sind klein (F3 ~7.5k Rohzeilen, F1 ~27k Ergebnisse).
+Der Generator erzeugt Tabellen mit derselben Struktur und ähnlichen
+Verteilungen, skaliert über die Anzahl Saisons (Feldgrösse und Rennen pro
+Saison bleiben realistisch, scale=10 heisst 10-mal so viele Saisons):
+
+- Zielreihenfolge aus Fahrerstärke (bleibt über die Karriere), Teamstärke
+  pro Saison und Rauschen pro Rennen; Fahrerwechsel zwischen den Saisons
+- Streckenlänge, Tempo und Renndistanz ergeben Rundenzeiten und Rundenzahl;
+  Abstände, Überrundete, DNF/DQ/DNS, Bestrunden und kph wie in den echten
+  Daten (Vergleich mit --check)
+- F3: f3_2019_2025_raw_results.csv mit driver_info ("127J. DaruvalaDARPrema Racing")
+  und Zeitstrings; F2: die Session-CSVs; F1: Kaggle-Tabellen inkl.
+  lap_times und pit_stops, fehlende Werte als \\N
+
+Aufruf vom Projektroot:
+    python -m src.data.synthetic --scale 10 --out data/synthetic/x10
+    python -m src.data.synthetic --check
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.standings import POINTS_SYSTEMS, points_table
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+OUT_DIR = BASE_DIR / "data" / "synthetic"
+
+F3_RAW = "f3_2019_2025_raw_results.csv"
+NA = "\\N"
+
+# Form einer Serie bei scale=1 (grob an den echten Daten ausgerichtet)
+SHAPES = {
+    "f1": {"first_season": 1950, "n_seasons": 75, "rounds": 15, "teams": 12, "cars": 2,
+           "turnover": 0.2, "kph": 205.0, "distance_km": 305.0, "gap": 9.0, "dnf": 0.35},
+    "f2": {"first_season": 2017, "n_seasons": 8, "rounds": 11, "teams": 9, "cars": 2,
+           "turnover": 0.5, "kph": 170.0, "distance_km": 145.0, "gap": 4.0, "dnf": 0.03},
+    "f3": {"first_season": 2019, "n_seasons": 7, "rounds": 9, "teams": 10, "cars": 3,
+           "turnover": 0.65, "kph": 185.0, "distance_km": 110.0, "gap": 1.7, "dnf": 0.12},
+}
+
+# Anteil der Ausfälle nach Art (echte F3-Daten: 97 % DNF, 2.6 % DQ, 0.4 % DNS)
+NC_SHARE = {"DNF": 0.97, "DQ": 0.025, "DNS": 0.005}
+
+TEAMS = [
+    "Vector Racing", "Nordhaus Motorsport", "ART Grand Prix", "Corsa Junior Team",
+    "Helix Racing", "Falco Motorsport", "Meridian GP", "Orion Racing",
+    "Kestrel Motorsport", "Torque Junior Team", "Lumen Racing", "Sable GP",
+]
+FORENAMES = [
+    "Adrian", "Bruno", "Carlos", "Dario", "Elias", "Felix", "Gabriel", "Hugo", "Ivan", "Jonas",
+    "Kai", "Luca", "Marco", "Nico", "Oliver", "Pedro", "Quentin", "Rafael", "Simon", "Theo",
+    "Umberto", "Victor", "William", "Xavier", "Yannick", "Zane",
+]
+NATIONALITIES = ["British", "German", "Italian", "French", "Spanish", "Dutch", "Brazilian", "Japanese"]
+_SYLLABLES = ["ka", "lo", "ren", "vi", "mar", "tes", "dan", "or", "bel", "si", "ru", "nek",
+              "a", "te", "vo", "lin"]
+
+
+# =========================================================
+# 1. Gemeinsames Modell: Fahrerfeld, Rennen, Sessions
+# =========================================================
+
+def _careers(rng, n_seasons: int, n_slots: int, turnover: float):
+    """Fahrer-ID pro (Saison, Cockpit); neuer Fahrer mit Wahrscheinlichkeit turnover."""
+    new = rng.random((n_seasons, n_slots)) < turnover
+    new[0] = True
+    ids = np.cumsum(new.ravel()).reshape(new.shape) - 1
+    # letzte Saison mit Wechsel pro Cockpit -> dessen ID
+    last = np.maximum.accumulate(np.where(new, np.arange(n_seasons)[:, None], 0), axis=0)
+    return ids[last, np.arange(n_slots)[None, :]], int(new.sum())
+
+
+def _field(rng, shape: dict, scale: int) -> dict:
+    """Fahrer, Teams, Stärke und Strecke pro Rennen (Arrays Rennen × Cockpit)."""
+    n_seasons = shape["n_seasons"] * scale
+    teams, cars, rounds = shape["teams"], shape["cars"], shape["rounds"]
+    n_slots = teams * cars
+    roster, n_drivers = _careers(rng, n_seasons, n_slots, shape["turnover"])
+    skill = rng.normal(0.0, 1.0, n_drivers)
+    team_pace = rng.normal(0.0, 0.6, teams)[None, :] + rng.normal(0.0, 0.5, (n_seasons, teams))
+
+    season_idx = np.repeat(np.arange(n_seasons), rounds)
+    slot_team = np.repeat(np.arange(teams), cars)
+    driver = roster[season_idx]
+
+    # Strecken: Länge und Tempo -> Rundenzeit, Renndistanz -> Runden
+    n_circuits = max(2 * rounds, 20)
+    length = rng.uniform(3.3, 7.0, n_circuits)
+    speed = shape["kph"] * rng.uniform(0.9, 1.1, n_circuits)
+    circuit = rng.integers(0, n_circuits, len(season_idx))
+
+    return {
+        "season": shape["first_season"] + season_idx,
+        "round": np.tile(np.arange(1, rounds + 1), n_seasons),
+        "driver": driver,
+        "team": np.broadcast_to(slot_team, driver.shape),
+        "car": np.broadcast_to(np.arange(1, n_slots + 1), driver.shape),
+        "strength": skill[driver] + team_pace[season_idx[:, None], slot_team[None, :]],
+        "skill": skill,
+        "circuit": circuit,
+        "length_km": length[circuit],
+        "lap_time": length[circuit] / speed[circuit] * 3600.0,
+        "laps": np.maximum(np.rint(shape["distance_km"] / length[circuit]), 5).astype(np.int64),
+        "n_drivers": n_drivers,
+        "n_circuits": n_circuits,
+    }
+
+
+def _race(rng, field: dict, shape: dict, distance_share: float = 1.0) -> dict:
+    """
+    Ein Rennen pro Wochenende. Zeilen wie in den Ergebnislisten: Klassierte
+    nach Position, danach Ausfälle nach gefahrenen Runden. Gibt flache Arrays
+    (eine Zeile pro Fahrer und Rennen) zurück.
+    """
+    n_races, n_slots = field["driver"].shape
+    rows = np.arange(n_races)[:, None]
+    perf = field["strength"] + rng.normal(0.0, 1.0, (n_races, n_slots))
+    by_perf = np.argsort(-perf, axis=1)
+
+    laps_total = np.maximum(np.rint(field["laps"] * distance_share), 5).astype(np.int64)
+    avg_lap = field["lap_time"] * rng.uniform(1.03, 1.10, n_races)
+
+    # Ausfälle unabhängig von der Stärke, Art nach NC_SHARE
+    u = rng.random((n_races, n_slots)) / shape["dnf"]
+    status = np.select([u < NC_SHARE["DNF"], u < 1 - NC_SHARE["DNS"], u < 1], ["DNF", "DQ", "DNS"], "")
+    classified = status == ""
+    laps_nc = np.where(status == "DNF", rng.integers(0, laps_total[:, None] + 1, (n_races, n_slots)),
+                       np.where(status == "DQ", laps_total[:, None], 0))
+
+    # Zeilenreihenfolge: Klassierte nach Leistung, dann Ausfälle mit mehr Runden zuerst
+    rank = np.empty_like(by_perf)
+    rank[rows, by_perf] = np.arange(n_slots)[None, :]
+    key = np.where(classified, rank, n_slots + laps_total[:, None] - laps_nc)
+    order = np.argsort(key, axis=1, kind="stable")
+
+    def pick(a):
+        return np.broadcast_to(a, (n_races, n_slots))[rows, order]
+
+    classified, status, laps_nc = pick(classified), pick(status), pick(laps_nc)
+    pos = np.where(classified, np.cumsum(classified, axis=1), 0)
+
+    step = rng.exponential(shape["gap"], (n_races, n_slots)) * classified
+    step[:, 0] = 0.0
+    gap = np.cumsum(step, axis=1)
+    lapped = np.floor(gap / avg_lap[:, None]).astype(np.int64)
+    laps_done = np.where(classified, laps_total[:, None] - lapped, laps_nc)
+
+    winner = laps_total * avg_lap
+    race_time = np.where(
+        classified,
+        winner[:, None] + gap - lapped * avg_lap[:, None],
+        laps_nc * avg_lap[:, None] * rng.uniform(1.0, 1.05, (n_races, n_slots)),
+    )
+    race_time[laps_done == 0] = np.nan
+
+    # Bestrunde: etwas langsamer mit der Position, nur mit gefahrenen Runden
+    best = (field["lap_time"][:, None] + 0.06 * np.arange(n_slots)[None, :]
+            + np.abs(rng.normal(0.0, 0.4, (n_races, n_slots))))
+    best[laps_done == 0] = np.nan
+    best_lap = np.where(laps_done > 0, rng.integers(1, np.maximum(laps_done, 1) + 1), 0)
+    kph = field["length_km"][:, None] * laps_done / race_time * 3600.0
+
+    interval = np.diff(gap, axis=1, prepend=0.0)
+    return {
+        "race": np.repeat(np.arange(n_races), n_slots),
+        "driver": pick(field["driver"]).ravel(),
+        "team": pick(field["team"]).ravel(),
+        "car": pick(field["car"]).ravel(),
+        "grid": (rank[rows, order] + 1).ravel(),
+        "status": status.ravel(),
+        "classified": classified.ravel(),
+        "pos": pos.ravel(),
+        "laps": laps_done.ravel(),
+        "laps_total": np.repeat(laps_total, n_slots),
+        "lapped": np.where(classified, lapped, 0).ravel(),
+        "time_s": race_time.ravel(),
+        "winner_s": np.repeat(winner, n_slots),
+        "gap_s": gap.ravel(),
+        "int_s": interval.ravel(),
+        "best_s": best.ravel(),
+        "best_lap": best_lap.ravel(),
+        "kph": kph.ravel(),
+        "avg_lap": np.repeat(avg_lap, n_slots),
+    }
+
+
+def _session(rng, field: dict, start_hour: int = 10) -> dict:
+    """Training/Qualifying: eine schnellste Runde pro Fahrer, nach Zeit sortiert."""
+    n_races, n_slots = field["driver"].shape
+    rows = np.arange(n_races)[:, None]
+    perf = field["strength"] + rng.normal(0.0, 0.7, (n_races, n_slots))
+    lap = field["lap_time"][:, None] * (1.0 - 0.008 * perf) + np.abs(rng.normal(0.0, 0.1, (n_races, n_slots)))
+    order = np.argsort(lap, axis=1)
+    lap = lap[rows, order]
+    gap = lap - lap[:, :1]
+    set_on = start_hour * 3600 + rng.integers(0, 1800, n_races)[:, None] + rng.integers(0, 2400, (n_races, n_slots))
+    return {
+        "race": np.repeat(np.arange(n_races), n_slots),
+        "driver": field["driver"][rows, order].ravel(),
+        "team": field["team"][rows, order].ravel(),
+        "car": field["car"][rows, order].ravel(),
+        "pos": np.tile(np.arange(1, n_slots + 1), n_races),
+        "laps": rng.integers(5, 17, n_races * n_slots),
+        "time_s": lap.ravel(),
+        "gap_s": gap.ravel(),
+        "int_s": np.diff(gap, axis=1, prepend=0.0).ravel(),
+        "kph": (field["length_km"][:, None] / lap * 3600.0).ravel(),
+        "set_on": set_on.ravel(),
+    }
+
+
+# =========================================================
+# 2. Formatierung wie in den Rohdaten
+# =========================================================
+
+def _fmt_time(seconds, hours: bool = False, missing=NA) -> pd.Series:
+    """Sekunden -> 'm:ss.fff' (oder 'h:mm:ss.fff' ab einer Stunde, falls hours)."""
+    seconds = np.asarray(seconds, dtype=float)
+    ms = np.rint(np.nan_to_num(seconds) * 1000).astype(np.int64)
+    h, rest = np.divmod(ms, 3_600_000)
+    m, rest = np.divmod(rest, 60_000)
+    s, frac = np.divmod(rest, 1000)
+    tail = ":" + pd.Series(s).astype(str).str.zfill(2) + "." + pd.Series(frac).astype(str).str.zfill(3)
+    if hours:
+        minutes = pd.Series(m).astype(str)
+        out = (minutes + tail).where(h == 0, pd.Series(h).astype(str) + ":" + minutes.str.zfill(2) + tail)
+    else:
+        out = pd.Series(m + 60 * h).astype(str) + tail
+    return out.where(~np.isnan(seconds), missing)
+
+
+def _fmt_clock(seconds) -> pd.Series:
+    """Tageszeit in Sekunden -> 'HH:MM:SS'."""
+    h, rest = np.divmod(np.asarray(seconds, dtype=np.int64) % 86_400, 3600)
+    m, s = np.divmod(rest, 60)
+    return (pd.Series(h).astype(str).str.zfill(2) + ":" + pd.Series(m).astype(str).str.zfill(2)
+            + ":" + pd.Series(s).astype(str).str.zfill(2))
+
+
+def _fmt_num(values, decimals: int = 3, missing=NA) -> pd.Series:
+    values = np.asarray(values, dtype=float)
+    return pd.Series(np.char.mod(f"%.{decimals}f", np.nan_to_num(values))).where(~np.isnan(values), missing)
+
+
+def driver_names(n: int) -> pd.DataFrame:
+    """Eindeutige Kunstnamen pro Fahrer-ID (Vorname, Nachname, Dreiercode)."""
+    width = max(3, int(np.ceil(np.log(max(n, 2)) / np.log(len(_SYLLABLES)))))
+    surnames = []
+    for i in range(n):
+        parts = []
+        for _ in range(width):
+            i, d = divmod(i, len(_SYLLABLES))
+            parts.append(_SYLLABLES[d])
+        surnames.append("".join(parts).capitalize())
+    names = pd.DataFrame({"forename": [FORENAMES[i % len(FORENAMES)] for i in range(n)], "surname": surnames})
+    names["short"] = names["forename"].str[0] + ". " + names["surname"]
+    names["code"] = names["surname"].str[:3].str.upper()
+    return names
+
+
+# =========================================================
+# 3. F3: raw_results
+# =========================================================
+
+def _f3_race_rows(race: dict, names, race_ids, field, session_types) -> pd.DataFrame:
+    r = race["race"]
+    status = race["status"]
+    has_laps = race["laps"] > 0
+    prefix = np.where(race["classified"], race["pos"].astype(str), status)
+    info = (pd.Series(prefix) + pd.Series(race["car"]).astype(str) + names["short"].to_numpy()[race["driver"]]
+            + names["code"].to_numpy()[race["driver"]] + np.array(TEAMS)[race["team"]])
+    gap = _fmt_num(race["gap_s"], missing="-")
+    gap = gap.mask(race["lapped"] > 0, pd.Series(race["lapped"]).astype(str) + " LAP")
+    gap = gap.mask(~race["classified"], status).mask(race["pos"] == 1, "-")
+    interval = _fmt_num(race["int_s"]).mask(~race["classified"] | (race["pos"] == 1), "-")
+    return pd.DataFrame({
+        "driver_info": info,
+        "laps": pd.Series(race["laps"]).astype(str).where(has_laps, "-"),
+        "time": _fmt_time(race["time_s"], missing="-"),
+        "gap": gap,
+        "int.": interval,
+        "kph": _fmt_num(race["kph"], missing="-"),
+        "best": _fmt_time(race["best_s"], missing="-"),
+        "lap": pd.Series(race["best_lap"]).astype(str).where(has_laps, "-"),
+        "race_id": race_ids[r],
+        "season": field["season"][r],
+        "session_type": session_types[r],
+        "lap_set_on": np.nan,
+    })
+
+
+def _f3_session_rows(sess: dict, names, race_ids, field, session_type: str) -> pd.DataFrame:
+    r = sess["race"]
+    info = (pd.Series(sess["pos"]).astype(str) + pd.Series(sess["car"]).astype(str)
+            + names["short"].to_numpy()[sess["driver"]] + names["code"].to_numpy()[sess["driver"]]
+            + np.array(TEAMS)[sess["team"]])
+    first = sess["pos"] == 1
+    return pd.DataFrame({
+        "driver_info": info,
+        "laps": sess["laps"].astype(str),
+        "time": _fmt_time(sess["time_s"]),
+        "gap": _fmt_num(sess["gap_s"]).mask(first, "-"),
+        "int.": _fmt_num(sess["int_s"]).mask(first, "-"),
+        "kph": _fmt_num(sess["kph"]),
+        "best": np.nan,
+        "lap": np.nan,
+        "race_id": race_ids[r],
+        "season": field["season"][r],
+        "session_type": session_type,
+        "lap_set_on": _fmt_clock(sess["set_on"]),
+    })
+
+
+def generate_f3(scale: int = 1, seed: int = 0) -> dict:
+    """
+    F3-Rohdaten wie f3_2019_2025_raw_results.csv: pro Wochenende (race_id)
+    Hauptrennen (ROUNDnSummary), zweites Rennen (Standings after roundn),
+    Session_2/Session_3 und bei ~18 % der Wochenenden Session_4.
+    """
+    shape = SHAPES["f3"]
+    rng = np.random.default_rng(seed)
+    field = _field(rng, shape, scale)
+    names = driver_names(field["n_drivers"])
+    n_races = len(field["season"])
+    race_ids = 1002 + np.arange(n_races)
+    rounds = field["round"].astype(str)
+
+    tables = [
+        (0, _f3_race_rows(_race(rng, field, shape), names, race_ids, field,
+                          np.char.add("ROUND", np.char.add(rounds, "Summary")))),
+        (1, _f3_race_rows(_race(rng, field, shape, distance_share=0.8), names, race_ids, field,
+                          np.char.add("Standings after round", rounds))),
+        (2, _f3_session_rows(_session(rng, field, 15), names, race_ids, field, "Session_2")),
+        (3, _f3_session_rows(_session(rng, field, 10), names, race_ids, field, "Session_3")),
+    ]
+    sess4 = _f3_session_rows(_session(rng, field, 10), names, race_ids, field, "Session_4")
+    with_s4 = rng.random(n_races) < 0.18
+    tables.append((4, sess4[with_s4[sess4["race_id"].to_numpy() - 1002]]))
+
+    # Reihenfolge wie in der Datei: pro race_id alle Tabellen nacheinander
+    df = pd.concat([t.assign(_table=i) for i, t in tables], ignore_index=True)
+    df = df.iloc[np.lexsort((np.arange(len(df)), df["_table"].to_numpy(), df["race_id"].to_numpy()))]
+    return {F3_RAW: df.drop(columns="_table").reset_index(drop=True)}
+
+
+# =========================================================
+# 4. F2: Session-CSVs
+# =========================================================
+
+def generate_f2(scale: int = 1, seed: int = 0) -> dict:
+    """Feature-Race, Sprint-Race(-2), Free-Practice, Qualifying-Session, Race_Results, drivers_to_f1."""
+    shape = SHAPES["f2"]
+    rng = np.random.default_rng(seed + 1)
+    field = _field(rng, shape, scale)
+    names = driver_names(field["n_drivers"])
+    circuits = np.array([f"Circuit {i + 1}" for i in range(field["n_circuits"])])
+    dates = (pd.Series(field["season"]).astype(str) + "-"
+             + pd.Series(3 + field["round"] * 8 // shape["rounds"]).astype(str).str.zfill(2) + "-"
+             + pd.Series(1 + field["round"] % 28).astype(str).str.zfill(2)).to_numpy()
+
+    def common(t, type_name):
+        r = t["race"]
+        return {
+            "POS": t["pos"].astype(float),
+            "CAR": t["car"],
+            "PILOT NAME": names["short"].to_numpy()[t["driver"]],
+            "TEAM": np.array(TEAMS)[t["team"]],
+            "CIRCUIT": circuits[field["circuit"][r]],
+            "TYPE": type_name,
+            "ROUND": "Round " + pd.Series(field["round"][r]).astype(str) + " ",
+            "DATE": dates[r],
+        }
+
+    def race_table(t, type_name):
+        gap = _fmt_num(t["gap_s"]).mask(t["lapped"] > 0, pd.Series(t["lapped"]).astype(str) + " LAP")
+        gap = gap.mask(~t["classified"], t["status"]).mask(t["pos"] == 1, "-")
+        # F2 führt auch Ausfälle mit Position (Reihenfolge der Liste)
+        pos = np.tile(np.arange(1, field["driver"].shape[1] + 1), len(field["season"]))
+        out = {
+            "LAPS": t["laps"],
+            "TIME": _fmt_time(t["time_s"], hours=True, missing=""),
+            "GAP": gap,
+            "INT.": _fmt_num(t["int_s"]).mask(~t["classified"] | (t["pos"] == 1), "-"),
+            "KPH": np.round(t["kph"], 3),
+            "BEST": _fmt_time(t["best_s"], missing=""),
+            "LAP": t["best_lap"].astype(float),
+        }
+        out.update(common({**t, "pos": pos}, type_name))
+        return pd.DataFrame(out)
+
+    def session_table(t, type_name):
+        out = {
+            "LAPS": t["laps"],
+            "TIME": _fmt_time(t["time_s"]),
+            "GAP": _fmt_num(t["gap_s"]).mask(t["pos"] == 1, "-"),
+            "INT.": _fmt_num(t["int_s"]).mask(t["pos"] == 1, "-"),
+            "KPH": np.round(t["kph"], 3),
+        }
+        out.update(common(t, type_name))
+        out["LAP SET ON"] = _fmt_clock(t["set_on"])
+        cols = ["LAPS", "TIME", "GAP", "INT.", "KPH", "POS", "CAR", "PILOT NAME", "TEAM", "CIRCUIT",
+                "TYPE", "LAP SET ON", "ROUND", "DATE"]
+        return pd.DataFrame(out)[cols]
+
+    feature = _race(rng, field, shape)
+    sprint = _race(rng, field, shape, distance_share=0.7)
+    sprint2 = _race(rng, field, shape, distance_share=0.7)
+    practice = _session(rng, field, 10)
+    quali = _session(rng, field, 15)
+
+    # Zwei Sprints nur in Saisons mit dem 2021er Format
+    sprint2_df = race_table(sprint2, "Sprint Race 2")
+    sprint2_df = sprint2_df[(field["season"][sprint2["race"]] % 8) == 5]
+
+    tables = {
+        "Feature-Race.csv": race_table(feature, "Feature Race"),
+        "Sprint-Race.csv": race_table(sprint, "Sprint Race"),
+        "Sprint-Race-2.csv": sprint2_df,
+        "Free-Practice.csv": session_table(practice, "Free Practice"),
+        "Qualifying-Session.csv": session_table(quali, "Qualifying Session").assign(**{"QUALI TYPE": "Unique"}),
+    }
+
+    # Sammeltabelle im Format von Formula2_Race_Results.csv
+    frames = []
+    for t, race_type in ((practice, "Free Practice Results"), (quali, "Qualifying Session Results"),
+                         (feature, "Feature Race Results"), (sprint, "Sprint Race Results")):
+        r = t["race"]
+        is_race = "status" in t
+        frames.append(pd.DataFrame({
+            "URL": "https://www.fiaformula2.com/Results?raceid=" + pd.Series(1000 + r).astype(str),
+            "Track Name": circuits[field["circuit"][r]],
+            "Country": "Country " + pd.Series(field["circuit"][r] % 15 + 1).astype(str),
+            "City": "City " + pd.Series(field["circuit"][r] + 1).astype(str),
+            "Date": dates[r] + " 15:00:00",
+            "Length (Km)": np.round(field["length_km"][r], 3),
+            "Race Type": race_type,
+            "Position": np.where(t["pos"] > 0, t["pos"], np.nan),
+            "Car Number": t["car"],
+            "Driver Name": names["short"].to_numpy()[t["driver"]],
+            "Team Name": np.array(TEAMS)[t["team"]],
+            "Laps": t["laps"].astype(float),
+            "Time": _fmt_time(t["time_s"], hours=True, missing=""),
+            "Gap": _fmt_num(t["gap_s"]).mask(t["pos"] == 1, "0"),
+            "Interval": _fmt_num(t["int_s"]).mask(t["pos"] == 1, "0"),
+            "KPH": np.round(t["kph"], 3),
+            "Best Lap Time": _fmt_time(t["best_s"], missing="") if is_race else _fmt_clock(t["set_on"]),
+        }))
+    tables["Formula2_Race_Results.csv"] = pd.concat(frames, ignore_index=True)
+
+    # Aggregat pro Fahrer mit Label (stärkste ~30 % schaffen es in die F1)
+    fr = pd.DataFrame({"driver": feature["driver"], "laps": feature["laps"], "gap": feature["gap_s"],
+                       "kph": feature["kph"], "pos": feature["pos"], "time": feature["time_s"],
+                       "best": feature["best_s"]})
+    fr = fr[feature["classified"]]
+    agg = fr.groupby("driver").agg(
+        LAPS=("laps", "sum"), AVG_GAP=("gap", "mean"), AVG_KPH=("kph", "mean"), AVG_POS=("pos", "mean"),
+        AVG_TIME_seconds=("time", "mean"), AVG_BEST_seconds=("best", "mean"), starts=("pos", "size"),
+    )
+    agg = agg[agg["starts"] >= shape["rounds"]]
+    skill = field["skill"][agg.index.to_numpy()] + rng.normal(0.0, 0.5, len(agg))
+    agg["REACHED_F1"] = (skill > np.quantile(skill, 0.7)).astype(int) if len(agg) else 0
+    agg["cluster"] = (field["skill"][agg.index.to_numpy()] > 0).astype(int)
+    agg.insert(0, "PILOT NAME", names["short"].to_numpy()[agg.index.to_numpy()])
+    tables["f2_drivers_to_f1.csv"] = agg.drop(columns="starts").sort_values("PILOT NAME").reset_index(drop=True)
+    return tables
+
+
+# =========================================================
+# 5. F1: Kaggle-Tabellen
+# =========================================================
+
+F1_STATUS = {
+    1: "Finished", 2: "Disqualified", 3: "Accident", 4: "Collision", 5: "Engine", 6: "Gearbox",
+    7: "Transmission", 8: "Clutch", 9: "Hydraulics", 10: "Electrical", 11: "+1 Lap", 12: "+2 Laps",
+    13: "+3 Laps", 14: "+4 Laps", 15: "+5 Laps", 54: "Withdrew",
+}
+# Wie in Kaggle: Rundenzeiten ab 1996, Boxenstopps ab 2011
+LAP_TIMES_FROM = 1996
+PIT_STOPS_FROM = 2011
+
+
+def _na(values, mask) -> pd.Series:
+    return pd.Series(values).astype(str).where(mask, NA)
+
+
+def _f1_lap_times(rng, race: dict, race_ids, keep) -> pd.DataFrame:
+    """Eine Zeile pro Fahrer und Runde; Position aus der kumulierten Zeit."""
+    laps = np.where(keep, race["laps"], 0)
+    entry = np.repeat(np.arange(len(laps)), laps)
+    if len(entry) == 0:
+        return pd.DataFrame(columns=["raceId", "driverId", "lap", "position", "time", "milliseconds"])
+    starts = np.cumsum(laps) - laps
+    lap_no = np.arange(len(entry)) - np.repeat(starts, laps) + 1
+
+    base = race["avg_lap"][entry]
+    ms = base * (1.0 + rng.normal(0.0, 0.01, len(entry)))
+    # Startrunde langsamer, im Schnitt zwei Boxenstopp-Runden pro Fahrer
+    pit = rng.random(len(entry)) < 2.0 / race["laps_total"][entry]
+    ms += np.where(lap_no == 1, 3.0, 0.0) + np.where(pit, 20.0, 0.0)
+    ms = np.rint(ms * 1000).astype(np.int64)
+
+    cum = np.cumsum(ms)
+    cum -= np.repeat(cum[starts] - ms[starts], laps)
+    race_idx = race["race"][entry]
+    order = np.lexsort((cum, lap_no, race_idx))
+    position = np.empty(len(entry), dtype=np.int64)
+    group_start = np.r_[True, (np.diff(race_idx[order]) != 0) | (np.diff(lap_no[order]) != 0)]
+    run = np.arange(len(order)) - np.maximum.accumulate(np.where(group_start, np.arange(len(order)), 0))
+    position[order] = run + 1
+
+    return pd.DataFrame({
+        "raceId": race_ids[race_idx],
+        "driverId": race["driver"][entry] + 1,
+        "lap": lap_no,
+        "position": position,
+        "time": _fmt_time(ms / 1000.0),
+        "milliseconds": ms,
+    })
+
+
+def _f1_pit_stops(rng, race: dict, race_ids, keep) -> pd.DataFrame:
+    """1-4 Stopps pro Fahrer (Mittel ~2), Dauer log-normal um 23.6 s."""
+    eligible = keep & (race["laps"] > 5)
+    n_stops = np.where(eligible, np.minimum(1 + rng.poisson(1.04, len(eligible)), 4), 0)
+    entry = np.repeat(np.arange(len(n_stops)), n_stops)
+    if len(entry) == 0:
+        return pd.DataFrame(columns=["raceId", "driverId", "stop", "lap", "time", "duration", "milliseconds"])
+    starts = np.cumsum(n_stops) - n_stops
+    stop = np.arange(len(entry)) - np.repeat(starts, n_stops) + 1
+    # Stopps gleichmässig über das Rennen verteilt, etwas gestreut
+    frac = (stop - rng.uniform(0.2, 0.8, len(entry))) / n_stops[entry]
+    lap = np.clip(np.rint(frac * race["laps"][entry]).astype(np.int64), 1, race["laps"][entry] - 1)
+    duration = np.exp(rng.normal(np.log(23.6), 0.4, len(entry)))
+    clock = 15 * 3600 + lap * race["avg_lap"][entry]
+    return pd.DataFrame({
+        "raceId": race_ids[race["race"][entry]],
+        "driverId": race["driver"][entry] + 1,
+        "stop": stop,
+        "lap": lap,
+        "time": _fmt_clock(clock),
+        "duration": _fmt_num(duration),
+        "milliseconds": np.rint(duration * 1000).astype(np.int64),
+    })
+
+
+def generate_f1(scale: int = 1, seed: int = 0, lap_times: bool = True) -> dict:
+    """races, results, qualifying, drivers, constructors, circuits, status, pit_stops (+ lap_times)."""
+    shape = SHAPES["f1"]
+    rng = np.random.default_rng(seed + 2)
+    field = _field(rng, shape, scale)
+    names = driver_names(field["n_drivers"])
+    n_races, n_slots = field["driver"].shape
+    race_ids = np.arange(1, n_races + 1)
+
+    race = _race(rng, field, shape)
+    quali = _session(rng, field, 14)
+    r = race["race"]
+    season = field["season"][r]
+
+    # Startplatz aus dem Qualifying
+    grid_of = np.empty((n_races, n_slots), dtype=np.int64)
+    grid_of[quali["race"], quali["car"] - 1] = quali["pos"]
+    grid = grid_of[r, race["car"] - 1]
+
+    # Punkte nach dem Schema der Saison (nur Klassierte); vor dem ersten
+    # hinterlegten Schema gilt dieses
+    points = np.zeros(len(r))
+    first_schema = POINTS_SYSTEMS["f1"][0][0]
+    for s in np.unique(season):
+        m = season == s
+        table = points_table("f1", max(int(s), first_schema), "feature", n_slots)
+        points[m] = np.where(race["classified"][m], table[np.maximum(race["pos"][m], 1) - 1], 0.0)
+
+    lead_lap = race["classified"] & (race["lapped"] == 0)
+    winner = race["pos"] == 1
+    plus = "+" + _fmt_num(race["gap_s"])
+    plus = plus.where(race["gap_s"] < 60, "+" + _fmt_time(race["gap_s"]))
+    time_str = _fmt_time(race["time_s"], hours=True).where(winner, plus).where(lead_lap, NA)
+
+    status_id = np.where(race["classified"], np.where(race["lapped"] > 0, 10 + np.minimum(race["lapped"], 5), 1),
+                         np.select([race["status"] == "DQ", race["status"] == "DNS"], [2, 54],
+                                   rng.integers(3, 11, len(r))))
+    position_text = np.where(race["classified"], race["pos"].astype(str),
+                             np.select([race["status"] == "DQ", race["status"] == "DNS"], ["D", "W"], "R"))
+    has_laps = race["laps"] > 0
+    best_rank = (pd.Series(np.where(has_laps, race["best_s"], np.inf)).groupby(r).rank(method="first")
+                 .astype(int).to_numpy())
+
+    results = pd.DataFrame({
+        "resultId": np.arange(1, len(r) + 1),
+        "raceId": race_ids[r],
+        "driverId": race["driver"] + 1,
+        "constructorId": race["team"] + 1,
+        "number": race["car"],
+        "grid": grid,
+        "position": _na(race["pos"], race["classified"]),
+        "positionText": position_text,
+        "positionOrder": np.tile(np.arange(1, n_slots + 1), n_races),
+        "points": points,
+        "laps": race["laps"],
+        "time": time_str,
+        "milliseconds": _na(np.rint(np.nan_to_num(race["time_s"]) * 1000).astype(np.int64), lead_lap),
+        "fastestLap": _na(race["best_lap"], has_laps),
+        "rank": _na(best_rank, has_laps),
+        "fastestLapTime": _fmt_time(race["best_s"]),
+        "fastestLapSpeed": _fmt_num(field["length_km"][r] / race["best_s"] * 3600.0),
+        "statusId": status_id,
+    })
+
+    q_pos = quali["pos"]
+    qualifying = pd.DataFrame({
+        "qualifyId": np.arange(1, len(q_pos) + 1),
+        "raceId": race_ids[quali["race"]],
+        "driverId": quali["driver"] + 1,
+        "constructorId": quali["team"] + 1,
+        "number": quali["car"],
+        "position": q_pos,
+        "q1": _fmt_time(quali["time_s"] + 0.4),
+        "q2": _fmt_time(quali["time_s"] + 0.2).where(q_pos <= 15, NA),
+        "q3": _fmt_time(quali["time_s"]).where(q_pos <= 10, NA),
+    })
+
+    circuit_ids = field["circuit"] + 1
+    years = field["season"]
+    races = pd.DataFrame({
+        "raceId": race_ids,
+        "year": years,
+        "round": field["round"],
+        "circuitId": circuit_ids,
+        "name": "Grand Prix " + pd.Series(circuit_ids).astype(str),
+        "date": (pd.Series(years).astype(str) + "-" + pd.Series(3 + field["round"] * 9 // shape["rounds"])
+                 .astype(str).str.zfill(2) + "-" + pd.Series(1 + field["round"] % 28).astype(str).str.zfill(2)),
+        "time": "14:00:00",
+        "url": "http://en.wikipedia.org/wiki/Grand_Prix_" + pd.Series(race_ids).astype(str),
+        **{c: NA for c in ["fp1_date", "fp1_time", "fp2_date", "fp2_time", "fp3_date", "fp3_time",
+                           "quali_date", "quali_time", "sprint_date", "sprint_time"]},
+    })
+
+    debut = pd.Series(field["season"][np.repeat(np.arange(n_races), n_slots)]).groupby(
+        field["driver"].ravel()).min().reindex(range(field["n_drivers"])).to_numpy()
+    drivers = pd.DataFrame({
+        "driverId": np.arange(1, field["n_drivers"] + 1),
+        "driverRef": names["surname"].str.lower(),
+        "number": NA,
+        "code": names["code"],
+        "forename": names["forename"],
+        "surname": names["surname"],
+        "dob": pd.Series(debut - 21).astype(str) + "-06-15",
+        "nationality": np.array(NATIONALITIES)[np.arange(field["n_drivers"]) % len(NATIONALITIES)],
+        "url": "http://en.wikipedia.org/wiki/" + names["forename"] + "_" + names["surname"],
+    })
+    constructors = pd.DataFrame({
+        "constructorId": np.arange(1, shape["teams"] + 1),
+        "constructorRef": [t.lower().replace(" ", "_") for t in TEAMS[:shape["teams"]]],
+        "name": TEAMS[:shape["teams"]],
+        "nationality": [NATIONALITIES[i % len(NATIONALITIES)] for i in range(shape["teams"])],
+        "url": "http://en.wikipedia.org/wiki/" + pd.Series(TEAMS[:shape["teams"]]).str.replace(" ", "_"),
+    })
+    circuits = pd.DataFrame({
+        "circuitId": np.arange(1, field["n_circuits"] + 1),
+        "circuitRef": [f"circuit_{i + 1}" for i in range(field["n_circuits"])],
+        "name": [f"Circuit {i + 1}" for i in range(field["n_circuits"])],
+        "location": [f"City {i + 1}" for i in range(field["n_circuits"])],
+        "country": [f"Country {i % 15 + 1}" for i in range(field["n_circuits"])],
+        "lat": np.round(rng.uniform(-40, 60, field["n_circuits"]), 4),
+        "lng": np.round(rng.uniform(-120, 140, field["n_circuits"]), 4),
+        "alt": rng.integers(0, 800, field["n_circuits"]),
+        "url": NA,
+    })
+    status = pd.DataFrame({"statusId": list(F1_STATUS), "status": list(F1_STATUS.values())})
+
+    tables = {
+        "races": races, "results": results, "qualifying": qualifying, "drivers": drivers,
+        "constructors": constructors, "circuits": circuits, "status": status,
+        "pit_stops": _f1_pit_stops(rng, race, race_ids, season >= PIT_STOPS_FROM),
+    }
+    if lap_times:
+        tables["lap_times"] = _f1_lap_times(rng, race, race_ids, season >= LAP_TIMES_FROM)
+    return tables
+
+
+# =========================================================
+# 6. F1: FastF1-Runden (Format nach make_dataset)
+# =========================================================
+
+COMPOUNDS = ["SOFT", "MEDIUM", "HARD"]
+# Reifenabbau (s pro Runde Reifenalter) und Grundtempo relativ zu MEDIUM
+COMPOUND_DEG = np.array([0.09, 0.055, 0.03])
+COMPOUND_OFFSET = np.array([-0.6, 0.0, 0.45])
+FUEL_EFFECT = 0.06  # s pro Runde leichter
+
+
+def generate_fastf1_laps(n_seasons: int = 1, seed: int = 0, rounds: int = 22, first_season: int = 2023,
+                         teams: int = 10) -> pd.DataFrame:
+    """
+    Runden aller Rennen in den Spalten von create_clean_lap_dataset
+    (Driver, Team, LapNumber, Stint, Compound, TyreLife, LapTime_s, Sektoren,
+    LapStartTime_s/Time_s, year, round, session_type). Rundenzeit = Strecke + Fahrer + Mischung
+    + Abbau * TyreLife - Sprit * Runde + Rauschen; Ein-/Ausfahrrunden und
+    Safety-Car-Phasen (TrackStatus "4") sind deutlich langsamer.
+    """
+    rng = np.random.default_rng(seed + 3)
+    n_races, n_drivers = n_seasons * rounds, teams * 2
+    # Dreiercodes eindeutig (Nachnamen-Codes aus driver_names können sich wiederholen);
+    # 677 ist teilerfremd zu 26^3 -> Abbildung ist eine Permutation
+    code_idx = (np.arange(n_drivers) * 677 + 31) % 26**3
+    codes = np.array(["".join(chr(65 + d) for d in (i // 676, i // 26 % 26, i % 26)) for i in code_idx])
+
+    base = rng.uniform(78.0, 105.0, n_races)
+    laps_total = rng.integers(50, 72, n_races)
+    skill = rng.normal(0.0, 0.35, (n_races, n_drivers)) + rng.normal(0.0, 0.4, n_drivers)[None, :]
+    deg_factor = rng.uniform(0.6, 1.4, (n_races, n_drivers))
+
+    # Strategie: 1-3 Stopps, Stopprunden sortiert, unbenutzte Stopps hinter dem Ziel
+    n_stops = rng.choice([1, 2, 3], size=(n_races, n_drivers), p=[0.45, 0.45, 0.10])
+    frac = np.sort(rng.uniform(0.15, 0.9, (n_races, n_drivers, 3)), axis=2)
+    stop_lap = np.rint(frac * laps_total[:, None, None]).astype(np.int64)
+    stop_lap[np.arange(3)[None, None, :] >= n_stops[:, :, None]] = 10_000
+    compound = rng.integers(0, 3, (n_races, n_drivers, 4))
+    # Pflicht: mindestens zwei Mischungen -> letzter Stint wechselt notfalls
+    same = compound[:, :, 1] == compound[:, :, 0]
+    compound[:, :, 1] = np.where(same, (compound[:, :, 0] + 1) % 3, compound[:, :, 1])
+
+    race = np.repeat(np.arange(n_races), n_drivers * laps_total)
+    driver = np.concatenate([np.repeat(np.arange(n_drivers), n) for n in laps_total])
+    entry_laps = np.repeat(laps_total, n_drivers)
+    starts = np.cumsum(entry_laps) - entry_laps
+    lap = np.arange(len(race)) - np.repeat(starts, entry_laps) + 1
+
+    stops = stop_lap[race, driver]
+    stint = (lap[:, None] > stops).sum(axis=1)
+    stint_start = np.where(stint == 0, 1, np.take_along_axis(stops, np.maximum(stint - 1, 0)[:, None], 1)[:, 0] + 1)
+    tyre_life = lap - stint_start + 1
+    comp = compound[race, driver, stint]
+
+    lap_time = (base[race] + skill[race, driver] + COMPOUND_OFFSET[comp]
+                + COMPOUND_DEG[comp] * deg_factor[race, driver] * tyre_life
+                - FUEL_EFFECT * lap + rng.normal(0.0, 0.25, len(race)))
+    in_lap = (stint < 3) & (lap == np.take_along_axis(stops, np.minimum(stint, 2)[:, None], 1)[:, 0])
+    out_lap = (tyre_life == 1) & (stint > 0)
+    lap_time += np.where(in_lap, 1.5, 0.0) + np.where(out_lap, 19.0, 0.0) + np.where(lap == 1, 4.0, 0.0)
+
+    # Safety Car in 40 % der Rennen für 3-5 Runden
+    sc_start = np.where(rng.random(n_races) < 0.4, rng.integers(5, laps_total - 8), 10_000)
+    sc_len = rng.integers(3, 6, n_races)
+    under_sc = (lap >= sc_start[race]) & (lap < sc_start[race] + sc_len[race])
+    lap_time = np.where(under_sc, lap_time * 1.35, lap_time)
+
+    # Position aus der kumulierten Zeit pro (Rennen, Runde)
+    cum = np.cumsum(lap_time)
+    cum -= np.repeat(cum[starts] - lap_time[starts], entry_laps)
+    order = np.lexsort((cum, lap, race))
+    group_start = np.r_[True, (np.diff(race[order]) != 0) | (np.diff(lap[order]) != 0)]
+    run = np.arange(len(order)) - np.maximum.accumulate(np.where(group_start, np.arange(len(order)), 0))
+    position = np.empty(len(order), dtype=np.int64)
+    position[order] = run + 1
+
+    split = rng.dirichlet([3000.0, 4000.0, 3000.0], len(race))
+    season = first_season + race // rounds
+    return pd.DataFrame({
+        "Driver": codes[driver],
+        "DriverNumber": driver + 1,
+        "Team": np.array(TEAMS)[driver // 2 % len(TEAMS)],
+        "LapNumber": lap.astype(float),
+        "Stint": (stint + 1).astype(float),
+        "Compound": np.array(COMPOUNDS)[comp],
+        "TyreLife": tyre_life.astype(float),
+        "Position": position.astype(float),
+        "TrackStatus": np.where(under_sc, "4", "1"),
+        "LapTime_s": np.round(lap_time, 3),
+        # Sessionzeit am Rundenstart/-ende wie FastF1 LapStartTime/Time (Start bei 0)
+        "LapStartTime_s": np.round(cum - lap_time, 3),
+        "Time_s": np.round(cum, 3),
+        "Sector1Time_s": np.round(lap_time * split[:, 0], 3),
+        "Sector2Time_s": np.round(lap_time * split[:, 1], 3),
+        "Sector3Time_s": np.round(lap_time * split[:, 2], 3),
+        "year": season,
+        "round": race % rounds + 1,
+        "session_type": "R",
+    })
+
+
+def generate_car_telemetry(laps: pd.DataFrame, hz: float = 4.0, seed: int = 0) -> dict:
+    """
+    Fahrzeugdaten wie FastF1 car_data (mit add_distance) für die Runden einer
+    Session: Fahrer -> DataFrame mit SessionTime (s), Speed, RPM, nGear,
+    Throttle, Brake, DRS, Distance. Geschwindigkeit folgt einem Streckenprofil
+    mit Kurven; Gas, Bremse, Gang und Drehzahl werden daraus abgeleitet.
+    """
+    rng = np.random.default_rng(seed + 4)
+    n_corners = 14
+    corner_at = np.sort(rng.uniform(0.0, 1.0, n_corners))
+    corner_speed = rng.uniform(80.0, 240.0, n_corners)
+    out = {}
+    for driver, dl in laps.sort_values(["Driver", "LapNumber"]).groupby("Driver", sort=True):
+        lap_s = dl["LapTime_s"].to_numpy(dtype=float)
+        total = lap_s.sum()
+        t = np.arange(0.0, total, 1.0 / hz) + rng.uniform(0.0, 1.0 / hz)
+        lap_idx = np.searchsorted(np.cumsum(lap_s), t, side="right").clip(max=len(lap_s) - 1)
+        frac = (t - (np.cumsum(lap_s) - lap_s)[lap_idx]) / lap_s[lap_idx]
+
+        # Abstand zur nächsten Kurve (Streckenanteil) -> Bremszone davor
+        dist_to_corner = np.abs(frac[:, None] - corner_at[None, :]).min(axis=1)
+        nearest = np.abs(frac[:, None] - corner_at[None, :]).argmin(axis=1)
+        speed = np.minimum(330.0, corner_speed[nearest] + 2600.0 * dist_to_corner) + rng.normal(0.0, 2.0, len(t))
+        accel = np.gradient(speed, t) if len(t) > 1 else np.zeros(len(t))
+        gear = np.clip(np.ceil(speed / 42.0), 1, 8).astype(np.int64)
+        out[driver] = pd.DataFrame({
+            "SessionTime": 300.0 + t,
+            "Speed": np.round(speed, 1),
+            "RPM": np.rint(6000.0 + 6000.0 * (speed - 42.0 * (gear - 1)) / 42.0).clip(4000, 12500),
+            "nGear": gear,
+            "Throttle": np.where(accel < -15.0, 0, np.clip(100 - np.maximum(-accel, 0) * 4, 0, 100)).astype(int),
+            "Brake": accel < -15.0,
+            "DRS": np.where((speed > 300.0) & (rng.random(len(t)) < 0.5), 12, 0),
+            "Distance": np.cumsum(speed / 3.6 / hz),
+        })
+    return out
+
+
+# =========================================================
+# 7. Schreiben und Vergleich mit den echten Daten
+# =========================================================
+
+def write(out_dir: Path, scale: int = 1, seed: int = 0, series=("f1", "f2", "f3"), lap_times: bool = True) -> dict:
+    """Schreibt die Rohdaten in dieselbe Ordnerstruktur wie data/ (f1/raw, f2, f3)."""
+    out_dir = Path(out_dir)
+    counts = {}
+    if "f1" in series:
+        raw = out_dir / "f1" / "raw"
+        raw.mkdir(parents=True, exist_ok=True)
+        for name, df in generate_f1(scale, seed, lap_times).items():
+            df.to_csv(raw / f"{name}.csv", index=False)
+            counts[f"f1/{name}"] = len(df)
+    if "f2" in series:
+        (out_dir / "f2").mkdir(parents=True, exist_ok=True)
+        for name, df in generate_f2(scale, seed).items():
+            df.to_csv(out_dir / "f2" / name, index=False)
+            counts[f"f2/{name}"] = len(df)
+    if "f3" in series:
+        (out_dir / "f3").mkdir(parents=True, exist_ok=True)
+        for name, df in generate_f3(scale, seed).items():
+            df.to_csv(out_dir / "f3" / name, index=False)
+            counts[f"f3/{name}"] = len(df)
+    return counts
+
+
+def _seconds(values: pd.Series) -> pd.Series:
+    text = values.astype(str)
+    parts = text.str.split(":", expand=True).apply(pd.to_numeric, errors="coerce")
+    total = parts[0]
+    for i in range(1, parts.shape[1]):
+        total = np.where(parts[i].notna(), total * 60 + parts[i], total)
+    return pd.Series(total, index=values.index)
+
+
+def stats(series: str, tables: dict) -> dict:
+    """Kennzahlen für den Vergleich echt vs. synthetisch (Rohformat als Eingabe)."""
+    if series == "f3":
+        df = tables[F3_RAW]
+        race = df[df["session_type"].astype(str).str.match(r"ROUND\d+Summary")]
+        status = race["driver_info"].astype(str).str.extract(r"^([A-Z]+)\d", expand=False)
+        gap = pd.to_numeric(race["gap"], errors="coerce")
+        pos = race.groupby("race_id").cumcount() + 1
+        return {
+            "Zeilen pro Wochenende": len(df) / df["race_id"].nunique(),
+            "Fahrer pro Rennen": race.groupby("race_id").size().mean(),
+            "Ausfallquote": status.notna().mean(),
+            "Abstand P2 (s)": gap[pos == 2].median(),
+            "Abstand P10 (s)": gap[pos == 10].median(),
+            "Runden pro Rennen": pd.to_numeric(race["laps"], errors="coerce").groupby(race["race_id"]).max().mean(),
+            "Bestrunde (s)": _seconds(race["best"]).mean(),
+        }
+    if series == "f2":
+        df = tables["Feature-Race.csv"]
+        gap = df["GAP"].astype(str)
+        return {
+            "Fahrer pro Rennen": df.groupby("DATE").size().mean(),
+            "Ausfallquote": gap.isin(["DNF", "DQ", "DNS"]).mean(),
+            "Überrundet": gap.str.contains("LAP").mean(),
+            "Runden pro Rennen": df.groupby("DATE")["LAPS"].max().mean(),
+            "Bestrunde (s)": _seconds(df["BEST"]).mean(),
+        }
+    results, pits = tables["results"], tables["pit_stops"]
+    status = pd.to_numeric(results["statusId"])
+    return {
+        "Fahrer pro Rennen": results.groupby("raceId").size().mean(),
+        "im Ziel, Führungsrunde": (status == 1).mean(),
+        "überrundet": status.between(11, 19).mean(),
+        "Boxenstopps pro Fahrer": pits.groupby(["raceId", "driverId"]).size().mean(),
+        "Stoppdauer Median (ms)": pits["milliseconds"].median(),
+        "Punkteanteil": (pd.to_numeric(results["points"]) > 0).mean(),
+    }
+
+
+def check(seed: int = 0):
+    """Synthetische Daten (scale=1) neben den echten Kennzahlen ausgeben."""
+    data = BASE_DIR / "data"
+    real = {
+        "f3": {F3_RAW: pd.read_csv(data / "f3" / F3_RAW)},
+        "f2": {"Feature-Race.csv": pd.read_csv(data / "f2" / "Feature-Race.csv")},
+        "f1": {t: pd.read_csv(data / "f1" / "raw" / f"{t}.csv") for t in ["results", "pit_stops"]},
+    }
+    synthetic = {"f3": generate_f3(1, seed), "f2": generate_f2(1, seed), "f1": generate_f1(1, seed, lap_times=False)}
+    for series in ["f1", "f2", "f3"]:
+        table = pd.DataFrame({"echt": stats(series, real[series]), "synthetisch": stats(series, synthetic[series])})
+        print(f"\n{series.upper()}")
+        print(table.to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetische F1/F2/F3-Rohdaten erzeugen.")
+    parser.add_argument("--scale", type=int, default=10, help="Vielfaches der echten Anzahl Saisons")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=None, help="Zielordner (Standard: data/synthetic/x<scale>)")
+    parser.add_argument("--series", nargs="*", default=["f1", "f2", "f3"], choices=["f1", "f2", "f3"])
+    parser.add_argument("--no-lap-times", action="store_true", help="F1 lap_times weglassen (grösste Tabelle)")
+    parser.add_argument("--check", action="store_true", help="Kennzahlen echt vs. synthetisch vergleichen")
+    args = parser.parse_args()
+
+    if args.check:
+        check(args.seed)
+        return
+
+    out = args.out or OUT_DIR / f"x{args.scale}"
+    start = time.perf_counter()
+    counts = write(out, args.scale, args.seed, args.series, lap_times=not args.no_lap_times)
+    for name, n in counts.items():
+        print(f"  {name:<40} {n:>12,} Zeilen")
+    print(f"Gespeichert unter {out} ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
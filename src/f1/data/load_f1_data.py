@@ -1,8 +1,11 @@
 import fastf1
 import pandas as pd
 
+from src.f1.data.telemetry_store import session_dir, write_from_fastf1
 
-def load_race_session(year: int, round_number: int, session_type: str = "R") -> pd.DataFrame:
+
+def load_race_session(year: int, round_number: int, session_type: str = "R",
+                      save_telemetry: bool = True) -> pd.DataFrame:
     """
     Lädt eine bestimmte Formel-1-Session (Race, Qualifying, FP1 usw.)
     und gibt einen DataFrame mit allen Runden zurück.
@@ -11,6 +14,7 @@ def load_race_session(year: int, round_number: int, session_type: str = "R") ->
     year: Jahr des Rennens, z. B. 2023
     round_number: Lauf im Rennkalender, z. B. 1 = Bahrain
     session_type: "R" (Race), "Q" (Qualifying), "FP1", "FP2", "FP3", "SPR" usw.
+    save_telemetry: Fahrzeugdaten zusätzlich in data/telemetry ablegen
     """
 
     # Cache aktivieren (damit FastF1 die Daten lokal speichert)
@@ -27,4 +31,8 @@ def load_race_session(year: int, round_number: int, session_type: str = "R") ->
     file_path = f"data/raw/f1_{year}_round{round_number}_{session_type}.csv"
     laps_df.to_csv(file_path, index=False)
 
+    # Telemetrie nicht verwerfen: Spaltenablage mit Rundenindex
+    if save_telemetry:
+        write_from_fastf1(session, session_dir(year, round_number, session_type))
+
     return laps_df
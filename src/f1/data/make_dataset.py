@@ -1,6 +1,8 @@
 import pandas as pd
 from pathlib import Path
 
+from src.data.lap_classification import classify_laps
+
 
 def create_clean_lap_dataset(
     input_path: str,
@@ -52,8 +54,9 @@ def create_clean_lap_dataset(
     if "LapTime" in df.columns:
         df["LapTime_s"] = df["LapTime"].apply(to_seconds)
 
-    # 4) Sektorzeiten in Sekunden umwandeln
-    for col in ["Sector1Time", "Sector2Time", "Sector3Time"]:
+    # 4) Sektorzeiten und Sessionzeit am Rundenstart/-ende in Sekunden umwandeln
+    # (LapStartTime/Time: kumulierte Rennzeit inkl. entfernter In-/Outlaps)
+    for col in ["Sector1Time", "Sector2Time", "Sector3Time", "LapStartTime", "Time"]:
         if col in df.columns:
             df[col + "_s"] = df[col].apply(to_seconds)
 
@@ -63,6 +66,7 @@ def create_clean_lap_dataset(
         "LapNumber", "Stint", "Compound", "TyreLife",
         "Position", "TrackStatus",
         "LapTime_s", "Sector1Time_s", "Sector2Time_s", "Sector3Time_s",
+        "LapStartTime_s", "Time_s",
     ]
 
     df = df[[c for c in keep_cols if c in df.columns]]
@@ -76,7 +80,11 @@ def create_clean_lap_dataset(
     if session_type is not None:
         df["session_type"] = session_type
 
-    # 3) Ergebnis speichern
+    # 3) Safety-Car/VSC-Runden und Tempo-Ausreisser markieren (nicht löschen),
+    # Statistik pro Session über year/round/session_type
+    df = classify_laps(df)
+
+    # 4) Ergebnis speichern
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(output_path, index=False)
@@ -0,0 +1,292 @@
+"""
+Spaltenablage für FastF1-Fahrzeugdaten (car_data) mit Rundenindex.
+
+session.load() lädt die Telemetrie, load_race_session() speicherte bisher aber
+nur session.laps. Hier wird pro Session ein Verzeichnis geschrieben:
+
+    data/telemetry/<Jahr>_<Lauf>_<Session>/
+        Speed.npy, RPM.npy, nGear.npy, ...   eine Datei pro Kanal, typisiert
+        index.csv                            Driver, LapNumber, start, stop, Anker
+        meta.json                            Kanäle, Typen, Kodierung
+
+Die Proben liegen nach Fahrer und Runde sortiert hintereinander, index.csv
+gibt für jede Runde den Zeilenbereich [start, stop) an. read_lap() öffnet die
+Kanäle per Memory-Mapping (np.load mmap_mode="r") und liest nur diesen
+Bereich, die Session wird nie komplett geladen.
+
+Kodierung (CHANNELS):
+- Speed float32, RPM int16, nGear/Throttle/Brake/DRS int8
+- Distance (m) und SessionTime (s) delta-kodiert: auf cm bzw. ms gerundet,
+  gespeichert wird die Differenz zur Vorprobe im kleinsten passenden Integer-
+  Typ. Der Wert der ersten Probe jeder Runde steht als Anker im Index, damit
+  jede Runde für sich dekodiert werden kann (Rundung auf cm/ms ist der
+  einzige Verlust). Mit delta=False werden beide als float32 absolut abgelegt.
+
+Aufruf vom Projektroot:
+    python -m src.f1.data.telemetry_store --benchmark
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+STORE_DIR = BASE_DIR / "data" / "telemetry"
+
+# Kanal -> (Typ, Skalierung für Delta-Kodierung oder None)
+CHANNELS = {
+    "Speed": ("float32", None),
+    "RPM": ("int16", None),
+    "nGear": ("int8", None),
+    "Throttle": ("int8", None),
+    "Brake": ("int8", None),
+    "DRS": ("int8", None),
+    "Distance": ("float32", 100),      # cm
+    "SessionTime": ("float32", 1000),  # ms
+}
+
+
+def session_dir(year: int, round_number: int, session_type: str = "R", store_dir: Path = STORE_DIR) -> Path:
+    return Path(store_dir) / f"{year}_{round_number:02d}_{session_type}"
+
+
+def _seconds(values) -> np.ndarray:
+    """Timedelta (FastF1) oder Sekunden -> float64 Sekunden."""
+    if pd.api.types.is_timedelta64_dtype(values):
+        return pd.to_timedelta(values).dt.total_seconds().to_numpy(dtype=np.float64)
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _smallest_int(values: np.ndarray) -> np.dtype:
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+# =========================================================
+# Schreiben
+# =========================================================
+
+def assign_laps(telemetry: pd.DataFrame, laps: pd.DataFrame) -> np.ndarray:
+    """
+    Rundennummer pro Probe über die Sessionzeit: eine Probe gehört zur Runde
+    mit LapStartTime <= t < Time. Proben außerhalb aller Runden -> NaN.
+    """
+    laps = laps.sort_values("LapStartTime")
+    starts = _seconds(laps["LapStartTime"])
+    ends = _seconds(laps["Time"])
+    t = _seconds(telemetry["SessionTime"])
+    i = np.searchsorted(starts, t, side="right") - 1
+    inside = (i >= 0) & (t < ends[i.clip(min=0)])
+    return np.where(inside, laps["LapNumber"].to_numpy(dtype=np.float64)[i.clip(min=0)], np.nan)
+
+
+def write_session(telemetry: dict, laps: pd.DataFrame, target: Path, delta: bool = True) -> pd.DataFrame:
+    """
+    telemetry: Fahrer -> DataFrame mit SessionTime und den Kanälen aus CHANNELS
+    laps:      Driver, LapNumber, LapStartTime, Time (Sessionzeit Start/Ende)
+    Schreibt die Kanäle und den Index nach target und gibt den Index zurück.
+    """
+    frames = []
+    for driver, tel in sorted(telemetry.items()):
+        driver_laps = laps[laps["Driver"] == driver]
+        if tel.empty or driver_laps.empty:
+            continue
+        lap_no = assign_laps(tel, driver_laps)
+        keep = np.isfinite(lap_no)
+        part = tel.loc[keep].copy()
+        part["Driver"] = driver
+        part["LapNumber"] = lap_no[keep]
+        frames.append(part)
+    samples = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["Driver", "LapNumber"])
+    samples = samples.sort_values(["Driver", "LapNumber", "SessionTime"], kind="stable").reset_index(drop=True)
+
+    lap_id = samples.groupby(["Driver", "LapNumber"], sort=False).ngroup().to_numpy()
+    first = np.r_[True, lap_id[1:] != lap_id[:-1]] if len(samples) else np.zeros(0, dtype=bool)
+    starts = np.flatnonzero(first)
+    index = samples.loc[first, ["Driver", "LapNumber"]].reset_index(drop=True)
+    index["start"] = starts
+    index["stop"] = np.r_[starts[1:], len(samples)]
+
+    target = Path(target)
+    target.mkdir(parents=True, exist_ok=True)
+    meta = {"n_samples": len(samples), "channels": {}}
+    for name, (dtype, scale) in CHANNELS.items():
+        if name not in samples.columns:
+            continue
+        if name == "SessionTime":
+            values = _seconds(samples[name])
+        else:
+            values = pd.to_numeric(samples[name], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+
+        if delta and scale is not None:
+            # Absolut quantisieren, dann differenzieren: exakt rekonstruierbar
+            q = np.rint(values * scale).astype(np.int64)
+            diffs = np.diff(q, prepend=q[:1])
+            diffs[first] = 0
+            index[f"{name}_anchor"] = q[first]
+            stored = diffs.astype(_smallest_int(diffs))
+            meta["channels"][name] = {"dtype": str(stored.dtype), "encoding": "delta", "scale": scale}
+        else:
+            stored = values.astype(dtype)
+            meta["channels"][name] = {"dtype": dtype, "encoding": "plain"}
+        np.save(target / f"{name}.npy", stored)
+
+    index.to_csv(target / "index.csv", index=False)
+    (target / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return index
+
+
+def write_from_fastf1(session, target: Path, delta: bool = True) -> pd.DataFrame:
+    """Adapter für eine geladene FastF1-Session (session.car_data je Fahrernummer)."""
+    laps = session.laps[["Driver", "DriverNumber", "LapNumber", "LapStartTime", "Time"]].dropna(
+        subset=["LapNumber", "LapStartTime", "Time"]
+    )
+    codes = laps.drop_duplicates("DriverNumber").set_index("DriverNumber")["Driver"]
+    telemetry = {}
+    for number, car in session.car_data.items():
+        if number in codes.index:
+            telemetry[codes[number]] = car.add_distance()
+    return write_session(telemetry, laps, target, delta)
+
+
+# =========================================================
+# Lesen
+# =========================================================
+
+class TelemetryStore:
+    """Eine gespeicherte Session; Kanäle werden beim Öffnen nur gemappt."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        self.index = pd.read_csv(self.path / "index.csv")
+        self._rows = {
+            (d, int(n)): i for i, (d, n) in enumerate(zip(self.index["Driver"], self.index["LapNumber"]))
+        }
+        self._columns = {
+            name: np.load(self.path / f"{name}.npy", mmap_mode="r") for name in self.meta["channels"]
+        }
+        self._anchors = {
+            name: self.index[f"{name}_anchor"].to_numpy()
+            for name, info in self.meta["channels"].items() if info["encoding"] == "delta"
+        }
+
+    @property
+    def channels(self) -> list:
+        return list(self.meta["channels"])
+
+    def laps(self) -> pd.DataFrame:
+        return self.index[["Driver", "LapNumber", "start", "stop"]]
+
+    def read_lap(self, driver: str, lap_number: int, channels=None) -> pd.DataFrame:
+        """Eine Runde eines Fahrers als DataFrame (leer, wenn nicht vorhanden)."""
+        channels = channels or self.channels
+        row = self._rows.get((driver, int(lap_number)))
+        if row is None:
+            return pd.DataFrame(columns=channels)
+        start, stop = self.index.at[row, "start"], self.index.at[row, "stop"]
+        out = {}
+        for name in channels:
+            info = self.meta["channels"][name]
+            raw = np.asarray(self._columns[name][start:stop])
+            if info["encoding"] == "delta":
+                raw = (self._anchors[name][row] + np.cumsum(raw, dtype=np.int64)) / info["scale"]
+            out[name] = raw
+        return pd.DataFrame(out)
+
+
+def read_lap(path: Path, driver: str, lap_number: int, channels=None) -> pd.DataFrame:
+    """Einmaliger Zugriff ohne offenes TelemetryStore-Objekt."""
+    return TelemetryStore(path).read_lap(driver, lap_number, channels)
+
+
+def disk_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in Path(path).iterdir() if f.is_file())
+
+
+# =========================================================
+# Benchmark mit synthetischer Telemetrie
+# =========================================================
+
+def benchmark(n_reads: int = 500, hz: float = 4.0):
+    from src.data.synthetic import generate_car_telemetry, generate_fastf1_laps
+
+    laps = generate_fastf1_laps(1)
+    laps = laps[laps["round"] == 1].sort_values(["Driver", "LapNumber"]).reset_index(drop=True)
+    telemetry = generate_car_telemetry(laps, hz=hz)
+    end = 300.0 + laps.groupby("Driver")["LapTime_s"].cumsum()
+    laps["Time"] = end
+    laps["LapStartTime"] = end - laps["LapTime_s"]
+
+    # Alles im Temp-Verzeichnis, nichts bleibt unter data/telemetry liegen
+    with tempfile.TemporaryDirectory(prefix="f_telemetry_") as tmp:
+        bench_dir = Path(tmp)
+        flat = pd.concat([tel.assign(Driver=d) for d, tel in telemetry.items()], ignore_index=True)
+        flat["LapNumber"] = np.concatenate([assign_laps(tel, laps[laps["Driver"] == d]) for d, tel in telemetry.items()])
+        csv_path = bench_dir / "telemetry.csv"
+        flat.to_csv(csv_path, index=False)
+
+        print(f"{len(flat):,} Proben, {len(laps):,} Runden, {len(telemetry)} Fahrer ({hz:g} Hz)")
+        print(f"  {'CSV':<22} {csv_path.stat().st_size / 1e6:8.2f} MB")
+        print(f"  {'float64 im Speicher':<22} {flat[list(CHANNELS)].to_numpy(dtype=np.float64).nbytes / 1e6:8.2f} MB")
+        stores = {}
+        for label, delta in [("Store, absolut", False), ("Store, delta", True)]:
+            stores[label] = bench_dir / label.split(", ")[1]
+            write_session(telemetry, laps, stores[label], delta=delta)
+            print(f"  {label:<22} {disk_size(stores[label]) / 1e6:8.2f} MB")
+
+        rng = np.random.default_rng(0)
+        picks = laps.iloc[rng.integers(0, len(laps), n_reads)][["Driver", "LapNumber"]].to_numpy()
+
+        store = TelemetryStore(stores["Store, delta"])
+        start = time.perf_counter()
+        for driver, lap in picks:
+            store.read_lap(driver, lap)
+        warm = (time.perf_counter() - start) / n_reads
+
+        start = time.perf_counter()
+        for driver, lap in picks[:50]:
+            read_lap(stores["Store, delta"], driver, lap)
+        cold = (time.perf_counter() - start) / 50
+
+        start = time.perf_counter()
+        for driver, lap in picks[:5]:
+            df = pd.read_csv(csv_path)
+            df[(df["Driver"] == driver) & (df["LapNumber"] == lap)]
+        csv = (time.perf_counter() - start) / 5
+
+        print("Eine Runde lesen:")
+        print(f"  {'Store offen (mmap)':<22} {warm * 1000:8.3f} ms")
+        print(f"  {'Store öffnen + lesen':<22} {cold * 1000:8.3f} ms")
+        print(f"  {'CSV laden + filtern':<22} {csv * 1000:8.3f} ms")
+
+        # Rundreise: dekodierte Runde gegen die Eingabe
+        driver, lap = picks[0]
+        got = store.read_lap(driver, lap)
+        ref = flat[(flat["Driver"] == driver) & (flat["LapNumber"] == lap)].sort_values("SessionTime")
+        for name in ["Speed", "Distance", "SessionTime"]:
+            diff = np.abs(got[name].to_numpy() - ref[name].to_numpy()).max()
+            print(f"  max. Abweichung {name:<12} {diff:.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telemetrie-Ablage mit Rundenindex.")
+    parser.add_argument("--benchmark", action="store_true", help="Größe und Lesezeit mit synthetischen Daten messen")
+    parser.add_argument("--reads", type=int, default=500)
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(args.reads)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
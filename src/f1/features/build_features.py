@@ -1,26 +1,73 @@
+"""
+Rundenfeatures aus bereinigten FastF1-Runden (make_dataset) plus Stint-Analyse.
+
+1. Pitlaps, Differenz zur Vorrunde, Rolling-Mittel, kumulierte Rennzeit
+2. Stint-Analyse: Reifenabbau pro (Session, Fahrer, Stint, Mischung) als
+   lineare Regression LapTime_s ~ TyreLife. Alle Stints werden auf einmal
+   über gruppierte Summen (n, Σx, Σy, Σxy, Σx², Σy²) in geschlossener Form
+   gelöst, ohne Schleife über Stints. Ausreisser (Safety Car, Ein-/Ausfahrt,
+   Verkehr) werden vorher über das Tempo und danach über die Residuen
+   markiert und nicht mitgefittet.
+
+Mehrere Sessions (z. B. eine ganze Saison) gehen in einem Aufruf, wenn die
+Spalten year / round / session_type vorhanden sind.
+
+Aufruf vom Projektroot:
+    python -m src.f1.features.build_features
+    python -m src.f1.features.build_features --benchmark 5
+"""
+
+import argparse
+import time
 from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
+from src.data.lap_classification import classify_laps, pace_features
+
 # Basisverzeichnis: .../formula3-ml-pipeline
 BASE_DIR = Path(__file__).resolve().parents[3]
 DATA_DIR = BASE_DIR / "data" / "f1" / "processed"
 
 INPUT = DATA_DIR / "f1_2023_round1_R_clean.csv"
 OUTPUT = DATA_DIR / "f1_2023_round1_R_features.csv"
+STINTS_OUTPUT = DATA_DIR / "f1_2023_round1_R_stints.csv"
+PACE_OUTPUT = DATA_DIR / "f1_2023_round1_R_pace.csv"
 
+SESSION_COLS = ["year", "round", "session_type"]
+
+# Runden langsamer als 107 % des Session-Medians gelten als Ausreisser
+OUTLIER_PACE = 1.07
+# Residuum über so vielen Standardabweichungen des Stints -> Ausreisser
+OUTLIER_Z = 3.0
+# Weniger saubere Runden -> kein Fit (Steigung NaN)
+MIN_STINT_LAPS = 4
+# Spritkorrektur: das Auto wird pro Runde etwa so viel schneller (~1.8 kg * 0.035 s/kg);
+# ohne Korrektur steckt der Spriteffekt in der Abbau-Steigung
+FUEL_CORRECTION_S = 0.06
+
+
+def session_keys(df: pd.DataFrame) -> list:
+    return [c for c in SESSION_COLS if c in df.columns]
 
-def build_features():
-    print(f"Lese Daten aus: {INPUT}")
-    df = pd.read_csv(INPUT)
+
+# =========================================================
+# 1. Rundenfeatures
+# =========================================================
+
+def add_lap_features(df: pd.DataFrame) -> pd.DataFrame:
+    driver = session_keys(df) + ["Driver"]
 
     # Zur Sicherheit sortieren
-    df = df.sort_values(["Driver", "LapNumber"]).reset_index(drop=True)
+    df = df.sort_values(driver + ["LapNumber"]).reset_index(drop=True)
+    by_driver = df.groupby(driver)
 
     # -------------------------
     # 1) Pitlaps über TyreLife-Reset / Compound-Wechsel
     # -------------------------
-    df["TyreLife_prev"] = df.groupby("Driver")["TyreLife"].shift(1)
-    df["Compound_prev"] = df.groupby("Driver")["Compound"].shift(1)
+    df["TyreLife_prev"] = by_driver["TyreLife"].shift(1)
+    df["Compound_prev"] = by_driver["Compound"].shift(1)
 
     # TyreLife-Reset (neuer Stint)
     tyre_reset = df["TyreLife"] < df["TyreLife_prev"]
@@ -35,43 +82,205 @@ def build_features():
     df["is_pit_lap"] = (tyre_reset | compound_change).fillna(False)
 
     # Erste Runde pro Fahrer niemals als Pitlap zählen
-    first_laps = df.groupby("Driver").head(1).index
+    first_laps = by_driver.head(1).index
     df.loc[first_laps, "is_pit_lap"] = False
 
     # -------------------------
     # 2) LapTime-Differenz zur vorherigen Runde
     # -------------------------
-    df["lap_time_prev"] = df.groupby("Driver")["LapTime_s"].shift(1)
+    df["lap_time_prev"] = by_driver["LapTime_s"].shift(1)
     df["lap_time_diff_prev"] = df["LapTime_s"] - df["lap_time_prev"]
 
     # -------------------------
     # 3) Rolling-Feature (Durchschnitt der letzten 3 Runden)
     # -------------------------
     df["rolling_lap_time_3"] = (
-        df.groupby("Driver")["LapTime_s"]
+        by_driver["LapTime_s"]
           .transform(lambda s: s.rolling(window=3, min_periods=1).mean())
     )
 
     # -------------------------
     # 4) Kumulative Rennzeit pro Fahrer
     # -------------------------
-    df["cumulative_race_time"] = (
-        df.groupby("Driver")["LapTime_s"].cumsum()
-    )
+    df["cumulative_race_time"] = by_driver["LapTime_s"].cumsum()
 
     # Hilfsspalten löschen
-    df = df.drop(columns=["TyreLife_prev", "Compound_prev", "lap_time_prev"])
+    return df.drop(columns=["TyreLife_prev", "Compound_prev", "lap_time_prev"])
+
+
+# =========================================================
+# 2. Stint-Analyse: Reifenabbau über gruppierte Summen
+# =========================================================
+
+def stint_keys(df: pd.DataFrame) -> list:
+    """(Session, Fahrer, Stint, Mischung); ohne Stint-Spalte zählen die Pitlaps."""
+    return session_keys(df) + ["Driver", "Stint" if "Stint" in df.columns else "stint_no", "Compound"]
+
+
+def _grouped_fit(g: np.ndarray, x: np.ndarray, y: np.ndarray, use: np.ndarray, n_groups: int) -> dict:
+    """
+    Kleinste Quadrate y = a + b*x pro Gruppe g, nur Zeilen mit use.
+    b = (Σxy - ΣxΣy/n) / (Σx² - (Σx)²/n), a = ȳ - b*x̄.
+    """
+    gu, xu, yu = g[use], x[use], y[use]
+    n = np.bincount(gu, minlength=n_groups).astype(float)
+    sx = np.bincount(gu, xu, n_groups)
+    sy = np.bincount(gu, yu, n_groups)
+    sxy = np.bincount(gu, xu * yu, n_groups)
+    sxx = np.bincount(gu, xu * xu, n_groups)
+    syy = np.bincount(gu, yu * yu, n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cxx = sxx - sx * sx / n
+        cxy = sxy - sx * sy / n
+        cyy = syy - sy * sy / n
+        ok = (n >= MIN_STINT_LAPS) & (cxx > 1e-9)
+        slope = np.where(ok, cxy / cxx, np.nan)
+        intercept = np.where(ok, (sy - slope * sx) / n, np.nan)
+
+        resid = y - (intercept[g] + slope[g] * x)
+        sse = np.bincount(gu, resid[use] ** 2, n_groups)
+        resid_std = np.where(ok & (n > 2), np.sqrt(sse / (n - 2)), np.nan)
+        r2 = np.where(ok & (cyy > 0), 1.0 - sse / cyy, np.nan)
+    return {"n": n, "slope": slope, "intercept": intercept, "resid": resid,
+            "resid_std": resid_std, "r2": r2}
+
+
+def fit_degradation(df: pd.DataFrame, x: str = "TyreLife", y: str = "LapTime_s",
+                    fuel_per_lap: float = FUEL_CORRECTION_S):
+    """
+    Reifenabbau pro Stint. Gibt (df mit Rundenspalten, Stint-Tabelle) zurück.
+    Gefittet wird y + fuel_per_lap * (LapNumber - 1) (spritkorrigiert,
+    fuel_per_lap=0 für die rohe Rundenzeit).
+
+    Rundenspalten: is_outlier_lap, deg_fit_s (Fit-Wert, spritkorrigiert), deg_residual_s.
+    Stint-Tabelle: Schlüssel, n_laps, n_clean_laps, tyre_life_min/max,
+    deg_slope_s (s pro Runde Reifenalter), deg_intercept_s, deg_r2, resid_std_s.
+    """
+    df = df.copy()
+    if "Stint" not in df.columns:
+        if "is_pit_lap" not in df.columns:
+            df = add_lap_features(df)
+        driver = [df[c] for c in session_keys(df) + ["Driver"]]
+        df["stint_no"] = df["is_pit_lap"].astype(int).groupby(driver).cumsum() + 1
+    keys = stint_keys(df)
+
+    g = df.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+    n_groups = int(g.max()) + 1 if len(g) else 0
+    xv = pd.to_numeric(df[x], errors="coerce").to_numpy(dtype=float)
+    yv = pd.to_numeric(df[y], errors="coerce").to_numpy(dtype=float)
+    if fuel_per_lap:
+        yv = yv + fuel_per_lap * (pd.to_numeric(df["LapNumber"], errors="coerce").to_numpy(dtype=float) - 1)
+    finite = np.isfinite(xv) & np.isfinite(yv)
+
+    # 1) Tempo: langsamer als OUTLIER_PACE * Session-Median oder nicht grün
+    # Schlüssel als Arrays: yv hat einen RangeIndex, df evtl. nicht
+    session = [df[c].to_numpy() for c in session_keys(df)] or np.zeros(len(df))
+    session_median = pd.Series(yv).groupby(session).transform("median").to_numpy()
+    slow = yv > OUTLIER_PACE * session_median
+    if "TrackStatus" in df.columns:
+        slow |= df["TrackStatus"].astype(str).str.contains("[4567]", regex=True).to_numpy()
+
+    # 2) Residuen aus dem ersten Fit, danach neu fitten ohne Ausreisser
+    use = finite & ~slow
+    first = _grouped_fit(g, xv, yv, use, n_groups)
+    far = np.abs(first["resid"]) > OUTLIER_Z * first["resid_std"][g]
+    use &= ~far
+    fit = _grouped_fit(g, xv, yv, use, n_groups)
+
+    df["is_outlier_lap"] = finite & ~use
+    df["deg_fit_s"] = fit["intercept"][g] + fit["slope"][g] * xv
+    df["deg_residual_s"] = fit["resid"]
+
+    first_row = np.unique(g, return_index=True)[1]
+    stints = df.iloc[first_row][keys].reset_index(drop=True)
+    stints["n_laps"] = np.bincount(g, minlength=n_groups)
+    stints["n_clean_laps"] = fit["n"].astype(int)
+    x_clean = np.where(use, xv, np.nan)
+    stints["tyre_life_min"] = pd.Series(x_clean).groupby(g).min().reindex(range(n_groups)).to_numpy()
+    stints["tyre_life_max"] = pd.Series(x_clean).groupby(g).max().reindex(range(n_groups)).to_numpy()
+    stints["deg_slope_s"] = fit["slope"]
+    stints["deg_intercept_s"] = fit["intercept"]
+    stints["deg_r2"] = fit["r2"]
+    stints["resid_std_s"] = fit["resid_std"]
+    return df, stints
+
+
+# =========================================================
+# 3. Skript + Benchmark
+# =========================================================
+
+def build_features():
+    print(f"Lese Daten aus: {INPUT}")
+    df = pd.read_csv(INPUT)
+
+    df = add_lap_features(df)
+    df, stints = fit_degradation(df)
+    # Ältere Clean-Dateien haben noch keine Rundenklassen
+    if "lap_class" not in df.columns:
+        df = classify_laps(df)
+    pace = pace_features(df, session_keys(df) + ["Driver"])
 
     # Output-Ordner sicherstellen
     OUTPUT.parent.mkdir(parents=True, exist_ok=True)
 
     # Speichern
     df.to_csv(OUTPUT, index=False)
+    stints.to_csv(STINTS_OUTPUT, index=False)
+    pace.to_csv(PACE_OUTPUT, index=False)
     print(f"Features gespeichert unter: {OUTPUT}")
     print("Shape mit Features:", df.shape)
+    print(f"{len(stints)} Stints, {int(df['is_outlier_lap'].sum())} Ausreisser-Runden -> {STINTS_OUTPUT.name}")
+    print(stints.groupby("Compound")["deg_slope_s"].describe().to_string(float_format=lambda v: f"{v:.3f}"))
+    print(f"Rundenklassen: {df['lap_class'].value_counts().to_dict()} -> {PACE_OUTPUT.name}")
 
 
-if __name__ == "__main__":
+def _loop_fit(df: pd.DataFrame, keys: list) -> pd.Series:
+    """Vergleich: np.polyfit pro Stint (gleiche saubere Runden und Spritkorrektur)."""
+    clean = df[~df["is_outlier_lap"]].assign(
+        y=lambda d: d["LapTime_s"] + FUEL_CORRECTION_S * (d["LapNumber"] - 1))
+    return clean.groupby(keys, sort=False, dropna=False).apply(
+        lambda s: np.polyfit(s["TyreLife"], s["y"], 1)[0]
+        if len(s) >= MIN_STINT_LAPS and s["TyreLife"].nunique() > 1 else np.nan
+    )
+
+
+def benchmark(n_seasons: int = 5, loop_stints: int = 500):
+    """Durchsatz auf synthetischen FastF1-Runden mehrerer Saisons, gegen polyfit pro Stint."""
+    from src.data.synthetic import generate_fastf1_laps
+
+    laps = generate_fastf1_laps(n_seasons)
+    start = time.perf_counter()
+    out, stints = fit_degradation(laps)
+    seconds = time.perf_counter() - start
+    print(f"{len(laps):,} Runden, {len(stints):,} Stints, {n_seasons} Saisons: "
+          f"{seconds * 1000:.0f} ms ({len(laps) / seconds:,.0f} Runden/s)")
+
+    # Schleife nur auf einer Teilmenge der Stints, hochgerechnet
+    keys = stint_keys(out)
+    subset = out.merge(stints[keys].head(loop_stints), on=keys)
+    start = time.perf_counter()
+    loop = _loop_fit(subset, keys)
+    loop_s = (time.perf_counter() - start) * len(stints) / loop_stints
+    vec = stints.head(loop_stints).set_index(keys)["deg_slope_s"]
+    diff = np.nanmax(np.abs(loop.reindex(vec.index).to_numpy(dtype=float) - vec.to_numpy()))
+    print(f"polyfit pro Stint (hochgerechnet): {loop_s * 1000:.0f} ms -> {loop_s / seconds:.0f}x langsamer, "
+          f"max. Abweichung der Steigung {diff:.2e}")
+    print(f"Ausreisser: {out['is_outlier_lap'].mean():.1%} der Runden")
+    print(stints.groupby("Compound")["deg_slope_s"].median().to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rundenfeatures und Reifenabbau pro Stint.")
+    parser.add_argument("--benchmark", type=int, metavar="N_SEASONS",
+                        help="Durchsatz auf synthetischen Runden von N_SEASONS Saisons")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
     build_features()
 
 
+if __name__ == "__main__":
+    main()
@@ -19,11 +19,19 @@ PROCESSED_DIR = Path(__file__).resolve().parents[3] / "data" / "f1" / "processed
 # → EINEN HÖHER → projektroot
 
 
-def build_f1_base_dataset() -> pd.DataFrame:
-    races = load_races()
-    results = load_results()
-    drivers = load_drivers()
-    constructors = load_constructors()
+def build_f1_base_dataset(tables: dict = None) -> pd.DataFrame:
+    # tables: bereits geladene Kaggle-Tabellen (z. B. synthetische), sonst aus data/f1/raw
+    if tables is None:
+        tables = {
+            "races": load_races(),
+            "results": load_results(),
+            "drivers": load_drivers(),
+            "constructors": load_constructors(),
+        }
+    races = tables["races"]
+    results = tables["results"]
+    drivers = tables["drivers"]
+    constructors = tables["constructors"]
 
     races_small = races[["raceId", "year", "round", "circuitId", "name", "date"]].rename(
         columns={"name": "race_name"}
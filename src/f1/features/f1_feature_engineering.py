@@ -47,7 +47,7 @@ def _time_str_to_seconds(x: Optional[str]) -> float:
     return np.nan
 
 
-def build_f1_season_features(min_year: int = 2019) -> pd.DataFrame:
+def build_f1_season_features(min_year: int = 2019, base: Optional[pd.DataFrame] = None) -> pd.DataFrame:
     """
     Baut saisonbasierte F1-Features pro Fahrer + Jahr.
 
@@ -59,9 +59,11 @@ def build_f1_season_features(min_year: int = 2019) -> pd.DataFrame:
 
     Hinweis: Keine echten Lap-Features (pro Runde), da im F1-Datensatz
     keine vollständigen Lap-Times vorhanden sind (nur Gesamtzeit + Bestlap).
+
+    base: bereits geladenes Basis-Dataset (sonst aus f1_base_dataset.csv).
     """
 
-    df = load_f1_base_dataset().copy()
+    df = (load_f1_base_dataset() if base is None else base).copy()
 
     # Auf moderne Jahre beschränken (wie dein aktuelles f1_features.csv)
     df = df[df["year"] >= min_year].copy()
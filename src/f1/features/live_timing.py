@@ -0,0 +1,343 @@
+"""
+Live-Timing: Rundenfeatures inkrementell, eine Runde (Ereignis) nach der
+anderen, statt im Batch nach dem Rennen (build_features.add_lap_features).
+
+Pro (Session, Fahrer) hält DriverState nur den laufenden Zustand:
+- Ringpuffer der letzten ROLLING_WINDOW Rundenzeiten -> rolling_lap_time_3
+- vorige Rundenzeit, TyreLife, Mischung -> lap_time_diff_prev, is_pit_lap
+- laufende Summe                       -> cumulative_race_time
+- LapNumber, Sessionzeit am Rundenende -> Wertung
+Jede Runde kostet damit konstante Zeit, unabhängig von der Renndauer. Nach
+jeder Runde gibt die Engine die Features der Runde plus die Position des
+Fahrers zurück (O(Fahrer) pro Runde, also konstant bei fester
+Startaufstellung), standings() liefert die ganze Wertung.
+
+Gewertet wird wie auf der Strecke: mehr absolvierte Runden (LapNumber, auch
+Runden ohne gültige Zeit) liegen vorne, bei gleicher Rundenzahl die frühere
+Sessionzeit am Rundenende (FastF1 Time, als Time_s). Fehlt Time, läuft die
+Uhr über die Rundenzeiten weiter; das ist dann nur eine Näherung, weil
+gestrichene Runden (NaN) keine Zeit beitragen.
+
+Quellen:
+- replay():     gespeicherte FastF1-Runden (roh mit LapTime/Time oder
+                bereinigt mit LapTime_s/Time_s) in Zeitreihenfolge, speed=1 ist
+                Echtzeit, speed=0 so schnell wie möglich
+- local_feed(): Platzhalter für einen Live-Feed, ein Thread schiebt die
+                Runden in eine Queue, die Engine liest daraus
+
+Der Endzustand muss dem Batch-Ergebnis entsprechen und die Live-Position
+nach jeder Runde der FastF1-Spalte Position, --benchmark prüft das.
+
+Aufruf vom Projektroot:
+    python -m src.f1.features.live_timing --benchmark 1
+    python -m src.f1.features.live_timing --replay data/raw/f1_2023_round1_R.csv --speed 50
+"""
+
+import argparse
+import math
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.f1.features.build_features import add_lap_features, session_keys
+
+ROLLING_WINDOW = 3
+FEATURE_COLS = ["is_pit_lap", "lap_time_diff_prev", "rolling_lap_time_3", "cumulative_race_time"]
+
+
+def _num(value) -> float:
+    """Wert aus einem Ereignis als float, fehlend -> NaN."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return value
+
+
+def _missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class DriverState:
+    __slots__ = ("window", "prev_lap_time", "prev_tyre_life", "prev_compound",
+                 "cum_time", "laps", "race_time", "seen")
+
+    def __init__(self):
+        self.window = deque(maxlen=ROLLING_WINDOW)
+        self.prev_lap_time = math.nan
+        self.prev_tyre_life = math.nan
+        self.prev_compound = None
+        self.cum_time = 0.0
+        self.laps = 0          # absolvierte Runden (für die Wertung)
+        self.race_time = 0.0   # Sessionzeit am Ende der letzten Runde (für die Wertung)
+        self.seen = False
+
+    def update(self, lap_time: float, tyre_life: float, compound,
+               lap_number: float = math.nan, session_time: float = math.nan) -> dict:
+        # Pitlap wie im Batch: TyreLife-Reset oder Mischungswechsel, nie in der ersten Runde
+        if self.seen:
+            pit = (tyre_life < self.prev_tyre_life) or (
+                not _missing(self.prev_compound) and compound != self.prev_compound)
+        else:
+            pit = False
+
+        diff = lap_time - self.prev_lap_time
+
+        # Rolling-Mittel über die Runden mit Zeit im Fenster (min_periods=1)
+        self.window.append(lap_time)
+        total, count = 0.0, 0
+        for value in self.window:
+            if value == value:
+                total += value
+                count += 1
+        rolling = total / count if count else math.nan
+
+        # cumsum überspringt fehlende Zeiten, die Runde selbst bleibt NaN
+        if lap_time == lap_time:
+            self.cum_time += lap_time
+            cumulative = self.cum_time
+        else:
+            cumulative = math.nan
+
+        # Wertung: jede Runde zählt, auch ohne gültige Zeit
+        self.laps = int(lap_number) if lap_number == lap_number else self.laps + 1
+        if session_time == session_time:
+            self.race_time = session_time
+        elif lap_time == lap_time:
+            self.race_time += lap_time
+
+        self.prev_lap_time = lap_time
+        self.prev_tyre_life = tyre_life
+        self.prev_compound = compound
+        self.seen = True
+        return {
+            "is_pit_lap": bool(pit),
+            "lap_time_diff_prev": diff,
+            "rolling_lap_time_3": rolling,
+            "cumulative_race_time": cumulative,
+        }
+
+
+class LiveTiming:
+    """Zustand aller Sessions und Fahrer; update() pro Runde."""
+
+    def __init__(self, keys: list):
+        self.keys = list(keys)
+        self.sessions = {}   # Session-Schlüssel -> {Fahrer: DriverState}
+
+    def update(self, event: dict) -> dict:
+        session = tuple(event[k] for k in self.keys)
+        drivers = self.sessions.setdefault(session, {})
+        state = drivers.get(event["Driver"])
+        if state is None:
+            state = drivers[event["Driver"]] = DriverState()
+
+        features = state.update(_num(event.get("LapTime_s")), _num(event.get("TyreLife")),
+                                event.get("Compound"), _num(event.get("LapNumber")),
+                                _num(event.get("Time_s")))
+
+        # Position: mehr Runden oder gleich viele und früher über die Linie liegt vorne;
+        # bei gleicher Zeit (ms) liegt vorne, wer zuerst gemeldet wurde
+        position = 1
+        for other in drivers.values():
+            if other is not state and (other.laps > state.laps or
+                                       (other.laps == state.laps and other.race_time <= state.race_time)):
+                position += 1
+
+        out = {k: event[k] for k in self.keys}
+        out["Driver"] = event["Driver"]
+        out["LapNumber"] = event["LapNumber"]
+        out.update(features)
+        out["live_position"] = position
+        return out
+
+    def standings(self, session: tuple) -> pd.DataFrame:
+        rows = [{"Driver": d, "laps": s.laps, "race_time_s": s.race_time, "cumulative_race_time": s.cum_time}
+                for d, s in self.sessions.get(session, {}).items()]
+        table = pd.DataFrame(rows, columns=["Driver", "laps", "race_time_s", "cumulative_race_time"])
+        table = table.sort_values(["laps", "race_time_s"], ascending=[False, True]).reset_index(drop=True)
+        table["position"] = np.arange(1, len(table) + 1)
+        leader = table["race_time_s"].iloc[0] if len(table) else math.nan
+        table["gap_s"] = np.where(table["laps"] == table["laps"].max(), table["race_time_s"] - leader, np.nan)
+        return table
+
+
+# =========================================================
+# Quellen
+# =========================================================
+
+def _event_order(df: pd.DataFrame) -> pd.DataFrame:
+    """Runden in der Reihenfolge, in der sie im Rennen abgeschlossen wurden."""
+    keys = session_keys(df)
+    driver = keys + ["Driver"]
+    df = df.sort_values(driver + ["LapNumber"]).reset_index(drop=True)
+    if "Time_s" not in df.columns and "Time" in df.columns:
+        # Sessionzeit am Rundenende (FastF1), für die Wertung ohne Auffüllen
+        df["Time_s"] = pd.to_timedelta(df["Time"], errors="coerce").dt.total_seconds()
+    if "Time_s" in df.columns:
+        df["_event_s"] = df.groupby(driver)["Time_s"].ffill().fillna(0.0)
+    else:
+        df["_event_s"] = df.groupby(driver)["LapTime_s"].cumsum().fillna(0.0)
+        df["_event_s"] = df.groupby(driver)["_event_s"].cummax()
+    return df.sort_values(keys + ["_event_s", "LapNumber"], kind="stable").reset_index(drop=True)
+
+
+def load_laps(path: Path) -> pd.DataFrame:
+    """Rohe (LapTime als Timedelta) oder bereinigte (LapTime_s) FastF1-Runden."""
+    df = pd.read_csv(path)
+    if "LapTime_s" not in df.columns and "LapTime" in df.columns:
+        df["LapTime_s"] = pd.to_timedelta(df["LapTime"], errors="coerce").dt.total_seconds()
+    return df
+
+
+def replay(df: pd.DataFrame, speed: float = 0.0):
+    """Ereignisse aus gespeicherten Runden; speed-fach Echtzeit (0 = ohne Warten)."""
+    df = _event_order(df)
+    records = df.to_dict("records")
+    t0 = time.perf_counter()
+    first = records[0]["_event_s"] if records else 0.0
+    for event in records:
+        if speed > 0:
+            wait = (event["_event_s"] - first) / speed - (time.perf_counter() - t0)
+            if wait > 0:
+                time.sleep(wait)
+        yield event
+
+
+def local_feed(df: pd.DataFrame, speed: float = 0.0, maxsize: int = 1000):
+    """Platzhalter-Feed: Produzenten-Thread -> Queue -> Ereignisse."""
+    q = queue.Queue(maxsize=maxsize)
+    done = object()
+
+    def produce():
+        for event in replay(df, speed):
+            q.put(event)
+        q.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        event = q.get()
+        if event is done:
+            return
+        yield event
+
+
+def run(events, keys: list):
+    """Alle Ereignisse durch die Engine; gibt (Engine, Ausgaben, Latenzen in s) zurück."""
+    engine = LiveTiming(keys)
+    outputs, latencies = [], []
+    for event in events:
+        start = time.perf_counter()
+        outputs.append(engine.update(event))
+        latencies.append(time.perf_counter() - start)
+    return engine, pd.DataFrame(outputs), np.asarray(latencies)
+
+
+def compare_with_batch(df: pd.DataFrame, live: pd.DataFrame) -> dict:
+    """Maximale Abweichung pro Feature zwischen Live- und Batch-Ergebnis."""
+    keys = session_keys(df) + ["Driver", "LapNumber"]
+    batch = add_lap_features(df)
+    merged = batch.merge(live, on=keys, suffixes=("", "_live"), validate="one_to_one")
+    diffs = {"rows": (len(batch), len(live), len(merged))}
+    for col in FEATURE_COLS:
+        a = merged[col].to_numpy(dtype=float)
+        b = merged[f"{col}_live"].to_numpy(dtype=float)
+        same_nan = np.isnan(a) == np.isnan(b)
+        diffs[col] = np.inf if not same_nan.all() else float(np.nanmax(np.abs(a - b), initial=0.0))
+    return diffs
+
+
+def check_positions(df: pd.DataFrame, live: pd.DataFrame) -> int:
+    """
+    Live-Position nach jeder Runde gegen die FastF1-Spalte Position (Position
+    am Rundenende); gibt die Zahl der Abweichungen zurück. Gleiche Time_s in
+    derselben Runde (auf die ms gleichauf) kann die Engine nicht trennen, diese
+    Abweichungen werden nur gezählt.
+    """
+    if "Position" not in df.columns:
+        print("  Wertung: keine Spalte Position, nicht geprüft")
+        return 0
+    keys = session_keys(df) + ["Driver", "LapNumber"]
+    clock = ["Time_s"] if "Time_s" in df.columns else []
+    merged = df[keys + ["Position"] + clock].merge(live[keys + ["live_position"]], on=keys, validate="one_to_one")
+    merged = merged[merged["Position"].notna()]
+    wrong = merged["Position"].to_numpy(dtype=float) != merged["live_position"].to_numpy()
+    tied = np.zeros(len(merged), dtype=bool)
+    if clock:
+        tied = (merged.duplicated(session_keys(df) + ["LapNumber", "Time_s"], keep=False)
+                & merged["Time_s"].notna()).to_numpy()
+    mismatched = int((wrong & ~tied).sum())
+    print(f"  Wertung: {int((~wrong).sum()):,}/{len(merged):,} Live-Positionen gleich Position, "
+          f"{int((wrong & tied).sum())} bei Gleichstand auf die ms")
+    return mismatched
+
+
+def _report(df: pd.DataFrame, live: pd.DataFrame, latencies: np.ndarray, wall: float):
+    print(f"{len(latencies):,} Ereignisse in {wall:.2f} s -> {len(latencies) / wall:,.0f} Ereignisse/s")
+    print(f"  Latenz pro Ereignis: median {np.median(latencies) * 1e6:.1f} µs, "
+          f"p99 {np.percentile(latencies, 99) * 1e6:.1f} µs, max {latencies.max() * 1e6:.1f} µs")
+    diffs = compare_with_batch(df, live)
+    print(f"  Zeilen Batch/Live/gemeinsam: {diffs.pop('rows')}")
+    for col, diff in diffs.items():
+        print(f"  max. Abweichung {col:<22} {diff:.2e}")
+    mismatched = check_positions(df, live)
+    if any(d > 1e-9 for d in diffs.values()):
+        raise AssertionError("Live-Endzustand weicht vom Batch ab")
+    if mismatched:
+        raise AssertionError(f"{mismatched} Live-Positionen weichen von Position ab")
+
+
+def benchmark(n_seasons: int = 1, feed: bool = False):
+    from src.data.synthetic import generate_fastf1_laps
+
+    laps = generate_fastf1_laps(n_seasons)
+    # Lücken wie nach make_dataset (Ein-/Ausfahrt, gestrichene Runden)
+    laps.loc[laps.sample(frac=0.03, random_state=0).index, "LapTime_s"] = np.nan
+    source = local_feed(laps) if feed else replay(laps)
+    start = time.perf_counter()
+    engine, live, latencies = run(source, session_keys(laps))
+    _report(laps, live, latencies, time.perf_counter() - start)
+
+    last = next(reversed(engine.sessions))
+    print(f"Wertung am Ende von {last}:")
+    print(engine.standings(last).head(5).to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live-Timing mit inkrementellen Rundenfeatures.")
+    parser.add_argument("--benchmark", type=int, metavar="N_SEASONS",
+                        help="Durchsatz und Batch-Vergleich auf synthetischen Runden")
+    parser.add_argument("--feed", action="store_true", help="über den lokalen Queue-Feed statt direktem Replay")
+    parser.add_argument("--replay", type=Path, help="gespeicherte FastF1-Runden (CSV) abspielen")
+    parser.add_argument("--speed", type=float, default=0.0, help="Vielfaches der Echtzeit, 0 = ohne Warten")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.feed)
+        return
+    if args.replay:
+        df = load_laps(args.replay)
+        source = local_feed(df, args.speed) if args.feed else replay(df, args.speed)
+        engine = LiveTiming(session_keys(df))
+        start = time.perf_counter()
+        latencies = []
+        outputs = []
+        for event in source:
+            t = time.perf_counter()
+            out = engine.update(event)
+            latencies.append(time.perf_counter() - t)
+            outputs.append(out)
+            print(f"Runde {int(out['LapNumber']):>3} {out['Driver']:<4} P{out['live_position']:<3} "
+                  f"{out['cumulative_race_time']:10.3f} s  Pit={out['is_pit_lap']}")
+        _report(df, pd.DataFrame(outputs), np.asarray(latencies), time.perf_counter() - start)
+        return
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
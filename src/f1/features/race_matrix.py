@@ -0,0 +1,280 @@
+"""
+Rennmatrix: Runden einer oder mehrerer Sessions als dichte NumPy-Arrays
+[Session, Fahrer, Runde] statt langer Tabelle.
+
+from_laps() verteilt die Runden (Format von make_dataset / build_features)
+auf Arrays für Rundenzeit, kumulierte Zeit, Position, Mischung und
+Reifenalter; fehlende Runden sind NaN (bzw. -1 bei der Mischung), present
+markiert vorhandene Runden. Fahrer sind alle Fahrer der Eingabe, wer in
+einer Session fehlt, hat dort nur NaN.
+
+Fahrerübergreifende Features laufen als Array-Operationen über alle Fahrer
+und Sessions auf einmal (Achse 1 = Fahrer):
+- gap_to_leader_s: kumulierte Zeit minus der schnellsten nach derselben Runde
+- interval_s:      Abstand zum Auto davor (nach kumulierter Zeit)
+- position_calc:   Position aus der kumulierten Zeit
+- positions_gained: Positionen gegenüber der Vorrunde (FastF1-Position)
+- in_traffic:      weniger als TRAFFIC_S hinter dem Auto davor
+
+Bereinigte Daten (make_dataset) haben Lücken bei Ein-/Ausfahrtsrunden.
+Die kumulierte Zeit kommt deshalb aus der Sessionuhr (Time_s minus
+Rennstart, make_dataset behält FastF1 Time/LapStartTime): sie enthält die
+Boxenstopps auch dann, wenn die Runden selbst fehlen (clock=True).
+
+Ohne Time_s wird aus den Rundenzeiten summiert. Mit impute=True werden
+Lücken innerhalb des Rennens eines Fahrers mit dem Median der Runde über
+alle Fahrer gefüllt (imputed markiert), sonst endet die kumulierte Zeit an
+der ersten Lücke. Der Median enthält keinen Boxenverlust, Abstände und
+Positionen nach einem Stopp sind dann nur genähert (clock=False, Warnung).
+
+Aufruf vom Projektroot:
+    python -m src.f1.features.race_matrix --benchmark 1
+"""
+
+import argparse
+import time
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.f1.features.build_features import session_keys
+
+# Abstand zum Vordermann, ab dem ein Auto als im Verkehr gilt (DRS-Fenster)
+TRAFFIC_S = 1.0
+
+
+@dataclass
+class RaceMatrix:
+    sessions: pd.DataFrame   # Schlüssel pro Session (year, round, session_type)
+    drivers: np.ndarray      # Fahrercodes, Achse 1
+    compounds: np.ndarray    # Namen zu den Codes in compound
+    lap_time: np.ndarray     # float64 [S, D, L]
+    cum_time: np.ndarray     # float64 [S, D, L], Rennzeit am Rundenende (s. clock)
+    position: np.ndarray     # float64 [S, D, L], FastF1-Position
+    compound: np.ndarray     # int8 [S, D, L], -1 = fehlt
+    tyre_life: np.ndarray    # float64 [S, D, L]
+    present: np.ndarray      # bool [S, D, L], Runde in den Daten
+    imputed: np.ndarray      # bool [S, D, L], Rundenzeit aufgefüllt
+    clock: bool = True       # cum_time aus der Sessionuhr; False = aus Rundenzeiten genähert
+
+    @property
+    def shape(self) -> tuple:
+        return self.lap_time.shape
+
+
+def from_laps(df: pd.DataFrame, impute: bool = True) -> RaceMatrix:
+    """Lange Rundentabelle -> RaceMatrix (eine Zeile pro Fahrer und Runde erwartet)."""
+    keys = session_keys(df)
+    s = df.groupby(keys, sort=True).ngroup().to_numpy() if keys else np.zeros(len(df), dtype=np.int64)
+    d, drivers = pd.factorize(df["Driver"], sort=True)
+    lap = pd.to_numeric(df["LapNumber"], errors="coerce").to_numpy()
+    ok = np.isfinite(lap) & (d >= 0)
+    s, d, lap = s[ok], d[ok], lap[ok].astype(np.int64) - 1
+    rows = df[ok]
+
+    shape = (int(s.max()) + 1 if len(s) else 0, len(drivers), int(lap.max()) + 1 if len(lap) else 0)
+
+    def dense(col, dtype=np.float64, fill=np.nan):
+        out = np.full(shape, fill, dtype=dtype)
+        if col in rows.columns:
+            out[s, d, lap] = pd.to_numeric(rows[col], errors="coerce").to_numpy(dtype=dtype)
+        return out
+
+    present = np.zeros(shape, dtype=bool)
+    present[s, d, lap] = True
+    lap_time = dense("LapTime_s")
+    clock = "Time_s" in rows.columns
+    comp_codes, compounds = pd.factorize(rows["Compound"]) if "Compound" in rows.columns else (None, [])
+    compound = np.full(shape, -1, dtype=np.int8)
+    if comp_codes is not None:
+        compound[s, d, lap] = comp_codes
+
+    imputed = np.zeros(shape, dtype=bool)
+    if impute:
+        # Lücken zwischen erster und letzter Runde eines Fahrers -> Median der Runde
+        has = np.isfinite(lap_time)
+        idx = np.arange(shape[2])
+        first = np.where(has.any(axis=2), np.argmax(has, axis=2), shape[2])
+        last = np.where(has.any(axis=2), shape[2] - 1 - np.argmax(has[:, :, ::-1], axis=2), -1)
+        inside = (idx >= first[:, :, None]) & (idx <= last[:, :, None])
+        with warnings.catch_warnings():
+            # Runden ohne einen einzigen Fahrer -> NaN, ohne Warnung
+            warnings.simplefilter("ignore", RuntimeWarning)
+            lap_median = np.nanmedian(lap_time, axis=1, keepdims=True)
+        imputed = inside & ~has
+        lap_time = np.where(imputed, lap_median, lap_time)
+        if imputed.any() and not clock:
+            warnings.warn("race_matrix: Lücken ohne Time_s mit dem Rundenmedian gefüllt, "
+                          "Boxenverluste fehlen (Abstände genähert)", stacklevel=2)
+
+    if clock:
+        # Rennzeit = Sessionzeit am Rundenende minus Rennstart (frühester Rundenstart der Session)
+        end = dense("Time_s")
+        begin = dense("LapStartTime_s") if "LapStartTime_s" in rows.columns else end - dense("LapTime_s")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            start = np.nanmin(begin, axis=(1, 2), keepdims=True)
+        cum_time = np.round(end - start, 3)
+    else:
+        # NaN pflanzt sich in cumsum fort: nach einer Lücke bleibt die Zeit unbekannt;
+        # auf ms gerundet wie die Zeitnahme, sonst trennt Summationsrauschen Gleichstände
+        cum_time = np.round(np.cumsum(lap_time, axis=2), 3)
+
+    if keys:
+        first_row = np.unique(s, return_index=True)[1]
+        sessions = rows.iloc[first_row][keys].reset_index(drop=True)
+    else:
+        sessions = pd.DataFrame(index=range(shape[0]))
+
+    return RaceMatrix(
+        sessions=sessions,
+        drivers=np.asarray(drivers),
+        compounds=np.asarray(compounds),
+        lap_time=lap_time,
+        cum_time=cum_time,
+        position=dense("Position"),
+        compound=compound,
+        tyre_life=dense("TyreLife"),
+        present=present,
+        imputed=imputed,
+        clock=clock,
+    )
+
+
+# =========================================================
+# Fahrerübergreifende Features als Array-Operationen
+# =========================================================
+
+def cross_driver_features(m: RaceMatrix) -> dict:
+    """Alle Features als Arrays [S, D, L] (NaN, wo die Runde fehlt)."""
+    cum = m.cum_time
+    valid = np.isfinite(cum)
+
+    with np.errstate(invalid="ignore"):
+        leader = np.min(np.where(valid, cum, np.inf), axis=1, keepdims=True)
+    gap_to_leader = np.where(valid, cum - leader, np.nan)
+
+    # Reihenfolge nach kumulierter Zeit pro (Session, Runde); NaN ans Ende
+    order = np.argsort(np.where(valid, cum, np.inf), axis=1, kind="stable")
+    cum_sorted = np.take_along_axis(cum, order, axis=1)
+    interval_sorted = np.full_like(cum_sorted, np.nan)
+    interval_sorted[:, 1:, :] = cum_sorted[:, 1:, :] - cum_sorted[:, :-1, :]
+
+    interval = np.empty_like(interval_sorted)
+    np.put_along_axis(interval, order, interval_sorted, axis=1)
+    rank = np.empty(order.shape, dtype=np.float64)
+    np.put_along_axis(rank, order, np.arange(1, cum.shape[1] + 1, dtype=np.float64)[None, :, None], axis=1)
+
+    position = m.position
+    gained = np.full_like(position, np.nan)
+    gained[:, :, 1:] = position[:, :, :-1] - position[:, :, 1:]
+
+    return {
+        "gap_to_leader_s": gap_to_leader,
+        "interval_s": np.where(valid, interval, np.nan),
+        "position_calc": np.where(valid, rank, np.nan),
+        "positions_gained": gained,
+        "in_traffic": valid & (interval < TRAFFIC_S),
+    }
+
+
+def to_long(m: RaceMatrix, features: dict, present_only: bool = True) -> pd.DataFrame:
+    """Arrays zurück in eine lange Tabelle (Session-Schlüssel, Driver, LapNumber, Features)."""
+    mask = m.present if present_only else np.ones(m.shape, dtype=bool)
+    s, d, lap = np.nonzero(mask)
+    out = m.sessions.iloc[s].reset_index(drop=True)
+    out["Driver"] = m.drivers[d]
+    out["LapNumber"] = (lap + 1).astype(float)
+    for name, values in features.items():
+        out[name] = values[s, d, lap]
+    return out
+
+
+def add_race_features(df: pd.DataFrame, impute: bool = True) -> pd.DataFrame:
+    """Bequemer Weg: Features der Matrix an die lange Rundentabelle mergen."""
+    m = from_laps(df, impute)
+    long = to_long(m, cross_driver_features(m))
+    return df.merge(long, on=session_keys(df) + ["Driver", "LapNumber"], how="left")
+
+
+# =========================================================
+# Vergleich: dieselben Features mit groupby auf der langen Tabelle
+# =========================================================
+
+def groupby_features(df: pd.DataFrame) -> pd.DataFrame:
+    keys = session_keys(df)
+    df = df.sort_values(keys + ["Driver", "LapNumber"]).reset_index(drop=True)
+    if "Time_s" in df.columns:
+        begin = df["LapStartTime_s"] if "LapStartTime_s" in df.columns else df["Time_s"] - df["LapTime_s"]
+        start = begin.groupby([df[k] for k in keys]).transform("min") if keys else begin.min()
+        df["cum_time"] = (df["Time_s"] - start).round(3)
+    else:
+        df["cum_time"] = df.groupby(keys + ["Driver"])["LapTime_s"].cumsum().round(3)
+    lap_keys = keys + ["LapNumber"]
+    df["gap_to_leader_s"] = df["cum_time"] - df.groupby(lap_keys)["cum_time"].transform("min")
+
+    ordered = df.sort_values(lap_keys + ["cum_time"], kind="stable")
+    df["interval_s"] = ordered.groupby(lap_keys)["cum_time"].diff()
+    df["position_calc"] = df.groupby(lap_keys)["cum_time"].rank(method="first")
+    df["positions_gained"] = -df.groupby(keys + ["Driver"])["Position"].diff()
+    df["in_traffic"] = df["interval_s"] < TRAFFIC_S
+    return df
+
+
+def benchmark(n_seasons: int = 1, repeat: int = 3):
+    from src.data.synthetic import generate_fastf1_laps
+
+    laps = generate_fastf1_laps(n_seasons)
+    timings = {}
+
+    def best(label, func):
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = func()
+            seconds.append(time.perf_counter() - start)
+        timings[label] = min(seconds)
+        return out
+
+    ref = best("groupby (lange Tabelle)", lambda: groupby_features(laps))
+    m = best("Matrix aufbauen", lambda: from_laps(laps))
+    feats = best("Features auf der Matrix", lambda: cross_driver_features(m))
+    long = best("zurück in lange Tabelle", lambda: to_long(m, feats))
+
+    print(f"{len(laps):,} Runden, Matrix {m.shape} (Sessions, Fahrer, Runden), "
+          f"{m.present.mean():.0%} belegt")
+    for label, seconds in timings.items():
+        print(f"  {label:<28} {seconds * 1000:8.1f} ms")
+    matrix_total = timings["Matrix aufbauen"] + timings["Features auf der Matrix"] + timings["zurück in lange Tabelle"]
+    print(f"  Matrix gesamt {matrix_total * 1000:.1f} ms -> {timings['groupby (lange Tabelle)'] / matrix_total:.1f}x, "
+          f"nur Features {timings['groupby (lange Tabelle)'] / timings['Features auf der Matrix']:.0f}x")
+
+    merged = ref.merge(long, on=session_keys(laps) + ["Driver", "LapNumber"], suffixes=("", "_m"))
+    for col in ["gap_to_leader_s", "interval_s", "position_calc", "positions_gained"]:
+        diff = np.nanmax(np.abs(merged[col].to_numpy(dtype=float) - merged[f"{col}_m"].to_numpy(dtype=float)))
+        print(f"  max. Abweichung {col:<18} {diff:.2e}")
+
+    # Wie make_dataset: In- und Outlaps fehlen. Kumulierte Zeit gegen die vollständigen Runden
+    out_lap = (laps["TyreLife"] == 1) & (laps["Stint"] > 1)
+    in_lap = out_lap.groupby([laps[k] for k in session_keys(laps) + ["Driver"]]).shift(-1, fill_value=False)
+    clean = laps[~(out_lap | in_lap)]
+    for label, data in [("Sessionuhr (Time_s)", clean),
+                        ("Median-Imputation", clean.drop(columns=["Time_s", "LapStartTime_s"]))]:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            part = from_laps(data)
+        err = np.abs(part.cum_time - m.cum_time)[part.present]
+        print(f"  ohne In-/Outlaps, {label:<20} kumulierte Zeit max. Fehler {np.nanmax(err):7.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rennmatrix [Session, Fahrer, Runde] und Abstandsfeatures.")
+    parser.add_argument("--benchmark", type=int, default=1, metavar="N_SEASONS")
+    args = parser.parse_args()
+    benchmark(args.benchmark)
+
+
+if __name__ == "__main__":
+    main()
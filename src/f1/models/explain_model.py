@@ -0,0 +1,320 @@
+"""
+Feature Importance und SHAP-Werte für die Modelle aus train_model.py.
+
+- SHAP-Werte modellunabhängig über Permutations-Sampling (wie der
+  PermutationExplainer von shap): pro Permutation werden die Features der
+  Reihe nach vom Hintergrund auf die erklärte Zeile umgeschaltet, die
+  Differenzen der Vorhersagen sind die Beiträge. Antithetische Paare
+  (Permutation + Umkehrung) verringern die Varianz; pro Permutation gilt
+  Summe der Beiträge = f(x) - E[f(Hintergrund)] exakt.
+- Hintergrund: k-Means-Zentren der Feature-Matrix, gewichtet mit der
+  Clustergrösse (wie shap.kmeans), statt aller Zeilen
+- Zeilen werden in Blöcken auf einen Prozess-Pool verteilt, X liegt als
+  geteilter Block vor (src/data/shared_matrix.py, wie in tune_model)
+- Permutation Importance (sklearn) und mittleres |SHAP| als globale Wichtigkeit
+- Cache in models/explain/, Schlüssel aus Modell-Hash, Daten-Hash und
+  Parametern; ein zweiter Aufruf liest nur die Datei
+- Aggregation pro Fahrer, Team und Saison für die EDA
+
+Aufruf vom Projektroot (Modell vorher mit train_model --save trainieren,
+sonst bzw. mit --model wird auf allen Zeilen trainiert, aber nicht gespeichert):
+    python -m src.f1.models.explain_model --series f3 --task top10
+    python -m src.f1.models.explain_model --series f3 --task top10 --benchmark
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.impute import SimpleImputer
+from sklearn.inspection import permutation_importance
+
+from src.data import shared_matrix
+from src.f1.models.train_model import (
+    MAIN_METRIC,
+    MODELS_DIR,
+    fit_final_model,
+    load_dataset,
+    model_path,
+)
+
+EXPLAIN_DIR = MODELS_DIR / "explain"
+
+# Zeilen pro Vorhersage-Block innerhalb eines Workers (begrenzt den Speicher)
+ROW_BATCH = 128
+
+# Spalten, nach denen für die EDA aggregiert wird (soweit im Dataset vorhanden)
+GROUP_LEVELS = {
+    "driver": ["driver_name", "driver", "driverId"],
+    "team": ["team_name"],
+    "season": ["season", "year"],
+}
+
+
+# =========================================================
+# 1. Hintergrund und Vorhersagefunktion
+# =========================================================
+
+def kmeans_background(X: np.ndarray, k: int = 20, seed: int = 0):
+    """k gewichtete Zentren als Hintergrund; fehlende Werte vorher mit dem Median gefüllt."""
+    filled = SimpleImputer(strategy="median", keep_empty_features=True).fit_transform(X)
+    if len(filled) <= k:
+        return filled.astype(np.float32), np.full(len(filled), 1.0 / max(len(filled), 1))
+    km = KMeans(n_clusters=k, n_init=3, random_state=seed).fit(filled)
+    weights = np.bincount(km.labels_, minlength=k) / len(filled)
+    return km.cluster_centers_.astype(np.float32), weights
+
+
+def predict_fn(model, kind: str):
+    """Erklärt wird die Wahrscheinlichkeit (clf) bzw. der Vorhersagewert (reg)."""
+    if kind == "clf":
+        return lambda Z: model.predict_proba(Z)[:, 1]
+    return model.predict
+
+
+def permutation_shap(f, X: np.ndarray, background: np.ndarray, weights: np.ndarray,
+                     n_permutations: int = 8, seed: int = 0) -> np.ndarray:
+    """
+    SHAP-Werte (n_rows, n_features) per Permutations-Sampling. Für jede
+    Permutation wird ein Block [Zeile, Schritt, Hintergrund] aufgebaut und
+    mit einem einzigen Modellaufruf vorhergesagt.
+    """
+    n, d = X.shape
+    k = len(background)
+    rng = np.random.default_rng(seed)
+    perms = []
+    for _ in range(max(n_permutations // 2, 1)):
+        p = rng.permutation(d)
+        perms += [p, p[::-1]]
+
+    phi = np.zeros((n, d))
+    for start in range(0, n, ROW_BATCH):
+        x = np.asarray(X[start:start + ROW_BATCH], dtype=np.float32)
+        m = len(x)
+        for p in perms:
+            # Schritt j: die ersten j Features der Permutation kommen aus x
+            Z = np.broadcast_to(background, (m, d + 1, k, d)).copy()
+            for j in range(1, d + 1):
+                cols = p[:j]
+                Z[:, j, :, cols] = x[:, None, cols].transpose(2, 0, 1)
+            values = f(Z.reshape(-1, d)).reshape(m, d + 1, k) @ weights
+            phi[start:start + m, p] += np.diff(values, axis=1)
+    return phi / len(perms)
+
+
+# =========================================================
+# 2. Parallel über Zeilenblöcke
+# =========================================================
+
+_WORKER_DATA = {}
+
+
+def _init_worker(matrix_path, model, kind, background, weights):
+    _WORKER_DATA.update(X=shared_matrix.attach(matrix_path).X, f=predict_fn(model, kind),
+                        background=background, weights=weights)
+
+
+def _shap_rows(start, stop, n_permutations, seed):
+    d = _WORKER_DATA
+    return start, permutation_shap(d["f"], d["X"][start:stop], d["background"], d["weights"],
+                                   n_permutations, seed)
+
+
+def parallel_shap(model, kind: str, X: np.ndarray, background, weights,
+                  n_permutations: int = 8, seed: int = 0, workers: int = None) -> np.ndarray:
+    """Zeilenblöcke auf einen Prozess-Pool verteilen (workers=1 -> im eigenen Prozess)."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return permutation_shap(predict_fn(model, kind), X, background, weights, n_permutations, seed)
+
+    # Etwa vier Blöcke pro Worker, damit ungleich schnelle Blöcke sich ausgleichen
+    bounds = np.linspace(0, len(X), min(len(X), workers * 4) + 1).astype(int)
+    phi = np.zeros(X.shape, dtype=np.float64)
+    with tempfile.TemporaryDirectory(prefix="f_explain_") as tmp:
+        matrix_path = shared_matrix.write_arrays(os.path.join(tmp, "X.f3m"), {"X": np.ascontiguousarray(X)})
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(str(matrix_path), model, kind, background, weights)) as pool:
+            futures = [pool.submit(_shap_rows, a, b, n_permutations, seed)
+                       for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+            for fut in futures:
+                start, values = fut.result()
+                phi[start:start + len(values)] = values
+    return phi
+
+
+# =========================================================
+# 3. Cache
+# =========================================================
+
+def cache_key(model, X: np.ndarray, params: dict) -> str:
+    """Modell-Hash (joblib.hash über das gepickelte Modell) + Daten-Hash + Parameter."""
+    data_hash = hashlib.sha1(np.ascontiguousarray(X).tobytes()).hexdigest()
+    raw = json.dumps({"model": joblib.hash(model), "data": data_hash, "params": params}, sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def explain(bundle: dict, data, background_k: int = 20, n_permutations: int = 8, n_repeats: int = 5,
+            workers: int = None, seed: int = 0, use_cache: bool = True) -> dict:
+    """
+    SHAP-Werte und Wichtigkeiten für ein Modell-Bundle auf data.X. Ergebnis:
+    shap (n_rows, n_features), base_value, importance (DataFrame), cached.
+    """
+    model, kind = bundle["model"], bundle["kind"]
+    params = {"background_k": background_k, "n_permutations": n_permutations,
+              "n_repeats": n_repeats, "seed": seed}
+    path = EXPLAIN_DIR / f"{data.series}_{data.task}_{cache_key(model, data.X, params)}.joblib"
+    if use_cache and path.exists():
+        return {**joblib.load(path), "cached": True}
+
+    background, weights = kmeans_background(data.X, background_k, seed)
+    phi = parallel_shap(model, kind, data.X, background, weights, n_permutations, seed, workers)
+    base_value = float(predict_fn(model, kind)(background) @ weights)
+
+    metric, _ = MAIN_METRIC[kind]
+    scoring = "roc_auc" if kind == "clf" else "neg_mean_absolute_error"
+    perm = permutation_importance(model, data.X, data.y, scoring=scoring, n_repeats=n_repeats,
+                                  random_state=seed, n_jobs=workers or -1)
+    importance = pd.DataFrame({
+        "feature": data.feature_names,
+        "mean_abs_shap": np.abs(phi).mean(axis=0),
+        f"permutation_{metric}": perm.importances_mean,
+        f"permutation_{metric}_std": perm.importances_std,
+    }).sort_values("mean_abs_shap", ascending=False).reset_index(drop=True)
+
+    result = {"shap": phi, "base_value": base_value, "importance": importance,
+              "feature_names": data.feature_names, "params": params}
+    if use_cache:
+        EXPLAIN_DIR.mkdir(parents=True, exist_ok=True)
+        joblib.dump(result, path)
+    return {**result, "cached": False}
+
+
+# =========================================================
+# 4. Aggregation für die EDA
+# =========================================================
+
+def aggregate_shap(result: dict, keys: pd.DataFrame) -> dict:
+    """Mittleres |SHAP| pro Feature und Fahrer / Team / Saison (soweit Spalten vorhanden)."""
+    values = pd.DataFrame(np.abs(result["shap"]), columns=result["feature_names"])
+    out = {}
+    for level, candidates in GROUP_LEVELS.items():
+        col = next((c for c in candidates if c in keys.columns), None)
+        if col is None:
+            continue
+        table = values.groupby(keys[col].to_numpy()).mean()
+        table.insert(0, "rows", keys[col].value_counts().reindex(table.index).to_numpy())
+        out[level] = table.rename_axis(col).reset_index()
+    return out
+
+
+def load_bundle(series: str, task: str, data, model_name: str = None) -> dict:
+    """Gespeichertes Modell; mit model_name (oder ohne Datei) wird neu trainiert, nicht gespeichert."""
+    path = model_path(series, task)
+    if model_name is None and path.exists():
+        return joblib.load(path)
+    model_name = model_name or "random_forest"
+    print(f"Trainiere {model_name} auf allen Zeilen (ohne Speichern)")
+    return fit_final_model(data, model_name, save=False)
+
+
+# =========================================================
+# 5. Benchmark gegen die naive Rechnung
+# =========================================================
+
+def benchmark(bundle: dict, data, background_k: int, n_permutations: int, workers: int, sample: int = 40):
+    """
+    Naiv = gleiche Schätzung mit allen Zeilen als Hintergrund in einem Prozess,
+    auf sample Zeilen gemessen und auf alle Zeilen hochgerechnet.
+    """
+    model, kind = bundle["model"], bundle["kind"]
+    f = predict_fn(model, kind)
+    rng = np.random.default_rng(0)
+    rows = np.sort(rng.choice(len(data.X), min(sample, len(data.X)), replace=False))
+
+    full_bg = SimpleImputer(strategy="median", keep_empty_features=True).fit_transform(data.X).astype(np.float32)
+    full_w = np.full(len(full_bg), 1.0 / len(full_bg))
+    start = time.perf_counter()
+    naive = permutation_shap(f, data.X[rows], full_bg, full_w, n_permutations)
+    naive_s = (time.perf_counter() - start) * len(data.X) / len(rows)
+
+    start = time.perf_counter()
+    background, weights = kmeans_background(data.X, background_k)
+    kmeans_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    serial = permutation_shap(f, data.X, background, weights, n_permutations)
+    serial_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pooled = parallel_shap(model, kind, data.X, background, weights, n_permutations, workers=workers)
+    pool_s = time.perf_counter() - start
+
+    # Erster Aufruf füllt den Cache (falls leer), gemessen wird der zweite
+    explain(bundle, data, background_k, n_permutations, workers=workers)
+    start = time.perf_counter()
+    result = explain(bundle, data, background_k, n_permutations, workers=workers)
+    cache_s = time.perf_counter() - start
+
+    n_workers = workers or os.cpu_count() or 1
+    print(f"{len(data.X):,} Zeilen, {data.X.shape[1]} Features, {n_permutations} Permutationen, "
+          f"{n_workers} Worker")
+    print(f"  {'naiv (alle Zeilen als Hintergrund, hochgerechnet)':<52} {naive_s:9.2f} s")
+    print(f"  {f'k-Means-Hintergrund k={background_k}, ein Prozess':<52} {serial_s + kmeans_s:9.2f} s")
+    print(f"  {'k-Means-Hintergrund, Prozess-Pool':<52} {pool_s + kmeans_s:9.2f} s")
+    print(f"  {'explain() aus dem Cache':<52} {cache_s:9.3f} s (cached={result['cached']})")
+    print(f"  max. Abweichung Pool vs. ein Prozess: {np.abs(pooled - serial).max():.2e}")
+
+    # Güte der Näherung: gleiche Zeilen, k-Means- gegen vollen Hintergrund
+    err = np.abs(serial[rows] - naive)
+    scale = np.abs(naive).mean()
+    print(f"  k-Means vs. voller Hintergrund: mittl. Abweichung {err.mean():.4f} "
+          f"(mittl. |SHAP| {scale:.4f}), Rangkorrelation der Wichtigkeit "
+          f"{pd.Series(np.abs(serial[rows]).mean(0)).corr(pd.Series(np.abs(naive).mean(0)), method='spearman'):.2f}")
+    # Effizienz: Summe der Beiträge = f(x) - E[f(Hintergrund)]
+    gap = serial.sum(axis=1) - (f(data.X) - predict_fn(model, kind)(background) @ weights)
+    print(f"  max. Verletzung der Effizienz (Summe SHAP vs. f(x) - Basis): {np.abs(gap).max():.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SHAP-Werte und Feature Importance mit Cache.")
+    parser.add_argument("--series", choices=["f3", "f2", "f1"], default="f3")
+    parser.add_argument("--task", default="top10")
+    parser.add_argument("--model", help="Dieses Modell neu trainieren statt des gespeicherten "
+                                        "(ohne gespeichertes Modell: random_forest)")
+    parser.add_argument("--background", type=int, default=20, help="k-Means-Zentren als Hintergrund")
+    parser.add_argument("--permutations", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=None, help="Worker (Standard: alle Kerne)")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--benchmark", action="store_true")
+    args = parser.parse_args()
+
+    data = load_dataset(args.series, args.task)
+    bundle = load_bundle(args.series, args.task, data, args.model)
+    if args.benchmark:
+        benchmark(bundle, data, args.background, args.permutations, args.jobs)
+        return
+
+    start = time.perf_counter()
+    result = explain(bundle, data, args.background, args.permutations, workers=args.jobs,
+                     use_cache=not args.no_cache)
+    print(f"{bundle['model_name']} {args.series}/{args.task}: {len(data.X):,} Zeilen in "
+          f"{time.perf_counter() - start:.2f} s (Cache: {result['cached']})")
+    print(result["importance"].to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    EXPLAIN_DIR.mkdir(parents=True, exist_ok=True)
+    for level, table in aggregate_shap(result, data.keys).items():
+        out = EXPLAIN_DIR / f"{args.series}_{args.task}_shap_by_{level}.csv"
+        table.to_csv(out, index=False)
+        print(f"|SHAP| pro {level}: {len(table)} Gruppen -> {out.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Inkrementelle Updates für die Top-10- und DNF-Modelle nach jedem Rennen.
+
+Statt nach jedem Rennwochenende auf der ganzen Historie neu zu trainieren,
+werden nur die neuen Rennzeilen verarbeitet:
+- StandardScaler.partial_fit aktualisiert Mittelwerte/Varianzen laufend
+- SGDClassifier(loss="log_loss").partial_fit aktualisiert die Gewichte
+- Jeder Stand wird als neue Version gespeichert (models/online/<serie>_<task>/)
+
+benchmark() spielt die Saisons Rennen für Rennen ab und vergleicht die
+Update-Latenz und die Genauigkeit auf dem jeweils nächsten Rennen mit
+einem kompletten Neutraining.
+
+Aufruf vom Projektroot:
+    python -m src.f1.models.online_model --task top10 --benchmark
+    python -m src.f1.models.online_model --task dnf --update-season 2025
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+from src.f1.models.train_model import MODELS_DIR, load_dataset
+
+ONLINE_DIR = MODELS_DIR / "online"
+
+CLASSES = np.array([0, 1])
+
+
+class OnlineModel:
+    """Scaler + SGD-Logit, beide mit partial_fit aktualisierbar."""
+
+    def __init__(self, feature_names, alpha: float = 1e-3, random_state: int = 42):
+        self.feature_names = list(feature_names)
+        self.scaler = StandardScaler()
+        self.model = SGDClassifier(loss="log_loss", alpha=alpha, learning_rate="optimal",
+                                   random_state=random_state)
+        self.version = 0
+        self.n_rows = 0
+        self.races = []
+
+    def _transform(self, X):
+        Z = self.scaler.transform(X)
+        # Fehlende Werte = laufender Mittelwert (nach Skalierung 0)
+        return np.nan_to_num(Z, nan=0.0)
+
+    def update(self, X, y, race_id=None, epochs: int = 1):
+        """Scaler-Statistik und Gewichte nur mit den neuen Zeilen aktualisieren."""
+        self.scaler.partial_fit(X)
+        Z = self._transform(X)
+        for _ in range(epochs):
+            self.model.partial_fit(Z, y, classes=CLASSES)
+        self.version += 1
+        self.n_rows += len(y)
+        if race_id is not None:
+            self.races.append(race_id)
+        return self
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self._transform(X))[:, 1]
+
+
+def fit_full(X, y, feature_names, epochs: int = 5, races=()) -> OnlineModel:
+    """
+    Referenz: kompletter Neuaufbau auf allen bisherigen Zeilen. races sind die
+    enthaltenen Rennen; spätere Updates überspringen sie.
+    """
+    model = OnlineModel(feature_names)
+    model.scaler.fit(X)
+    Z = model._transform(X)
+    for _ in range(epochs):
+        model.model.partial_fit(Z, y, classes=CLASSES)
+    model.version = 1
+    model.n_rows = len(y)
+    model.races = list(races)
+    return model
+
+
+# =========================================================
+# Versionierte Ablage
+# =========================================================
+
+class ModelStore:
+    """Legt jede Modellversion als eigene Datei ab und führt ein Manifest."""
+
+    def __init__(self, series: str, task: str, root=ONLINE_DIR):
+        self.dir = Path(root) / f"{series}_{task}"
+        self.manifest_path = self.dir / "manifest.json"
+
+    def manifest(self) -> dict:
+        if self.manifest_path.exists():
+            return json.loads(self.manifest_path.read_text())
+        return {"latest": None, "versions": []}
+
+    def save(self, model: OnlineModel, note: str = "") -> Path:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self.dir / f"v{model.version:04d}.joblib"
+        joblib.dump(model, path)
+
+        manifest = self.manifest()
+        manifest["latest"] = model.version
+        manifest["versions"].append({
+            "version": model.version,
+            "file": path.name,
+            "n_rows": model.n_rows,
+            "last_race": model.races[-1] if model.races else None,
+            "note": note,
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        self.manifest_path.write_text(json.dumps(manifest, indent=2, default=int))
+        return path
+
+    def load(self, version=None) -> OnlineModel:
+        manifest = self.manifest()
+        version = version or manifest["latest"]
+        if version is None:
+            raise FileNotFoundError(f"Noch kein Modell in {self.dir}")
+        return joblib.load(self.dir / f"v{version:04d}.joblib")
+
+
+# =========================================================
+# Rennen für Rennen
+# =========================================================
+
+def race_slices(keys: pd.DataFrame) -> list:
+    """(race_id, Zeilen-Indizes) in zeitlicher Reihenfolge des Datensatzes."""
+    race_ids = keys["race_id"].to_numpy()
+    order = pd.unique(race_ids)
+    return [(rid, np.flatnonzero(race_ids == rid)) for rid in order]
+
+
+def _metrics(y, p):
+    if len(np.unique(y)) < 2:
+        return np.nan, accuracy_score(y, p >= 0.5)
+    return roc_auc_score(y, p), accuracy_score(y, p >= 0.5)
+
+
+def benchmark(task: str = "top10", warmup_seasons: int = 3) -> pd.DataFrame:
+    """
+    Trainiert auf den ersten warmup_seasons Saisons und spielt danach jedes
+    Rennen einzeln ein: inkrementelles Update vs. Neutraining auf allem.
+    Bewertet wird jeweils auf dem nächsten, noch ungesehenen Rennen.
+    """
+    data = load_dataset("f3", task)
+    seasons = np.unique(data.groups)
+    warm = np.flatnonzero(np.isin(data.groups, seasons[:warmup_seasons]))
+    races = [(rid, idx) for rid, idx in race_slices(data.keys) if idx[0] > warm[-1]]
+
+    online = fit_full(data.X[warm], data.y[warm], data.feature_names)
+    seen = warm
+
+    rows = []
+    for (race_id, idx), (next_id, next_idx) in zip(races[:-1], races[1:]):
+        start = time.perf_counter()
+        online.update(data.X[idx], data.y[idx], race_id)
+        update_s = time.perf_counter() - start
+
+        seen = np.concatenate([seen, idx])
+        start = time.perf_counter()
+        full = fit_full(data.X[seen], data.y[seen], data.feature_names)
+        retrain_s = time.perf_counter() - start
+
+        y_next = data.y[next_idx]
+        p_online = online.predict_proba(data.X[next_idx])
+        p_full = full.predict_proba(data.X[next_idx])
+        auc_on, acc_on = _metrics(y_next, p_online)
+        auc_full, acc_full = _metrics(y_next, p_full)
+        rows.append({
+            "race_id": race_id,
+            "rows_seen": len(seen),
+            "update_ms": update_s * 1000,
+            "retrain_ms": retrain_s * 1000,
+            "auc_online": auc_on,
+            "auc_full": auc_full,
+            "acc_online": acc_on,
+            "acc_full": acc_full,
+            "logloss_drift": log_loss(y_next, p_online, labels=CLASSES)
+                             - log_loss(y_next, p_full, labels=CLASSES),
+        })
+    return pd.DataFrame(rows)
+
+
+def update_season(task: str, season: int):
+    """Spielt alle Rennen einer Saison als Updates in das gespeicherte Modell ein."""
+    data = load_dataset("f3", task)
+    store = ModelStore("f3", task)
+    if store.manifest()["latest"] is None:
+        base = np.flatnonzero(data.groups < season)
+        base_races = pd.unique(data.keys["race_id"].to_numpy()[base])
+        model = fit_full(data.X[base], data.y[base], data.feature_names, races=base_races)
+        store.save(model, note=f"Basis bis Saison {season - 1}")
+    model = store.load()
+
+    season_keys = data.keys[data.groups == season]
+    covered = set(model.races)
+    skipped = 0
+    for race_id, _ in race_slices(season_keys):
+        if race_id in covered:
+            skipped += 1
+            continue
+        idx = np.flatnonzero(data.keys["race_id"].to_numpy() == race_id)
+        start = time.perf_counter()
+        model.update(data.X[idx], data.y[idx], race_id)
+        path = store.save(model, note=f"Update Rennen {race_id}")
+        print(f"Rennen {race_id}: {len(idx)} Zeilen in {(time.perf_counter() - start) * 1000:.1f} ms "
+              f"-> {path.name}")
+    if skipped:
+        print(f"{skipped} Rennen der Saison {season} sind schon im Modell enthalten, übersprungen.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inkrementelle Modell-Updates pro Rennen.")
+    parser.add_argument("--task", choices=["top10", "dnf"], default="top10")
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--update-season", type=int, help="Rennen dieser Saison als Updates einspielen")
+    args = parser.parse_args()
+
+    if args.update_season:
+        update_season(args.task, args.update_season)
+    if args.benchmark:
+        report = benchmark(args.task)
+        pd.set_option("display.width", 200)
+        print(report.tail(10).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        print(f"\n{len(report)} Rennen: Update im Mittel {report['update_ms'].mean():.2f} ms, "
+              f"Neutraining {report['retrain_ms'].mean():.2f} ms "
+              f"(Faktor {report['retrain_ms'].mean() / report['update_ms'].mean():.1f})")
+        print(f"AUC online {report['auc_online'].mean():.3f} vs. neu {report['auc_full'].mean():.3f}, "
+              f"mittlere Log-Loss-Drift {report['logloss_drift'].mean():+.4f}")
+
+
+if __name__ == "__main__":
+    main()
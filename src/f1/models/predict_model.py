@@ -0,0 +1,334 @@
+"""
+Batch-Vorhersagen mit einem gespeicherten Modell aus train_model.py.
+
+- Predictor lädt Modell und Feature-Aufbereitung genau einmal und hält sie warm
+- score_keys / score_race / score_season bewerten ganze Startfelder oder
+  Saisons mit einem einzigen Modellaufruf
+- Die Feature-Aufbereitung (prepare) läuft einmal beim Laden; danach ist ein
+  Feature-Vektor nur noch ein Zeilenzugriff über den Schlüsselindex
+- serve() startet einen kleinen lokalen HTTP-Endpunkt, der gleichzeitige
+  Anfragen zu Micro-Batches bündelt
+- load_test() misst p50/p99-Latenz und Durchsatz gegen diesen Endpunkt
+
+Aufruf vom Projektroot (Modell vorher mit train_model --save trainieren):
+    python -m src.f1.models.predict_model --series f3 --task top10 --race-id 1059
+    python -m src.f1.models.predict_model --series f3 --task top10 --serve --port 8765
+    python -m src.f1.models.predict_model --series f3 --task top10 --load-test 2000
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.f1.models.train_model import SERIES, model_path
+
+# Schlüssel, über die ein Feature-Vektor angefragt wird
+LOOKUP_KEYS = {
+    "f3": ["race_id", "driver_name"],
+    "f1": ["year", "driverId"],
+    "f2": ["driver"],
+}
+
+
+class Predictor:
+    """Hält Modell und vorbereitete Feature-Tabelle einer Serie/Task im Speicher."""
+
+    def __init__(self, series: str, task: str, path=None):
+        bundle_path = Path(path) if path else model_path(series, task)
+        if not bundle_path.exists():
+            raise FileNotFoundError(
+                f"Modell nicht gefunden: {bundle_path} "
+                f"(zuerst: python -m src.f1.models.train_model --series {series} --task {task} --save)"
+            )
+        bundle = joblib.load(bundle_path)
+        self.series = series
+        self.task = task
+        self.kind = bundle["kind"]
+        self.model = bundle["model"]
+        self.feature_names = bundle["feature_names"]
+
+        # Feature-Aufbereitung einmal ausführen (alle Zeilen, auch ohne Zielwert)
+        cfg = SERIES[series]
+        table = cfg["prepare"](pd.read_csv(cfg["path"], low_memory=False))
+        self.key_cols = LOOKUP_KEYS[series]
+        self.table = table
+        self.matrix = table[self.feature_names].to_numpy(dtype=np.float32)
+        self.index = {
+            key: i for i, key in enumerate(table[self.key_cols].itertuples(index=False, name=None))
+        }
+
+    # ---------------------------------------------------------
+    # Feature-Vektoren
+    # ---------------------------------------------------------
+
+    def rows(self, keys) -> np.ndarray:
+        rows = []
+        for key in keys:
+            key = tuple(key)
+            row = self.index.get(key)
+            if row is None:
+                raise KeyError(f"Unbekannter Schlüssel {dict(zip(self.key_cols, key))}")
+            rows.append(row)
+        return np.asarray(rows, dtype=np.int64)
+
+    def feature_vector(self, key) -> np.ndarray:
+        return self.matrix[self.rows([key])[0]].copy()
+
+    def feature_matrix(self, keys) -> np.ndarray:
+        """Ein Zugriff für alle Schlüssel (Kopie, das Modell bekommt eigene Zeilen)."""
+        return self.matrix[self.rows(keys)]
+
+    # ---------------------------------------------------------
+    # Vektorisierte Vorhersage
+    # ---------------------------------------------------------
+
+    def predict_matrix(self, X: np.ndarray) -> np.ndarray:
+        """Ein Modellaufruf für alle Zeilen (Wahrscheinlichkeit bzw. Wert)."""
+        if len(X) == 0:
+            return np.empty(0)
+        if self.kind == "clf":
+            return self.model.predict_proba(X)[:, 1]
+        return self.model.predict(X)
+
+    def score_keys(self, keys) -> pd.DataFrame:
+        keys = [tuple(k) for k in keys]
+        out = pd.DataFrame(keys, columns=self.key_cols)
+        out["prediction"] = self.predict_matrix(self.feature_matrix(keys))
+        return out
+
+    def _score_rows(self, mask) -> pd.DataFrame:
+        rows = np.flatnonzero(mask)
+        out = self.table.loc[rows, self.key_cols].reset_index(drop=True)
+        out["prediction"] = self.predict_matrix(self.matrix[rows])
+        return out.sort_values("prediction", ascending=self.kind != "clf").reset_index(drop=True)
+
+    def score_race(self, race_id) -> pd.DataFrame:
+        """Ganzes Startfeld eines Rennens (F3) bzw. einer Saison (F1) bewerten."""
+        col = self.key_cols[0]
+        return self._score_rows(self.table[col].to_numpy() == race_id)
+
+    def score_season(self, season) -> pd.DataFrame:
+        col = SERIES[self.series]["season_col"]
+        if col is None:
+            raise ValueError(f"{self.series} hat keine Saison-Spalte")
+        return self._score_rows(self.table[col].to_numpy() == season)
+
+
+# =========================================================
+# Micro-Batching
+# =========================================================
+
+class MicroBatcher:
+    """
+    Sammelt Anfragen aus mehreren Threads und ruft das Modell pro Batch
+    nur einmal auf. Ein Batch wird abgeschickt, sobald max_rows erreicht
+    sind oder max_wait_ms seit der ersten Anfrage vergangen sind.
+    """
+
+    def __init__(self, predictor: Predictor, max_rows: int = 512, max_wait_ms: float = 2.0):
+        self.predictor = predictor
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.rows = 0
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, X: np.ndarray) -> Future:
+        future = Future()
+        self.queue.put((X, future))
+        return future
+
+    def _loop(self):
+        while True:
+            items = [self.queue.get()]
+            n_rows = len(items[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while n_rows < self.max_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                items.append(item)
+                n_rows += len(item[0])
+
+            try:
+                preds = self.predictor.predict_matrix(np.vstack([x for x, _ in items]))
+            except Exception as exc:
+                for _, future in items:
+                    future.set_exception(exc)
+                continue
+
+            self.batches += 1
+            self.rows += n_rows
+            offset = 0
+            for x, future in items:
+                future.set_result(preds[offset:offset + len(x)])
+                offset += len(x)
+
+
+# =========================================================
+# HTTP-Endpunkt
+# =========================================================
+
+def make_server(predictor: Predictor, host: str = "127.0.0.1", port: int = 8765, **batch_kwargs):
+    """
+    POST /predict mit {"keys": [[race_id, driver_name], ...]} liefert
+    {"predictions": [...]}. GET /health liefert Batch-Statistiken.
+    """
+    batcher = MicroBatcher(predictor, **batch_kwargs)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/health":
+                return self._send(404, {"error": "unbekannter Pfad"})
+            self._send(200, {
+                "series": predictor.series,
+                "task": predictor.task,
+                "batches": batcher.batches,
+                "rows": batcher.rows,
+                "keys": len(predictor.index),
+            })
+
+        def do_POST(self):
+            if self.path != "/predict":
+                return self._send(404, {"error": "unbekannter Pfad"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                keys = json.loads(self.rfile.read(length))["keys"]
+                X = predictor.feature_matrix(keys)
+            except (KeyError, ValueError, TypeError) as exc:
+                return self._send(400, {"error": str(exc)})
+            preds = batcher.submit(X).result()
+            self._send(200, {"predictions": preds.tolist()})
+
+        def log_message(self, format, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        # Grössere Listen-Queue, sonst verwirft der Kernel Verbindungen unter Last
+        request_queue_size = 256
+        daemon_threads = True
+
+    server = Server((host, port), Handler)
+    server.batcher = batcher
+    return server
+
+
+def serve(predictor: Predictor, host: str = "127.0.0.1", port: int = 8765):
+    server = make_server(predictor, host, port)
+    print(f"Vorhersage-Service läuft auf http://{host}:{port} (POST /predict, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# =========================================================
+# Lastgenerator
+# =========================================================
+
+def load_test(predictor: Predictor, n_requests: int = 2000, concurrency: int = 32,
+              keys_per_request: int = 1, seed: int = 0) -> dict:
+    """
+    Startet den Service lokal auf einem freien Port und feuert n_requests
+    Anfragen aus concurrency Threads ab. Schlüssel werden aus einem kleinen
+    Pool gezogen, damit sich Anfragen wiederholen.
+    """
+    server = make_server(predictor, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/predict"
+
+    rng = np.random.default_rng(seed)
+    all_keys = list(predictor.index)
+    pool = [all_keys[i] for i in rng.choice(len(all_keys), size=min(200, len(all_keys)), replace=False)]
+    payloads = [
+        json.dumps({"keys": [pool[i] for i in rng.integers(0, len(pool), keys_per_request)]},
+                   default=int).encode()
+        for _ in range(n_requests)
+    ]
+
+    def send(body):
+        start = time.perf_counter()
+        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req) as resp:
+            resp.read()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool_exec:
+        latencies = np.array(list(pool_exec.map(send, payloads)))
+    wall = time.perf_counter() - start
+
+    batcher = server.batcher
+    server.shutdown()
+    server.server_close()
+
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "throughput_rps": n_requests / wall,
+        "batches": batcher.batches,
+        "avg_rows_per_batch": batcher.rows / max(batcher.batches, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vorhersagen mit gespeichertem Modell.")
+    parser.add_argument("--series", choices=list(SERIES), default="f3")
+    parser.add_argument("--task", default="top10")
+    parser.add_argument("--race-id", type=int, help="Startfeld eines Rennens bewerten")
+    parser.add_argument("--season", type=int, help="Ganze Saison bewerten")
+    parser.add_argument("--serve", action="store_true", help="HTTP-Endpunkt starten")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--load-test", type=int, metavar="N", help="Lasttest mit N Anfragen")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    predictor = Predictor(args.series, args.task)
+    print(f"Modell und Features geladen in {time.perf_counter() - start:.2f} s "
+          f"({len(predictor.index)} Schlüssel).")
+
+    pd.set_option("display.width", 200)
+    if args.race_id is not None:
+        print(predictor.score_race(args.race_id).to_string(index=False))
+    if args.season is not None:
+        print(predictor.score_season(args.season).head(30).to_string(index=False))
+    if args.load_test:
+        stats = load_test(predictor, args.load_test, args.concurrency)
+        for key, value in stats.items():
+            print(f"  {key:20s} {value:.2f}" if isinstance(value, float) else f"  {key:20s} {value}")
+    if args.serve:
+        serve(predictor, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Zeitbewusstes Training für die geplanten Modelle (Top-10, Position, DNF).
+
+Eine Schnittstelle für F3, F2 und F1:
+- load_dataset(series, task) lädt die Feature-Datei einmal und baut
+  X (float32), y, Saison-Gruppen und Schlüsselspalten
+- forward_chaining_folds() berechnet die CV-Folds vorab als Index-Arrays
+  (trainiert immer nur auf früheren Saisons, getestet auf der nächsten)
+- evaluate() lässt alle Folds × Kandidatenmodelle parallel mit joblib laufen.
+  X, y und Schlüssel liegen dabei einmal als Block auf der Platte
+  (src/data/shared_matrix.py) und werden von den Workern nur eingeblendet
+  statt pro Worker kopiert.
+
+Aufruf vom Projektroot:
+    python -m src.f1.models.train_model --series f3 --task top10
+    python -m src.f1.models.train_model --series f1 --task position --save
+"""
+
+import argparse
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import (
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression, Ridge
+from sklearn.metrics import accuracy_score, mean_absolute_error, roc_auc_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.data import shared_matrix
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[3]
+MODELS_DIR = BASE_DIR / "models"
+
+F3_FEATURES = BASE_DIR / "data" / "f3" / "f3_2019_2025_races_features.csv"
+F2_FEATURES = BASE_DIR / "data" / "f2" / "f2_features.csv"
+F1_FEATURES = BASE_DIR / "data" / "f1" / "processed" / "f1_features.csv"
+
+
+@dataclass
+class Dataset:
+    series: str
+    task: str
+    kind: str               # "clf" oder "reg"
+    X: np.ndarray           # float32, (n_rows, n_features)
+    y: np.ndarray
+    groups: np.ndarray      # Saison pro Zeile (oder Block-Nummer ohne Saison)
+    feature_names: list
+    keys: pd.DataFrame      # season, race_id, driver (soweit vorhanden)
+
+
+# =========================================================
+# 1. Form-Features (nur Informationen aus früheren Rennen)
+# =========================================================
+
+def add_prior_means(df, entity, order_cols, value_cols, prefix):
+    """
+    Mittelwert aller früheren Rennen pro entity (Fahrer oder Team), ohne das
+    aktuelle Rennen. Teams werden zuerst pro Rennen aggregiert, damit
+    Teamkollegen im selben Rennen nicht einfliessen.
+    """
+    per_race = (
+        df.groupby([entity] + order_cols)[value_cols]
+        .agg(["sum", "count"])
+        .sort_index()
+    )
+    out = pd.DataFrame(index=per_race.index)
+    grouped = per_race.groupby(level=entity)
+    prev = grouped.cumsum() - per_race
+    for col in value_cols:
+        out[f"{prefix}_prior_{col}"] = prev[(col, "sum")] / prev[(col, "count")].replace(0, np.nan)
+    out[f"{prefix}_prior_races"] = grouped.cumcount()
+    return df.merge(out.reset_index(), on=[entity] + order_cols, how="left")
+
+
+def prepare_f3(df):
+    df = df.copy()
+    df["position_clean"] = pd.to_numeric(df["position"], errors="coerce")
+    df["top10"] = (df["position_clean"] <= 10).astype(int)
+    order_cols = ["season", "session_round"]
+    values = ["position_clean", "top10", "is_dnf", "lap_vs_race_avg"]
+
+    df = add_prior_means(df, "driver_name", order_cols, values, "driver")
+    df = add_prior_means(df, "team_name", order_cols, values, "team")
+    return df.sort_values(order_cols + ["driver_name"]).reset_index(drop=True)
+
+
+def prepare_f1(df):
+    """F1-Saison-Features: Vorhersage einer Saison aus der Vorsaison des Fahrers."""
+    df = df.sort_values(["driverId", "year"]).reset_index(drop=True)
+    prev_cols = ["avg_finish", "top10_rate", "dnf_rate", "avg_points", "avg_grid",
+                 "avg_gap_to_winner", "team_avg_pos_season", "driver_vs_team_avg_finish"]
+    grouped = df.groupby("driverId")
+    for col in prev_cols:
+        df[f"prev_{col}"] = grouped[col].shift(1)
+    df["n_prev_seasons"] = grouped.cumcount()
+    df["top10"] = (df["top10_rate"] >= 0.5).astype(int)
+    return df.sort_values(["year", "driverId"]).reset_index(drop=True)
+
+
+def prepare_f2(df):
+    return df.reset_index(drop=True)
+
+
+_F3_FEATURES = [
+    "session_round",
+    "driver_prior_position_clean", "driver_prior_top10", "driver_prior_is_dnf",
+    "driver_prior_lap_vs_race_avg", "driver_prior_races",
+    "team_prior_position_clean", "team_prior_top10", "team_prior_is_dnf",
+    "team_prior_lap_vs_race_avg", "team_prior_races",
+]
+
+_F1_FEATURES = [
+    "prev_avg_finish", "prev_top10_rate", "prev_dnf_rate", "prev_avg_points",
+    "prev_avg_grid", "prev_avg_gap_to_winner", "prev_team_avg_pos_season",
+    "prev_driver_vs_team_avg_finish", "n_prev_seasons",
+]
+
+_F2_FEATURES = [
+    "total_laps", "avg_kph", "avg_position", "best_position", "avg_best_lap",
+    "avg_pos_feature_race", "avg_pos_free_practice", "avg_pos_qualifying",
+    "avg_pos_sprint_race1", "avg_pos_sprint_race2", "avg_final_position",
+]
+
+# Serie -> Datei, Vorbereitung, Spalten und Tasks (Zielspalte, Art)
+SERIES = {
+    "f3": {
+        "path": F3_FEATURES,
+        "prepare": prepare_f3,
+        "season_col": "season",
+        "key_cols": ["season", "race_id", "driver_name", "team_name"],
+        "features": _F3_FEATURES,
+        "tasks": {
+            "top10": ("top10", "clf"),
+            "position": ("position_clean", "reg"),
+            "dnf": ("is_dnf", "clf"),
+        },
+    },
+    "f1": {
+        "path": F1_FEATURES,
+        "prepare": prepare_f1,
+        "season_col": "year",
+        "key_cols": ["year", "driverId", "driver_name"],
+        "features": _F1_FEATURES,
+        "tasks": {
+            "top10": ("top10", "clf"),
+            "position": ("avg_finish", "reg"),
+            "dnf": ("dnf_rate", "reg"),
+        },
+    },
+    "f2": {
+        "path": F2_FEATURES,
+        "prepare": prepare_f2,
+        # f2_features.csv hat keine Saison -> Blöcke in Dateireihenfolge
+        "season_col": None,
+        "key_cols": ["driver"],
+        "features": _F2_FEATURES,
+        "tasks": {
+            "reached_f1": ("reached_f1", "clf"),
+        },
+    },
+}
+
+
+def load_dataset(series: str, task: str, path=None, n_blocks: int = 5) -> Dataset:
+    """
+    Lädt eine Feature-Datei genau einmal und gibt ein Dataset zurück.
+    Zeilen ohne Zielwert (z. B. Position bei DNF) werden entfernt.
+    """
+    cfg = SERIES[series]
+    if task not in cfg["tasks"]:
+        raise ValueError(f"Task '{task}' gibt es für {series} nicht: {list(cfg['tasks'])}")
+    target, kind = cfg["tasks"][task]
+
+    df = cfg["prepare"](pd.read_csv(path or cfg["path"], low_memory=False))
+    df = df[df[target].notna()].reset_index(drop=True)
+
+    features = [c for c in cfg["features"] if c in df.columns]
+    X = df[features].to_numpy(dtype=np.float32)
+    y = df[target].to_numpy(dtype=np.int64 if kind == "clf" else np.float64)
+
+    if cfg["season_col"] is not None:
+        groups = df[cfg["season_col"]].to_numpy()
+    else:
+        groups = np.arange(len(df)) * n_blocks // max(len(df), 1)
+
+    keys = df[[c for c in cfg["key_cols"] if c in df.columns]]
+    return Dataset(series, task, kind, X, y, groups, features, keys)
+
+
+# =========================================================
+# 2. Forward-Chaining Folds
+# =========================================================
+
+def forward_chaining_folds(groups: np.ndarray, min_train_groups: int = 2) -> list:
+    """
+    Folds nach Saison: Fold i trainiert auf allen Saisons vor Saison i und
+    testet auf Saison i. Ergebnis: Liste von (test_group, train_idx, test_idx).
+    """
+    order = np.unique(groups)
+    folds = []
+    for i in range(min_train_groups, len(order)):
+        train_idx = np.flatnonzero(groups < order[i])
+        test_idx = np.flatnonzero(groups == order[i])
+        folds.append((order[i], train_idx, test_idx))
+    return folds
+
+
+# =========================================================
+# 3. Kandidatenmodelle
+# =========================================================
+
+def make_model(name: str, kind: str, **params):
+    if kind == "clf":
+        models = {
+            "logreg": lambda: make_pipeline(
+                SimpleImputer(strategy="median"), StandardScaler(),
+                LogisticRegression(max_iter=1000, **params)),
+            "random_forest": lambda: make_pipeline(
+                SimpleImputer(strategy="median"),
+                RandomForestClassifier(n_estimators=200, min_samples_leaf=5,
+                                       random_state=42, n_jobs=1, **params)),
+            "hist_gb": lambda: HistGradientBoostingClassifier(random_state=42, **params),
+        }
+    else:
+        models = {
+            "ridge": lambda: make_pipeline(
+                SimpleImputer(strategy="median"), StandardScaler(), Ridge(**params)),
+            "random_forest": lambda: make_pipeline(
+                SimpleImputer(strategy="median"),
+                RandomForestRegressor(n_estimators=200, min_samples_leaf=5,
+                                      random_state=42, n_jobs=1, **params)),
+            "hist_gb": lambda: HistGradientBoostingRegressor(random_state=42, **params),
+        }
+    return models[name]()
+
+
+CANDIDATES = {
+    "clf": ["logreg", "random_forest", "hist_gb"],
+    "reg": ["ridge", "random_forest", "hist_gb"],
+}
+
+
+def score(kind: str, y_true, y_pred, y_score=None) -> dict:
+    if kind == "clf":
+        auc = roc_auc_score(y_true, y_score) if len(np.unique(y_true)) > 1 else np.nan
+        return {"roc_auc": auc, "accuracy": accuracy_score(y_true, y_pred)}
+    return {"mae": mean_absolute_error(y_true, y_pred)}
+
+
+# Hauptmetrik pro Art und ob grösser besser ist
+MAIN_METRIC = {"clf": ("roc_auc", True), "reg": ("mae", False)}
+
+
+def _run_fold(matrix_path, model_name, season, train_idx, test_idx):
+    shared = shared_matrix.attach(matrix_path)
+    X, y, kind = shared.X, shared.y, shared.meta["kind"]
+    model = make_model(model_name, kind)
+
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X[test_idx])
+    y_score = model.predict_proba(X[test_idx])[:, 1] if kind == "clf" else None
+    predict_s = time.perf_counter() - start
+
+    return {
+        "model": model_name,
+        "season": season,
+        "n_train": len(train_idx),
+        "n_test": len(test_idx),
+        "fit_s": fit_s,
+        "predict_s": predict_s,
+        **score(kind, y[test_idx], y_pred, y_score),
+    }
+
+
+def evaluate(data: Dataset, models=None, n_jobs: int = -1, min_train_groups: int = 2) -> pd.DataFrame:
+    """
+    Bewertet alle Kandidatenmodelle auf allen Folds parallel.
+    Gibt eine Tabelle mit Metriken und Fit-/Predict-Zeiten pro Fold zurück.
+    """
+    models = models or CANDIDATES[data.kind]
+    folds = forward_chaining_folds(data.groups, min_train_groups)
+    if not folds:
+        raise ValueError(f"Zu wenige Saisons/Blöcke für Forward-Chaining: {np.unique(data.groups)}")
+
+    with tempfile.TemporaryDirectory(prefix="f_train_") as tmp:
+        matrix_path = str(shared_matrix.export(data, Path(tmp) / "data.f3m"))
+        rows = Parallel(n_jobs=n_jobs)(
+            delayed(_run_fold)(matrix_path, name, season, train_idx, test_idx)
+            for name in models
+            for season, train_idx, test_idx in folds
+        )
+        shared_matrix.detach(matrix_path)
+    return pd.DataFrame(rows)
+
+
+def summarize(report: pd.DataFrame, kind: str) -> pd.DataFrame:
+    metric, higher_is_better = MAIN_METRIC[kind]
+    summary = (
+        report.groupby("model")
+        .agg(**{metric: (metric, "mean")},
+             fit_s=("fit_s", "sum"),
+             predict_s=("predict_s", "sum"),
+             folds=("season", "count"))
+        .sort_values(metric, ascending=not higher_is_better)
+    )
+    return summary
+
+
+# =========================================================
+# 4. Finales Modell speichern
+# =========================================================
+
+def model_path(series: str, task: str) -> Path:
+    return MODELS_DIR / f"{series}_{task}.joblib"
+
+
+def fit_final_model(data: Dataset, model_name: str, save: bool = True) -> dict:
+    """Trainiert das Modell auf allen Zeilen und speichert es samt Metadaten."""
+    model = make_model(model_name, data.kind)
+    model.fit(data.X, data.y)
+    bundle = {
+        "model": model,
+        "model_name": model_name,
+        "series": data.series,
+        "task": data.task,
+        "kind": data.kind,
+        "feature_names": data.feature_names,
+        "n_rows": len(data.y),
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    if save:
+        MODELS_DIR.mkdir(parents=True, exist_ok=True)
+        joblib.dump(bundle, model_path(data.series, data.task))
+        print(f"Modell gespeichert unter: {model_path(data.series, data.task)}")
+    return bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training mit saisonbasiertem Forward-Chaining.")
+    parser.add_argument("--series", choices=list(SERIES), default="f3")
+    parser.add_argument("--task", default="top10")
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--models", nargs="*", help="Nur diese Kandidaten bewerten")
+    parser.add_argument("--save", action="store_true", help="Bestes Modell auf allen Daten trainieren und speichern")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = load_dataset(args.series, args.task)
+    print(f"{args.series}/{args.task}: {data.X.shape[0]} Zeilen, {data.X.shape[1]} Features, "
+          f"{len(np.unique(data.groups))} Saisons ({time.perf_counter() - start:.2f} s)")
+
+    report = evaluate(data, args.models, n_jobs=args.jobs)
+    pd.set_option("display.width", 200)
+    print("\nPro Fold:")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    summary = summarize(report, data.kind)
+    print("\nZusammenfassung:")
+    print(summary.to_string(float_format=lambda v: f"{v:.4f}"))
+
+    if args.save:
+        fit_final_model(data, summary.index[0])
+
+
+if __name__ == "__main__":
+    main()
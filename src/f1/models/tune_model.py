@@ -0,0 +1,336 @@
+"""
+Hyperparameter-Suche mit Successive Halving / Hyperband.
+
+- Budget = Boosting-Runden (hist_gb: max_iter) bzw. Bäume (random_forest)
+- Jede Runde behält nur das beste 1/eta der Konfigurationen und gibt ihnen
+  eta-mal mehr Budget; hist_gb nutzt zusätzlich internes Early Stopping
+- Trials laufen in einem Prozess-Pool, X und y werden von den Workern
+  aus dem geteilten Block (src/data/shared_matrix.py) eingeblendet
+- Jeder Trial landet sofort in einer JSONL-Historie; ein abgebrochener
+  Lauf wird beim nächsten Start ohne Doppelarbeit fortgesetzt. Der
+  Dateiname enthält einen Hash über Daten, Folds und eta, andere Folds
+  oder geänderte Daten starten also eine neue Historie
+- benchmark() vergleicht die Zeit bis zu einem Ziel-Score mit Grid Search
+
+Aufruf vom Projektroot:
+    python -m src.f1.models.tune_model --series f3 --task top10
+    python -m src.f1.models.tune_model --series f3 --task top10 --benchmark
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data import shared_matrix
+from src.f1.models.train_model import (
+    MAIN_METRIC,
+    MODELS_DIR,
+    forward_chaining_folds,
+    load_dataset,
+    make_model,
+    score,
+)
+
+TUNING_DIR = MODELS_DIR / "tuning"
+
+# Suchräume pro Modell; "budget" ist der Parameter, der mit dem Budget skaliert
+SEARCH_SPACES = {
+    "hist_gb": {
+        "budget": "max_iter",
+        "min_budget": 9,
+        "max_budget": 243,
+        "params": {
+            "learning_rate": [0.03, 0.1, 0.3],
+            "max_leaf_nodes": [7, 15, 31],
+            "min_samples_leaf": [10, 30, 80],
+            "l2_regularization": [0.0, 1.0, 10.0],
+        },
+        "fixed": {"early_stopping": True, "n_iter_no_change": 10, "validation_fraction": 0.15},
+    },
+    "random_forest": {
+        "budget": "n_estimators",
+        "min_budget": 10,
+        "max_budget": 270,
+        "params": {
+            "max_depth": [4, 8, 16, None],
+            "min_samples_leaf": [1, 5, 20],
+            "max_features": ["sqrt", 0.5, 1.0],
+        },
+        "fixed": {},
+    },
+}
+
+
+def param_grid(model_name: str) -> list:
+    space = SEARCH_SPACES[model_name]["params"]
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def trial_key(params: dict, budget: int) -> str:
+    raw = json.dumps({"params": params, "budget": budget}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def run_key(data, folds, eta: int) -> str:
+    """Hash über X, y, die Fold-Aufteilung und eta (Teil des Historien-Namens)."""
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(data.X).tobytes())
+    h.update(np.ascontiguousarray(data.y).tobytes())
+    for season, train_idx, test_idx in folds:
+        h.update(str(season).encode())
+        h.update(np.ascontiguousarray(train_idx).tobytes())
+        h.update(np.ascontiguousarray(test_idx).tobytes())
+    h.update(str(eta).encode())
+    return h.hexdigest()[:12]
+
+
+# =========================================================
+# 1. Worker
+# =========================================================
+
+_WORKER_DATA = {}
+
+
+def _init_worker(matrix_path, folds):
+    shared = shared_matrix.attach(matrix_path)
+    _WORKER_DATA.update(X=shared.X, y=shared.y, folds=folds, kind=shared.meta["kind"])
+
+
+def _make_estimator(model_name, kind, params, budget):
+    space = SEARCH_SPACES[model_name]
+    kwargs = {**space["fixed"], **params, space["budget"]: budget}
+    if model_name == "random_forest":
+        # make_model kapselt RF in einer Pipeline; Parameter direkt setzen
+        est = make_model(model_name, kind)
+        est.steps[-1][1].set_params(**kwargs)
+        return est
+    return make_model(model_name, kind, **kwargs)
+
+
+def run_trial(model_name, params, budget):
+    """Mittlerer Score (grösser = besser) über alle Folds für eine Konfiguration."""
+    X, y, folds, kind = (_WORKER_DATA[k] for k in ("X", "y", "folds", "kind"))
+    metric, higher_is_better = MAIN_METRIC[kind]
+
+    start = time.perf_counter()
+    scores = []
+    for _, train_idx, test_idx in folds:
+        est = _make_estimator(model_name, kind, params, budget)
+        est.fit(X[train_idx], y[train_idx])
+        if kind == "clf":
+            result = score(kind, y[test_idx], est.predict(X[test_idx]), est.predict_proba(X[test_idx])[:, 1])
+        else:
+            result = score(kind, y[test_idx], est.predict(X[test_idx]))
+        scores.append(result[metric])
+
+    value = float(np.nanmean(scores))
+    return {
+        "params": params,
+        "budget": budget,
+        "score": value if higher_is_better else -value,
+        "fit_s": time.perf_counter() - start,
+    }
+
+
+# =========================================================
+# 2. Historie
+# =========================================================
+
+class TrialHistory:
+    """JSONL-Datei mit allen abgeschlossenen Trials (Resume-fähig)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.trials = {}
+        if self.path.exists():
+            for line in self.path.read_text().splitlines():
+                if line.strip():
+                    trial = json.loads(line)
+                    self.trials[trial["key"]] = trial
+
+    def get(self, params, budget):
+        return self.trials.get(trial_key(params, budget))
+
+    def add(self, trial: dict):
+        trial = {"key": trial_key(trial["params"], trial["budget"]), **trial}
+        self.trials[trial["key"]] = trial
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(trial, default=str) + "\n")
+        return trial
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(list(self.trials.values()))
+
+
+# =========================================================
+# 3. Successive Halving / Hyperband
+# =========================================================
+
+def _run_batch(pool, history, model_name, configs, budget, start, tag):
+    """Führt alle noch nicht bekannten (Konfiguration, Budget)-Trials parallel aus."""
+    results = []
+    todo = []
+    for params in configs:
+        known = history.get(params, budget)
+        if known is not None:
+            results.append(known)
+        else:
+            todo.append(params)
+
+    futures = [pool.submit(run_trial, model_name, params, budget) for params in todo]
+    for future in futures:
+        trial = future.result()
+        trial.update(tag, elapsed_s=time.perf_counter() - start)
+        results.append(history.add(trial))
+    return results
+
+
+def successive_halving(pool, history, model_name, configs, min_budget, max_budget, eta, start, bracket=0):
+    budget = min_budget
+    rung = 0
+    while configs:
+        results = _run_batch(pool, history, model_name, configs, budget, start,
+                             {"bracket": bracket, "rung": rung})
+        if budget >= max_budget or len(configs) == 1:
+            return max(results, key=lambda t: t["score"])
+        # Nur das beste 1/eta weiter, mit eta-mal mehr Budget
+        keep = max(1, len(configs) // eta)
+        results.sort(key=lambda t: t["score"], reverse=True)
+        configs = [t["params"] for t in results[:keep]]
+        budget = min(budget * eta, max_budget)
+        rung += 1
+
+
+def hyperband(pool, history, model_name, eta=3, seed=0, start=None):
+    """
+    Hyperband: mehrere Successive-Halving-Brackets mit unterschiedlichem
+    Verhältnis zwischen Anzahl Konfigurationen und Startbudget.
+    """
+    space = SEARCH_SPACES[model_name]
+    grid = param_grid(model_name)
+    rng = np.random.default_rng(seed)
+    start = start or time.perf_counter()
+
+    s_max = int(math.floor(math.log(space["max_budget"] / space["min_budget"], eta) + 1e-9))
+    best = None
+    for s in range(s_max, -1, -1):
+        n_configs = min(len(grid), int(math.ceil((s_max + 1) / (s + 1) * eta ** s)))
+        min_budget = int(space["max_budget"] * eta ** (-s))
+        configs = [grid[i] for i in rng.choice(len(grid), n_configs, replace=False)]
+        result = successive_halving(pool, history, model_name, configs, min_budget,
+                                    space["max_budget"], eta, start, bracket=s)
+        if best is None or result["score"] > best["score"]:
+            best = result
+    return best
+
+
+def grid_search(pool, history, model_name, start=None):
+    """Referenz: jede Konfiguration mit vollem Budget."""
+    space = SEARCH_SPACES[model_name]
+    start = start or time.perf_counter()
+    results = _run_batch(pool, history, model_name, param_grid(model_name), space["max_budget"],
+                         start, {"bracket": "grid", "rung": 0})
+    return max(results, key=lambda t: t["score"])
+
+
+def _open_pool(data, folds, workers, tmp):
+    matrix_path = shared_matrix.export(data, Path(tmp) / "data.f3m")
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        initializer=_init_worker,
+        initargs=(str(matrix_path), folds),
+    )
+
+
+def history_path(series, task, model_name, key, suffix="hyperband"):
+    return TUNING_DIR / f"{series}_{task}_{model_name}_{suffix}_{key}.jsonl"
+
+
+def tune(series, task, model_name="hist_gb", eta=3, workers=None, last_folds=3, seed=0):
+    data = load_dataset(series, task)
+    folds = forward_chaining_folds(data.groups)[-last_folds:]
+    history = TrialHistory(history_path(series, task, model_name, run_key(data, folds, eta)))
+    if history.trials:
+        print(f"Setze Suche fort: {len(history.trials)} Trials aus {history.path}")
+
+    with tempfile.TemporaryDirectory(prefix="f_tune_") as tmp, _open_pool(data, folds, workers, tmp) as pool:
+        best = hyperband(pool, history, model_name, eta=eta, seed=seed)
+    return best, history
+
+
+# =========================================================
+# 4. Benchmark gegen Grid Search
+# =========================================================
+
+def time_to_score(trials: list, target: float) -> float:
+    """Erster Zeitpunkt, an dem der beste bisherige Score das Ziel erreicht."""
+    hits = [t["elapsed_s"] for t in trials if t["score"] >= target]
+    return min(hits) if hits else float("nan")
+
+
+def benchmark(series, task, model_name="hist_gb", eta=3, workers=None, last_folds=3, tolerance=0.005):
+    """
+    Startet Hyperband und Grid Search mit frischer Historie und misst, wie
+    lange jeder Ansatz braucht, bis er innerhalb `tolerance` am besten
+    Grid-Score liegt.
+    """
+    data = load_dataset(series, task)
+    folds = forward_chaining_folds(data.groups)[-last_folds:]
+
+    with tempfile.TemporaryDirectory(prefix="f_tune_") as tmp, _open_pool(data, folds, workers, tmp) as pool:
+        hb_history = TrialHistory(Path(tmp) / "hyperband.jsonl")
+        start = time.perf_counter()
+        hb_best = hyperband(pool, hb_history, model_name, eta=eta, start=start)
+        hb_total = time.perf_counter() - start
+
+        grid_history = TrialHistory(Path(tmp) / "grid.jsonl")
+        start = time.perf_counter()
+        grid_best = grid_search(pool, grid_history, model_name, start=start)
+        grid_total = time.perf_counter() - start
+
+    target = grid_best["score"] - tolerance
+    hb_trials = [t for t in hb_history.trials.values()]
+    grid_trials = [t for t in grid_history.trials.values()]
+
+    print(f"Benchmark {series}/{task} mit {model_name}, {len(folds)} Folds, Ziel-Score {target:.4f}")
+    print(f"  Hyperband:   {len(hb_trials):4d} Trials, gesamt {hb_total:7.1f} s, "
+          f"bis Ziel {time_to_score(hb_trials, target):7.1f} s, bester Score {hb_best['score']:.4f}")
+    print(f"  Grid Search: {len(grid_trials):4d} Trials, gesamt {grid_total:7.1f} s, "
+          f"bis Ziel {time_to_score(grid_trials, target):7.1f} s, bester Score {grid_best['score']:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperband-Suche für die Rennmodelle.")
+    parser.add_argument("--series", default="f3")
+    parser.add_argument("--task", default="top10")
+    parser.add_argument("--model", choices=list(SEARCH_SPACES), default="hist_gb")
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--folds", type=int, default=3, help="Nur die letzten N Saison-Folds verwenden")
+    parser.add_argument("--benchmark", action="store_true", help="Zeit bis Ziel-Score gegen Grid Search messen")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.series, args.task, args.model, args.eta, args.workers, args.folds)
+        return
+
+    best, history = tune(args.series, args.task, args.model, args.eta, args.workers, args.folds)
+    print(f"\n{len(history.trials)} Trials in {history.path}")
+    print(f"Beste Konfiguration (Budget {best['budget']}): {best['params']}")
+    print(f"Score: {best['score']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,10 @@
+"""
+F2 Feature Engineering: Sessions zusammenführen, Kennzahlen pro Fahrer.
+
+Aufruf vom Projektroot:
+    python -m src.f2.f2_feature_engineering
+"""
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -10,14 +17,6 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = PROJECT_ROOT / "data" / "f2"   # <--- WICHTIG: nur ein "f2"!
 
-print("PROJECT ROOT:", PROJECT_ROOT)
-print("F2 DATA DIR:", DATA_DIR)
-
-csv_files = list(DATA_DIR.glob("*.csv"))
-print("Gefundene CSV-Dateien im F2-Ordner:")
-for f in csv_files:
-    print("  -", f.name)
-
 
 # ============================================================
 # 2. Helper: Zeitstring → Sekunden
@@ -44,36 +43,23 @@ def time_to_seconds(t):
 # 3. Helper zum Laden: nach Pattern suchen
 # ============================================================
 
-def load_csv(pattern: str) -> pd.DataFrame:
+def load_csv(pattern: str, data_dir: Path = DATA_DIR) -> pd.DataFrame:
     """
     Lädt die erste CSV, die auf das Pattern passt.
     z.B. load_csv("Free-Practice") findet "Free-Practice.csv".
     """
-    matches = list(DATA_DIR.glob(pattern + ".csv")) + list(DATA_DIR.glob(pattern + "*.csv"))
+    matches = list(data_dir.glob(pattern + ".csv")) + list(data_dir.glob(pattern + "*.csv"))
     if not matches:
         raise FileNotFoundError(
             f"Keine Datei gefunden für Pattern '{pattern}'. "
-            f"Verfügbare Dateien: {[f.name for f in DATA_DIR.glob('*.csv')]}"
+            f"Verfügbare Dateien: {[f.name for f in data_dir.glob('*.csv')]}"
         )
     print(f"Lade Datei für Pattern '{pattern}':", matches[0].name)
     return pd.read_csv(matches[0])
 
 
 # ============================================================
-# 4. CSV-Dateien laden
-# ============================================================
-
-free_practice = load_csv("Free-Practice")
-qualifying    = load_csv("Qualifying-Session")
-feature_race  = load_csv("Feature-Race")
-sprint_race1  = load_csv("Sprint-Race")
-sprint_race2  = load_csv("Sprint-Race-2")
-race_results  = load_csv("Formula2_Race_Results")
-drivers_to_f1 = load_csv("f2_drivers_to_f1")
-
-
-# ============================================================
-# 5. Spalten vereinheitlichen
+# 4. Spalten vereinheitlichen
 # ============================================================
 
 def clean_cols(df):
@@ -81,27 +67,13 @@ def clean_cols(df):
     df.columns = [c.lower().replace(" ", "_") for c in df.columns]
     return df
 
-free_practice, qualifying, feature_race, sprint_race1, sprint_race2, race_results, drivers_to_f1 = \
-    [clean_cols(df) for df in
-     [free_practice, qualifying, feature_race, sprint_race1, sprint_race2, race_results, drivers_to_f1]]
 
 # Fahrername einheitlich "driver"
-rename_candidates = ["pilot_name", "driver_name", "name"]
-
-for df in [free_practice, qualifying, feature_race, sprint_race1, sprint_race2]:
-    for c in rename_candidates:
-        if c in df.columns:
-            df.rename(columns={c: "driver"}, inplace=True)
-
-if "driver_name" in race_results.columns:
-    race_results.rename(columns={"driver_name": "driver"}, inplace=True)
-
-if "pilot_name" in drivers_to_f1.columns:
-    drivers_to_f1.rename(columns={"pilot_name": "driver"}, inplace=True)
+RENAME_CANDIDATES = ["pilot_name", "driver_name", "name"]
 
 
 # ============================================================
-# 6. Sessions vorbereiten
+# 5. Sessions vorbereiten
 # ============================================================
 
 def prepare_session(df, session_name):
@@ -122,74 +94,108 @@ def prepare_session(df, session_name):
 
     return df
 
-free_practice  = prepare_session(free_practice,  "free_practice")
-qualifying     = prepare_session(qualifying,     "qualifying")
-feature_race   = prepare_session(feature_race,   "feature_race")
-sprint_race1   = prepare_session(sprint_race1,   "sprint_race1")
-sprint_race2   = prepare_session(sprint_race2,   "sprint_race2")
 
+def load_sessions(data_dir: Path = DATA_DIR) -> dict:
+    """CSV-Dateien laden, Spalten vereinheitlichen, Fahrer als "driver"."""
+    tables = {
+        "free_practice": load_csv("Free-Practice", data_dir),
+        "qualifying": load_csv("Qualifying-Session", data_dir),
+        "feature_race": load_csv("Feature-Race", data_dir),
+        "sprint_race1": load_csv("Sprint-Race", data_dir),
+        "sprint_race2": load_csv("Sprint-Race-2", data_dir),
+        "race_results": load_csv("Formula2_Race_Results", data_dir),
+        "drivers_to_f1": load_csv("f2_drivers_to_f1", data_dir),
+    }
+    tables = {name: clean_cols(df) for name, df in tables.items()}
 
-# ============================================================
-# 7. Sessions zusammenführen
-# ============================================================
+    for name in ["free_practice", "qualifying", "feature_race", "sprint_race1", "sprint_race2"]:
+        for c in RENAME_CANDIDATES:
+            if c in tables[name].columns:
+                tables[name] = tables[name].rename(columns={c: "driver"})
 
-sessions = pd.concat(
-    [free_practice, qualifying, feature_race, sprint_race1, sprint_race2],
-    ignore_index=True
-)
+    if "driver_name" in tables["race_results"].columns:
+        tables["race_results"] = tables["race_results"].rename(columns={"driver_name": "driver"})
 
+    if "pilot_name" in tables["drivers_to_f1"].columns:
+        tables["drivers_to_f1"] = tables["drivers_to_f1"].rename(columns={"pilot_name": "driver"})
+    return tables
 
-# ============================================================
-# 8. Feature Engineering pro Fahrer
-# ============================================================
 
-driver_base = sessions.groupby("driver").agg(
-    total_laps=("laps", "sum"),
-    avg_kph=("kph", "mean"),
-    avg_position=("pos", "mean"),
-    best_position=("pos", "min"),
-    avg_best_lap=("best_lap_seconds", "mean")
-).reset_index()
+def build_f2_features(tables: dict) -> pd.DataFrame:
+    # ========================================================
+    # 6. Sessions zusammenführen
+    # ========================================================
 
-session_positions = (
-    sessions.groupby(["driver", "session_type"])["pos"]
-    .mean()
-    .unstack()
-    .add_prefix("avg_pos_")
-    .reset_index()
-)
+    sessions = pd.concat(
+        [prepare_session(tables[name], name)
+         for name in ["free_practice", "qualifying", "feature_race", "sprint_race1", "sprint_race2"]],
+        ignore_index=True
+    )
 
-features = driver_base.merge(session_positions, on="driver", how="left")
+    # ========================================================
+    # 7. Feature Engineering pro Fahrer
+    # ========================================================
 
+    driver_base = sessions.groupby("driver").agg(
+        total_laps=("laps", "sum"),
+        avg_kph=("kph", "mean"),
+        avg_position=("pos", "mean"),
+        best_position=("pos", "min"),
+        avg_best_lap=("best_lap_seconds", "mean")
+    ).reset_index()
 
-# ============================================================
-# 9. Finale Platzierung (Race Results) hinzufügen
-# ============================================================
+    session_positions = (
+        sessions.groupby(["driver", "session_type"])["pos"]
+        .mean()
+        .unstack()
+        .add_prefix("avg_pos_")
+        .reset_index()
+    )
 
-if "position" in race_results.columns:
-    final_pos = race_results.groupby("driver")["position"].mean().reset_index()
-    final_pos.rename(columns={"position": "avg_final_position"}, inplace=True)
-    features = features.merge(final_pos, on="driver", how="left")
+    features = driver_base.merge(session_positions, on="driver", how="left")
 
+    # ========================================================
+    # 8. Finale Platzierung (Race Results) hinzufügen
+    # ========================================================
 
-# ============================================================
-# 10. Label: reached_f1 hinzufügen
-# ============================================================
+    race_results = tables["race_results"]
+    if "position" in race_results.columns:
+        final_pos = race_results.groupby("driver")["position"].mean().reset_index()
+        final_pos.rename(columns={"position": "avg_final_position"}, inplace=True)
+        features = features.merge(final_pos, on="driver", how="left")
+
+    # ========================================================
+    # 9. Label: reached_f1 hinzufügen
+    # ========================================================
 
-if "reached_f1" in drivers_to_f1.columns:
-    labels = drivers_to_f1[["driver", "reached_f1"]]
-    features = features.merge(labels, on="driver", how="left")
+    drivers_to_f1 = tables["drivers_to_f1"]
+    if "reached_f1" in drivers_to_f1.columns:
+        labels = drivers_to_f1[["driver", "reached_f1"]]
+        features = features.merge(labels, on="driver", how="left")
+
+    return features
 
 
 # ============================================================
-# 11. Speichern
+# 10. Speichern
 # ============================================================
 
 OUTFILE = DATA_DIR / "f2_features.csv"
-features.to_csv(OUTFILE, index=False)
 
-print("✔ Feature Engineering abgeschlossen!")
-print("→ Datei gespeichert unter:", OUTFILE)
-print("Anzahl Fahrer:", len(features))
-print("Anzahl Features:", features.shape[1])
-print(features.head())
+
+def main():
+    print("PROJECT ROOT:", PROJECT_ROOT)
+    print("F2 DATA DIR:", DATA_DIR)
+
+    features = build_f2_features(load_sessions())
+    features.to_csv(OUTFILE, index=False)
+
+    print("✔ Feature Engineering abgeschlossen!")
+    print("→ Datei gespeichert unter:", OUTFILE)
+    print("Anzahl Fahrer:", len(features))
+    print("Anzahl Features:", features.shape[1])
+    print(features.head())
+
+
+if __name__ == "__main__":
+    main()
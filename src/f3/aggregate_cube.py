@@ -0,0 +1,235 @@
+"""
+Voraggregierter Würfel Saison × Team × Fahrer für EDA, Dashboards und Notebooks.
+
+Pro (season, team_name, driver_name) werden Zählwerte, Summen,
+Quadratsummen, Min/Max und ein Positions-Histogramm (exakte
+Quantil-Skizze für ganzzahlige Positionen) gespeichert. Alle Kennzahlen
+wie Mittelwert, Standardabweichung oder Quantile auf gröberen Ebenen
+(Team, Fahrer, Saison × Team, ...) entstehen durch Aufrollen des Würfels,
+ohne die Rohdaten erneut zu gruppieren.
+
+Aufruf vom Projektroot:
+    python -m src.f3.aggregate_cube
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_DIR = BASE_DIR / "data" / "f3"
+
+INPUT = DATA_DIR / "f3_2019_2025_races_features.csv"
+CUBE = DATA_DIR / "f3_2019_2025_cube.csv"
+CUBE_META = CUBE.with_suffix(".json")
+
+DIMENSIONS = ["season", "team_name", "driver_name"]
+
+# Kennzahl -> nur Finisher (True) oder alle Zeilen (False)
+MEASURES = {
+    "position": True,
+    "time_from_winner_s": True,
+    "avg_lap_time_s": False,
+    "best_lap_s": False,
+    "driver_vs_team": False,
+}
+
+# Zählwerte, die beim Aufrollen einfach summiert werden
+COUNTS = ["rows", "finishers", "dnfs", "dns", "dsq", "wins", "podiums", "top10"]
+
+# Positions-Histogramm 1..MAX_POSITION (nur Finisher)
+MAX_POSITION = 40
+HIST_COLS = [f"pos_{p}" for p in range(1, MAX_POSITION + 1)]
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Baut den Würfel in einem Durchlauf über den Feature-Datensatz.
+    Alle Kennzahlen werden als Hilfsspalten vorbereitet und dann mit
+    einem einzigen groupby summiert.
+    """
+    finished = df["finished"].eq(1).to_numpy()
+    pos = pd.to_numeric(df["position"], errors="coerce").to_numpy(dtype=float)
+    pos_fin = np.where(finished, pos, np.nan)
+
+    parts = {
+        "rows": np.ones(len(df), dtype=np.int64),
+        "finishers": finished.astype(np.int64),
+        "dnfs": df["is_dnf"].to_numpy(dtype=np.int64),
+        "dns": df["is_dns"].to_numpy(dtype=np.int64),
+        "dsq": df["is_dsq"].to_numpy(dtype=np.int64),
+        "wins": (pos_fin == 1).astype(np.int64),
+        "podiums": (pos_fin <= 3).astype(np.int64),
+        "top10": (pos_fin <= 10).astype(np.int64),
+    }
+
+    extremes = {}
+    for measure, finishers_only in MEASURES.items():
+        values = pd.to_numeric(df[measure], errors="coerce").to_numpy(dtype=float)
+        if finishers_only:
+            values = np.where(finished, values, np.nan)
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        parts[f"{measure}_n"] = valid.astype(np.int64)
+        parts[f"{measure}_sum"] = filled
+        parts[f"{measure}_sumsq"] = filled * filled
+        extremes[f"{measure}_min"] = values
+        extremes[f"{measure}_max"] = values
+
+    # Positions-Histogramm als One-Hot (Positionen ausserhalb 1..MAX werden ignoriert)
+    hist = np.zeros((len(df), MAX_POSITION), dtype=np.int64)
+    in_range = ~np.isnan(pos_fin) & (pos_fin >= 1) & (pos_fin <= MAX_POSITION)
+    hist[np.flatnonzero(in_range), pos_fin[in_range].astype(int) - 1] = 1
+
+    keys = df[DIMENSIONS].reset_index(drop=True)
+    additive = pd.concat(
+        [keys, pd.DataFrame(parts), pd.DataFrame(hist, columns=HIST_COLS)], axis=1
+    )
+    minmax = pd.concat([keys, pd.DataFrame(extremes)], axis=1)
+
+    grouped = additive.groupby(DIMENSIONS, dropna=False).sum()
+    agg_minmax = minmax.groupby(DIMENSIONS, dropna=False).agg(
+        {c: ("min" if c.endswith("_min") else "max") for c in extremes}
+    )
+
+    cube = grouped.join(agg_minmax).reset_index()
+    return cube
+
+
+def rollup(cube: pd.DataFrame, by) -> pd.DataFrame:
+    """
+    Rollt den Würfel auf die Dimensionen in `by` auf (z. B. ["team_name"]
+    oder ["season", "team_name"]) und leitet Mittelwert und
+    Standardabweichung (ddof=1) pro Kennzahl ab.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+
+    additive_cols = [c for c in cube.columns
+                     if c in COUNTS or c in HIST_COLS
+                     or c.endswith(("_n", "_sum", "_sumsq"))]
+    agg = {c: "sum" for c in additive_cols}
+    for measure in MEASURES:
+        agg[f"{measure}_min"] = "min"
+        agg[f"{measure}_max"] = "max"
+
+    out = cube.groupby(by, dropna=False).agg(agg)
+
+    for measure in MEASURES:
+        n = out[f"{measure}_n"].to_numpy(dtype=float)
+        s = out[f"{measure}_sum"].to_numpy(dtype=float)
+        ss = out[f"{measure}_sumsq"].to_numpy(dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, s / n, np.nan)
+            var = np.where(n > 1, (ss - s * s / n) / (n - 1), np.nan)
+        out[f"{measure}_mean"] = mean
+        # Rundungsfehler der Quadratsummen können minimal negativ werden
+        out[f"{measure}_std"] = np.sqrt(np.clip(var, 0.0, None))
+
+    return out.reset_index()
+
+
+def position_quantiles(rolled: pd.DataFrame, qs=(0.25, 0.5, 0.75)) -> pd.DataFrame:
+    """
+    Exakte Quantile der Finisher-Positionen aus dem Histogramm
+    (gleiche lineare Interpolation wie np.quantile).
+    """
+    hist = rolled[HIST_COLS].to_numpy()
+    cum = hist.cumsum(axis=1)
+    n = cum[:, -1]
+    out = {}
+    for q in qs:
+        h = (n - 1) * q
+        lo, hi = np.floor(h), np.ceil(h)
+        # k-ter sortierter Wert = erste Position mit kumulierter Anzahl > k
+        x_lo = (cum <= lo[:, None]).sum(axis=1) + 1
+        x_hi = (cum <= hi[:, None]).sum(axis=1) + 1
+        val = x_lo + (h - lo) * (x_hi - x_lo)
+        out[f"position_q{int(round(q * 100))}"] = np.where(n > 0, val, np.nan)
+    return pd.DataFrame(out, index=rolled.index)
+
+
+def boxplot_stats(rolled: pd.DataFrame, label_col: str) -> list:
+    """
+    Boxplot-Statistiken (für Axes.bxp) pro Zeile aus dem Positions-Histogramm,
+    Whisker nach der üblichen 1.5 × IQR Regel.
+    """
+    quantiles = position_quantiles(rolled)
+    positions = np.arange(1, MAX_POSITION + 1)
+    stats = []
+    for i, (_, row) in enumerate(rolled.iterrows()):
+        counts = row[HIST_COLS].to_numpy(dtype=int)
+        q1, med, q3 = quantiles.iloc[i][["position_q25", "position_q50", "position_q75"]]
+        iqr = q3 - q1
+        present = positions[counts > 0]
+        inside = present[(present >= q1 - 1.5 * iqr) & (present <= q3 + 1.5 * iqr)]
+        outside = present[(present < q1 - 1.5 * iqr) | (present > q3 + 1.5 * iqr)]
+        stats.append({
+            "label": row[label_col],
+            "q1": q1,
+            "med": med,
+            "q3": q3,
+            "whislo": inside.min(),
+            "whishi": inside.max(),
+            "fliers": np.repeat(outside, counts[outside - 1]),
+        })
+    return stats
+
+
+def save_cube(cube: pd.DataFrame, source=INPUT, path=CUBE) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cube.to_csv(path, index=False)
+    meta = {
+        "source": Path(source).name,
+        "source_sha256": _file_digest(source),
+        "dimensions": DIMENSIONS,
+        "measures": MEASURES,
+        "max_position": MAX_POSITION,
+        "rows": len(cube),
+    }
+    path.with_suffix(".json").write_text(json.dumps(meta, indent=2))
+    return path
+
+
+def load_cube(source=INPUT, path=CUBE, rebuild=False) -> pd.DataFrame:
+    """
+    Lädt den gespeicherten Würfel. Wurde der Feature-Datensatz seit dem
+    letzten Aufbau geändert (oder fehlt der Würfel), wird er neu gebaut
+    und gespeichert.
+    """
+    path = Path(path)
+    meta_path = path.with_suffix(".json")
+    if not rebuild and path.exists() and meta_path.exists():
+        meta = json.loads(meta_path.read_text())
+        if meta.get("source_sha256") == _file_digest(source):
+            return pd.read_csv(path)
+
+    print(f"Baue Aggregat-Würfel aus {source}")
+    cube = build_cube(pd.read_csv(source))
+    save_cube(cube, source, path)
+    return cube
+
+
+def main():
+    cube = load_cube(rebuild=True)
+    print(f"Würfel gespeichert unter: {CUBE} mit {len(cube)} Zellen "
+          f"und {len(cube.columns)} Spalten.")
+    print(rollup(cube, "team_name")[["team_name", "rows", "finishers", "position_mean", "position_std"]]
+          .sort_values("position_mean")
+          .head(10))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,67 @@
+"""
+Stufe 2a: nur Zeilen mit echten Runden behalten, Standings-Tabellen entfernen.
+
+Mit --incremental nur die von driver_cleaning vorgemerkten Rennen neu
+filtern, der Rest kommt aus der bestehenden Ausgabe.
+
+Aufruf vom Projektroot:
+    python -m src.f3.build_clean_datasets
+    python -m src.f3.build_clean_datasets --incremental
+"""
+
+import argparse
+import time
+from pathlib import Path
+
 import pandas as pd
 
-df = pd.read_csv("f3_2019_2025_with_drivers_and_status.csv")
+from src.data.contracts import enforce, report_overhead
+from src.data.fingerprints import consume_changed_races, load_changed_races, read_output, update_races
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_DIR = BASE_DIR / "data" / "f3"
+INPUT = DATA_DIR / "f3_2019_2025_with_drivers_and_status.csv"
+OUTPUT = DATA_DIR / "f3_2019_2025_races_only.csv"
+STAGE = "build_clean_datasets"
+
+
+def races_only(df: pd.DataFrame) -> pd.DataFrame:
+    # 1) Nur Zeilen mit echten Runden behalten
+    mask_laps = df["laps"].notna()
+
+    # 2) Standings Tabellen rauswerfen
+    session = df["session_type"].astype(str)
+    mask_no_standings = ~session.str.startswith("Standings", na=False)
+
+    # 3) Nur Renn-Tabellen (beides muss true sein)
+    return df[mask_laps & mask_no_standings].copy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nur Renn-Tabellen der F3-Daten behalten.")
+    parser.add_argument("--incremental", action="store_true", help="nur geänderte Rennen neu filtern")
+    args = parser.parse_args()
 
-# 1) Nur Zeilen mit echten Runden behalten
-mask_laps = df["laps"].notna()
+    start = time.perf_counter()
+    # Eingabe wurde als Ausgabe von driver_cleaning bereits geprüft
+    df = pd.read_csv(INPUT)
 
-# 2) Standings Tabellen rauswerfen
-session = df["session_type"].astype(str)
-mask_no_standings = ~session.str.startswith("Standings", na=False)
+    races = load_changed_races(STAGE) if args.incremental and OUTPUT.exists() else None
+    if races is None:
+        race_df = races_only(df)
+    else:
+        print(f"{len(races)} geänderte Rennen neu filtern")
+        race_df = update_races(df, read_output(OUTPUT), races, races_only)
+    print("Zeilen nach Renn-Filter:", len(race_df))
+    print(race_df[["session_type", "driver_name", "laps", "time"]].head(20))
 
-# 3) Nur Renn-Tabellen (beides muss true sein)
-race_df = df[mask_laps & mask_no_standings].copy()
+    race_df, out_report = enforce(race_df, "f3_races_only")
+    race_df.to_csv(OUTPUT, index=False)
+    consume_changed_races(STAGE)
+    print("Neue races_only gespeichert!")
+    report_overhead([out_report], time.perf_counter() - start, "build_clean_datasets")
 
-print("Zeilen nach Renn-Filter:", len(race_df))
-print(race_df[["session_type", "driver_name", "laps", "time"]].head(20))
 
-race_df.to_csv("f3_2019_2025_races_only.csv", index=False)
-print("Neue races_only gespeichert!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Chunk-Modus der F3-Pipeline für Daten, die nicht in den Speicher passen.
+
+Gleiche Stufen und Dateien wie die einzelnen Skripte, aber ohne die ganze
+Datei auf einmal zu lesen:
+
+- zeilenweise Stufen (driver_cleaning, build_clean_datasets, parse_times)
+  lesen mit pd.read_csv(chunksize=...) und hängen an die Ausgabe an;
+  exakte Duplikate der Rohdaten über die Hashes früherer Chunks
+- race_only_bereinigung und die Rennfeatures laufen auf Blöcken aus
+  ganzen (season, race_id) Partitionen; die Eingabe muss dafür nach
+  Rennen gruppiert sein (so wie gescrapt), sonst bricht iter_partitions ab
+- Saison-Aggregate (Team/Fahrer) in zwei Durchläufen: Rennfeatures in eine
+  Zwischendatei + Teilsummen pro Saison, danach Teilsummen zusammenführen
+  und anhängen
+
+Der Spitzenspeicher hängt damit von chunksize und der größten Partition ab,
+nicht von der Dateigröße (plus 8 Byte pro Rohzeile für die Dedup-Hashes und
+die Teilsummen pro Saison/Team/Fahrer). Die Verträge werden pro Chunk
+geprüft, Quarantäne-Dateien werden angehängt. Fingerprints für
+--incremental schreibt nur das normale driver_cleaning.
+
+Aufruf vom Projektroot:
+    python -m src.f3.chunked_pipeline
+    python -m src.f3.chunked_pipeline --chunksize 20000 --data-dir data/f3
+    python -m src.f3.chunked_pipeline --benchmark 5
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data import synthetic
+from src.data.contracts import enforce, report_overhead
+from src.data.fingerprints import drop_seen_duplicates
+from src.f3.build_clean_datasets import races_only
+from src.f3.driver_cleaning import clean_drivers
+from src.f3.feature_engineering import (apply_season_partials, build_features, finalize_features,
+                                        merge_partials, race_features, season_partials)
+from src.f3.parse_times import add_times
+from src.f3.race_only_bereinigung import final_races
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_DIR = BASE_DIR / "data" / "f3"
+
+CHUNKSIZE = 50_000
+PARTITION_KEY = ["season", "race_id"]
+
+# Textspalten fest als str lesen, sonst hängt der Typ vom Chunk ab
+# (z. B. status ohne Eintrag im Chunk -> float)
+TEXT_DTYPES = {col: str for col in ["session_type", "driver_name", "driver_code", "team_name", "status"]}
+
+# Teilsummen nach so vielen Blöcken zusammenfassen
+MERGE_EVERY = 64
+
+FILES = {
+    "raw": "f3_2019_2025_raw_results.csv",
+    "drivers": "f3_2019_2025_with_drivers_and_status.csv",
+    "races_only": "f3_2019_2025_races_only.csv",
+    "with_times": "f3_2019_2025_with_times.csv",
+    "final": "f3_2019_2025_races_only_final.csv",
+    "features": "f3_2019_2025_races_features.csv",
+}
+
+
+# =========================================================
+# 1. Lesen in Chunks und Partitionen
+# =========================================================
+
+def iter_chunks(path, chunksize: int = CHUNKSIZE, dtype=str):
+    """Zeilenweise Stufen: alle Spalten als Text, die Ausgabe behält das Format der Eingabe."""
+    yield from pd.read_csv(path, chunksize=chunksize, dtype=dtype)
+
+
+def iter_partitions(path, key=PARTITION_KEY, chunksize: int = CHUNKSIZE, dtype=None):
+    """
+    Blöcke aus vollständigen Partitionen (gleicher key) einer nach key
+    gruppierten Datei, etwa chunksize Zeilen pro Block. Die letzte Partition
+    eines Chunks kann im nächsten weitergehen und wird deshalb erst mit dem
+    nächsten Chunk ausgegeben; keine Partition wird geteilt.
+    """
+    dtype = TEXT_DTYPES if dtype is None else dtype
+    closed = set()
+    carry = None
+
+    def emit(block):
+        keys = block[key].drop_duplicates()
+        reopened = [k for k in keys.itertuples(index=False, name=None) if k in closed]
+        if reopened:
+            raise ValueError(f"{path}: Partition {dict(zip(key, reopened[0]))} ist nicht zusammenhängend, "
+                             f"Datei zuerst nach {key} gruppieren")
+        closed.update(keys.itertuples(index=False, name=None))
+        return block.reset_index(drop=True)
+
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=dtype):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        code = chunk.groupby(key, sort=False, dropna=False).ngroup().to_numpy()
+        starts = np.flatnonzero(np.r_[True, code[1:] != code[:-1]])
+        if len(starts) != code.max() + 1:
+            raise ValueError(f"{path}: Partitionen nicht zusammenhängend, Datei zuerst nach {key} gruppieren")
+        if len(starts) > 1:
+            yield emit(chunk.iloc[:starts[-1]])
+        carry = chunk.iloc[starts[-1]:]
+    if carry is not None and len(carry):
+        yield emit(carry)
+
+
+def _dedup(chunks, stats: dict):
+    seen = np.empty(0, dtype=np.uint64)
+    for chunk in chunks:
+        rows = len(chunk)
+        chunk, seen = drop_seen_duplicates(chunk, seen)
+        stats["duplicates"] = stats.get("duplicates", 0) + rows - len(chunk)
+        yield chunk
+
+
+# =========================================================
+# 2. Stufen
+# =========================================================
+
+def _merge_reports(reports: list) -> dict:
+    """Berichte aller Chunks eines Vertrags zu einem zusammenfassen (für report_overhead)."""
+    merged = dict(reports[0], violations={}, quarantine=None)
+    for key in ["rows", "dropped", "check_seconds", "seconds"]:
+        merged[key] = sum(r[key] for r in reports)
+    for r in reports:
+        for rule, n in r["violations"].items():
+            merged["violations"][rule] = merged["violations"].get(rule, 0) + n
+        merged["quarantine"] = merged["quarantine"] or r["quarantine"]
+    return merged
+
+
+def run_stage(parts, target: Path, func, contract_out: str, contract_in: str = None,
+              quarantine_dir=None, stage: str = "", budget: float = None):
+    """
+    func auf jedes Teilstück anwenden, Verträge pro Teilstück prüfen und die
+    Ausgabe anhängen. Gibt die Anzahl geschriebener Zeilen zurück.
+    """
+    start = time.perf_counter()
+    quarantine_dir = quarantine_dir or target.parent / "quarantine"
+    checks = [name for name in [contract_in, contract_out] if name]
+    for name in checks:
+        (Path(quarantine_dir) / f"{name}.csv").unlink(missing_ok=True)
+
+    reports = {name: [] for name in checks}
+    offsets = dict.fromkeys(checks, 0)
+
+    def check(df, name):
+        df, report = enforce(df, name, quarantine_dir, append=True, row_offset=offsets[name])
+        offsets[name] += report["rows"]
+        reports[name].append(report)
+        return df
+
+    tmp = target.with_name(target.name + ".tmp")
+    written = 0
+    with open(tmp, "w", newline="", encoding="utf-8") as out:
+        for part in parts:
+            if contract_in:
+                part = check(part, contract_in)
+            if part.empty:
+                continue
+            part = check(func(part), contract_out)
+            part.to_csv(out, index=False, header=(written == 0))
+            written += len(part)
+    # erst am Ende ersetzen: ein abgebrochener Lauf lässt die alte Datei stehen
+    tmp.replace(target)
+
+    report_overhead([_merge_reports(reports[name]) for name in checks if reports[name]],
+                    time.perf_counter() - start, stage, budget)
+    return written
+
+
+def run_features(source: Path, target: Path, chunksize: int = CHUNKSIZE, quarantine_dir=None,
+                 budget: float = None) -> int:
+    """
+    Zwei Durchläufe: (1) Rennfeatures pro Block in eine Zwischendatei,
+    Teilsummen pro Saison sammeln; (2) Saison-Aggregate anhängen, runden,
+    prüfen und schreiben.
+    """
+    race_tmp = target.with_name(target.name + ".races.tmp")
+    team_parts, driver_parts = [], []
+    with open(race_tmp, "w", newline="", encoding="utf-8") as out:
+        for i, part in enumerate(iter_partitions(source, chunksize=chunksize)):
+            part = race_features(part)
+            part.to_csv(out, index=False, header=(i == 0))
+            team, driver = season_partials(part)
+            team_parts.append(team)
+            driver_parts.append(driver)
+            if len(team_parts) >= MERGE_EVERY:
+                team_parts = [merge_partials(team_parts)]
+                driver_parts = [merge_partials(driver_parts)]
+    team, driver = merge_partials(team_parts), merge_partials(driver_parts)
+
+    def season_step(part):
+        return finalize_features(apply_season_partials(part, team, driver))
+
+    try:
+        return run_stage(iter_partitions(race_tmp, chunksize=chunksize), target, season_step,
+                         "f3_races_features", quarantine_dir=quarantine_dir, stage="feature_engineering",
+                         budget=budget)
+    finally:
+        race_tmp.unlink(missing_ok=True)
+
+
+def run_pipeline(data_dir: Path = DATA_DIR, chunksize: int = CHUNKSIZE, quarantine_dir=None,
+                 budget: float = None) -> dict:
+    """Alle F3-Stufen im Chunk-Modus; gibt die Zeilen pro Ausgabedatei zurück."""
+    paths = {name: Path(data_dir) / file for name, file in FILES.items()}
+    q = quarantine_dir or Path(data_dir) / "quarantine"
+    stats = {}
+
+    stats["drivers"] = run_stage(
+        _dedup(iter_chunks(paths["raw"], chunksize), stats), paths["drivers"], clean_drivers,
+        "f3_with_drivers_and_status", "f3_raw_results", q, "driver_cleaning", budget)
+    stats["races_only"] = run_stage(
+        iter_chunks(paths["drivers"], chunksize), paths["races_only"], races_only,
+        "f3_races_only", quarantine_dir=q, stage="build_clean_datasets", budget=budget)
+    stats["with_times"] = run_stage(
+        iter_chunks(paths["drivers"], chunksize), paths["with_times"], add_times,
+        "f3_with_times", quarantine_dir=q, stage="parse_times", budget=budget)
+    stats["final"] = run_stage(
+        iter_partitions(paths["with_times"], chunksize=chunksize, dtype=str), paths["final"], final_races,
+        "f3_races_only_final", "f3_with_times", q, "race_only_bereinigung", budget)
+    stats["features"] = run_features(paths["final"], paths["features"], chunksize, q, budget)
+    return stats
+
+
+# =========================================================
+# 3. Benchmark: Chunk-Modus gegen die Stufen im Speicher
+# =========================================================
+
+def _in_memory(data_dir: Path):
+    """Dieselbe Kette komplett im Speicher (wie die einzelnen Skripte ohne Dateien dazwischen)."""
+    raw = pd.read_csv(data_dir / FILES["raw"]).drop_duplicates()
+    drivers = clean_drivers(raw)
+    races_only(drivers)
+    return build_features(final_races(add_times(drivers)))
+
+
+def _fold_seasons(path: Path) -> int:
+    """
+    Synthetische Saisons auf 2019-2025 zurückfalten: scale=10 erzeugt Saisons
+    bis weit nach 2030, die der Rohdaten-Vertrag sonst verwirft. race_id
+    bleibt eindeutig, die Partitionen also zusammenhängend.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    rows = 0
+    with open(tmp, "w", newline="", encoding="utf-8") as out:
+        for chunk in pd.read_csv(path, chunksize=CHUNKSIZE):
+            chunk["season"] = 2019 + (chunk["season"] - 2019) % 7
+            chunk.to_csv(out, index=False, header=(rows == 0))
+            rows += len(chunk)
+    tmp.replace(path)
+    return rows
+
+
+def _peak_mb(func, *args) -> tuple:
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func(*args)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def benchmark(scales=(1, 5), chunksize: int = 20_000):
+    """Laufzeit und Spitzenspeicher (tracemalloc) auf synthetischen F3-Daten."""
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            synthetic.write(tmp, scale, series=("f3",))
+            data_dir = tmp / "f3"
+            rows = _fold_seasons(data_dir / FILES["raw"])
+
+            mem_s, mem_mb = _peak_mb(_in_memory, data_dir)
+            chunk_s, chunk_mb = _peak_mb(run_pipeline, data_dir, chunksize)
+        print(f"Skala {scale:>3} ({rows:>9,} Rohzeilen): im Speicher {mem_s:6.1f} s {mem_mb:7.1f} MB | "
+              f"Chunks à {chunksize:,} {chunk_s:6.1f} s {chunk_mb:7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="F3-Pipeline im Chunk-Modus (begrenzter Speicher).")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    parser.add_argument("--benchmark", type=int, nargs="+", metavar="SCALE",
+                        help="synthetische Skalen vergleichen statt die Pipeline auszuführen")
+    parser.add_argument("--contract-budget", type=float, default=None,
+                        help="erlaubter Prüfanteil pro Stufe (Standard: contracts.OVERHEAD_BUDGET)")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.chunksize)
+        return
+
+    start = time.perf_counter()
+    stats = run_pipeline(args.data_dir, args.chunksize, budget=args.contract_budget)
+    print(f"\nChunk-Modus fertig in {time.perf_counter() - start:.1f} s (chunksize {args.chunksize:,})")
+    print(f"  {stats.pop('duplicates', 0)} exakte Duplikate entfernt")
+    for name, rows in stats.items():
+        print(f"  {FILES[name]:<45} {rows:>10,} Zeilen")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,36 @@
-import pandas as pd
+"""
+Stufe 1: driver_info der Rohdaten zerlegen (Status, Startnummer, Name, Code, Team).
+
+Ein- und Ausgabe werden gegen die Verträge aus src/data/contracts.py
+geprüft; Problemzeilen landen in data/f3/quarantine/ statt in der Konsole.
+
+Exakte Duplikate der Rohdaten werden verworfen (src/data/fingerprints.py).
+Mit --incremental werden nur Rennen neu geparst, deren Tabellen sich seit
+dem letzten Lauf geändert haben; der Rest kommt aus der bestehenden Ausgabe.
+Die geänderten race_ids werden für die folgenden Stufen vorgemerkt, die sie
+mit ihrem eigenen --incremental abarbeiten.
+
+Aufruf vom Projektroot:
+    python -m src.f3.driver_cleaning
+    python -m src.f3.driver_cleaning --incremental
+"""
+
+import argparse
 import re
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.data.contracts import enforce, report_overhead
+from src.data.fingerprints import changed_races, read_output, record, refresh, update_races
 
-# 1. Rohdaten einlesen
-df = pd.read_csv("f3_2019_2025_raw_results.csv")
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_DIR = BASE_DIR / "data" / "f3"
+INPUT = DATA_DIR / "f3_2019_2025_raw_results.csv"
+OUTPUT = DATA_DIR / "f3_2019_2025_with_drivers_and_status.csv"
 
-print(df.columns)
-print(df["driver_info"].head())
 
 def parse_driver_info(cell):
     """
@@ -54,18 +79,47 @@ def parse_driver_info(cell):
         index=["status", "car_number", "driver_name", "driver_code", "team_name"]
     )
 
-parsed = df["driver_info"].apply(parse_driver_info)
 
-# neue Spalten anhängen
-df = pd.concat([df.drop(columns=["car_number", "driver_name", "driver_code", "team_name"], errors="ignore"),
-                parsed],
-               axis=1)
+def clean_drivers(df: pd.DataFrame) -> pd.DataFrame:
+    parsed = df["driver_info"].apply(parse_driver_info)
+
+    # neue Spalten anhängen
+    return pd.concat(
+        [df.drop(columns=["car_number", "driver_name", "driver_code", "team_name"], errors="ignore"),
+         parsed],
+        axis=1,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="driver_info der F3-Rohdaten zerlegen.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="nur geänderte Rennen neu parsen (Fingerprints in data/f3/cache/)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    # 1. Rohdaten einlesen, exakte Duplikate verwerfen, Änderungen erkennen
+    raw = pd.read_csv(INPUT)
+    df, fingerprints, changes = refresh(raw)
+    races = changed_races(changes)
+    print(f"{len(raw) - len(df)} exakte Duplikate entfernt, {len(races)} Rennen geändert")
+    df, in_report = enforce(df, "f3_raw_results")
+
+    if args.incremental and OUTPUT.exists():
+        df = update_races(df, read_output(OUTPUT), races, clean_drivers)
+    else:
+        df = clean_drivers(df)
+
+    # Stichprobe
+    print(df[["driver_info", "status", "car_number", "driver_name", "driver_code", "team_name"]].head(20))
 
-# Stichprobe
-print(df[["driver_info", "status", "car_number", "driver_name", "driver_code", "team_name"]].head(20))
+    # Problemzeilen (ohne Fahrercode / Startnummer) -> Quarantäne
+    df, out_report = enforce(df, "f3_with_drivers_and_status")
+    df.to_csv(OUTPUT, index=False)
+    record(fingerprints, races)
+    report_overhead([in_report, out_report], time.perf_counter() - start, "driver_cleaning")
 
-problem_rows = df[df["driver_code"].isna() | df["car_number"].isna()]
-print("Problemzeilen:", len(problem_rows))
-print(problem_rows["driver_info"].head(30))
 
-df.to_csv("f3_2019_2025_with_drivers_and_status.csv", index=False)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Clustering der Fahrer-Statistiken.
+
+- Fahrer-Features werden aus dem Aggregat-Würfel aufgerollt (starts = alle
+  Rennen, Abstand zum Sieger nur über Finisher). Das ist nicht dieselbe
+  Definition wie in der bestehenden driver_clusters_stats.csv, deshalb geht
+  das Ergebnis in eine eigene Datei (driver_clusters_fit.csv)
+- Die standardisierte Feature-Matrix wird gecacht (npz, Schlüssel = Hash der
+  Statistiken), es bleiben nur die CACHE_KEEP zuletzt benutzten Einträge
+- Ab MINIBATCH_THRESHOLD Zeilen wird MiniBatchKMeans statt KMeans verwendet
+- k wird parallel (joblib) mit Silhouette und Inertia bewertet
+- Zentren + Scaler werden gespeichert, neue Fahrer werden ohne Refit zugeordnet
+
+Aufruf vom Projektroot:
+    python -m src.f3.driver_clustering
+    python -m src.f3.driver_clustering --benchmark 1000000
+"""
+
+import argparse
+import hashlib
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+
+from src.f3.aggregate_cube import load_cube, rollup
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_DIR = BASE_DIR / "data" / "f3"
+CACHE_DIR = DATA_DIR / "cache"
+
+STATS_OUTPUT = DATA_DIR / "driver_clusters_fit.csv"
+MODEL_PATH = DATA_DIR / "driver_clusters_model.npz"
+SWEEP_OUTPUT = DATA_DIR / "driver_clusters_k_sweep.csv"
+
+FEATURES = [
+    "starts",
+    "avg_position",
+    "std_position",
+    "avg_best_lap",
+    "avg_gap_to_winner",
+    "dnf_rate",
+]
+
+MIN_STARTS = 5
+MINIBATCH_THRESHOLD = 50_000
+SILHOUETTE_SAMPLE = 10_000
+K_RANGE = range(2, 9)
+# Anzahl gecachter Matrizen, ältere werden gelöscht
+CACHE_KEEP = 8
+
+
+# ---------------------------------------------------------
+# 1. Fahrer-Features
+# ---------------------------------------------------------
+
+def build_driver_stats(cube: pd.DataFrame, by=("driver_name",)) -> pd.DataFrame:
+    """
+    Fahrer-Statistiken wie in driver_clusters_stats.csv, aufgerollt aus dem
+    Würfel. by=("season", "driver_name") liefert Fahrer-Saisons.
+    """
+    rolled = rollup(cube, list(by))
+    stats = pd.DataFrame({
+        **{col: rolled[col] for col in by},
+        "starts": rolled["rows"],
+        "avg_position": rolled["position_mean"],
+        "std_position": rolled["position_std"],
+        "avg_best_lap": rolled["best_lap_s_mean"],
+        "avg_gap_to_winner": rolled["time_from_winner_s_mean"],
+        "dnf_rate": rolled["dnfs"] / rolled["rows"],
+    })
+    return stats
+
+
+def _clean_stats(stats: pd.DataFrame) -> pd.DataFrame:
+    return stats[stats["starts"] >= MIN_STARTS].dropna(subset=FEATURES).reset_index(drop=True)
+
+
+# ---------------------------------------------------------
+# 2. Gecachte standardisierte Matrix
+# ---------------------------------------------------------
+
+def _stats_key(stats: pd.DataFrame) -> str:
+    hashed = pd.util.hash_pandas_object(stats[FEATURES], index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()[:16]
+
+
+def standardised_matrix(stats: pd.DataFrame, cache_dir=CACHE_DIR):
+    """
+    Gibt (X, mean, scale) zurück. X ist float32 und z-standardisiert.
+    Gleiche Statistiken werden aus dem Cache geladen statt neu skaliert.
+    """
+    cache_dir = Path(cache_dir)
+    cache_path = cache_dir / f"driver_features_{_stats_key(stats)}.npz"
+    if cache_path.exists():
+        cache_path.touch()
+        with np.load(cache_path) as cached:
+            return cached["X"], cached["mean"], cached["scale"]
+
+    values = stats[FEATURES].to_numpy(dtype=np.float64)
+    mean = values.mean(axis=0)
+    scale = values.std(axis=0)
+    scale[scale == 0] = 1.0
+    X = ((values - mean) / scale).astype(np.float32)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    np.savez(cache_path, X=X, mean=mean, scale=scale)
+    _evict_cache(cache_dir)
+    return X, mean, scale
+
+
+def _evict_cache(cache_dir: Path, keep: int = CACHE_KEEP):
+    """Löscht alle bis auf die keep zuletzt benutzten Matrizen."""
+    entries = sorted(cache_dir.glob("driver_features_*.npz"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in entries[keep:]:
+        old.unlink(missing_ok=True)
+
+
+# ---------------------------------------------------------
+# 3. k-Sweep
+# ---------------------------------------------------------
+
+def make_kmeans(k: int, n_rows: int, random_state: int = 42):
+    if n_rows > MINIBATCH_THRESHOLD:
+        return MiniBatchKMeans(n_clusters=k, batch_size=4096, n_init=3, random_state=random_state)
+    return KMeans(n_clusters=k, n_init=10, random_state=random_state)
+
+
+def _score_k(X: np.ndarray, k: int, random_state: int = 42) -> dict:
+    start = time.perf_counter()
+    model = make_kmeans(k, len(X), random_state).fit(X)
+    fit_s = time.perf_counter() - start
+
+    labels = model.labels_
+    sample = SILHOUETTE_SAMPLE if len(X) > SILHOUETTE_SAMPLE else None
+    silhouette = silhouette_score(X, labels, sample_size=sample, random_state=random_state)
+    return {
+        "k": k,
+        "silhouette": float(silhouette),
+        "inertia": float(model.inertia_),
+        "fit_s": fit_s,
+        "centroids": model.cluster_centers_,
+    }
+
+
+def sweep_k(X: np.ndarray, k_range=K_RANGE, n_jobs: int = -1) -> list:
+    """
+    Bewertet alle k parallel. Grosse Matrizen werden von joblib per
+    Memmap an die Worker übergeben statt kopiert.
+    """
+    return Parallel(n_jobs=n_jobs)(delayed(_score_k)(X, k) for k in k_range)
+
+
+# ---------------------------------------------------------
+# 4. Modell speichern und neue Fahrer zuordnen
+# ---------------------------------------------------------
+
+def save_model(result: dict, mean, scale, path=MODEL_PATH) -> Path:
+    np.savez(
+        path,
+        centroids=result["centroids"],
+        mean=mean,
+        scale=scale,
+        features=np.array(FEATURES),
+        k=result["k"],
+    )
+    return Path(path)
+
+
+def load_model(path=MODEL_PATH) -> dict:
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def assign_clusters(stats: pd.DataFrame, model: dict, chunk_size: int = 200_000) -> np.ndarray:
+    """
+    Ordnet Fahrer dem nächsten gespeicherten Zentrum zu (ohne Refit).
+    Arbeitet in Blöcken, damit die Distanzmatrix klein bleibt.
+    """
+    features = [str(f) for f in model["features"]]
+    values = stats[features].to_numpy(dtype=np.float64)
+    centroids = model["centroids"].astype(np.float64)
+    labels = np.empty(len(values), dtype=np.int32)
+
+    for start in range(0, len(values), chunk_size):
+        block = (values[start:start + chunk_size] - model["mean"]) / model["scale"]
+        dist = (
+            (block ** 2).sum(axis=1)[:, None]
+            - 2.0 * block @ centroids.T
+            + (centroids ** 2).sum(axis=1)[None, :]
+        )
+        labels[start:start + chunk_size] = dist.argmin(axis=1)
+    return labels
+
+
+def fit_driver_clusters(stats: pd.DataFrame, k_range=K_RANGE, n_jobs: int = -1, cache_dir=CACHE_DIR):
+    """
+    Kompletter Ablauf: Matrix (gecacht), k-Sweep, bestes k nach Silhouette.
+    Gibt (stats mit cluster-Spalte, Sweep-Tabelle, Modell-dict) zurück.
+    """
+    stats = _clean_stats(stats)
+    X, mean, scale = standardised_matrix(stats, cache_dir)
+
+    results = sweep_k(X, k_range, n_jobs)
+    best = max(results, key=lambda r: r["silhouette"])
+    sweep = pd.DataFrame([{k: v for k, v in r.items() if k != "centroids"} for r in results])
+
+    model = {
+        "centroids": best["centroids"],
+        "mean": mean,
+        "scale": scale,
+        "features": np.array(FEATURES),
+        "k": best["k"],
+    }
+    stats = stats.copy()
+    stats["cluster"] = assign_clusters(stats, model)
+    return stats, sweep, model
+
+
+def main_fit(n_jobs: int = -1):
+    cube = load_cube()
+    stats, sweep, model = fit_driver_clusters(build_driver_stats(cube), n_jobs=n_jobs)
+
+    print("k-Sweep:")
+    print(sweep.to_string(index=False))
+    print(f"\nBestes k nach Silhouette: {model['k']}")
+
+    stats.to_csv(STATS_OUTPUT, index=False)
+    sweep.to_csv(SWEEP_OUTPUT, index=False)
+    save_model(model, model["mean"], model["scale"])
+    print(f"Cluster gespeichert unter: {STATS_OUTPUT}")
+    print(f"Modell gespeichert unter: {MODEL_PATH}")
+
+
+# ---------------------------------------------------------
+# 5. Benchmark auf synthetischen Fahrer-Saisons
+# ---------------------------------------------------------
+
+def synthetic_driver_seasons(n_rows: int, n_groups: int = 4, seed: int = 0) -> pd.DataFrame:
+    """Synthetische Fahrer-Saisons aus einer Mischung von n_groups Leistungsklassen."""
+    rng = np.random.default_rng(seed)
+    group = rng.integers(0, n_groups, n_rows)
+    level = group / max(n_groups - 1, 1)
+    return pd.DataFrame({
+        "driver_name": np.char.add("D", np.arange(n_rows).astype(str)),
+        "starts": rng.integers(MIN_STARTS, 21, n_rows),
+        "avg_position": 5 + 18 * level + rng.normal(0, 2.0, n_rows),
+        "std_position": 4 + 2 * level + rng.normal(0, 0.8, n_rows),
+        "avg_best_lap": 95 + 1.5 * level + rng.normal(0, 0.4, n_rows),
+        "avg_gap_to_winner": 10 + 40 * level + rng.normal(0, 6.0, n_rows),
+        "dnf_rate": np.clip(0.05 + 0.1 * level + rng.normal(0, 0.03, n_rows), 0, 1),
+    })
+
+
+def benchmark(n_rows: int = 1_000_000, n_jobs: int = -1, cache_dir=None):
+    import tempfile
+
+    stats = synthetic_driver_seasons(n_rows)
+    cache_dir = Path(cache_dir or tempfile.mkdtemp(prefix="f3_cluster_cache_"))
+
+    t0 = time.perf_counter()
+    stats = _clean_stats(stats)
+    X, mean, scale = standardised_matrix(stats, cache_dir)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    standardised_matrix(stats, cache_dir)
+    t_cached = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    results = sweep_k(X, K_RANGE, n_jobs)
+    t_sweep = time.perf_counter() - t0
+    best = max(results, key=lambda r: r["silhouette"])
+
+    model = {"centroids": best["centroids"], "mean": mean, "scale": scale,
+             "features": np.array(FEATURES), "k": best["k"]}
+    new_drivers = synthetic_driver_seasons(100_000, seed=1)
+    t0 = time.perf_counter()
+    assign_clusters(new_drivers, model)
+    t_assign = time.perf_counter() - t0
+
+    print(f"Benchmark mit {len(stats):,} Fahrer-Saisons "
+          f"({'MiniBatchKMeans' if len(stats) > MINIBATCH_THRESHOLD else 'KMeans'})")
+    print(f"  Matrix bauen + cachen:   {t_build:.2f} s")
+    print(f"  Matrix aus Cache:        {t_cached:.2f} s")
+    print(f"  k-Sweep {K_RANGE.start}..{K_RANGE.stop - 1}:            {t_sweep:.2f} s")
+    print(f"  Bestes k:                {best['k']}")
+    print(f"  Zuordnung 100k neue:     {t_assign * 1000:.1f} ms")
+    print(pd.DataFrame([{k: v for k, v in r.items() if k != "centroids"} for r in results])
+          .to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="F3 Fahrer-Clustering mit k-Sweep.")
+    parser.add_argument("--jobs", type=int, default=-1, help="Anzahl paralleler Worker")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Benchmark mit N synthetischen Fahrer-Saisons")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.jobs)
+    else:
+        main_fit(args.jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,213 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
+import matplotlib
+
+# Headless Backend: Plots werden nur gespeichert, nie angezeigt
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
+from src.f3 import aggregate_cube
+from src.f3.aggregate_cube import HIST_COLS, boxplot_stats, load_cube, rollup
+from src.f3 import driver_clustering
 
-# ---------------------------------------------------------
-# 1. Daten laden
-# ---------------------------------------------------------
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+INPUT = BASE_DIR / "data" / "f3" / "f3_2019_2025_races_features.csv"
+OUTPUT_DIR = BASE_DIR / "images" / "f3"
+
+# Merkt sich pro PNG den Fingerprint (Input + Code), mit dem es erzeugt wurde
+MANIFEST_NAME = ".plot_manifest.json"
+# Manifest-Präfix für Jobs, die bewusst nichts gezeichnet haben
+SKIPPED = "skipped:"
+
+
+# =========================================================
+# PLOT REGISTRY
+# =========================================================
+
+# Dateiname -> (Plot-Funktion, Keyword-Argumente)
+PLOT_JOBS = {}
+
+
+def plot_job(filename, **kwargs):
+    """
+    Registriert eine Plot-Funktion als Job.
+    Die Funktion bekommt den vorberechneten Input (dict) und zeichnet
+    in eine neue Figure. Speichern und Schliessen übernimmt der Runner.
+    Gibt die Funktion False zurück, wird der Plot übersprungen.
+    """
+    def decorator(func):
+        PLOT_JOBS[filename] = (func, kwargs)
+        return func
+    return decorator
+
+
+# =========================================================
+# 1. Daten laden und gemeinsamen Input vorberechnen
+# =========================================================
+
+def load_data(path=INPUT):
+    df = pd.read_csv(path)
+
+    print("Daten erfolgreich geladen.")
+    print("Zeilen:", len(df))
+    print("Spalten:", df.columns.tolist(), "\n")
+    return df
+
+
+def prepare_inputs(df, cube):
+    """
+    Berechnet alle Aggregationen, die die Plots brauchen, genau einmal.
+    Aggregat-Plots werden aus dem Saison × Team × Fahrer Würfel aufgerollt,
+    nur Heatmap, Korrelation, Scatter und Histogramme brauchen Zeilendaten.
+    Jeder Plot-Job liest danach nur noch aus diesem dict.
+    """
+    inputs = {}
+
+    # Alle Positionen 1 bis 30 aus dem Positions-Histogramm
+    inputs["position_counts"] = pd.Series(
+        cube[HIST_COLS[:30]].sum().to_numpy(), index=range(1, 31)
+    )
+
+    # Fahrerstatistiken (Finisher-Kennzahlen und alle Zeilen in einem Rollup)
+    by_driver = rollup(cube, "driver_name")
+    driver_stats = by_driver.rename(columns={
+        "finishers": "starts",
+        "position_mean": "avg_position",
+        "time_from_winner_s_mean": "avg_time_gap_s",
+    })[["driver_name", "starts", "wins", "podiums", "top10",
+        "avg_position", "position_std", "avg_time_gap_s"]]
+    driver_stats["top10_rate"] = driver_stats["top10"] / driver_stats["starts"]
+
+    min_starts = 5
+    driver_stats_filtered = (
+        driver_stats[driver_stats["starts"] >= min_starts]
+        .sort_values("avg_position")
+    )
+    inputs["driver_stats_filtered"] = driver_stats_filtered
+    inputs["min_starts"] = min_starts
+
+    print("\nFahrerstatistiken, Top 10 nach Durchschnittsposition:")
+    print(driver_stats_filtered.drop(columns="position_std").head(10))
+
+    inputs["driver_consistency"] = (
+        driver_stats[["driver_name", "position_std"]]
+        .dropna()
+        .sort_values("position_std")
+    )
 
-df = pd.read_csv("f3_2019_2025_races_features.csv")
+    inputs["driver_perf"] = (
+        by_driver[["driver_name", "avg_lap_time_s_mean"]]
+        .rename(columns={"avg_lap_time_s_mean": "avg_lap_time_s"})
+        .dropna()
+        .sort_values("avg_lap_time_s")
+        .head(20)
+    )
+    inputs["driver_pace_filtered"] = (
+        by_driver.loc[by_driver["rows"] >= 5, ["driver_name", "rows", "driver_vs_team_mean"]]
+        .rename(columns={"rows": "starts"})
+        .dropna()
+        .sort_values("driver_vs_team_mean")
+    )
 
-print("Daten erfolgreich geladen.")
-print("Zeilen:", len(df))
-print("Spalten:", df.columns.tolist(), "\n")
+    # Team Performance gesamt und pro Saison
+    by_team = rollup(cube, "team_name")
+    inputs["team_perf"] = (
+        by_team[["team_name", "position_mean"]]
+        .rename(columns={"position_mean": "position"})
+        .dropna()
+        .sort_values("position")
+    )
+    inputs["team_year_perf"] = (
+        rollup(cube, ["season", "team_name"])
+        .pivot(index="season", columns="team_name", values="position_mean")
+    )
+
+    # Entwicklung der Fahrer mit den meisten Saisons
+    driver_year_perf = (
+        rollup(cube, ["season", "driver_name"])
+        .pivot(index="season", columns="driver_name", values="position_mean")
+    )
+    top_drivers = driver_year_perf.notna().sum().sort_values(ascending=False).head(10).index
+    inputs["driver_year_perf"] = driver_year_perf[top_drivers]
+
+    # DNF Analyse nach Team
+    team_dnf = by_team[["team_name", "rows", "dnfs"]].rename(columns={"rows": "starts"})
+    team_dnf["dnf_rate"] = team_dnf["dnfs"] / team_dnf["starts"]
+    inputs["team_dnf_filtered"] = (
+        team_dnf[team_dnf["starts"] >= 10]
+        .sort_values("dnf_rate", ascending=False)
+    )
+
+    # Positionsverteilung pro Team (nur Teams mit mindestens 15 Zielankünften)
+    valid_teams = by_team[by_team["finishers"] >= 15].sort_values("finishers", ascending=False)
+    inputs["team_box_stats"] = boxplot_stats(valid_teams, "team_name")
+
+    # Fahrer-Cluster aus dem gespeicherten Modell zuordnen (kein Refit)
+    if driver_clustering.MODEL_PATH.exists():
+        model = driver_clustering.load_model()
+        stats = driver_clustering._clean_stats(driver_clustering.build_driver_stats(cube))
+        z = (stats[driver_clustering.FEATURES].to_numpy() - model["mean"]) / model["scale"]
+        # 2D-Projektion über die ersten beiden Hauptkomponenten
+        _, _, vt = np.linalg.svd(z - z.mean(axis=0), full_matrices=False)
+        inputs["driver_clusters"] = pd.DataFrame({
+            "pc1": z @ vt[0],
+            "pc2": z @ vt[1],
+            "cluster": driver_clustering.assign_clusters(stats, model),
+        })
+    else:
+        inputs["driver_clusters"] = None
+
+    # Finisher-Zeilen nur noch für Heatmap
+    finished = df[df["finished"] == 1]
+
+    # Heatmap der neuesten Saison
+    latest_season = df["season"].max()
+    df_latest = finished[finished["season"] == latest_season]
+    top_drivers_season = df_latest["driver_name"].value_counts().head(15).index
+    inputs["latest_season"] = latest_season
+    inputs["heat_pivot"] = (
+        df_latest[df_latest["driver_name"].isin(top_drivers_season)]
+        .pivot_table(index="driver_name", columns="race_id", values="position", aggfunc="min")
+    )
+
+    # Korrelationsmatrix wichtiger numerischer Features
+    numeric_cols = [
+        "position",
+        "time_s",
+        "best_lap_s",
+        "avg_lap_time_s",
+        "time_from_winner_s",
+        "laps_clean",
+        "race_max_laps",
+        "rel_laps",
+        "driver_vs_team",
+    ]
+    available_numeric = [c for c in numeric_cols if c in df.columns]
+    inputs["corr"] = df[available_numeric].corr()
+
+    # Rohwerte für Scatterplots und Histogramme
+    inputs["best_lap_vs_position"] = df[["best_lap_s", "position"]].dropna()
+    if "rel_laps" in df.columns:
+        inputs["rel_laps_vs_gap"] = df[["rel_laps", "time_from_winner_s"]].dropna()
+    else:
+        inputs["rel_laps_vs_gap"] = None
+    inputs["hist"] = {
+        col: df[col].dropna().to_numpy()
+        for col in ["position", "time_s", "best_lap_s", "avg_lap_time_s", "time_from_winner_s"]
+        if col in df.columns
+    }
+
+    return inputs
 
 
 # =========================================================
@@ -25,28 +218,15 @@ print("Spalten:", df.columns.tolist(), "\n")
 # 2. Plot 1: Verteilung der Rennpositionen
 # ---------------------------------------------------------
 
-# Position in numerisch umwandeln
-pos = pd.to_numeric(df["position"], errors="coerce")
-
-# NaN entfernen, auf ganze Zahlen casten und alle Positionen 1 bis 30 anzeigen
-position_counts = (
-    pos.dropna()
-       .astype(int)
-       .value_counts()
-       .reindex(range(1, 31), fill_value=0)
-)
-
-plt.figure(figsize=(12, 6))
-position_counts.plot(kind="bar")
+@plot_job("plot_positions_distribution_bar.png")
+def plot_positions_distribution(inputs):
+    plt.figure(figsize=(12, 6))
+    inputs["position_counts"].plot(kind="bar")
 
-plt.title("Verteilung der Rennpositionen")
-plt.xlabel("Position")
-plt.ylabel("Anzahl")
-plt.grid(axis="y")
-plt.tight_layout()
-
-plt.savefig("plot_positions_distribution_bar.png", dpi=150)
-plt.show()
+    plt.title("Verteilung der Rennpositionen")
+    plt.xlabel("Position")
+    plt.ylabel("Anzahl")
+    plt.grid(axis="y")
 
 
 # ---------------------------------------------------------
@@ -54,51 +234,32 @@ plt.show()
 #    Nur Finisher berücksichtigen
 # ---------------------------------------------------------
 
-team_perf = (
-    df[df["finished"] == 1]
-    .groupby("team_name")["position"]
-    .mean()
-    .sort_values()
-    .reset_index()
-)
+@plot_job("plot_team_performance.png")
+def plot_team_performance(inputs):
+    team_perf = inputs["team_perf"]
 
-plt.figure(figsize=(14, 8))
-plt.barh(team_perf["team_name"], team_perf["position"])
-plt.title("Team Performance, durchschnittliche Position pro Rennen (niedriger ist besser)")
-plt.xlabel("Durchschnittliche Position")
-plt.ylabel("Team")
-plt.gca().invert_yaxis()
-plt.tight_layout()
-plt.savefig("plot_team_performance.png", dpi=150)
-plt.show()
+    plt.figure(figsize=(14, 8))
+    plt.barh(team_perf["team_name"], team_perf["position"])
+    plt.title("Team Performance, durchschnittliche Position pro Rennen (niedriger ist besser)")
+    plt.xlabel("Durchschnittliche Position")
+    plt.ylabel("Team")
+    plt.gca().invert_yaxis()
 
 
 # ---------------------------------------------------------
 # 4. Plot 3: Schnellste Fahrer nach durchschnittlicher Rundenzeit
 # ---------------------------------------------------------
 
-driver_perf = (
-    df.groupby("driver_name")["avg_lap_time_s"]
-      .mean()
-      .sort_values()
-      .head(20)
-      .reset_index()
-)
-
-plt.figure(figsize=(14, 8))
-plt.barh(driver_perf["driver_name"], driver_perf["avg_lap_time_s"])
-plt.title("Top 20 Fahrer nach durchschnittlicher Rundenzeit (je weiter links desto schneller)")
-plt.xlabel("Durchschnittliche Rundenzeit in Sekunden")
-plt.ylabel("Fahrer")
-plt.gca().invert_yaxis()
-plt.tight_layout()
-plt.savefig("plot_best_drivers.png", dpi=150)
-plt.show()
+@plot_job("plot_best_drivers.png")
+def plot_best_drivers(inputs):
+    driver_perf = inputs["driver_perf"]
 
-print("\nBasisplots wurden erstellt und gespeichert:")
-print(" - plot_positions_distribution_bar.png")
-print(" - plot_team_performance.png")
-print(" - plot_best_drivers.png")
+    plt.figure(figsize=(14, 8))
+    plt.barh(driver_perf["driver_name"], driver_perf["avg_lap_time_s"])
+    plt.title("Top 20 Fahrer nach durchschnittlicher Rundenzeit (je weiter links desto schneller)")
+    plt.xlabel("Durchschnittliche Rundenzeit in Sekunden")
+    plt.ylabel("Fahrer")
+    plt.gca().invert_yaxis()
 
 
 # =========================================================
@@ -109,129 +270,75 @@ print(" - plot_best_drivers.png")
 # 5. Plot 4: Fahrer, die über alle Rennen am konstant besten abschneiden
 # ---------------------------------------------------------
 
-# Nur Finisher
-finished = df[df["finished"] == 1].copy()
-
-driver_stats = (
-    finished
-    .groupby("driver_name")
-    .agg(
-        starts=("race_id", "count"),
-        wins=("position", lambda s: (s == 1).sum()),
-        podiums=("position", lambda s: (s <= 3).sum()),
-        top10=("position", lambda s: (s <= 10).sum()),
-        avg_position=("position", "mean"),
-        avg_time_gap_s=("time_from_winner_s", "mean"),
-    )
-    .reset_index()
-)
-
-driver_stats["top10_rate"] = driver_stats["top10"] / driver_stats["starts"]
-
-min_starts = 5
-driver_stats_filtered = driver_stats[driver_stats["starts"] >= min_starts].copy()
-driver_stats_filtered = driver_stats_filtered.sort_values("avg_position")
-
-print("\nFahrerstatistiken, Top 10 nach Durchschnittsposition:")
-print(driver_stats_filtered.head(10))
+@plot_job("plot_driver_avg_position.png", top_n=20)
+def plot_driver_avg_position(inputs, top_n):
+    top_drivers = inputs["driver_stats_filtered"].head(top_n)
 
-top_n = 20
-top_drivers = driver_stats_filtered.head(top_n)
-
-plt.figure(figsize=(12, 8))
-plt.barh(top_drivers["driver_name"], top_drivers["avg_position"])
-plt.gca().invert_yaxis()
-plt.xlabel("Durchschnittliche Position (niedriger ist besser)")
-plt.ylabel("Fahrer")
-plt.title(f"Top {top_n} Fahrer nach Durchschnittsposition bei mindestens {min_starts} Starts")
-plt.tight_layout()
-plt.savefig("plot_driver_avg_position.png", dpi=150)
-plt.close()
-
-print("Plot gespeichert als: plot_driver_avg_position.png")
+    plt.figure(figsize=(12, 8))
+    plt.barh(top_drivers["driver_name"], top_drivers["avg_position"])
+    plt.gca().invert_yaxis()
+    plt.xlabel("Durchschnittliche Position (niedriger ist besser)")
+    plt.ylabel("Fahrer")
+    plt.title(f"Top {top_n} Fahrer nach Durchschnittsposition bei mindestens {inputs['min_starts']} Starts")
 
 
 # ---------------------------------------------------------
 # 6. Plot 5: Team Performance im Zeitverlauf
 # ---------------------------------------------------------
 
-team_year_perf = (
-    df[df["finished"] == 1]
-    .groupby(["season", "team_name"])["position"]
-    .mean()
-    .reset_index()
-)
+@plot_job("plot_team_performance_over_time.png")
+def plot_team_performance_over_time(inputs):
+    team_year_perf = inputs["team_year_perf"]
 
-plt.figure(figsize=(14, 8))
+    plt.figure(figsize=(14, 8))
 
-for team in team_year_perf["team_name"].unique():
-    subset = team_year_perf[team_year_perf["team_name"] == team]
-    plt.plot(subset["season"], subset["position"], marker="o", alpha=0.7, label=team)
+    # Eine Linie pro Team-Spalte, Saisons ohne Wert werden ausgelassen
+    for team in team_year_perf.columns:
+        subset = team_year_perf[team].dropna()
+        plt.plot(subset.index, subset.values, marker="o", alpha=0.7, label=team)
 
-plt.gca().invert_yaxis()
-plt.title("Team Performance im Zeitverlauf, durchschnittliche Position (niedriger ist besser)")
-plt.xlabel("Saison")
-plt.ylabel("Durchschnittliche Position")
-plt.legend(bbox_to_anchor=(1.05, 1), loc="upper left")
-plt.tight_layout()
-plt.savefig("plot_team_performance_over_time.png", dpi=150)
-plt.show()
+    plt.gca().invert_yaxis()
+    plt.title("Team Performance im Zeitverlauf, durchschnittliche Position (niedriger ist besser)")
+    plt.xlabel("Saison")
+    plt.ylabel("Durchschnittliche Position")
+    plt.legend(bbox_to_anchor=(1.05, 1), loc="upper left")
 
 
 # ---------------------------------------------------------
 # 7. Plot 6: Entwicklung der Fahrer über die Saisons
 # ---------------------------------------------------------
 
-driver_year_perf = (
-    df[df["finished"] == 1]
-    .groupby(["season", "driver_name"])["position"]
-    .mean()
-    .reset_index()
-)
-
-top_drivers = driver_year_perf["driver_name"].value_counts().head(10).index
+@plot_job("plot_driver_development.png")
+def plot_driver_development(inputs):
+    driver_year_perf = inputs["driver_year_perf"]
 
-plt.figure(figsize=(14, 8))
+    plt.figure(figsize=(14, 8))
 
-for driver in top_drivers:
-    subset = driver_year_perf[driver_year_perf["driver_name"] == driver]
-    plt.plot(subset["season"], subset["position"], marker="o", label=driver)
+    for driver in driver_year_perf.columns:
+        subset = driver_year_perf[driver].dropna()
+        plt.plot(subset.index, subset.values, marker="o", label=driver)
 
-plt.gca().invert_yaxis()
-plt.title("Entwicklung der Top Fahrer über die Saisons")
-plt.xlabel("Saison")
-plt.ylabel("Durchschnittliche Position")
-plt.legend(bbox_to_anchor=(1.05, 1), loc="upper left")
-plt.tight_layout()
-plt.savefig("plot_driver_development.png", dpi=150)
-plt.show()
+    plt.gca().invert_yaxis()
+    plt.title("Entwicklung der Top Fahrer über die Saisons")
+    plt.xlabel("Saison")
+    plt.ylabel("Durchschnittliche Position")
+    plt.legend(bbox_to_anchor=(1.05, 1), loc="upper left")
 
 
 # ---------------------------------------------------------
 # 8. Plot 7: Konsistenz der Fahrer (Varianz der Position)
 # ---------------------------------------------------------
 
-driver_consistency = (
-    df[df["finished"] == 1]
-    .groupby("driver_name")["position"]
-    .std()
-    .reset_index()
-    .rename(columns={"position": "position_std"})
-    .dropna()
-    .sort_values("position_std")
-)
+@plot_job("plot_driver_consistency.png")
+def plot_driver_consistency(inputs):
+    top_consistent = inputs["driver_consistency"].head(20)
 
-top_consistent = driver_consistency.head(20)
-
-plt.figure(figsize=(14, 8))
-plt.barh(top_consistent["driver_name"], top_consistent["position_std"])
-plt.gca().invert_yaxis()
-plt.title("Top 20 konstanteste Fahrer (niedrige Standardabweichung ist stabil)")
-plt.xlabel("Standardabweichung der Position")
-plt.ylabel("Fahrer")
-plt.tight_layout()
-plt.savefig("plot_driver_consistency.png", dpi=150)
-plt.show()
+    plt.figure(figsize=(14, 8))
+    plt.barh(top_consistent["driver_name"], top_consistent["position_std"])
+    plt.gca().invert_yaxis()
+    plt.title("Top 20 konstanteste Fahrer (niedrige Standardabweichung ist stabil)")
+    plt.xlabel("Standardabweichung der Position")
+    plt.ylabel("Fahrer")
 
 
 # =========================================================
@@ -242,56 +349,29 @@ plt.show()
 # 9. Plot 8: DNF Analyse nach Team
 # ---------------------------------------------------------
 
-df_status = df.copy()
-
-team_dnf = (
-    df_status.groupby("team_name")
-    .agg(
-        starts=("race_id", "count"),
-        dnfs=("is_dnf", "sum"),
-        dns=("is_dns", "sum"),
-        dsq=("is_dsq", "sum"),
-    )
-    .reset_index()
-)
-
-team_dnf["dnf_rate"] = team_dnf["dnfs"] / team_dnf["starts"]
-
-team_dnf_filtered = team_dnf[team_dnf["starts"] >= 10].sort_values("dnf_rate", ascending=False)
+@plot_job("plot_team_dnf_rate.png")
+def plot_team_dnf_rate(inputs):
+    team_dnf_filtered = inputs["team_dnf_filtered"]
 
-plt.figure(figsize=(14, 8))
-plt.barh(team_dnf_filtered["team_name"], team_dnf_filtered["dnf_rate"])
-plt.title("DNF Rate pro Team, nur Teams mit mindestens 10 Starts")
-plt.xlabel("DNF Rate")
-plt.ylabel("Team")
-plt.tight_layout()
-plt.savefig("plot_team_dnf_rate.png", dpi=150)
-plt.show()
+    plt.figure(figsize=(14, 8))
+    plt.barh(team_dnf_filtered["team_name"], team_dnf_filtered["dnf_rate"])
+    plt.title("DNF Rate pro Team, nur Teams mit mindestens 10 Starts")
+    plt.xlabel("DNF Rate")
+    plt.ylabel("Team")
 
 
 # ---------------------------------------------------------
 # 10. Plot 9: Boxplot der Positionsverteilung pro Team
 # ---------------------------------------------------------
 
-df_finished = df[df["finished"] == 1].copy()
-
-team_counts = df_finished["team_name"].value_counts()
-valid_teams = team_counts[team_counts >= 15].index
-
-df_box = df_finished[df_finished["team_name"].isin(valid_teams)]
-
-plt.figure(figsize=(14, 8))
-
-positions_by_team = [df_box[df_box["team_name"] == t]["position"] for t in valid_teams]
-
-plt.boxplot(positions_by_team, labels=valid_teams, vert=False)
-plt.gca().invert_xaxis()
-plt.title("Positionsverteilung pro Team, nur beendete Rennen")
-plt.xlabel("Position (niedriger ist besser)")
-plt.ylabel("Team")
-plt.tight_layout()
-plt.savefig("plot_team_position_boxplot.png", dpi=150)
-plt.show()
+@plot_job("plot_team_position_boxplot.png")
+def plot_team_position_boxplot(inputs):
+    plt.figure(figsize=(14, 8))
+    plt.gca().bxp(inputs["team_box_stats"], vert=False)
+    plt.gca().invert_xaxis()
+    plt.title("Positionsverteilung pro Team, nur beendete Rennen")
+    plt.xlabel("Position (niedriger ist besser)")
+    plt.ylabel("Team")
 
 
 # =========================================================
@@ -302,200 +382,300 @@ plt.show()
 # 11. Plot 10: Heatmap der Rennpositionen in der neuesten Saison
 # ---------------------------------------------------------
 
-latest_season = df["season"].max()
-df_latest = df[(df["season"] == latest_season) & (df["finished"] == 1)].copy()
-
-top_drivers_season = (
-    df_latest["driver_name"]
-    .value_counts()
-    .head(15)
-    .index
-)
-
-df_heat = df_latest[df_latest["driver_name"].isin(top_drivers_season)]
-
-pivot = df_heat.pivot_table(
-    index="driver_name",
-    columns="race_id",
-    values="position",
-    aggfunc="min",
-)
-
-plt.figure(figsize=(12, 8))
-im = plt.imshow(pivot.values, aspect="auto", cmap="viridis_r")
-
-plt.colorbar(im, label="Position")
-plt.xticks(
-    ticks=range(len(pivot.columns)),
-    labels=pivot.columns,
-    rotation=45,
-    ha="right"
-)
-plt.yticks(
-    ticks=range(len(pivot.index)),
-    labels=pivot.index
-)
-plt.title(f"Heatmap der Rennpositionen in Saison {latest_season}")
-plt.xlabel("Race ID")
-plt.ylabel("Fahrer")
-plt.tight_layout()
-plt.savefig("plot_heatmap_positions_latest_season.png", dpi=150)
-plt.show()
+@plot_job("plot_heatmap_positions_latest_season.png")
+def plot_heatmap_latest_season(inputs):
+    pivot = inputs["heat_pivot"]
+
+    plt.figure(figsize=(12, 8))
+    im = plt.imshow(pivot.values, aspect="auto", cmap="viridis_r")
+
+    plt.colorbar(im, label="Position")
+    plt.xticks(
+        ticks=range(len(pivot.columns)),
+        labels=pivot.columns,
+        rotation=45,
+        ha="right"
+    )
+    plt.yticks(
+        ticks=range(len(pivot.index)),
+        labels=pivot.index
+    )
+    plt.title(f"Heatmap der Rennpositionen in Saison {inputs['latest_season']}")
+    plt.xlabel("Race ID")
+    plt.ylabel("Fahrer")
 
 
 # ---------------------------------------------------------
 # 12. Plot 11: Fahrer vs Team Pace
 # ---------------------------------------------------------
 
-driver_pace = (
-    df.groupby("driver_name")
-    .agg(
-        starts=("race_id", "count"),
-        driver_vs_team_mean=("driver_vs_team", "mean"),
-    )
-    .reset_index()
-)
-
-driver_pace_filtered = driver_pace[driver_pace["starts"] >= 5].dropna()
-
-best_drivers_vs_team = driver_pace_filtered.sort_values("driver_vs_team_mean").head(10)
-worst_drivers_vs_team = driver_pace_filtered.sort_values("driver_vs_team_mean").tail(10)
-
-plt.figure(figsize=(12, 6))
-plt.barh(best_drivers_vs_team["driver_name"], best_drivers_vs_team["driver_vs_team_mean"])
-plt.gca().invert_yaxis()
-plt.title("Top 10 Fahrer schneller als Teamdurchschnitt, negative Werte sind besser")
-plt.xlabel("Durchschnittlicher Unterschied zur Team Pace in Sekunden")
-plt.ylabel("Fahrer")
-plt.tight_layout()
-plt.savefig("plot_driver_vs_team_best.png", dpi=150)
-plt.show()
-
-plt.figure(figsize=(12, 6))
-plt.barh(worst_drivers_vs_team["driver_name"], worst_drivers_vs_team["driver_vs_team_mean"])
-plt.gca().invert_yaxis()
-plt.title("Bottom 10 Fahrer langsamer als Teamdurchschnitt, positive Werte sind schlechter")
-plt.xlabel("Durchschnittlicher Unterschied zur Team Pace in Sekunden")
-plt.ylabel("Fahrer")
-plt.tight_layout()
-plt.savefig("plot_driver_vs_team_worst.png", dpi=150)
-plt.show()
+@plot_job("plot_driver_vs_team_best.png")
+def plot_driver_vs_team_best(inputs):
+    best_drivers_vs_team = inputs["driver_pace_filtered"].head(10)
 
+    plt.figure(figsize=(12, 6))
+    plt.barh(best_drivers_vs_team["driver_name"], best_drivers_vs_team["driver_vs_team_mean"])
+    plt.gca().invert_yaxis()
+    plt.title("Top 10 Fahrer schneller als Teamdurchschnitt, negative Werte sind besser")
+    plt.xlabel("Durchschnittlicher Unterschied zur Team Pace in Sekunden")
+    plt.ylabel("Fahrer")
 
-# =========================================================
-# E) ERWEITERTE EDA UND DISTRIBUTIONEN
-# =========================================================
 
-print("\nStarte erweiterte EDA.")
+@plot_job("plot_driver_vs_team_worst.png")
+def plot_driver_vs_team_worst(inputs):
+    worst_drivers_vs_team = inputs["driver_pace_filtered"].tail(10)
+
+    plt.figure(figsize=(12, 6))
+    plt.barh(worst_drivers_vs_team["driver_name"], worst_drivers_vs_team["driver_vs_team_mean"])
+    plt.gca().invert_yaxis()
+    plt.title("Bottom 10 Fahrer langsamer als Teamdurchschnitt, positive Werte sind schlechter")
+    plt.xlabel("Durchschnittlicher Unterschied zur Team Pace in Sekunden")
+    plt.ylabel("Fahrer")
 
-df_valid = df.copy()
 
 # ---------------------------------------------------------
-# 13. Plot 12: Korrelationsmatrix wichtiger numerischer Features
+# 12b. Plot 11b: Fahrer-Cluster (PCA-Projektion)
 # ---------------------------------------------------------
 
-numeric_cols = [
-    "position",
-    "time_s",
-    "best_lap_s",
-    "avg_lap_time_s",
-    "time_from_winner_s",
-    "laps_clean",
-    "race_max_laps",
-    "rel_laps",
-    "driver_vs_team",
-]
+@plot_job("plot_driver_clusters.png")
+def plot_driver_clusters(inputs):
+    clusters = inputs["driver_clusters"]
+    if clusters is None:
+        print("Kein Cluster-Modell gefunden (python -m src.f3.driver_clustering), Plot wird übersprungen.")
+        return False
 
-available_numeric = [c for c in numeric_cols if c in df_valid.columns]
+    plt.figure(figsize=(10, 7))
+    scatter = plt.scatter(clusters["pc1"], clusters["pc2"], c=clusters["cluster"], cmap="tab10", alpha=0.8)
+    plt.legend(*scatter.legend_elements(), title="Cluster")
+    plt.title("Fahrer-Cluster, Projektion auf die ersten beiden Hauptkomponenten")
+    plt.xlabel("PC 1")
+    plt.ylabel("PC 2")
 
-corr = df_valid[available_numeric].corr()
 
-plt.figure(figsize=(10, 8))
-im = plt.imshow(corr.values, cmap="coolwarm", vmin=-1, vmax=1)
-plt.colorbar(im, label="Korrelationskoeffizient")
+# =========================================================
+# E) ERWEITERTE EDA UND DISTRIBUTIONEN
+# =========================================================
 
-plt.xticks(
-    ticks=range(len(available_numeric)),
-    labels=available_numeric,
-    rotation=45,
-    ha="right"
-)
-plt.yticks(
-    ticks=range(len(available_numeric)),
-    labels=available_numeric
-)
+# ---------------------------------------------------------
+# 13. Plot 12: Korrelationsmatrix wichtiger numerischer Features
+# ---------------------------------------------------------
 
-plt.title("Korrelationsmatrix wichtiger numerischer Features")
-plt.tight_layout()
-plt.savefig("plot_corr_matrix.png", dpi=150)
-plt.close()
+@plot_job("plot_corr_matrix.png")
+def plot_corr_matrix(inputs):
+    corr = inputs["corr"]
+
+    plt.figure(figsize=(10, 8))
+    im = plt.imshow(corr.values, cmap="coolwarm", vmin=-1, vmax=1)
+    plt.colorbar(im, label="Korrelationskoeffizient")
+
+    plt.xticks(
+        ticks=range(len(corr.columns)),
+        labels=corr.columns,
+        rotation=45,
+        ha="right"
+    )
+    plt.yticks(
+        ticks=range(len(corr.columns)),
+        labels=corr.columns
+    )
 
-print("Plot gespeichert: plot_corr_matrix.png")
+    plt.title("Korrelationsmatrix wichtiger numerischer Features")
 
 
 # ---------------------------------------------------------
 # 14. Plot 13: Best Lap vs Position
 # ---------------------------------------------------------
 
-df_bl = df_valid[["best_lap_s", "position"]].dropna()
-
-plt.figure(figsize=(8, 6))
-plt.scatter(df_bl["best_lap_s"], df_bl["position"], alpha=0.3)
-plt.gca().invert_yaxis()
-plt.xlabel("Beste Rundenzeit in Sekunden")
-plt.ylabel("Endposition, 1 ist Sieger")
-plt.title("Zusammenhang Best Lap und Endposition")
-plt.tight_layout()
-plt.savefig("plot_bestlap_vs_position.png", dpi=150)
-plt.close()
+@plot_job("plot_bestlap_vs_position.png")
+def plot_bestlap_vs_position(inputs):
+    df_bl = inputs["best_lap_vs_position"]
 
-print("Plot gespeichert: plot_bestlap_vs_position.png")
+    plt.figure(figsize=(8, 6))
+    plt.scatter(df_bl["best_lap_s"], df_bl["position"], alpha=0.3)
+    plt.gca().invert_yaxis()
+    plt.xlabel("Beste Rundenzeit in Sekunden")
+    plt.ylabel("Endposition, 1 ist Sieger")
+    plt.title("Zusammenhang Best Lap und Endposition")
 
 
 # ---------------------------------------------------------
 # 15. Plot 14: Zeitabstand zum Sieger vs relative Rundenzahl
 # ---------------------------------------------------------
 
-if "rel_laps" in df_valid.columns:
-    df_rel = df_valid[["rel_laps", "time_from_winner_s"]].dropna()
+@plot_job("plot_rel_laps_vs_gap.png")
+def plot_rel_laps_vs_gap(inputs):
+    df_rel = inputs["rel_laps_vs_gap"]
+    if df_rel is None:
+        print("Spalte rel_laps fehlt, Plot 14 wird übersprungen.")
+        return False
 
     plt.figure(figsize=(8, 6))
     plt.scatter(df_rel["rel_laps"], df_rel["time_from_winner_s"], alpha=0.3)
     plt.xlabel("Relative Rundenzahl, 0 bis 1")
     plt.ylabel("Zeitabstand zum Sieger in Sekunden")
     plt.title("Zeitabstand zum Sieger nach gefahrenem Rundenanteil")
-    plt.tight_layout()
-    plt.savefig("plot_rel_laps_vs_gap.png", dpi=150)
-    plt.close()
-
-    print("Plot gespeichert: plot_rel_laps_vs_gap.png")
-else:
-    print("Spalte rel_laps fehlt, Plot 14 wird übersprungen.")
 
 
 # ---------------------------------------------------------
 # 16. Plot 15: Histogramme wichtiger Features
 # ---------------------------------------------------------
 
-features_hist = [
-    "position",
-    "time_s",
-    "best_lap_s",
-    "avg_lap_time_s",
-    "time_from_winner_s",
-]
-
-for col in features_hist:
-    if col in df_valid.columns:
-        plt.figure(figsize=(8, 5))
-        df_valid[col].dropna().hist(bins=40)
-        plt.title(f"Verteilung von {col}")
-        plt.xlabel(col)
-        plt.ylabel("Häufigkeit")
-        plt.tight_layout()
-        fname = f"hist_{col}.png"
-        plt.savefig(fname, dpi=150)
-        plt.close()
-        print(f"Plot gespeichert: {fname}")
+def plot_hist(inputs, col):
+    values = inputs["hist"].get(col)
+    if values is None:
+        return False
+
+    plt.figure(figsize=(8, 5))
+    plt.hist(values, bins=40)
+    plt.grid(True)
+    plt.title(f"Verteilung von {col}")
+    plt.xlabel(col)
+    plt.ylabel("Häufigkeit")
+
+
+for _col in ["position", "time_s", "best_lap_s", "avg_lap_time_s", "time_from_winner_s"]:
+    plot_job(f"hist_{_col}.png", col=_col)(plot_hist)
+
+
+# =========================================================
+# RUNNER: Fingerprints, Prozess-Pool, Manifest
+# =========================================================
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
 
-print("\nErweiterte EDA abgeschlossen.")
+
+def job_fingerprint(input_digest, filename):
+    """
+    Fingerprint eines Jobs = Input-Datei + Code der Vorberechnung
+    (inkl. Würfel und Fahrer-Clustering) + Code und Argumente der Plot-Funktion.
+    """
+    func, kwargs = PLOT_JOBS[filename]
+    h = hashlib.sha256()
+    h.update(input_digest.encode())
+    h.update(inspect.getsource(prepare_inputs).encode())
+    h.update(inspect.getsource(aggregate_cube).encode())
+    h.update(inspect.getsource(driver_clustering).encode())
+    h.update(inspect.getsource(func).encode())
+    h.update(repr(sorted(kwargs.items())).encode())
+    return h.hexdigest()
+
+
+def _load_manifest(out_dir):
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return {}
+
+
+def _save_manifest(out_dir, manifest):
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+
+# Gemeinsamer Input pro Worker-Prozess (wird einmal beim Start übergeben)
+_WORKER_INPUTS = None
+
+
+def _init_worker(inputs):
+    global _WORKER_INPUTS
+    matplotlib.use("Agg")
+    _WORKER_INPUTS = inputs
+
+
+def _render(filename, out_dir, inputs=None):
+    inputs = _WORKER_INPUTS if inputs is None else inputs
+    func, kwargs = PLOT_JOBS[filename]
+
+    start = time.perf_counter()
+    try:
+        result = func(inputs, **kwargs)
+        if result is False:
+            return filename, None
+        plt.tight_layout()
+        plt.savefig(out_dir / filename, dpi=150)
+    finally:
+        plt.close("all")
+    return filename, time.perf_counter() - start
+
+
+def render_all(input_path=INPUT, out_dir=OUTPUT_DIR, workers=None, force=False, only=None):
+    """
+    Rendert alle (oder nur die angegebenen) Plot-Jobs.
+    Jobs, deren Fingerprint sich seit dem letzten PNG nicht geändert hat,
+    werden übersprungen. Gibt die Liste der neu erzeugten Dateien zurück.
+    """
+    start = time.perf_counter()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    input_digest = _file_digest(input_path)
+    if driver_clustering.MODEL_PATH.exists():
+        input_digest += _file_digest(driver_clustering.MODEL_PATH)
+    manifest = _load_manifest(out_dir)
+
+    names = list(PLOT_JOBS) if only is None else list(only)
+    fingerprints = {name: job_fingerprint(input_digest, name) for name in names}
+    # Übersprungene Jobs stehen als "skipped:<Fingerprint>" im Manifest und
+    # bleiben aktuell, bis sich ihr Fingerprint ändert (z. B. neues Modell)
+    stale = [
+        name for name in names
+        if force
+        or not (manifest.get(name) == SKIPPED + fingerprints[name]
+                or (manifest.get(name) == fingerprints[name] and (out_dir / name).exists()))
+    ]
+
+    if not stale:
+        print(f"Alle {len(names)} Plots aktuell, nichts zu tun "
+              f"({time.perf_counter() - start:.3f} s).")
+        return []
+
+    print(f"{len(stale)} von {len(names)} Plots werden neu erzeugt.")
+    inputs = prepare_inputs(load_data(input_path), load_cube(input_path))
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(stale))
+
+    if workers == 1:
+        results = [_render(name, out_dir, inputs) for name in stale]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(inputs,)
+        ) as pool:
+            results = list(pool.map(_render, stale, [out_dir] * len(stale)))
+
+    written = []
+    for name, seconds in results:
+        if seconds is None:
+            manifest[name] = SKIPPED + fingerprints[name]
+            continue
+        manifest[name] = fingerprints[name]
+        written.append(name)
+        print(f"Plot gespeichert: {name} ({seconds:.2f} s)")
+
+    _save_manifest(out_dir, manifest)
+    print(f"\nEDA abgeschlossen: {len(written)} Plots mit {workers} Prozessen "
+          f"in {time.perf_counter() - start:.2f} s.")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="F3 Explorative Analyse: alle Plots als PNG rendern.")
+    parser.add_argument("--input", type=Path, default=INPUT)
+    parser.add_argument("--out-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Prozesse (Standard: alle Kerne)")
+    parser.add_argument("--force", action="store_true", help="Alle Plots neu erzeugen")
+    parser.add_argument("--only", nargs="*", help="Nur diese Dateinamen rendern")
+    args = parser.parse_args()
+
+    render_all(args.input, args.out_dir, workers=args.workers, force=args.force, only=args.only)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,191 +1,325 @@
-# feature_engineering.py
+"""
+Stufe 3: Feature Engineering auf den finalen F3-Rennresultaten.
 
-import pandas as pd
-import numpy as np
-
-# 1. Daten einlesen
-df = pd.read_csv("f3_2019_2025_races_only_final.csv")
-
-print("Zeilen:", len(df))
-print("Spalten:", df.columns.tolist())
-print(df[["season", "race_id", "session_type", "driver_name", "laps", "time", "time_s", "status"]].head(15))
-
-# 2. Laps bereinigen (Zahl oder NaN)
-df["laps_clean"] = pd.to_numeric(df["laps"], errors="coerce")
-
-# 3. Finisher kennzeichnen
-# Finisher = Status leer und time_s vorhanden und laps_clean > 0
-df["is_finisher"] = (
-    df["status"].isna()
-    & df["time_s"].notna()
-    & df["laps_clean"].notna()
-    & (df["laps_clean"] > 0)
-).astype(int)
-
-print("\nVerteilung is_finisher:")
-print(df["is_finisher"].value_counts(dropna=False))
-
-# 4. Sortierung innerhalb eines Rennens
-# Ziel: Finisher zuerst, danach Nichtfinisher
-# Innerhalb der Finisher: zuerst Fahrer mit mehr Runden, dann nach Zeit
-df = df.sort_values(
-    by=["season", "race_id", "session_type",
-        "is_finisher", "laps_clean", "time_s"],
-    ascending=[True, True, True,
-               False, False, True]
-).reset_index(drop=True)
-
-# 5. Position innerhalb jedes Rennens vergeben
-df["position"] = df.groupby(
-    ["season", "race_id", "session_type"]
-).cumcount() + 1
-
-# 6. Position für Nichtfinisher entfernen
-df.loc[df["is_finisher"] == 0, "position"] = np.nan
-
-print("\nBeispiel mit Position (eine Runde):")
-example_race = df[(df["season"] == df["season"].min()) &
-                  (df["session_type"] == df["session_type"].unique()[0])]
-print(example_race[["season", "race_id", "session_type",
-                    "driver_name", "status", "laps_clean", "time_s", "position"]].head(25))
-
-# 7. Basis Features pro Rennen
-
-# 7.1 Korrekte Rennzeit des Siegers pro Rennen (nur Position == 1)
-winners = (
-    df[df["position"] == 1]
-    .groupby(["season", "race_id", "session_type"])["time_s"]
-    .first()
-    .rename("winner_time_s")
-)
-
-# Zurück in den Haupt-Datensatz mergen
-df = df.merge(
-    winners,
-    on=["season", "race_id", "session_type"],
-    how="left"
-)
-
-
-# 7.2 Beste Rennrunde
-df["best_race_lap_s"] = df.groupby(
-    ["season", "race_id", "session_type"]
-)["best_lap_s"].transform("min")
-
-# 7.3 Maximale Rundenzahl im Rennen
-df["race_max_laps"] = df.groupby(
-    ["season", "race_id", "session_type"]
-)["laps_clean"].transform("max")
-
-# 7.4 Relative Rundenzahl
-df["rel_laps"] = df["laps_clean"] / df["race_max_laps"]
-
-# 8. Performance Features
+Mit --incremental nur die Saisons der von driver_cleaning vorgemerkten
+Rennen neu berechnen (Saison-Aggregate hängen an der ganzen Saison), der
+Rest kommt aus der bestehenden Ausgabe.
 
-# 8.1 Zeitabstand zum Sieger
-df["time_from_winner_s"] = df["time_s"] - df["winner_time_s"]
+Aufruf vom Projektroot:
+    python -m src.f3.feature_engineering
+    python -m src.f3.feature_engineering --incremental
+"""
 
-# Fahrer ohne Zieleinlauf (is_finisher == 0) sollen keinen Zeitabstand bekommen
-df.loc[df["is_finisher"] == 0, "time_from_winner_s"] = np.nan
+import argparse
+import time
+from pathlib import Path
 
+import numpy as np
+import pandas as pd
 
-# 8.2 Abstand zur besten Rennrunde
-df["best_lap_from_best_s"] = df["best_lap_s"] - df["best_race_lap_s"]
-
-# 8.3 Durchschnittliche Rundenzeit
-df["avg_lap_time_s"] = df["time_s"] / df["laps_clean"]
-df.loc[df["laps_clean"].isna() | (df["laps_clean"] <= 0), "avg_lap_time_s"] = np.nan
-
-# 9. Status Features
+from src.data.contracts import ContractError, enforce, report_overhead
+from src.data.fingerprints import consume_changed_races, load_changed_races, read_output, update_races
+from src.data.lap_classification import classify_results
 
-df["finished"] = df["is_finisher"]
-df["is_dnf"] = df["status"].eq("DNF").astype(int)
-df["is_dns"] = df["status"].eq("DNS").astype(int)
-df["is_dsq"] = df["status"].eq("DSQ").astype(int)
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_DIR = BASE_DIR / "data" / "f3"
+INPUT = DATA_DIR / "f3_2019_2025_races_only_final.csv"
+OUTPUT = DATA_DIR / "f3_2019_2025_races_features.csv"
+STAGE = "feature_engineering"
 
-# 10. Position als Zahl (für Aggregationen)
-df["position_clean"] = pd.to_numeric(df["position"], errors="coerce")
+# Zahlen, die auf 3 Nachkommastellen gerundet werden
+ROUND_COLS = [
+    "time_s", "best_lap_s", "gap_s",
+    "winner_time_s", "best_race_lap_s", "rel_laps",
+    "avg_lap_time_s", "time_from_winner_s", "team_avg_pos_season",
+    "best_lap_from_best_s", "lap_vs_race_avg", "driver_top10_rate", "race_avg_lap_time_s",
+    "team_speed", "driver_speed", "driver_vs_team",
+    "race_avg_lap_time_clean_s", "lap_vs_race_avg_clean",
+]
 
-# 11. Team und Fahrer Aggregationen pro Saison
-
-# 11.1 Teamdurchschnittsplatzierung pro Saison
-df["team_avg_pos_season"] = df.groupby(
-    ["season", "team_name"]
-)["position_clean"].transform("mean")
-
-# 11.2 Team Speed Index
-df["team_speed"] = df.groupby(
-    ["season", "team_name"]
-)["avg_lap_time_s"].transform("mean")
+# Spalten am Ende der Ausgabe (Saison-Aggregate zwischen den Rennspalten)
+TAIL_COLS = [
+    "team_avg_pos_season", "team_speed", "driver_speed", "driver_top10_rate",
+    "race_avg_lap_time_s", "driver_vs_team", "lap_vs_race_avg",
+    "race_avg_lap_time_clean_s", "lap_vs_race_avg_clean", "session_round",
+]
 
-# 11.3 Driver Speed Index
-df["driver_speed"] = df.groupby(
-    ["season", "driver_name"]
-)["avg_lap_time_s"].transform("mean")
 
-# 11.4 Top 10 Rate pro Fahrer
 def top10_rate(series):
     return (series <= 10).mean()
 
-df["driver_top10_rate"] = df.groupby(
-    ["season", "driver_name"]
-)["position_clean"].transform(top10_rate)
 
-# 11.5 Durchschnittliche Rundenzeit im Rennen
-df["race_avg_lap_time_s"] = df.groupby(
-    ["season", "race_id", "session_type"]
-)["avg_lap_time_s"].transform("mean")
+def race_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Schritte 2 bis 12 ohne die Saison-Aggregate: alles hängt nur von den
+    Zeilen desselben Rennens ab und läuft daher auch pro (season, race_id)
+    Partition (src/f3/chunked_pipeline.py).
+    """
+    df = df.copy()
 
-# 11.6 Fahrer vs Team Pace
-df["driver_vs_team"] = df["avg_lap_time_s"] - df["team_speed"]
+    # 2. Laps bereinigen (Zahl oder NaN)
+    df["laps_clean"] = pd.to_numeric(df["laps"], errors="coerce")
+
+    # 3. Finisher kennzeichnen
+    # Finisher = Status leer und time_s vorhanden und laps_clean > 0
+    df["is_finisher"] = (
+        df["status"].isna()
+        & df["time_s"].notna()
+        & df["laps_clean"].notna()
+        & (df["laps_clean"] > 0)
+    ).astype(int)
 
-# 11.7 Fahrer vs Rennschnitt
-df["lap_vs_race_avg"] = df["avg_lap_time_s"] - df["race_avg_lap_time_s"]
-
-# 12. Session Round als Zahl (1 bis 10)
-df["session_round"] = (
-    df["session_type"]
-    .astype(str)
-    .str.extract(r"ROUND(\d+)")
-    .astype(float)
-    .astype("Int64")
-)
-
-print("\nSession Rounds:", df["session_round"].unique())
-
-# 13. Aufräumen von Hilfsspalten
-df = df.drop(columns=["is_finisher"], errors="ignore")
-
-# Zahlen sauber runden
-round_cols = [
-    "time_s", "best_lap_s", "gap_s",
-    "winner_time_s", "best_race_lap_s", "rel_laps",
-    "avg_lap_time_s", "time_from_winner_s", "team_avg_pos_season",
-    "best_lap_from_best_s", "lap_vs_race_avg", "driver_top10_rate", "race_avg_lap_time_s"
-    "team_speed", "driver_speed", "driver_vs_team"
-]
+    # 4. Sortierung innerhalb eines Rennens
+    # Ziel: Finisher zuerst, danach Nichtfinisher
+    # Innerhalb der Finisher: zuerst Fahrer mit mehr Runden, dann nach Zeit
+    df = df.sort_values(
+        by=["season", "race_id", "session_type",
+            "is_finisher", "laps_clean", "time_s"],
+        ascending=[True, True, True,
+                   False, False, True]
+    ).reset_index(drop=True)
+
+    # 5. Position innerhalb jedes Rennens vergeben
+    df["position"] = df.groupby(
+        ["season", "race_id", "session_type"]
+    ).cumcount() + 1
+
+    # 6. Position für Nichtfinisher entfernen
+    df.loc[df["is_finisher"] == 0, "position"] = np.nan
+
+    # 7. Basis Features pro Rennen
+
+    # 7.1 Korrekte Rennzeit des Siegers pro Rennen (nur Position == 1)
+    winners = (
+        df[df["position"] == 1]
+        .groupby(["season", "race_id", "session_type"])["time_s"]
+        .first()
+        .rename("winner_time_s")
+    )
 
-for col in round_cols:
-    if col in df.columns:
-        df[col] = df[col].round(3)    # auf 3 Nachkommastellen runden
+    # Zurück in den Haupt-Datensatz mergen
+    df = df.merge(
+        winners,
+        on=["season", "race_id", "session_type"],
+        how="left"
+    )
 
-# 14. Ergebnis speichern
-df.to_csv("f3_2019_2025_races_features.csv", index=False)
 
+    # 7.2 Beste Rennrunde
+    df["best_race_lap_s"] = df.groupby(
+        ["season", "race_id", "session_type"]
+    )["best_lap_s"].transform("min")
 
+    # 7.3 Maximale Rundenzahl im Rennen
+    df["race_max_laps"] = df.groupby(
+        ["season", "race_id", "session_type"]
+    )["laps_clean"].transform("max")
+
+    # 7.4 Relative Rundenzahl
+    df["rel_laps"] = df["laps_clean"] / df["race_max_laps"]
+
+    # 8. Performance Features
+
+    # 8.1 Zeitabstand zum Sieger
+    df["time_from_winner_s"] = df["time_s"] - df["winner_time_s"]
+
+    # Fahrer ohne Zieleinlauf (is_finisher == 0) sollen keinen Zeitabstand bekommen
+    df.loc[df["is_finisher"] == 0, "time_from_winner_s"] = np.nan
+
+
+    # 8.2 Abstand zur besten Rennrunde
+    df["best_lap_from_best_s"] = df["best_lap_s"] - df["best_race_lap_s"]
+
+    # 8.3 Durchschnittliche Rundenzeit
+    df["avg_lap_time_s"] = df["time_s"] / df["laps_clean"]
+    df.loc[df["laps_clean"].isna() | (df["laps_clean"] <= 0), "avg_lap_time_s"] = np.nan
+
+    # 9. Status Features
+
+    df["finished"] = df["is_finisher"]
+    df["is_dnf"] = df["status"].eq("DNF").astype(int)
+    df["is_dns"] = df["status"].eq("DNS").astype(int)
+    df["is_dsq"] = df["status"].eq("DSQ").astype(int)
+
+    # 10. Position als Zahl (für Aggregationen)
+    df["position_clean"] = pd.to_numeric(df["position"], errors="coerce")
+
+    # 11.5 Durchschnittliche Rundenzeit im Rennen
+    df["race_avg_lap_time_s"] = df.groupby(
+        ["season", "race_id", "session_type"]
+    )["avg_lap_time_s"].transform("mean")
+
+    # 11.7 Fahrer vs Rennschnitt
+    df["lap_vs_race_avg"] = df["avg_lap_time_s"] - df["race_avg_lap_time_s"]
+
+    # 11.8 Ausreisser-Resultate (robust pro Rennen), Rennschnitt zusätzlich ohne Ausreisser
+    df = classify_results(df)
+
+    # 12. Session Round als Zahl (1 bis 10)
+    df["session_round"] = (
+        df["session_type"]
+        .astype(str)
+        .str.extract(r"ROUND(\d+)")
+        .astype(float)
+        .astype("Int64")
+    )
+
+    # 13. Aufräumen von Hilfsspalten
+    return df.drop(columns=["is_finisher"], errors="ignore")
+
+
+def season_features(df: pd.DataFrame) -> pd.DataFrame:
+    """11. Team und Fahrer Aggregationen pro Saison (braucht die ganze Saison)."""
+    df = df.copy()
+
+    # 11.1 Teamdurchschnittsplatzierung pro Saison
+    df["team_avg_pos_season"] = df.groupby(
+        ["season", "team_name"]
+    )["position_clean"].transform("mean")
+
+    # 11.2 Team Speed Index
+    df["team_speed"] = df.groupby(
+        ["season", "team_name"]
+    )["avg_lap_time_s"].transform("mean")
+
+    # 11.3 Driver Speed Index
+    df["driver_speed"] = df.groupby(
+        ["season", "driver_name"]
+    )["avg_lap_time_s"].transform("mean")
 
+    # 11.4 Top 10 Rate pro Fahrer
+    df["driver_top10_rate"] = df.groupby(
+        ["season", "driver_name"]
+    )["position_clean"].transform(top10_rate)
+
+    # 11.6 Fahrer vs Team Pace
+    df["driver_vs_team"] = df["avg_lap_time_s"] - df["team_speed"]
+    return df
+
+
+# =========================================================
+# Saison-Aggregate aus Teilsummen (für den Chunk-Modus)
+# =========================================================
+
+TEAM_KEY = ["season", "team_name"]
+DRIVER_KEY = ["season", "driver_name"]
 
-print("\nFeature Engineering abgeschlossen.")
-print("Gespeichert als: f3_2019_2025_races_features.csv")
-print("Beispiel mit Features:")
-print(df[[
-    "season", "race_id", "session_type", "driver_name",
-    "position", "finished",
-    "time_s", "winner_time_s", "time_from_winner_s",
-    "best_lap_s", "best_race_lap_s", "best_lap_from_best_s",
-    "laps_clean", "race_max_laps", "rel_laps",
-    "avg_lap_time_s",
-    "team_avg_pos_season", "driver_speed", "team_speed",
-    "driver_top10_rate", "driver_vs_team", "lap_vs_race_avg",
-    "session_round"
-]].head(20))
+
+def season_partials(df: pd.DataFrame):
+    """
+    Summen und Anzahlen pro (season, team_name) und (season, driver_name)
+    für einen Teil der Saison. Teile werden mit merge_partials addiert;
+    Mittelwerte entstehen erst am Ende (Summe / Anzahl).
+    """
+    pos = df["position_clean"]
+    lap = df["avg_lap_time_s"]
+    parts = df.assign(
+        pos_sum=pos, pos_n=pos.notna().astype(int),
+        lap_sum=lap, lap_n=lap.notna().astype(int),
+        top10_n=(pos <= 10).astype(int), rows=1,
+    )
+    team = parts.groupby(TEAM_KEY)[["pos_sum", "pos_n", "lap_sum", "lap_n"]].sum()
+    driver = parts.groupby(DRIVER_KEY)[["lap_sum", "lap_n", "top10_n", "rows"]].sum()
+    return team, driver
+
+
+def merge_partials(partials: list) -> pd.DataFrame:
+    """Teilsummen mehrerer Partitionen zusammenfassen (gleicher Schlüssel -> addieren)."""
+    merged = pd.concat(partials)
+    return merged.groupby(level=list(range(merged.index.nlevels))).sum()
+
+
+def apply_season_partials(df: pd.DataFrame, team: pd.DataFrame, driver: pd.DataFrame) -> pd.DataFrame:
+    """Wie season_features, aber aus den zusammengeführten Teilsummen."""
+    team_means = pd.DataFrame({
+        # ohne Werte (n == 0) NaN, wie transform("mean")
+        "team_avg_pos_season": team["pos_sum"] / team["pos_n"].where(team["pos_n"] > 0),
+        "team_speed": team["lap_sum"] / team["lap_n"].where(team["lap_n"] > 0),
+    })
+    driver_means = pd.DataFrame({
+        "driver_speed": driver["lap_sum"] / driver["lap_n"].where(driver["lap_n"] > 0),
+        "driver_top10_rate": driver["top10_n"] / driver["rows"],
+    })
+    out = df.merge(team_means, left_on=TEAM_KEY, right_index=True, how="left")
+    out = out.merge(driver_means, left_on=DRIVER_KEY, right_index=True, how="left")
+    out["driver_vs_team"] = out["avg_lap_time_s"] - out["team_speed"]
+    return out
+
+
+def finalize_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Spaltenreihenfolge wie in der Ausgabedatei, Zahlen runden."""
+    tail = [c for c in TAIL_COLS if c in df.columns]
+    df = df[[c for c in df.columns if c not in tail] + tail]
+
+    # Zahlen sauber runden (fehlende Spalte = Tippfehler in ROUND_COLS, nicht still ignorieren)
+    missing = [c for c in ROUND_COLS if c not in df.columns]
+    if missing:
+        raise ContractError(f"ROUND_COLS enthält unbekannte Spalten: {missing}")
+    df[ROUND_COLS] = df[ROUND_COLS].round(3)
+    return df
+
+
+def build_features(df: pd.DataFrame) -> pd.DataFrame:
+    df = race_features(df)
+
+    print("\nVerteilung is_finisher:")
+    print(df["finished"].rename("is_finisher").value_counts(dropna=False))
+
+    print("\nBeispiel mit Position (eine Runde):")
+    example_race = df[(df["season"] == df["season"].min()) &
+                      (df["session_type"] == df["session_type"].unique()[0])]
+    print(example_race[["season", "race_id", "session_type",
+                        "driver_name", "status", "laps_clean", "time_s", "position"]].head(25))
+
+    df = season_features(df)
+    print("\nSession Rounds:", df["session_round"].unique())
+    return finalize_features(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Features für die finalen F3-Rennresultate.")
+    parser.add_argument("--incremental", action="store_true", help="nur Saisons geänderter Rennen neu berechnen")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    # 1. Daten einlesen
+    # Eingabe wurde als Ausgabe von race_only_bereinigung bereits geprüft
+    df = pd.read_csv(INPUT)
+
+    print("Zeilen:", len(df))
+    print("Spalten:", df.columns.tolist())
+    print(df[["season", "race_id", "session_type", "driver_name", "laps", "time", "time_s", "status"]].head(15))
+
+    races = load_changed_races(STAGE) if args.incremental and OUTPUT.exists() else None
+    if races is None:
+        df = build_features(df)
+    else:
+        print(f"\n{len(races)} geänderte Rennen, deren Saisons neu berechnen")
+        df = update_races(df, read_output(OUTPUT), races, build_features, by="season")
+
+    # 14. Ergebnis speichern (Positionen, Runden und Schlüssel vorher prüfen)
+    df, out_report = enforce(df, "f3_races_features")
+    df.to_csv(OUTPUT, index=False)
+    consume_changed_races(STAGE)
+
+    print("\nFeature Engineering abgeschlossen.")
+    print(f"Gespeichert als: {OUTPUT.name}")
+    print("Beispiel mit Features:")
+    print(df[[
+        "season", "race_id", "session_type", "driver_name",
+        "position", "finished",
+        "time_s", "winner_time_s", "time_from_winner_s",
+        "best_lap_s", "best_race_lap_s", "best_lap_from_best_s",
+        "laps_clean", "race_max_laps", "rel_laps",
+        "avg_lap_time_s",
+        "team_avg_pos_season", "driver_speed", "team_speed",
+        "driver_top10_rate", "driver_vs_team", "lap_vs_race_avg",
+        "session_round"
+    ]].head(20))
+    report_overhead([out_report], time.perf_counter() - start, "feature_engineering")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Stufe 1b: Zeitstrings (time, best, gap) in Sekunden umrechnen.
+
+Erzeugt f3_2019_2025_with_times.csv aus der Ausgabe von driver_cleaning
+(gleiche Zeilen, zusätzlich time_s, best_lap_s, gap_s). Nicht-numerische
+Einträge wie "-", "DNF" oder "1 LAP" werden NaN.
+
+Mit --incremental nur die von driver_cleaning vorgemerkten Rennen neu
+umrechnen, der Rest kommt aus der bestehenden Ausgabe.
+
+Aufruf vom Projektroot:
+    python -m src.f3.parse_times
+    python -m src.f3.parse_times --incremental
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.contracts import enforce, report_overhead
+from src.data.fingerprints import consume_changed_races, load_changed_races, read_output, update_races
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_DIR = BASE_DIR / "data" / "f3"
+INPUT = DATA_DIR / "f3_2019_2025_with_drivers_and_status.csv"
+OUTPUT = DATA_DIR / "f3_2019_2025_with_times.csv"
+STAGE = "parse_times"
+
+
+def to_seconds(values: pd.Series) -> pd.Series:
+    """'1:23.456' / '1:02:03.4' / '83.4' -> Sekunden (vektorisiert, sonst NaN)."""
+    text = values.astype(str).str.strip()
+    parts = text.str.split(":", expand=True).apply(pd.to_numeric, errors="coerce")
+    n_parts = text.str.count(":") + 1
+    result = pd.Series(np.nan, index=values.index)
+    for n in range(1, parts.shape[1] + 1):
+        total = sum(parts[i] * 60 ** (n - 1 - i) for i in range(n))
+        result = result.mask(n_parts == n, total)
+    return result
+
+
+def add_times(df: pd.DataFrame) -> pd.DataFrame:
+    """Zeilenweise, daher auch für einzelne Chunks geeignet."""
+    return df.assign(
+        time_s=to_seconds(df["time"]),
+        best_lap_s=to_seconds(df["best"]),
+        gap_s=pd.to_numeric(df["gap"], errors="coerce"),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zeitstrings der F3-Daten in Sekunden umrechnen.")
+    parser.add_argument("--incremental", action="store_true", help="nur geänderte Rennen neu umrechnen")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    # Eingabe wurde als Ausgabe von driver_cleaning bereits geprüft
+    df = pd.read_csv(INPUT)
+    races = load_changed_races(STAGE) if args.incremental and OUTPUT.exists() else None
+    if races is None:
+        df = add_times(df)
+    else:
+        print(f"{len(races)} geänderte Rennen neu umrechnen")
+        df = update_races(df, read_output(OUTPUT), races, add_times)
+
+    df, out_report = enforce(df, "f3_with_times")
+    df.to_csv(OUTPUT, index=False)
+    consume_changed_races(STAGE)
+    print(f"{len(df)} Zeilen mit Zeiten gespeichert als {OUTPUT.name}")
+    report_overhead([out_report], time.perf_counter() - start, "parse_times")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,75 @@
+"""
+Stufe 2b: aus den Daten mit Zeiten nur die finalen Rennresultate
+(ROUND1Summary, ROUND2Summary, ... ROUND10Summary) behalten.
+
+Mit --incremental nur die von driver_cleaning vorgemerkten Rennen neu
+filtern, der Rest kommt aus der bestehenden Ausgabe.
+
+Aufruf vom Projektroot:
+    python -m src.f3.race_only_bereinigung
+    python -m src.f3.race_only_bereinigung --incremental
+"""
+
+import argparse
+import time
+from pathlib import Path
+
 import pandas as pd
 
-# Basisdaten mit Zeiten und Fahrerinfos
-df = pd.read_csv("f3_2019_2025_with_times.csv")
+from src.data.contracts import enforce, report_overhead
+from src.data.fingerprints import consume_changed_races, load_changed_races, read_output, update_races
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_DIR = BASE_DIR / "data" / "f3"
+INPUT = DATA_DIR / "f3_2019_2025_with_times.csv"
+OUTPUT = DATA_DIR / "f3_2019_2025_races_only_final.csv"
+STAGE = "race_only_bereinigung"
+
+
+def final_races(df: pd.DataFrame) -> pd.DataFrame:
+    """Nur finale Rennresultate behalten."""
+    mask_round_summary = df["session_type"].astype(str).str.match(r"^ROUND\d+Summary$", na=False)
+    return df[mask_round_summary].copy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nur finale F3-Rennresultate behalten.")
+    parser.add_argument("--incremental", action="store_true", help="nur geänderte Rennen neu filtern")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    # Basisdaten mit Zeiten und Fahrerinfos
+    df = pd.read_csv(INPUT)
+    df, in_report = enforce(df, "f3_with_times")
+
+    print("Gesamtzeilen in with_times:", len(df))
+    print("Session Types (Top 20):")
+    print(df["session_type"].value_counts().head(20))
+
+    races = load_changed_races(STAGE) if args.incremental and OUTPUT.exists() else None
+    if races is None:
+        df_races = final_races(df)
+    else:
+        print(f"\n{len(races)} geänderte Rennen neu filtern")
+        df_races = update_races(df, read_output(OUTPUT), races, final_races)
 
-print("Gesamtzeilen in with_times:", len(df))
-print("Session Types (Top 20):")
-print(df["session_type"].value_counts().head(20))
+    print("\nZeilen nach Filter auf ROUNDxSummary:", len(df_races))
+    print("Verteilung session_type:")
+    print(df_races["session_type"].value_counts())
 
-# Nur finale Rennresultate behalten
-# ROUND1Summary, ROUND2Summary, ... ROUND10Summary
-mask_round_summary = df["session_type"].astype(str).str.match(r"^ROUND\d+Summary$", na=False)
-df_races = df[mask_round_summary].copy()
+    # Kurze Stichprobe
+    print("\nBeispielzeilen:")
+    print(df_races[["season", "race_id", "session_type", "driver_name", "laps", "time", "status"]].head(15))
 
-print("\nZeilen nach Filter auf ROUNDxSummary:", len(df_races))
-print("Verteilung session_type:")
-print(df_races["session_type"].value_counts())
+    # Regex-Ergebnis, Schlüssel und Zeiten pro Rennen prüfen
+    df_races, out_report = enforce(df_races, "f3_races_only_final")
+    df_races.to_csv(OUTPUT, index=False)
+    consume_changed_races(STAGE)
+    print(f"\nGespeichert als {OUTPUT.name}")
+    report_overhead([in_report, out_report], time.perf_counter() - start, "race_only_bereinigung")
 
-# Kurze Stichprobe
-print("\nBeispielzeilen:")
-print(df_races[["season", "race_id", "session_type", "driver_name", "laps", "time", "status"]].head(15))
 
-# Speichern
-df_races.to_csv("f3_2019_2025_races_only_final.csv", index=False)
-print("\nGespeichert als f3_2019_2025_races_only_final.csv")
+if __name__ == "__main__":
+    main()
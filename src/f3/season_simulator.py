@@ -0,0 +1,199 @@
+"""
+Monte-Carlo-Simulation der Meisterschaft (Frage aus "Fragen": was passiert
+nach Runde 1 mit dem Stand?).
+
+Eingabe pro Fahrer: Verteilung der Zielposition (falls im Ziel),
+DNF-Wahrscheinlichkeit und aktueller Punktestand. Die restlichen Rennen
+einer Saison werden 100k+ mal simuliert, das Punkteschema angewendet und
+Titel- bzw. Top-N-Wahrscheinlichkeiten ausgegeben.
+
+- Alle Simulationen eines Blocks laufen als NumPy-Arrays (keine Schleife
+  pro Simulation, nur über die Rennen)
+- Blöcke werden auf einen Prozess-Pool verteilt; jeder Block hat einen
+  eigenen RNG-Stream aus SeedSequence.spawn, dadurch ist das Ergebnis
+  unabhängig von der Anzahl Worker reproduzierbar
+
+Aufruf vom Projektroot:
+    python -m src.f3.season_simulator --season 2025 --after-round 1 --sims 200000
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.standings import RACE_TYPES, compute_standings, f3_results, points_table, standings_after
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+INPUT = BASE_DIR / "data" / "f3" / "f3_2019_2025_races_features.csv"
+
+BLOCK_SIZE = 10_000
+
+
+def race_points(season: int, race_types, n_drivers: int) -> np.ndarray:
+    """Punktetabelle pro Restrennen (Rennen × Zielposition) aus dem F3-Schema."""
+    return np.stack([points_table("f3", season, t, n_drivers) for t in race_types])
+
+
+# =========================================================
+# 1. Vektorisierte Simulation eines Blocks
+# =========================================================
+
+def simulate_block(pos_probs, dnf_prob, current_points, race_tables, n_sims, seed_seq):
+    """
+    Simuliert n_sims Saisonenden auf einmal.
+    Gibt die Endplatzierung in der Meisterschaft (n_sims × n_drivers, 0 = Titel)
+    zurück.
+    """
+    rng = np.random.default_rng(seed_seq)
+    n_drivers, n_positions = pos_probs.shape
+    cdf = np.cumsum(pos_probs, axis=1).astype(np.float32)
+    cdf[:, -1] = 1.0
+
+    points = np.broadcast_to(current_points.astype(np.float32), (n_sims, n_drivers)).copy()
+    wins = np.zeros((n_sims, n_drivers), dtype=np.int16)
+    rows = np.arange(n_sims)[:, None]
+
+    for table in race_tables:
+        # Latente Position aus der Verteilung jedes Fahrers (inverse CDF),
+        # Zufallsrauschen bricht Gleichstände, DNF landet hinten
+        u = rng.random((n_sims, n_drivers), dtype=np.float32)
+        latent = (u[:, :, None] > cdf[None, :, :]).sum(axis=2, dtype=np.float32)
+        latent += rng.random((n_sims, n_drivers), dtype=np.float32)
+        dnf = rng.random((n_sims, n_drivers)) < dnf_prob[None, :]
+        latent[dnf] = np.inf
+
+        order = np.argsort(latent, axis=1)
+        finish = np.empty_like(order)
+        finish[rows, order] = np.arange(n_drivers)[None, :]
+
+        points += np.where(dnf, 0.0, table[finish])
+        wins += (finish == 0) & ~dnf
+
+    # Gleichstand: mehr Siege vorne, sonst Zufall
+    key = points * 1000.0 + wins + rng.random((n_sims, n_drivers)) * 0.5
+    order = np.argsort(-key, axis=1)
+    standing = np.empty_like(order)
+    standing[rows, order] = np.arange(n_drivers)[None, :]
+    return standing
+
+
+def _block_counts(args):
+    pos_probs, dnf_prob, current_points, race_tables, n_sims, seed_seq, top_n = args
+    standing = simulate_block(pos_probs, dnf_prob, current_points, race_tables, n_sims, seed_seq)
+    return np.stack([(standing < n).sum(axis=0) for n in top_n])
+
+
+def simulate_season(pos_probs, dnf_prob, current_points, race_tables, n_sims=100_000,
+                    seed=42, workers=None, top_n=(1, 3, 10), block_size=BLOCK_SIZE):
+    """
+    Verteilt n_sims auf Blöcke fester Grösse (je eigener RNG-Stream) und
+    summiert die Top-N-Zählungen. Gibt (Wahrscheinlichkeiten, Simulationen/s) zurück.
+    """
+    n_blocks = int(np.ceil(n_sims / block_size))
+    sizes = [min(block_size, n_sims - i * block_size) for i in range(n_blocks)]
+    seeds = np.random.SeedSequence(seed).spawn(n_blocks)
+    tasks = [
+        (pos_probs, dnf_prob, current_points, race_tables, size, s, tuple(top_n))
+        for size, s in zip(sizes, seeds)
+    ]
+
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        counts = [_block_counts(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = list(pool.map(_block_counts, tasks))
+    elapsed = time.perf_counter() - start
+
+    probs = np.sum(counts, axis=0) / n_sims
+    return probs, n_sims / elapsed
+
+
+# =========================================================
+# 2. Verteilungen aus den F3-Daten
+# =========================================================
+
+def driver_distributions(df, season, after_round, alpha=2.0, dnf_prior=(1.0, 10.0)):
+    """
+    Positionsverteilung und DNF-Wahrscheinlichkeit pro Fahrer der Saison,
+    geschätzt aus allen Rennen bis einschliesslich after_round (plus
+    frühere Saisons), geglättet mit der Gesamtverteilung als Prior.
+    """
+    known = df[(df["season"] < season)
+               | ((df["season"] == season) & (df["session_round"] <= after_round))]
+    drivers = sorted(df.loc[df["season"] == season, "driver_name"].dropna().unique())
+    n_drivers = len(drivers)
+
+    pos = pd.to_numeric(known["position"], errors="coerce")
+    fin = known[pos.notna() & (pos <= n_drivers)].assign(position=lambda x: x["position"].astype(int))
+
+    overall = np.bincount(fin["position"] - 1, minlength=n_drivers)[:n_drivers].astype(float)
+    overall /= overall.sum()
+
+    counts = (
+        fin.groupby(["driver_name", "position"]).size()
+        .unstack(fill_value=0)
+        .reindex(index=drivers, columns=range(1, n_drivers + 1), fill_value=0)
+        .to_numpy(dtype=float)
+    )
+    pos_probs = counts + alpha * overall[None, :]
+    pos_probs /= pos_probs.sum(axis=1, keepdims=True)
+
+    starts = known.groupby("driver_name").size().reindex(drivers, fill_value=0).to_numpy()
+    dnfs = known.groupby("driver_name")["is_dnf"].sum().reindex(drivers, fill_value=0).to_numpy()
+    dnf_prob = (dnfs + dnf_prior[0]) / (starts + dnf_prior[1])
+    return drivers, pos_probs, dnf_prob
+
+
+def current_standings(df, season, after_round):
+    """Punktestand nach after_round aus der gemeinsamen Standings-Engine."""
+    standings = compute_standings(f3_results(df[df["season"] == season]), series="f3")
+    table = standings_after(standings, season, after_round)
+    return table.set_index("driver")["points"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte-Carlo-Simulation der F3-Meisterschaft.")
+    parser.add_argument("--season", type=int, default=2025)
+    parser.add_argument("--after-round", type=int, default=1)
+    parser.add_argument("--sims", type=int, default=100_000)
+    parser.add_argument("--race-type", choices=list(RACE_TYPES), default="feature")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    df = pd.read_csv(INPUT)
+    drivers, pos_probs, dnf_prob = driver_distributions(df, args.season, args.after_round)
+    standings = current_standings(df, args.season, args.after_round)
+    current = standings.reindex(drivers, fill_value=0).to_numpy(dtype=float)
+
+    n_rounds = int(df.loc[df["season"] == args.season, "session_round"].max())
+    race_types = [args.race_type] * (n_rounds - args.after_round)
+
+    tables = race_points(args.season, race_types, len(drivers))
+    probs, rate = simulate_season(pos_probs, dnf_prob, current, tables,
+                                  n_sims=args.sims, seed=args.seed, workers=args.workers)
+
+    result = pd.DataFrame({
+        "driver_name": drivers,
+        "points_now": current,
+        "p_champion": probs[0],
+        "p_top3": probs[1],
+        "p_top10": probs[2],
+    }).sort_values("p_champion", ascending=False)
+
+    print(f"Saison {args.season} nach Runde {args.after_round}: "
+          f"{len(race_types)} Rennen simuliert, {args.sims:,} Simulationen "
+          f"({rate:,.0f} Simulationen/s)")
+    print(result.head(15).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Fenster über die letzten N Rennen pro Fahrer für Sequenzmodelle.
+
+Statt mit einer Python-Schleife über df.groupby("driver_name") jedes Fenster
+einzeln zu bauen, liegen die Rennfeatures einmal fahrersortiert in einem
+Array. Vor jedem Fahrer stehen N leere Zeilen (Maske 0), dadurch ist das
+Fenster eines Rennens immer P[j-N:j] und reicht nie in den vorigen Fahrer:
+
+    Zeile j:   [pad]*N  A1 A2 A3 ... [pad]*N  B1 B2 ...
+    Fenster:   sliding_window_view(P, N) -> (Positionen, N, Features) als View
+
+Offsets (Startzeile pro Fahrer) ergeben sich aus den Fahrerzahlen; Ziel,
+Saison und "gültig" (echtes Rennen statt Padding) liegen im selben Raster.
+
+iter_batches() liefert Batch(windows, mask, targets, valid, rows):
+- ohne Shuffle: aufeinanderfolgende Positionen, alle Arrays sind Views auf
+  das Raster (keine Kopie); Padding-Positionen sind über valid markiert
+- shuffle="season": Saisons in zufälliger Reihenfolge, darin die Rennen
+  gemischt; nur gültige Positionen, per Indexrechnung idx + arange(N)
+  direkt aus dem Raster gesammelt (eigene Kopie pro Batch)
+
+Die Fenster enthalten nur frühere Rennen (das aktuelle ist das Ziel).
+
+Aufruf vom Projektroot:
+    python -m src.f3.sequence_windows --window 5
+    python -m src.f3.sequence_windows --window 5 --benchmark 100
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Basisverzeichnis: .../formula3-ml-pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+INPUT = BASE_DIR / "data" / "f3" / "f3_2019_2025_races_features.csv"
+
+# Rennfeatures im Fenster (nach dem Rennen bekannt), NaN -> 0
+FEATURES = ["position_clean", "finished", "is_dnf", "rel_laps", "lap_vs_race_avg", "best_lap_from_best_s"]
+ORDER = ["season", "session_round", "race_id"]
+
+
+@dataclass
+class Batch:
+    """
+    Ein Batch Fenster. Ohne Shuffle sind alle Arrays Views auf das Raster
+    (nur lesen), mit Shuffle eigene Kopien, die der Aufrufer behalten darf.
+    """
+
+    windows: np.ndarray   # float32 (B, N, F), älteste Runde zuerst
+    mask: np.ndarray      # bool (B, N), echtes früheres Rennen
+    targets: np.ndarray   # float32 (B,)
+    valid: np.ndarray     # bool (B,), Position ist ein Rennen (kein Padding)
+    rows: np.ndarray      # int64 (B,), Zeile in der sortierten Eingabe, -1 = Padding
+
+
+class SequenceLayout:
+    """Fahrersortiertes, gepaddetes Raster mit Fenster-Views."""
+
+    def __init__(self, df: pd.DataFrame, window: int = 5, features=FEATURES, target: str = "top10",
+                 driver: str = "driver_name"):
+        df = df.sort_values([driver] + ORDER, kind="stable").reset_index(drop=True)
+        codes, self.drivers = pd.factorize(df[driver], sort=True)
+        n, n_drivers = len(df), len(self.drivers)
+        self.window = window
+        self.features = list(features)
+        self.frame = df
+
+        counts = np.bincount(codes, minlength=n_drivers)
+        # Offset jedes Fahrers im Raster: N Paddingzeilen vor jedem Fahrer
+        self.offsets = np.cumsum(counts + window) - counts
+        pos = np.arange(n) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(self.offsets, counts)
+        size = int(self.offsets[-1] + counts[-1]) if n_drivers else window
+
+        values = df[self.features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32)
+        self.grid = np.zeros((size, len(self.features)), dtype=np.float32)
+        self.grid[pos] = np.nan_to_num(values, nan=0.0)
+        self.present = np.zeros(size, dtype=bool)
+        self.present[pos] = True
+        self.targets = np.full(size, np.nan, dtype=np.float32)
+        self.targets[pos] = self._target(df, target)
+        self.season = np.full(size, -1, dtype=np.int64)
+        self.season[pos] = df["season"].to_numpy()
+        self.rows = np.full(size, -1, dtype=np.int64)
+        self.rows[pos] = np.arange(n)
+
+        # Fenster von Position j = Zeilen j-N .. j-1 -> View-Index j-N
+        self._windows = sliding_window_view(self.grid, window, axis=0).transpose(0, 2, 1)
+        self._masks = sliding_window_view(self.present, window)
+
+    @staticmethod
+    def _target(df: pd.DataFrame, target: str) -> np.ndarray:
+        if target == "top10":
+            return (pd.to_numeric(df["position_clean"], errors="coerce") <= 10).to_numpy(dtype=np.float32)
+        return pd.to_numeric(df[target], errors="coerce").to_numpy(dtype=np.float32)
+
+    @property
+    def n_positions(self) -> int:
+        """Zielpositionen im Raster (ab Zeile N), inklusive Padding."""
+        return len(self.grid) - self.window
+
+    def view(self, start: int, stop: int) -> Batch:
+        """Positionen N+start .. N+stop-1 als Views (keine Kopie)."""
+        lo, hi = self.window + start, self.window + stop
+        return Batch(
+            windows=self._windows[start:stop],
+            mask=self._masks[start:stop],
+            targets=self.targets[lo:hi],
+            valid=self.present[lo:hi],
+            rows=self.rows[lo:hi],
+        )
+
+    def iter_batches(self, batch_size: int = 256, shuffle: str = None, seed: int = 0):
+        if shuffle is None:
+            for start in range(0, self.n_positions, batch_size):
+                yield self.view(start, min(start + batch_size, self.n_positions))
+            return
+        if shuffle != "season":
+            raise ValueError(f"Unbekanntes Shuffle '{shuffle}' (erlaubt: None, 'season')")
+
+        rng = np.random.default_rng(seed)
+        positions = np.flatnonzero(self.present[self.window:])
+        seasons = self.season[positions + self.window]
+        order = []
+        for s in rng.permutation(np.unique(seasons)):
+            order.append(rng.permutation(positions[seasons == s]))
+        order = np.concatenate(order) if order else positions
+
+        # Fenster direkt aus dem Raster sammeln: Zeilen idx .. idx+N-1,
+        # jeder Batch bekommt eigene Arrays (kein geteilter Puffer)
+        steps = np.arange(self.window)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            rows = idx[:, None] + steps
+            yield Batch(self.grid[rows], self.present[rows], self.targets[idx + self.window],
+                        np.ones(len(idx), dtype=bool), self.rows[idx + self.window])
+
+
+# =========================================================
+# Vergleich: Schleife über groupby
+# =========================================================
+
+def loop_windows(df: pd.DataFrame, window: int = 5, features=FEATURES, driver: str = "driver_name"):
+    """Referenz: ein Fenster pro Rennen über groupby, (windows, masks) in Fahrerreihenfolge."""
+    df = df.sort_values([driver] + ORDER, kind="stable")
+    windows, masks = [], []
+    for _, g in df.groupby(driver, sort=True):
+        arr = np.nan_to_num(g[list(features)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32))
+        for i in range(len(g)):
+            hist = arr[max(0, i - window):i]
+            w = np.zeros((window, len(features)), dtype=np.float32)
+            m = np.zeros(window, dtype=bool)
+            if len(hist):
+                w[window - len(hist):] = hist
+                m[window - len(hist):] = True
+            windows.append(w)
+            masks.append(m)
+    return np.stack(windows), np.stack(masks)
+
+
+def scaled(df: pd.DataFrame, factor: int) -> pd.DataFrame:
+    """factor Kopien der Tabelle mit eigenen Fahrernamen (mehr Fahrer, gleiche Historienlänge)."""
+    if factor <= 1:
+        return df
+    parts = [df.assign(driver_name=df["driver_name"].astype(str) + f"#{k}") for k in range(factor)]
+    return pd.concat(parts, ignore_index=True)
+
+
+def benchmark(df: pd.DataFrame, window: int = 5, factor: int = 100, batch_size: int = 1024):
+    big = scaled(df, factor)
+
+    start = time.perf_counter()
+    layout = SequenceLayout(big, window)
+    build_s = time.perf_counter() - start
+    n_valid = int(layout.present.sum())
+    print(f"{len(big):,} Rennen ({factor}x), {len(layout.drivers):,} Fahrer, Fenster {window}, "
+          f"Raster {layout.grid.nbytes / 2**20:.1f} MB, Aufbau {build_s:.2f} s")
+
+    def consume(batches):
+        start = time.perf_counter()
+        seen = 0
+        for b in batches:
+            # Fenster wirklich lesen (wie ein Modell)
+            b.windows.sum()
+            seen += int(b.valid.sum())
+        return seen, time.perf_counter() - start
+
+    for label, batches in [("Views, sortiert", layout.iter_batches(batch_size)),
+                           ("Saison-Shuffle", layout.iter_batches(batch_size, shuffle="season"))]:
+        seen, seconds = consume(batches)
+        print(f"  {label:<24} {seen:>10,} Fenster in {seconds:6.2f} s -> {seen / seconds:12,.0f} Fenster/s")
+    padding = 1 - n_valid / layout.n_positions
+    print(f"  Padding-Anteil der sortierten Views: {padding:.1%}")
+
+    # Schleife nur auf einem Teil der Fahrer, hochgerechnet
+    subset = big[big["driver_name"].isin(layout.drivers[: max(len(layout.drivers) // factor, 1)])]
+    start = time.perf_counter()
+    loop_w, loop_m = loop_windows(subset, window)
+    loop_s = (time.perf_counter() - start) * len(big) / max(len(subset), 1)
+    print(f"  {'groupby-Schleife (hochger.)':<24} {len(big):>10,} Fenster in {loop_s:6.2f} s -> "
+          f"{len(big) / loop_s:12,.0f} Fenster/s")
+
+    # Gleiche Fenster wie die Schleife (erste Fahrer, sortierte Reihenfolge)
+    got = layout.view(0, layout.n_positions)
+    keep = got.valid[: len(loop_w) + window * len(subset['driver_name'].unique())]
+    same = (np.array_equal(got.windows[: len(keep)][keep], loop_w)
+            and np.array_equal(got.mask[: len(keep)][keep], loop_m))
+    print(f"  identisch mit der Schleife: {same}")
+
+    # Saison-Shuffle: dieselben Fenster wie die Views, jeder Batch eigenständig
+    batches = list(layout.iter_batches(batch_size, shuffle="season"))
+    where = np.full(len(big), -1, dtype=np.int64)
+    where[got.rows[got.valid]] = np.flatnonzero(got.valid)
+    same = all(np.array_equal(b.windows, got.windows[where[b.rows]])
+               and np.array_equal(b.mask, got.mask[where[b.rows]]) for b in batches)
+    print(f"  Shuffle-Batches identisch mit den Views (gesammelt): {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fahrer-Fenster über die letzten N Rennen.")
+    parser.add_argument("--window", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--benchmark", type=int, metavar="FAKTOR", help="Durchsatz auf FAKTOR-facher Datenmenge")
+    args = parser.parse_args()
+
+    df = pd.read_csv(INPUT)
+    if args.benchmark:
+        benchmark(df, args.window, args.benchmark)
+        return
+
+    layout = SequenceLayout(df, args.window)
+    batch = next(layout.iter_batches(args.batch_size, shuffle="season"))
+    print(f"{len(df):,} Rennen, {len(layout.drivers)} Fahrer, Fenster {args.window} x {len(layout.features)} Features")
+    print(f"Erster Batch (Saison-Shuffle): windows {batch.windows.shape}, mask {batch.mask.shape}, "
+          f"Ziel-Rate {np.nanmean(batch.targets):.2f}, mittlere Historie {batch.mask.sum(axis=1).mean():.1f} Rennen")
+
+
+if __name__ == "__main__":
+    main()